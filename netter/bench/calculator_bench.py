@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the calculator entry points, with the stdlib ipaddress module as a baseline and regression gates.
+
+Every benchmark runs over the same seeded workload. The addresses are random and the prefix lengths cover all 33
+values, weighted towards the /16 - /32 subnets seen in practice. Each benchmark is run --repeat times, interleaved with
+the others, and the best time is kept. It is reported in ns per address, with the speedup over its ipaddress baseline
+where one exists.
+
+Usage (from the netter directory):
+    python3 bench/calculator_bench.py [--quick] [--filter TEXT] [-o results.json]
+    python3 bench/calculator_bench.py --compare baseline.json [--threshold 0.25] [--relative]
+
+With --compare, the run is checked against a results file from an earlier run (e.g. on the main branch). The script
+exits with status 1 if any benchmark got slower by more than the threshold, so it can gate CI. It refuses to compare
+against a run over a different workload (sizes, seed), and warns when the Python or NumPy version, --repeat or the
+platform differ. Raw timings are only comparable between runs on the same machine. --relative compares benchmarks by
+their speedup over the ipaddress baseline measured in the same run instead, which cancels out a different CPU speed but
+adds the baseline's own noise. On a busy shared host, back-to-back runs of the same code differ by up to ~25%, hence
+the default threshold.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from os.path  import dirname
+from os.path  import abspath
+from argparse import ArgumentParser
+from time     import perf_counter
+from datetime import datetime
+from datetime import timezone
+from platform import python_version
+from platform import platform
+from json     import dump
+from json     import load
+import ipaddress
+import sys
+
+# Allow running the script directly from the netter directory or from bench/
+sys.path.insert( 0, dirname( dirname( abspath( __file__ ) ) ) )
+
+from v4._ipv4_calculator   import parse_addr_str
+from v4._ipv4_calculator   import netmask_to_cidr
+from v4._ipv4_calculator   import addr_to_str
+from v4._ipv4_calculator   import ipv4_to_int
+from v4._ipv4_calculator   import parse_subnet_str
+from v4._ipv4_calculator   import get_subnet_info_given_mask
+from v4._ipv4_calculator   import get_subnet_info_given_cidr
+from v4._ipv4_calculator   import get_subnet_info_batch
+from v4._ipv4_calculator   import get_subnet_info_rows
+from v4._ipv4_validator    import is_valid_ipv4
+from v4._ipv4_parser       import parse_ipv4_lines
+from v4._ipv4_parser       import format_ipv4_lines
+from v4._ipv4_parser       import format_ipv4_batch
+from v4._ipv4_prefix_table import PREFIX_MASK_STR
+from v4._ipv4_prefix_index import PrefixIndex
+from v4._ipv4_subnet_info  import SubnetInfo
+from v4._ipv4_summarize    import collapse_prefix_arrays
+from v6._ipv6_parser       import parse_ipv6
+from v6._ipv6_parser       import format_ipv6
+from numpy                 import __version__ as numpy_version
+from numpy                 import arange
+from numpy                 import int64
+from numpy                 import uint32
+from numpy.random          import default_rng
+
+#|###################################################################| Global constants |###################################################################|#
+
+RESULTS_FORMAT = 1
+DEFAULT_THRESHOLD = 0.25
+
+# Results of runs that differ in these are not comparable at all ...
+WORKLOAD_META = ( 'format', 'scalar_size', 'batch_size', 'seed' )
+# ... and runs that differ in these are comparable, but their differences may be due to the setup rather than the code
+SETUP_META = ( 'python', 'numpy', 'platform', 'repeat' )
+
+# Relative weight of each prefix length in the workload -> every prefix appears, /16 - /32 dominate
+PREFIX_WEIGHTS = [ 1 ] * 16 + [ 4 ] * 8 + [ 8 ] * 9
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class Workload:
+    """Seeded inputs shared by every benchmark, as NumPy columns and as the equivalent Python strings/integers"""
+
+    def __init__( self, scalar_size: int, batch_size: int, seed: int ):
+        rng = default_rng( seed )
+        weights = [ w / sum( PREFIX_WEIGHTS ) for w in PREFIX_WEIGHTS ]
+        self.ipv4s = rng.integers( 0, 1 << 32, size=batch_size, dtype=uint32 )
+        # The first 33 rows cover every prefix length even in the smallest workloads
+        self.cidrs = rng.choice( 33, size=batch_size, p=weights ).astype( int64 )
+        self.cidrs[ :33 ] = arange( 33 )
+        self.lines = format_ipv4_lines( self.ipv4s )
+        # Scalar benchmarks loop over the first scalar_size rows in Python
+        self.ipv4_ints = self.ipv4s[ :scalar_size ].tolist()
+        self.cidr_ints = self.cidrs[ :scalar_size ].tolist()
+        self.ipv4_strs = format_ipv4_batch( self.ipv4s[ :scalar_size ] )
+        self.octet_lists = [ parse_addr_str( addr ) for addr in self.ipv4_strs ]
+        self.mask_strs = [ PREFIX_MASK_STR[ cidr ] for cidr in self.cidr_ints ]
+        self.cidr_strs = [ '{}/{}'.format( addr, cidr ) for addr, cidr in zip( self.ipv4_strs, self.cidr_ints ) ]
+        self.ipv6_ints = [ int( hi ) << 64 | int( lo ) for hi, lo in rng.integers( 0, 1 << 63, size=( scalar_size, 2 ), dtype=int64 ) ]
+        self.ipv6_strs = [ format_ipv6( ipv6 ) for ipv6 in self.ipv6_ints ]
+        # Routing-table-like prefix index -> short prefixes are rare, lookups use the batch addresses
+        table_size = max( 1000, batch_size // 10 )
+        self.table = ( rng.integers( 0, 1 << 32, size=table_size ), rng.choice( 33, size=table_size, p=weights ) )
+        self.index = PrefixIndex.from_arrays( *self.table )
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _ipaddress_subnet_info( ipv4_str: str, cidr: int ) -> dict:
+    """Baseline -> the same fields as get_subnet_info_given_cidr computed with ipaddress"""
+    net = ipaddress.IPv4Network( ( ipv4_str, cidr ), strict=False )
+    size = net.num_addresses
+    first, last = ( net.network_address, net.broadcast_address ) if cidr >= 31 else ( net.network_address + 1, net.broadcast_address - 1 )
+    return {
+        'ipv4' : ipv4_str,
+        'network_id' : str( net.network_address ),
+        'subnet_mask' : str( net.netmask ),
+        'wildcard_mask' : str( net.hostmask ),
+        'cidr_int' : cidr,
+        'cidr_str' : '/{}'.format( cidr ),
+        'first_host' : str( first ),
+        'last_host' : str( last ),
+        'broadcast' : str( net.broadcast_address ),
+        'num_hosts' : size if cidr >= 31 else size - 2
+    }
+
+def _is_valid_ipaddress( ipv4_str: str ) -> bool:
+    """Baseline -> IPv4 address validation with ipaddress"""
+    try:
+        ipaddress.IPv4Address( ipv4_str )
+        return True
+    except ValueError:
+        return False
+
+def benchmarks( w: Workload ) -> list:
+    """Returns the benchmarks as (name, baseline name or None, number of addresses, function) tuples
+
+    Baselines are benchmarks themselves, named 'ipaddress.*', and do the same work as the benchmark they belong to.
+    """
+    n = len( w.ipv4_strs )
+    size = len( w.ipv4s )
+    return [
+        # Scalar entry points, one call per address
+        ( 'parse_addr_str', 'ipaddress.IPv4Address(str)', n, lambda: [ parse_addr_str( s ) for s in w.ipv4_strs ] ),
+        ( 'ipv4_to_int', 'ipaddress.IPv4Address(str)', n, lambda: [ ipv4_to_int( s ) for s in w.ipv4_strs ] ),
+        ( 'is_valid_ipv4', 'ipaddress.is_valid', n, lambda: [ is_valid_ipv4( s ) for s in w.ipv4_strs ] ),
+        ( 'netmask_to_cidr', 'ipaddress.netmask_prefixlen', n, lambda: [ netmask_to_cidr( m ) for m in w.mask_strs ] ),
+        ( 'addr_to_str', 'ipaddress.str(IPv4Address)', n, lambda: [ addr_to_str( a ) for a in w.octet_lists ] ),
+        ( 'parse_subnet_str', 'ipaddress.IPv4Interface(str)', n, lambda: [ parse_subnet_str( s ) for s in w.cidr_strs ] ),
+        ( 'get_subnet_info_given_mask', 'ipaddress.subnet_info', n, lambda: [ get_subnet_info_given_mask( s, m ) for s, m in zip( w.ipv4_strs, w.mask_strs ) ] ),
+        ( 'get_subnet_info_given_cidr', 'ipaddress.subnet_info', n, lambda: [ get_subnet_info_given_cidr( s, c ) for s, c in zip( w.ipv4_strs, w.cidr_ints ) ] ),
+        ( 'SubnetInfo.from_cidr', 'ipaddress.IPv4Interface(str)', n, lambda: [ SubnetInfo.from_cidr( s, c ) for s, c in zip( w.ipv4_strs, w.cidr_ints ) ] ),
+        ( 'PrefixIndex.lookup', None, n, lambda: [ w.index.lookup( a ) for a in w.ipv4_ints ] ),
+        ( 'parse_ipv6', 'ipaddress.IPv6Address(str)', n, lambda: [ parse_ipv6( s ) for s in w.ipv6_strs ] ),
+        ( 'format_ipv6', 'ipaddress.str(IPv6Address)', n, lambda: [ format_ipv6( a ) for a in w.ipv6_ints ] ),
+        # Batch and index paths, one call per column
+        ( 'get_subnet_info_batch', 'ipaddress.subnet_info', size, lambda: get_subnet_info_batch( w.ipv4s, w.cidrs ) ),
+        ( 'get_subnet_info_rows', 'ipaddress.subnet_info', n, lambda: get_subnet_info_rows( w.ipv4_strs, w.ipv4_ints, w.cidr_ints ) ),
+        ( 'parse_ipv4_lines', 'ipaddress.IPv4Address(str)', size, lambda: parse_ipv4_lines( w.lines ) ),
+        ( 'format_ipv4_lines', 'ipaddress.str(IPv4Address)', size, lambda: format_ipv4_lines( w.ipv4s ) ),
+        ( 'format_ipv4_batch', 'ipaddress.str(IPv4Address)', size, lambda: format_ipv4_batch( w.ipv4s ) ),
+        ( 'PrefixIndex.lookup_batch', None, size, lambda: w.index.lookup_batch( w.ipv4s ) ),
+        ( 'collapse_prefix_arrays', 'ipaddress.collapse_addresses', n, lambda: collapse_prefix_arrays( w.ipv4s[ :n ], w.cidrs[ :n ] ) ),
+        # Baselines
+        ( 'ipaddress.IPv4Address(str)', None, n, lambda: [ int( ipaddress.IPv4Address( s ) ) for s in w.ipv4_strs ] ),
+        ( 'ipaddress.is_valid', None, n, lambda: [ _is_valid_ipaddress( s ) for s in w.ipv4_strs ] ),
+        ( 'ipaddress.netmask_prefixlen', None, n, lambda: [ ipaddress.IPv4Network( '0.0.0.0/' + m ).prefixlen for m in w.mask_strs ] ),
+        ( 'ipaddress.str(IPv4Address)', None, n, lambda: [ str( ipaddress.IPv4Address( a ) ) for a in w.ipv4_ints ] ),
+        ( 'ipaddress.IPv4Interface(str)', None, n, lambda: [ ipaddress.IPv4Interface( s ) for s in w.cidr_strs ] ),
+        ( 'ipaddress.subnet_info', None, n, lambda: [ _ipaddress_subnet_info( s, c ) for s, c in zip( w.ipv4_strs, w.cidr_ints ) ] ),
+        ( 'ipaddress.IPv6Address(str)', None, n, lambda: [ int( ipaddress.IPv6Address( s ) ) for s in w.ipv6_strs ] ),
+        ( 'ipaddress.str(IPv6Address)', None, n, lambda: [ str( ipaddress.IPv6Address( a ) ) for a in w.ipv6_ints ] ),
+        ( 'ipaddress.collapse_addresses', None, n, lambda: list( ipaddress.collapse_addresses(
+            ipaddress.IPv4Network( ( a, c ), strict=False ) for a, c in zip( w.ipv4_ints, w.cidr_ints ) ) ) )
+    ]
+
+def run( w: Workload, repeat: int, name_filter: str = None ) -> dict:
+    """Runs the benchmarks and returns their results keyed by name
+
+    Returns:
+        A dict mapping each benchmark name to its best time in ns per address, its baseline and the speedup over it.
+        example:
+        { 'parse_addr_str' : { 'ns_per_op' : 450.2, 'ops' : 20000, 'baseline' : 'ipaddress.IPv4Address(str)', 'speedup' : 3.1 } }
+    """
+    suite = benchmarks( w )
+    selected = [ b for b in suite if name_filter is None or name_filter in b[0] ]
+    # Baselines of selected benchmarks always run, so speedups can be reported
+    wanted = { b[0] for b in selected } | { b[1] for b in selected if b[1] }
+    suite = [ b for b in suite if b[0] in wanted ]
+    for name, baseline, ops, func in suite: func()
+    # Rounds interleave the benchmarks, so a burst of load on the machine hits one round of each rather than every
+    # round of one benchmark, and the best round of each is kept
+    best = { name : float( 'inf' ) for name, baseline, ops, func in suite }
+    for _ in range( repeat ):
+        for name, baseline, ops, func in suite:
+            start = perf_counter()
+            func()
+            best[ name ] = min( best[ name ], perf_counter() - start )
+    results = { name : { 'ns_per_op' : best[ name ] / ops * 1e9, 'ops' : ops, 'baseline' : baseline } for name, baseline, ops, func in suite }
+    for result in results.values():
+        if result[ 'baseline' ] in results: result[ 'speedup' ] = results[ result[ 'baseline' ] ][ 'ns_per_op' ] / result[ 'ns_per_op' ]
+    return results
+
+def slowdown( result: dict, stored: dict, relative: bool = False ) -> float:
+    """Returns how much slower a benchmark got than in a stored run, e.g. 0.2 for 20% slower and -0.1 for 10% faster
+
+    With relative set, benchmarks that have a speedup over their baseline in both runs are compared by that speedup,
+    i.e. by their time relative to the baseline measured in the same run.
+    """
+    if relative and 'speedup' in result and 'speedup' in stored: return stored[ 'speedup' ] / result[ 'speedup' ] - 1
+    return result[ 'ns_per_op' ] / stored[ 'ns_per_op' ] - 1
+
+def compare( results: dict, stored: dict, threshold: float, relative: bool = False ) -> list:
+    """Compares results against a stored run, returning the names of benchmarks that regressed beyond the threshold
+
+    Args:
+        results:
+            The 'results' dict of the current run.
+        stored:
+            The 'results' dict of the stored run. Benchmarks missing from either run are skipped, and so are the
+            ipaddress baselines, which only change with the Python version.
+        threshold:
+            The allowed slowdown as a fraction, e.g. 0.25 lets a benchmark take up to 25% longer.
+        relative:
+            Compare the time relative to the ipaddress baseline instead of raw ns per address (see slowdown).
+    """
+    return [ name for name, result in results.items()
+             if name in stored and not name.startswith( 'ipaddress.' ) and slowdown( result, stored[ name ], relative ) > threshold ]
+
+def main() -> None:
+    parser = ArgumentParser( description='Benchmark the calculator entry points against the ipaddress module' )
+    parser.add_argument( '--scalar-size', type=int, default=20000, help='number of addresses per scalar benchmark' )
+    parser.add_argument( '--batch-size', type=int, default=1000000, help='number of addresses per batch benchmark' )
+    parser.add_argument( '--repeat', type=int, default=5, help='number of timed runs per benchmark, the best is kept' )
+    parser.add_argument( '--seed', type=int, default=0, help='random seed of the workload' )
+    parser.add_argument( '--quick', action='store_true', help='small workload for a fast smoke run' )
+    parser.add_argument( '--filter', help='only run benchmarks whose name contains this text (and their baselines)' )
+    parser.add_argument( '-o', '--output', help='write the results as JSON to this file' )
+    parser.add_argument( '--compare', help='results file of an earlier run to check for regressions' )
+    parser.add_argument( '--threshold', type=float, default=DEFAULT_THRESHOLD, help='allowed slowdown as a fraction (default: %(default)s)' )
+    parser.add_argument( '--relative', action='store_true', help='compare timings relative to the ipaddress baselines instead of raw timings' )
+    args = parser.parse_args()
+    if args.quick: args.scalar_size, args.batch_size, args.repeat = 2000, 50000, 3
+
+    meta = {
+        'format' : RESULTS_FORMAT,
+        'date' : datetime.now( timezone.utc ).isoformat( timespec='seconds' ),
+        'python' : python_version(),
+        'numpy' : numpy_version,
+        'platform' : platform(),
+        'scalar_size' : args.scalar_size,
+        'batch_size' : args.batch_size,
+        'repeat' : args.repeat,
+        'seed' : args.seed
+    }
+    stored = None
+    if args.compare:
+        # Check the stored run before spending time on this one
+        with open( args.compare ) as f: stored_run = load( f )
+        stored, stored_meta = stored_run[ 'results' ], stored_run.get( 'meta', {} )
+        differences = [ '{} {} vs {}'.format( key, stored_meta.get( key ), meta[ key ] ) for key in WORKLOAD_META if stored_meta.get( key ) != meta[ key ] ]
+        if differences: parser.error( '{} was run over a different workload ({})'.format( args.compare, ', '.join( differences ) ) )
+        for key in SETUP_META:
+            # A different platform is what --relative is for
+            if stored_meta.get( key ) != meta[ key ] and not ( key == 'platform' and args.relative ):
+                print( 'WARNING: {} differs from the stored run ({} vs {}), changes may not be due to the code'.format(
+                    key, stored_meta.get( key ), meta[ key ] ), file=sys.stderr )
+
+    w = Workload( args.scalar_size, args.batch_size, args.seed )
+    results = run( w, args.repeat, args.filter )
+
+    print( '{:<30} {:>12} {:>10} {:>10}'.format( 'benchmark', 'ns/address', 'speedup', 'change' ) )
+    for name, result in results.items():
+        speedup = '{:.1f}x'.format( result[ 'speedup' ] ) if 'speedup' in result else ''
+        change = '{:+.1%}'.format( slowdown( result, stored[ name ], args.relative ) ) if stored and name in stored else ''
+        print( '{:<30} {:>12.1f} {:>10} {:>10}'.format( name, result[ 'ns_per_op' ], speedup, change ) )
+
+    if args.output:
+        with open( args.output, 'w' ) as f: dump( { 'meta' : meta, 'results' : results }, f, indent=2 )
+
+    if stored is not None:
+        regressions = compare( results, stored, args.threshold, args.relative )
+        for name in regressions:
+            print( 'REGRESSION: {} is {:.1%} slower than the stored run (threshold {:.0%})'.format(
+                name, slowdown( results[ name ], stored[ name ], args.relative ), args.threshold ), file=sys.stderr )
+        if regressions: sys.exit( 1 )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark of cold-start latency -> how long a fresh interpreter takes to import the calculator and answer one query.
+
+Every scenario is run --repeat times as a new Python process and timed from spawn to exit, so the numbers include the
+interpreter's own startup (reported separately as 'python'). Each scenario also runs once with -X importtime to check
+which scenarios import NumPy. The scalar scenarios must not, since NumPy alone takes longer to import than the rest
+of a one-shot run (see COLD_SCALAR_ROWS_LIMIT in v4/_ipv4_calculator.py).
+
+Usage (from the netter directory):
+    python3 bench/import_bench.py [--repeat N] [-o results.json]
+    python3 bench/import_bench.py --compare baseline.json [--threshold 0.25]
+
+With --compare, the run is checked against a results file from an earlier run on the same machine. The script exits
+with status 1 if any scenario's best time got slower by more than the threshold, or if a scenario that should not
+import NumPy does.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from os.path    import dirname
+from os.path    import abspath
+from os.path    import join
+from argparse   import ArgumentParser
+from time       import perf_counter
+from datetime   import datetime
+from datetime   import timezone
+from platform   import python_version
+from platform   import platform
+from statistics import median
+from subprocess import run
+from subprocess import DEVNULL
+from subprocess import PIPE
+from json       import dump
+from json       import load
+import sys
+
+#|###################################################################| Global constants |###################################################################|#
+
+RESULTS_FORMAT = 1
+DEFAULT_THRESHOLD = 0.25
+
+# The netter directory -> scenarios run from here so that the v4 package is importable
+NETTER_DIR = dirname( dirname( abspath( __file__ ) ) )
+
+# Scenario name -> ( interpreter arguments, stdin, whether NumPy may be imported )
+SCENARIOS = {
+    'python' : ( [ '-c', 'pass' ], None, False ),
+    'import numpy' : ( [ '-c', 'import numpy' ], None, True ),
+    'import calculator' : ( [ '-c', 'import v4._ipv4_calculator' ], None, False ),
+    'scalar query' : ( [ '-c', 'from v4._ipv4_calculator import get_subnet_info_given_cidr; get_subnet_info_given_cidr( "192.168.10.1", 24 )' ], None, False ),
+    'netter.py one address' : ( [ join( NETTER_DIR, 'netter.py' ) ], b'192.168.10.1/24\n', False ),
+    'batch query' : ( [ '-c', 'from v4._ipv4_calculator import get_subnet_info_batch; get_subnet_info_batch( [ 3232238081 ], 24 )' ], None, True )
+}
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def run_scenario( args: list, stdin: bytes = None, importtime: bool = False ):
+    """Runs one scenario in a fresh interpreter -> returns its wall time in seconds, or its -X importtime report"""
+    argv = [ sys.executable ] + ( [ '-X', 'importtime' ] if importtime else [] ) + args
+    start = perf_counter()
+    process = run( argv, input=stdin, stdout=DEVNULL, stderr=PIPE if importtime else DEVNULL, cwd=NETTER_DIR, check=True )
+    elapsed = perf_counter() - start
+    return process.stderr.decode() if importtime else elapsed
+
+def imports_numpy( args: list, stdin: bytes = None ) -> bool:
+    """Returns whether a scenario imports NumPy"""
+    return any( line.rpartition( '|' )[2].strip() == 'numpy' for line in run_scenario( args, stdin, importtime=True ).splitlines() )
+
+def measure( repeat: int, name_filter: str = None ) -> dict:
+    """Runs the scenarios and returns their results keyed by name
+
+    Returns:
+        A dict mapping each scenario name to its best and median time in ms and whether it imported NumPy.
+        example:
+        { 'import calculator' : { 'min_ms' : 31.2, 'median_ms' : 34.0, 'numpy' : False, 'numpy_allowed' : False } }
+    """
+    suite = { name : scenario for name, scenario in SCENARIOS.items() if name_filter is None or name_filter in name or name == 'python' }
+    results = {}
+    for name, ( args, stdin, numpy_allowed ) in suite.items():
+        results[ name ] = { 'numpy' : imports_numpy( args, stdin ), 'numpy_allowed' : numpy_allowed }
+    # Rounds interleave the scenarios, so a burst of load on the machine hits one round of each rather than every
+    # round of one scenario
+    times = { name : [] for name in suite }
+    for _ in range( repeat ):
+        for name, ( args, stdin, numpy_allowed ) in suite.items(): times[ name ].append( run_scenario( args, stdin ) )
+    for name, result in results.items():
+        result[ 'min_ms' ] = min( times[ name ] ) * 1000
+        result[ 'median_ms' ] = median( times[ name ] ) * 1000
+    return results
+
+def slowdown( result: dict, stored: dict ) -> float:
+    """Returns how much slower a scenario's best time got than in a stored run, e.g. 0.2 for 20% slower"""
+    return result[ 'min_ms' ] / stored[ 'min_ms' ] - 1
+
+def compare( results: dict, stored: dict, threshold: float ) -> list:
+    """Compares results against a stored run, returning the names of scenarios that regressed beyond the threshold
+
+    Args:
+        results:
+            The 'results' dict of the current run. Scenarios that import NumPy when they shouldn't always regressed.
+        stored:
+            The 'results' dict of the stored run. Scenarios missing from it are only checked for NumPy imports.
+        threshold:
+            The allowed slowdown as a fraction, e.g. 0.25 lets a scenario take up to 25% longer.
+    """
+    return [ name for name, result in results.items()
+             if ( result[ 'numpy' ] and not result[ 'numpy_allowed' ] ) or ( name in stored and slowdown( result, stored[ name ] ) > threshold ) ]
+
+def main() -> None:
+    parser = ArgumentParser( description='Benchmark the cold-start latency of the calculator in fresh interpreters' )
+    parser.add_argument( '--repeat', type=int, default=20, help='number of timed runs per scenario, the best and median are reported' )
+    parser.add_argument( '--filter', help='only run scenarios whose name contains this text (and the python baseline)' )
+    parser.add_argument( '-o', '--output', help='write the results as JSON to this file' )
+    parser.add_argument( '--compare', help='results file of an earlier run to check for regressions' )
+    parser.add_argument( '--threshold', type=float, default=DEFAULT_THRESHOLD, help='allowed slowdown as a fraction (default: %(default)s)' )
+    args = parser.parse_args()
+
+    results = measure( args.repeat, args.filter )
+    stored = {}
+    if args.compare:
+        with open( args.compare ) as f: stored = load( f )[ 'results' ]
+
+    baseline = results[ 'python' ][ 'min_ms' ]
+    print( '{:<24} {:>9} {:>9} {:>14} {:>7} {:>9}'.format( 'scenario', 'min ms', 'median ms', 'over python', 'numpy', 'change' ) )
+    for name, result in results.items():
+        change = '{:+.1%}'.format( slowdown( result, stored[ name ] ) ) if name in stored else ''
+        print( '{:<24} {:>9.1f} {:>9.1f} {:>14.1f} {:>7} {:>9}'.format(
+            name, result[ 'min_ms' ], result[ 'median_ms' ], result[ 'min_ms' ] - baseline, 'yes' if result[ 'numpy' ] else 'no', change ) )
+
+    if args.output:
+        meta = {
+            'format' : RESULTS_FORMAT,
+            'date' : datetime.now( timezone.utc ).isoformat( timespec='seconds' ),
+            'python' : python_version(),
+            'platform' : platform(),
+            'repeat' : args.repeat
+        }
+        with open( args.output, 'w' ) as f: dump( { 'meta' : meta, 'results' : results }, f, indent=2 )
+
+    # Without --compare, only the NumPy checks can fail
+    regressions = compare( results, stored, args.threshold )
+    for name in regressions:
+        if results[ name ][ 'numpy' ] and not results[ name ][ 'numpy_allowed' ]:
+            print( 'REGRESSION: {} imports NumPy'.format( name ), file=sys.stderr )
+        else:
+            print( 'REGRESSION: {} is {:.1%} slower than the stored run (threshold {:.0%})'.format(
+                name, slowdown( results[ name ], stored[ name ] ), args.threshold ), file=sys.stderr )
+    if regressions: sys.exit( 1 )
+
+if __name__ == '__main__':
+    main()
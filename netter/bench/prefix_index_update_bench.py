@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark comparing incremental PrefixIndex updates against rebuilding the whole index.
+
+Usage (from the netter directory):
+    python3 bench/prefix_index_update_bench.py [--prefixes N] [--changes N] [--batch N]
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from os.path  import dirname
+from os.path  import abspath
+from argparse import ArgumentParser
+from time     import perf_counter
+import sys
+
+# Allow running the script directly from the netter directory or from bench/
+sys.path.insert( 0, dirname( dirname( abspath( __file__ ) ) ) )
+
+from v4._ipv4_prefix_index import PrefixIndex
+from numpy.random          import default_rng
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def main() -> None:
+    parser = ArgumentParser( description='Compare incremental PrefixIndex updates against a full rebuild' )
+    parser.add_argument( '--prefixes', type=int, default=1000000, help='number of prefixes in the table' )
+    parser.add_argument( '--changes', type=int, default=10000, help='number of add/remove/replace operations' )
+    parser.add_argument( '--batch', type=int, default=100, help='number of operations applied per batch' )
+    parser.add_argument( '--seed', type=int, default=0, help='random seed' )
+    args = parser.parse_args()
+
+    rng = default_rng( args.seed )
+    networks = rng.integers( 0, 2**32, args.prefixes )
+    cidrs = rng.integers( 8, 33, args.prefixes )
+
+    start = perf_counter()
+    index = PrefixIndex.from_arrays( networks, cidrs )
+    rebuild = perf_counter() - start
+    print( 'full rebuild of {} prefixes: {:.3f} s'.format( len( index ), rebuild ) )
+
+    # Half of the changes withdraw/replace existing prefixes, half announce new ones
+    existing = rng.choice( args.prefixes, args.changes, replace=False )
+    new_networks = rng.integers( 0, 2**32, args.changes )
+    new_cidrs = rng.integers( 8, 33, args.changes )
+    start = perf_counter()
+    for first in range( 0, args.changes, args.batch ):
+        with index.batch() as changes:
+            for i in range( first, min( first + args.batch, args.changes ) ):
+                prefix = ( int( networks[ existing[ i ] ] ), int( cidrs[ existing[ i ] ] ) )
+                if i % 4 == 0 and prefix in changes:
+                    changes.remove( prefix )
+                elif i % 4 == 1 and prefix in changes:
+                    changes.replace( prefix, -i )
+                else:
+                    changes.add( ( int( new_networks[ i ] ), int( new_cidrs[ i ] ) ), -i )
+    incremental = perf_counter() - start
+    per_change = incremental / args.changes
+    print( 'incremental: {} changes in batches of {}: {:.3f} s ({:.1f} us/change, {:.0f} changes/s)'.format(
+        args.changes, args.batch, incremental, per_change * 1e6, 1 / per_change ) )
+    print( 'a full rebuild costs as much as {:.0f} incremental changes'.format( rebuild / per_change ) )
+
+    queries = rng.integers( 0, 2**32, 1000000 )
+    start = perf_counter()
+    index.lookup_batch( queries )
+    print( 'batch lookup with {} pending changes: {:.0f} addresses/s'.format(
+        index._snapshot.delta, len( queries ) / ( perf_counter() - start ) ) )
+    index.compact()
+    start = perf_counter()
+    index.lookup_batch( queries )
+    print( 'batch lookup after compaction: {:.0f} addresses/s'.format( len( queries ) / ( perf_counter() - start ) ) )
+
+if __name__ == '__main__':
+    main()
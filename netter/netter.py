@@ -1,31 +1,331 @@
 #!/usr/bin/env python3
+"""
+netter.py validates and calculates detailed IPv4 subnet information for streams of IPv4 addresses.
 
-# netter.py validates and calculates detailed IPv4 subnet information given an arbitrary IPv4 address and subnet mask/CIDR
+Addresses are read from files or stdin, one per line, in any of these forms:
+    192.168.10.1                    (bare address, uses --cidr)
+    192.168.10.1 255.255.255.0      (address and subnet mask)
+    192.168.10.1/24                 (CIDR notation)
+
+Input is processed in fixed-size chunks that are pushed through the vectorized calculator and written out as JSON
+Lines or CSV before the next chunk is read, so memory use is constant regardless of input size. Invalid lines are
+reported on stderr and skipped. Blank lines and lines starting with '#' are ignored. With --workers, chunks are
+parsed and formatted by a pool of processes and written back in input order. With --serve, the calculator runs as a
+local TCP service that batches concurrent requests (see v4/_ipv4_service.py). With --hosts, the host addresses of
+every input subnet are written instead, one per line, optionally shuffled and with exclusions (see v4/_ipv4_hosts.py).
+
+example:
+    ./netter.py addresses.txt --format csv -o subnets.csv
+    cat addresses.txt | ./netter.py > subnets.jsonl
+    ./netter.py huge_export.txt --workers 8 -o subnets.jsonl
+    ./netter.py --serve 4994 &
+    ./netter.py --load-test 4994 --connections 32
+    ./netter.py subnets.txt --hosts --shuffle --exclude 10.0.0.0/24,10.0.5.1 -o targets.txt && nmap -iL targets.txt
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
 # TODO:
-# - Flags for varying output options (e.g. only output first/last host) and a flag to write output directly to a text file (for use with nmap -iL <filename>)
+# - Flags for varying output options (e.g. only output first/last host)
 # - IPv6 functionality
-# - VLSM validator/calculator/planner/optimizer
+# - VLSM validator/optimizer
 #   - Given a valid subnet, display all possible segmentation options
 #   - e.g. user inputs x.x.x.x 255.255.255.0 -> x1 /24, x2 /25, x4 /26, x8 /27, x16 /28, x32 /29, x64 /30, x128 /31, x256 /32
-#   - Read/write VLSM planning info to text file
-#   - Validate VLSM configuration 
-#   - Given a valid VLSM configuration, display ranges of used and unused addresses, % unused address space, how optimal the configuration is, etc.
+#   - Validate VLSM configuration
 #   - Given a valid, non-optimal VLSM configuration, suggest an optimized alternative
 
-from argparse import ArgumentParser
-from argparse import ArgumentTypeError
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator       import parse_subnet_str
+from v4._ipv4_calculator       import get_subnet_info_rows
+from v4._ipv4_calculator       import SUBNET_INFO_FIELDS
+from v4._ipv4_service_defaults import DEFAULT_HOST
+from v4._ipv4_service_defaults import DEFAULT_MAX_BATCH_SIZE
+from v4._ipv4_service_defaults import DEFAULT_MAX_DELAY
+from v4._ipv4_service_defaults import DEFAULT_MAX_PENDING
+from v4._ipv4_service_defaults import DEFAULT_MAX_IN_FLIGHT
+from argparse                  import ArgumentParser
+from argparse                  import ArgumentTypeError
+from contextlib                import contextmanager
+from itertools                 import islice
+from itertools                 import chain
+from csv                       import DictWriter
+from io                        import StringIO
+from json                      import JSONEncoder
+from math                      import isfinite
+import sys
+# The modules that need NumPy, worker processes or asyncio (--workers, --hosts, --serve, --load-test) are imported
+# where they are used, so that a plain run over a handful of addresses starts up without them (see
+# COLD_SCALAR_ROWS_LIMIT in v4/_ipv4_calculator.py)
+
+#|###################################################################| Global constants |###################################################################|#
+
+DEFAULT_CHUNK_SIZE = 65536
+# Rows only hold strings and integers, so skip the encoder's circular reference checks
+_encode_row = JSONEncoder( check_circular=False ).encode
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def read_line_chunks( streams, chunk_size: int = DEFAULT_CHUNK_SIZE ):
+    """Lazily splits input streams into chunks of raw lines
+
+    Args:
+        streams:
+            An iterable of (name, text stream) pairs, read one after the other.
+        chunk_size:
+            The maximum number of lines per chunk.
+
+    Yields:
+        Tuples of (stream name, line number of the chunk's first line, list of lines).
+    """
+    for name, stream in streams:
+        line_no = 1
+        while True:
+            lines = list( islice( stream, chunk_size ) )
+            if not lines: break
+            yield ( name, line_no, lines )
+            line_no += len( lines )
+
+def parse_lines( lines: list, default_cidr: int = 32 ) -> tuple:
+    """Parses a chunk of raw lines, skipping blank lines, comments and invalid lines
+
+    Args:
+        lines:
+            The raw input lines.
+        default_cidr:
+            The CIDR value used for bare addresses.
+
+    Returns:
+        A tuple of (address strings, packed addresses, CIDR values) lists for the valid lines, and a list of
+        (line index within the chunk, error) tuples for the invalid ones.
+    """
+    addr_strs, ipv4s, cidrs, errors = [], [], [], []
+    for i, line in enumerate( lines ):
+        # Skip blank lines and comments
+        stripped = line.strip()
+        if not stripped or stripped[0] == '#': continue
+        try:
+            addr_str, ipv4, cidr = parse_subnet_str( stripped, default_cidr )
+        except ValueError as e:
+            errors.append( ( i, e ) )
+            continue
+        addr_strs.append( addr_str )
+        ipv4s.append( ipv4 )
+        cidrs.append( cidr )
+    return ( ( addr_strs, ipv4s, cidrs ), errors )
+
+def read_chunks( streams, chunk_size: int = DEFAULT_CHUNK_SIZE, default_cidr: int = 32, on_error=None ):
+    """Lazily parses input streams into chunks of valid addresses
+
+    Args:
+        streams:
+            An iterable of (name, text stream) pairs, read one after the other.
+        chunk_size:
+            The maximum number of lines read per chunk.
+        default_cidr:
+            The CIDR value used for bare addresses.
+        on_error:
+            Called as on_error( name, line number, error ) for every invalid line, invalid lines are skipped.
+
+    Yields:
+        Tuples of (address strings, packed addresses, CIDR values) lists, one per non-empty chunk.
+    """
+    for name, first_line_no, lines in read_line_chunks( streams, chunk_size ):
+        chunk, errors = parse_lines( lines, default_cidr )
+        if on_error is not None:
+            for i, error in errors: on_error( name, first_line_no + i, error )
+        if chunk[0]: yield chunk
+
+def render_chunk( name: str, first_line_no: int, lines: list, default_cidr: int = 32, output_format: str = 'jsonl', cold: bool = False ) -> tuple:
+    """Parses, calculates and formats one chunk of raw lines -> the unit of work handed to worker processes
+
+    Args:
+        name:
+            The name of the input the lines came from, used in error messages.
+        first_line_no:
+            The line number of the first line, used in error messages.
+        lines:
+            The raw input lines.
+        default_cidr:
+            The CIDR value used for bare addresses.
+        output_format:
+            Either 'jsonl' or 'csv' (rows only, without a header).
+        cold:
+            Passed on to get_subnet_info_rows -> True for the first chunk of a run, so that a handful of addresses is
+            answered without importing NumPy.
+
+    Returns:
+        A tuple of the formatted output text and a list of error messages for the invalid lines.
+    """
+    chunk, errors = parse_lines( lines, default_cidr )
+    messages = [ '{}:{}: {}'.format( name, first_line_no + i, error ) for i, error in errors ]
+    if not chunk[0]: return ( '', messages )
+    rows = get_subnet_info_rows( *chunk, cold=cold )
+    if output_format == 'csv':
+        buffer = StringIO()
+        DictWriter( buffer, fieldnames=SUBNET_INFO_FIELDS, lineterminator='\n' ).writerows( rows )
+        return ( buffer.getvalue(), messages )
+    return ( ''.join( _encode_row( row ) + '\n' for row in rows ), messages )
+
+def build_parser() -> ArgumentParser:
+    """Builds the command line argument parser"""
+    parser = ArgumentParser( description='Calculates IPv4 subnet information for addresses read from files or stdin.' )
+    parser.add_argument( 'files', nargs='*', default=[ '-' ], help='input files, one address per line (default/-: stdin)' )
+    parser.add_argument( '-f', '--format', choices=( 'jsonl', 'csv' ), default='jsonl', help='output format (default: jsonl)' )
+    parser.add_argument( '-o', '--output', default='-', help='output file (default/-: stdout)' )
+    parser.add_argument( '-c', '--cidr', type=_cidr_arg, default=32, help='CIDR value used for bare addresses (default: 32)' )
+    parser.add_argument( '-w', '--workers', type=_positive_int_arg, default=1, help='worker processes, output stays in input order (default: 1)' )
+    parser.add_argument( '--chunk-size', type=_positive_int_arg, default=DEFAULT_CHUNK_SIZE, help='lines processed per batch (default: {})'.format(DEFAULT_CHUNK_SIZE) )
+    service = parser.add_argument_group( 'service mode', 'answer requests over TCP instead of reading files (see v4/_ipv4_service.py for the protocol)' )
+    modes = service.add_mutually_exclusive_group()
+    modes.add_argument( '--serve', metavar='[HOST:]PORT', type=_endpoint_arg, help='run the calculator as a local TCP service' )
+    modes.add_argument( '--load-test', metavar='[HOST:]PORT', type=_endpoint_arg, help='send load to a running service and report latency/throughput' )
+    service.add_argument( '--max-batch-size', type=_positive_int_arg, default=DEFAULT_MAX_BATCH_SIZE, help='most requests answered per batch (default: {})'.format(DEFAULT_MAX_BATCH_SIZE) )
+    service.add_argument( '--max-delay-ms', type=_non_negative_float_arg, default=DEFAULT_MAX_DELAY * 1000, help='longest a request waits for a batch to fill (default: {:g})'.format(DEFAULT_MAX_DELAY * 1000) )
+    service.add_argument( '--max-pending', type=_positive_int_arg, default=DEFAULT_MAX_PENDING, help='most queued requests before connections are throttled (default: {})'.format(DEFAULT_MAX_PENDING) )
+    service.add_argument( '--max-in-flight', type=_positive_int_arg, default=DEFAULT_MAX_IN_FLIGHT, help='most unanswered requests per connection (default: {})'.format(DEFAULT_MAX_IN_FLIGHT) )
+    service.add_argument( '--requests', type=_positive_int_arg, default=100000, help='load test requests (default: 100000)' )
+    service.add_argument( '--connections', type=_positive_int_arg, default=16, help='load test connections (default: 16)' )
+    service.add_argument( '--pipeline', type=_positive_int_arg, default=64, help='load test unanswered requests per connection (default: 64)' )
+    hosts = parser.add_argument_group( 'host lists', 'write host addresses instead of subnet information (e.g. for nmap -iL)' )
+    hosts.add_argument( '--hosts', action='store_true', help='write every host of the input subnets, one per line' )
+    hosts.add_argument( '--shuffle', action='store_true', help='write the hosts in a random order' )
+    hosts.add_argument( '--seed', type=int, help='seed for --shuffle, the same seed gives the same order' )
+    hosts.add_argument( '--exclude', metavar='SUBNETS', action='append', default=[], help='comma separated addresses/subnets to leave out, may be repeated' )
+    hosts.add_argument( '--exclude-file', metavar='FILE', action='append', default=[], help='file of addresses/subnets to leave out, one per line, may be repeated' )
+    return parser
+
+def main( argv=None ) -> int:
+    """Runs the command line interface
+
+    Args:
+        argv:
+            The command line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        The exit status -> 0 if every line was valid, 1 if any invalid lines or unreadable files were skipped.
+    """
+    args = build_parser().parse_args( argv )
+    if args.serve:
+        from v4._ipv4_service import run_server
+        run_server( *args.serve, max_in_flight=args.max_in_flight, max_batch_size=args.max_batch_size, max_delay=args.max_delay_ms / 1000, max_pending=args.max_pending, default_cidr=args.cidr )
+        return 0
+    if args.load_test:
+        import asyncio
+        from v4._ipv4_service import load_test
+        report = asyncio.run( load_test( *args.load_test, requests=args.requests, connections=args.connections, pipeline=args.pipeline ) )
+        sys.stdout.write( _encode_row( report ) + '\n' )
+        return 1 if report[ 'errors' ] else 0
+    if args.hosts: return _write_host_list( args )
+    errors = 0
+    def on_open_error( name, error ):
+        nonlocal errors
+        errors += 1
+        sys.stderr.write( 'netter: {}: {}\n'.format( name, error.strerror or error ) )
+    out = sys.stdout if args.output == '-' else open( args.output, 'w', newline='' )
+    try:
+        if args.format == 'csv': DictWriter( out, fieldnames=SUBNET_INFO_FIELDS, lineterminator='\n' ).writeheader()
+        chunks = read_line_chunks( _open_inputs( args.files, on_open_error ), args.chunk_size )
+        # Only the first chunk may skip the vectorized pass to avoid importing NumPy, longer runs are better off importing it
+        tasks = ( chunk + ( args.cidr, args.format, i == 0 ) for i, chunk in enumerate( chunks ) )
+        with _chunk_mapper( args.workers ) as map_chunks:
+            for text, messages in map_chunks( render_chunk, tasks ):
+                out.write( text )
+                out.flush()
+                for message in messages: sys.stderr.write( 'netter: {}\n'.format( message ) )
+                errors += len( messages )
+    finally:
+        if out is not sys.stdout: out.close()
+    return 1 if errors else 0
+
+def _write_host_list( args ) -> int:
+    """Helper function that runs --hosts mode -> returns the exit status"""
+    from v4._ipv4_hosts       import subnet_hosts
+    from v4._ipv4_hosts       import write_hosts
+    from v4._ipv4_address_set import AddressSet
+    errors = []
+    on_error = lambda name, line_no, error: errors.append( 'netter: {}:{}: {}'.format( name, line_no, error ) )
+    on_open_error = lambda name, error: errors.append( 'netter: {}: {}'.format( name, error.strerror or error ) )
+    # Hosts and exclusions are collected as address sets, which stay small however many addresses they cover. The
+    # sets of all chunks are merged in one union rather than one union per chunk
+    chunks = read_chunks( _open_inputs( args.files, on_open_error ), args.chunk_size, args.cidr, on_error )
+    hosts = AddressSet().union( *( subnet_hosts( ipv4s, cidrs ) for _, ipv4s, cidrs in chunks ) )
+    # Exclusions cover whole subnets, network IDs and broadcast addresses included
+    exclude_entries = iter( [ entry for value in args.exclude for entry in value.split( ',' ) ] )
+    sources = chain( [ ( '--exclude', exclude_entries ) ], _open_inputs( args.exclude_file, on_open_error ) )
+    chunks = read_chunks( sources, args.chunk_size, 32, on_error )
+    excluded = AddressSet().union( *( AddressSet.from_prefix_arrays( ipv4s, cidrs ) for _, ipv4s, cidrs in chunks ) )
+    for message in errors: sys.stderr.write( message + '\n' )
+    out = sys.stdout.buffer if args.output == '-' else open( args.output, 'wb' )
+    try:
+        write_hosts( hosts, out, excluded, args.shuffle, args.seed, args.chunk_size )
+        out.flush()
+    finally:
+        if out is not sys.stdout.buffer: out.close()
+    return 1 if errors else 0
+
+@contextmanager
+def _chunk_mapper( workers: int ):
+    """Helper function that yields a function lazily mapping fn over argument tuples, yielding results in input order
+
+    The yielded function is called as map_chunks( fn, arg_tuples ). With one worker it runs everything in this
+    process, otherwise on a process pool that is shut down when the with block exits.
+    """
+    if workers == 1:
+        yield lambda fn, arg_tuples: ( fn( *args ) for args in arg_tuples )
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    from v4._ipv4_parallel  import imap_ordered
+    with ProcessPoolExecutor( workers ) as executor:
+        # Workers handle whole chunks, at most two per worker are in flight so memory use stays constant
+        yield lambda fn, arg_tuples: imap_ordered( executor, fn, arg_tuples, window=2 * workers )
+
+def _open_inputs( files, on_error ):
+    """Helper function that lazily opens each input file in turn, '-' is stdin
+
+    Files that can't be opened are skipped after calling on_error( name, OSError ).
+    """
+    for name in files:
+        if name == '-':
+            yield ( '<stdin>', sys.stdin )
+            continue
+        try:
+            stream = open( name, errors='replace' )
+        except OSError as e:
+            on_error( name, e )
+            continue
+        with stream:
+            yield ( name, stream )
+
+#|##########################################################| Argument type validator functions |###########################################################|#
+
+def _is_ascii_decimal( value: str ) -> bool:
+    """Helper function that checks for a non-empty string of the digits 0-9, unlike str.isdigit it rejects e.g. '²' and '２'"""
+    return value.isascii() and value.isdecimal()
 
-# import ipv4_calculator
-# import ipv4_validator
+def _cidr_arg( value: str ) -> int:
+    """argparse type for CIDR values in the range [0,32]"""
+    if not _is_ascii_decimal( value ) or not 0 <= int( value ) <= 32: raise ArgumentTypeError( 'invalid CIDR value: {}'.format(value) )
+    return int( value )
 
-# validate_ipv4( ipv4_string ) <- call using argparse type field
-# validate_netmask( subnetmask_string ) <- call using argparse type field
-# validate CIDR values using argparse range
+def _endpoint_arg( value: str ) -> tuple:
+    """argparse type for [HOST:]PORT service endpoints"""
+    host, _, port = value.rpartition( ':' )
+    if not _is_ascii_decimal( port ) or not 0 < int( port ) < 65536: raise ArgumentTypeError( 'invalid endpoint: {}'.format(value) )
+    return ( host or DEFAULT_HOST, int( port ) )
 
-# subnet_from_mask( ipv4_string, subnetmask_string )
+def _positive_int_arg( value: str ) -> int:
+    """argparse type for positive integers"""
+    if not _is_ascii_decimal( value ) or int( value ) < 1: raise ArgumentTypeError( 'invalid positive integer: {}'.format(value) )
+    return int( value )
 
-# OR
+def _non_negative_float_arg( value: str ) -> float:
+    """argparse type for finite, non-negative numbers"""
+    try:
+        if isfinite( float( value ) ) and float( value ) >= 0: return float( value )
+    except ValueError:
+        pass
+    raise ArgumentTypeError( 'invalid non-negative number: {}'.format(value) )
 
-# Need a function that can parse a CIDR notation string and return a tuplet containing the address string and CIDR integer value
-#   e.g parse_cidr( e.g. '192.168.10.1/24' ) -> ( '192.168.10.1', 24 )
-# subnet_from_cidr( ipv4_string, cidr )
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit( main() )
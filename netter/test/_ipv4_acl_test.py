@@ -0,0 +1,75 @@
+"""Tests for _ipv4_acl.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_acl import AccessList
+from numpy.random import default_rng
+from numpy import arange
+from numpy import full
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _brute_force( entries: list, ipv4s ):
+    """Helper function that finds the first matching entry for each address by checking every entry in turn"""
+    firsts = full( len( ipv4s ), -1 )
+    for i, ( address, wildcard, action ) in enumerate( entries ):
+        care = wildcard ^ 0xFFFFFFFF
+        firsts[ ( ( ipv4s & care ) == ( address & care ) ) & ( firsts == -1 ) ] = i
+    return firsts
+
+def _random_entries( rng, size: int ) -> list:
+    """Helper function that builds a random mix of contiguous and non-contiguous entries within 10.0.0.0/24"""
+    entries = []
+    for i in range( size ):
+        address = int( 0x0A000000 + rng.integers( 0, 256 ) )
+        wildcard = int( rng.integers( 0, 256 ) ) if rng.random() < 0.5 else ( 1 << int( rng.integers( 0, 9 ) ) ) - 1
+        entries.append( ( address, wildcard, i ) )
+    return entries
+
+def test_access_list():
+    """Tests first match lookups, actions and hit counts"""
+    acl = AccessList( [ ( '10.0.0.1', '0.255.255.0', 'deny' ), ( '10.0.0.0', '0.255.255.255', 'permit' ), ( '192.168.1.7', 0, 'permit' ) ] )
+    assert len( acl ) == 3
+    assert list( acl ) == [ ( '10.0.0.1', '0.255.255.0', 'deny' ), ( '10.0.0.0', '0.255.255.255', 'permit' ), ( '192.168.1.7', '0.0.0.0', 'permit' ) ]
+    assert ( acl.action( '10.20.30.1' ), acl.action( '10.20.30.2' ), acl.action( '192.168.1.7' ), acl.action( '192.168.1.8' ) ) == ( 'deny', 'permit', 'permit', 'deny' )
+    assert ( acl.match( '10.20.30.1' ), acl.match( 167772161 ), acl.match( '11.0.0.1' ) ) == ( 0, 0, -1 )
+    assert acl.match_batch( [ 169090561, 169090562, 3232235777 ] ).tolist() == [ 0, 1, -1 ]
+    assert acl.actions_batch( [ 169090562, 3232235777 ] ).tolist() == [ 'permit', 'deny' ]
+    assert acl.hit_counts( [ 169090561, 169090562, 169090818, 3232235777 ] ).tolist() == [ 1, 2, 0 ]
+    assert AccessList( default_action='permit' ).action( '10.0.0.1' ) == 'permit'
+    # Invalid entries and addresses
+    with pytest.raises( ValueError ) as e_info:
+        AccessList( [ ( '10.0.0.0', '0.0.0.255' ) ] )
+    with pytest.raises( ValueError ) as e_info:
+        AccessList( [ ( '10.0.0.0', '0.0.0.256', 'deny' ) ] )
+    with pytest.raises( TypeError ) as e_info:
+        AccessList( [ ( '10.0.0.0', 255.0, 'deny' ) ] )
+    with pytest.raises( ValueError ) as e_info:
+        acl.match_batch( [ 1 << 32 ] )
+    # Random lists against checking every entry in turn
+    rng = default_rng( 24 )
+    for _ in range( 20 ):
+        entries = _random_entries( rng, int( rng.integers( 1, 40 ) ) )
+        ipv4s = 0x0A000000 + rng.integers( 0, 512, size=2000 )
+        assert ( AccessList( entries ).match_batch( ipv4s ) == _brute_force( entries, ipv4s ) ).all()
+
+def test_shadowed_entries():
+    """Tests that exactly the entries that can never be hit are reported as shadowed"""
+    acl = AccessList( [
+        ( '10.0.0.0', '0.0.0.254', 'permit' ),  # even hosts of 10.0.0.0/24
+        ( '10.0.0.1', '0.0.0.254', 'deny' ),    # odd hosts of 10.0.0.0/24
+        ( '10.0.0.0', '0.0.0.255', 'deny' ),    # covered by the two entries above together
+        ( '10.0.0.0', '0.0.255.255', 'permit' ),
+        ( '10.0.5.0', '0.0.0.255', 'deny' ),    # covered by the /16 entry above
+        ( '0.0.0.0', '255.255.255.255', 'permit' ),
+        ( '192.168.0.1', '0.0.0.0', 'deny' )    # after permit any
+    ] )
+    assert acl.shadowed_entries() == { 2 : ( 0, 1 ), 4 : ( 3, ), 6 : ( 5, ) }
+    assert AccessList().shadowed_entries() == {}
+    # Random lists within 10.0.0.0/24 -> shadowed exactly when no address of the /24 hits the entry
+    rng = default_rng( 240 )
+    universe = arange( 0x0A000000, 0x0A000100 )
+    for _ in range( 50 ):
+        acl = AccessList( _random_entries( rng, int( rng.integers( 1, 25 ) ) ) )
+        assert set( acl.shadowed_entries() ) == set( ( acl.hit_counts( universe ) == 0 ).nonzero()[0].tolist() )
@@ -0,0 +1,99 @@
+"""Tests for _ipv4_address_set.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_address_set import AddressSet
+from ipaddress import ip_network
+from ipaddress import collapse_addresses
+from numpy.random import default_rng
+from numpy import arange
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _brute_force( address_set, universe ) -> set:
+    """Helper function that lists which addresses of a small universe are in a set"""
+    return { int( a ) for a in universe[ address_set.contains_batch( universe ) ] }
+
+def _random_set( rng ) -> AddressSet:
+    """Helper function that builds a random set of prefixes and ranges within 10.0.0.0/20"""
+    prefixes = [ ( int( 0x0A000000 + rng.integers( 0, 4096 ) ), int( rng.integers( 22, 33 ) ) ) for _ in range(20) ]
+    starts = rng.integers( 0x0A000000, 0x0A001000, 10 )
+    ranges = [ ( int( s ), int( min( s + rng.integers( 0, 200 ), 0x0A000FFF ) ) ) for s in starts ]
+    return AddressSet( prefixes=prefixes, ranges=ranges )
+
+def test_address_set_construction():
+    """Tests for the AddressSet constructors"""
+    with pytest.raises( ValueError ) as e_info:
+        AddressSet( prefixes=[ '10.0.0.0/33' ] )
+    with pytest.raises( ValueError ) as e_info:
+        AddressSet( ranges=[ ( '10.0.0.2', '10.0.0.1' ) ] )
+    with pytest.raises( ValueError ) as e_info:
+        AddressSet.from_range_arrays( [ 0 ], [ 2**32 ] )
+    with pytest.raises( TypeError ) as e_info:
+        AddressSet( ranges=[ ( 1.5, 2 ) ] )
+    assert not AddressSet()
+    assert len( AddressSet() ) == 0
+    # Overlapping and adjacent inputs are merged
+    s = AddressSet( prefixes=[ '10.0.0.0/25', '10.0.0.0/26' ], ranges=[ ( '10.0.0.128', '10.0.0.255' ) ] )
+    assert [ list( column ) for column in s.ranges ] == [ [ 167772160 ], [ 167772415 ] ]
+    assert len( s ) == 256
+    assert s.to_prefixes() == [ '10.0.0.0/24' ]
+    assert s == AddressSet.from_prefix_arrays( [ 167772161 ], [ 24 ] )
+    assert len( AddressSet( prefixes=[ '0.0.0.0/0' ] ) ) == 2**32
+
+def test_address_set_membership():
+    """Tests for AddressSet membership"""
+    s = AddressSet( prefixes=[ '10.0.0.0/8' ], ranges=[ ( '192.168.0.10', '192.168.0.20' ) ] )
+    assert '10.255.255.255' in s
+    assert '11.0.0.0' not in s
+    assert '192.168.0.10' in s
+    assert '192.168.0.21' not in s
+    assert 0 not in s
+    assert list( s.contains_batch( [ 0, 167772160, 184549375, 184549376, 3232235530 ] ) ) == [ False, True, True, False, True ]
+    assert list( AddressSet().contains_batch( [ 0, 1 ] ) ) == [ False, False ]
+
+def test_address_set_algebra():
+    """Tests the AddressSet operators against a brute force evaluation"""
+    with pytest.raises( TypeError ) as e_info:
+        AddressSet() & [ '10.0.0.0/8' ]
+    with pytest.raises( TypeError ) as e_info:
+        AddressSet() <= { 167772160 }
+    universe = arange( 0x09FFFF00, 0x0A001100 )
+    rng = default_rng( 9 )
+    for _ in range(20):
+        a, b = _random_set( rng ), _random_set( rng )
+        set_a, set_b = _brute_force( a, universe ), _brute_force( b, universe )
+        assert _brute_force( a | b, universe ) == set_a | set_b
+        assert _brute_force( a & b, universe ) == set_a & set_b
+        assert _brute_force( a - b, universe ) == set_a - set_b
+        assert _brute_force( a ^ b, universe ) == set_a ^ set_b
+        assert _brute_force( ~a, universe ) == set( universe.tolist() ) - set_a
+        assert len( ~a ) == 2**32 - len( a )
+        assert ( a - b ).isdisjoint( b )
+        assert ( a & b ) <= a
+        assert ( a < b, a <= b, a > b, a >= b ) == ( set_a < set_b, set_a <= set_b, set_a > set_b, set_a >= set_b )
+        assert ( a | b ) >= b and a.issuperset( a & b )
+        assert not a < a and not a > a
+        # Results stay canonical -> equal sets compare equal however they were built
+        assert ( a - b ) | ( a & b ) == a
+        assert hash( ( a - b ) | ( a & b ) ) == hash( a )
+        # Results convert back to minimal CIDR lists
+        expected = collapse_addresses( ip_network( p ) for p in ( a | b ).to_prefixes() )
+        assert ( a | b ).to_prefixes() == [ str( n ) for n in expected ]
+
+def test_address_set_whole_space():
+    """Tests set algebra over whole /8s"""
+    allocated = AddressSet( prefixes=[ '10.0.0.0/8', '11.0.0.0/8' ] )
+    reserved = AddressSet( prefixes=[ '10.0.0.0/16' ], ranges=[ ( '11.255.255.0', '11.255.255.255' ) ] )
+    in_use = AddressSet( prefixes=[ '10.1.0.0/16', '11.0.0.0/9' ] )
+    free = allocated - reserved - in_use
+    assert free.to_prefixes() == [
+        '10.2.0.0/15', '10.4.0.0/14', '10.8.0.0/13', '10.16.0.0/12', '10.32.0.0/11', '10.64.0.0/10', '10.128.0.0/9',
+        '11.128.0.0/10', '11.192.0.0/11', '11.224.0.0/12', '11.240.0.0/13', '11.248.0.0/14', '11.252.0.0/15',
+        '11.254.0.0/16', '11.255.0.0/17', '11.255.128.0/18', '11.255.192.0/19', '11.255.224.0/20', '11.255.240.0/21',
+        '11.255.248.0/22', '11.255.252.0/23', '11.255.254.0/24'
+    ]
+    assert len( free ) == 2 * 2**24 - 2**16 - 2**8 - 2**16 - 2**23
+    assert ( ~AddressSet() ).to_prefixes() == [ '0.0.0.0/0' ]
+    assert not ~AddressSet( prefixes=[ '0.0.0.0/0' ] )
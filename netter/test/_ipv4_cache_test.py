@@ -0,0 +1,48 @@
+"""Tests for _ipv4_cache.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_cache import SubnetInfoCache
+from threading import Thread
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_subnet_info_cache_init():
+    """Tests for SubnetInfoCache.__init__"""
+    # Test invalid input type
+    with pytest.raises( TypeError ) as e_info:
+        SubnetInfoCache( 1.5 )
+    # Test invalid size
+    with pytest.raises( ValueError ) as e_info:
+        SubnetInfoCache( 0 )
+    assert SubnetInfoCache( 8 ).stats() == { 'hits' : 0, 'misses' : 0, 'evictions' : 0, 'size' : 0, 'maxsize' : 8 }
+
+def test_subnet_info_cache_lru():
+    """Tests for SubnetInfoCache.get/put eviction order and counters"""
+    cache = SubnetInfoCache( 2 )
+    cache.put( ( 1, 24 ), 'a' )
+    cache.put( ( 2, 24 ), 'b' )
+    # Touch the first entry so the second becomes least recently used
+    assert cache.get( ( 1, 24 ) ) == 'a'
+    cache.put( ( 3, 24 ), 'c' )
+    assert cache.get( ( 2, 24 ) ) is None
+    assert cache.get( ( 1, 24 ) ) == 'a'
+    assert cache.get( ( 3, 24 ) ) == 'c'
+    assert cache.stats() == { 'hits' : 3, 'misses' : 1, 'evictions' : 1, 'size' : 2, 'maxsize' : 2 }
+    # Test clear
+    cache.clear()
+    assert cache.stats() == { 'hits' : 0, 'misses' : 0, 'evictions' : 0, 'size' : 0, 'maxsize' : 2 }
+
+def test_subnet_info_cache_threads():
+    """Tests that concurrent access keeps the counters consistent"""
+    cache = SubnetInfoCache( 64 )
+    def worker():
+        for i in range(1000):
+            if cache.get( ( i % 128, 24 ) ) is None: cache.put( ( i % 128, 24 ), i )
+    threads = [ Thread( target=worker ) for _ in range(4) ]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    stats = cache.stats()
+    assert stats[ 'hits' ] + stats[ 'misses' ] == 4000
+    assert stats[ 'size' ] == 64
@@ -16,6 +16,25 @@ from v4._ipv4_calculator import cidr_to_netmask
 from v4._ipv4_calculator import cidr_to_str
 from v4._ipv4_calculator import get_subnet_info_given_mask
 from v4._ipv4_calculator import get_subnet_info_given_cidr
+from v4._ipv4_calculator import get_subnet_info_batch
+from v4._ipv4_calculator import addr_to_str
+from v4._ipv4_calculator import enable_subnet_info_cache
+from v4._ipv4_calculator import disable_subnet_info_cache
+from v4._ipv4_calculator import get_subnet_info_cache_stats
+from v4._ipv4_calculator import enable_strict_validation
+from v4._ipv4_calculator import disable_strict_validation
+from v4._ipv4_calculator import parse_cidr_str
+from v4._ipv4_calculator import ipv4_to_int
+from v4._ipv4_calculator import parse_prefix
+from v4._ipv4_calculator import range_to_prefixes
+from v4._ipv4_calculator import parse_subnet_str
+from v4._ipv4_calculator import get_subnet_info_rows
+from v4._ipv4_calculator import int_to_addr_str
+from v4._ipv4_calculator import SCALAR_ROWS_LIMIT
+from os.path import dirname
+from os.path import abspath
+from subprocess import run
+import sys
 import pytest
 
 #|#################################################################| Function definitions |#################################################################|#
@@ -63,36 +82,71 @@ def test_get_network_id():
 
 def test_get_wildcard_mask():
     """Tests for get_wildcard_mask"""
+    # Test invalid input types
+    with pytest.raises( TypeError ) as e_info:
+        get_wildcard_mask( '255.255.255.0' )
+    with pytest.raises( TypeError ) as e_info:
+        get_wildcard_mask( [255,255,'255',0] )
     ### Class (none) ###
+    assert get_wildcard_mask( [0,0,0,0] ) == [255,255,255,255]
+    assert get_wildcard_mask( [128,0,0,0] ) == [127,255,255,255]
     ### Class A ###
+    assert get_wildcard_mask( [255,0,0,0] ) == [0,255,255,255]
     ### Class B ###
+    assert get_wildcard_mask( [255,255,240,0] ) == [0,0,15,255]
     ### Class C ###
-    assert True
+    assert get_wildcard_mask( [255,255,255,0] ) == [0,0,0,255]
+    assert get_wildcard_mask( [255,255,255,255] ) == [0,0,0,0]
 
 def test_get_broadcast_addr():
     """Tests for get_broadcast_addr"""
+    # Test invalid input types
+    with pytest.raises( TypeError ) as e_info:
+        get_broadcast_addr( [192,168,10,0], '0.0.0.255' )
     ### Class (none) ###
+    assert get_broadcast_addr( [0,0,0,0], [255,255,255,255] ) == [255,255,255,255]
     ### Class A ###
+    assert get_broadcast_addr( [10,0,0,0], [0,255,255,255] ) == [10,255,255,255]
     ### Class B ###
+    assert get_broadcast_addr( [172,16,0,0], [0,0,15,255] ) == [172,16,15,255]
     ### Class C ###
-    assert True
+    assert get_broadcast_addr( [192,168,10,0], [0,0,0,255] ) == [192,168,10,255]
 
 def test_get_num_hosts():
     """Tests for get_num_hosts"""
     ### Class (none) ###
+    assert get_num_hosts( [0,0,0,0] ) == 4294967294
     assert get_num_hosts( [128,0,0,0] ) == 2147483646
     ### Class A ###
+    assert get_num_hosts( [255,0,0,0] ) == 16777214
     ### Class B ###
+    assert get_num_hosts( [255,255,0,0] ) == 65534
     ### Class C ###
-    assert True
+    assert get_num_hosts( [255,255,255,0] ) == 254
+    assert get_num_hosts( [255,255,255,252] ) == 2
+    # /31 and /32 subnets don't reserve a network ID/broadcast address (RFC 3021)
+    assert get_num_hosts( [255,255,255,254] ) == 2
+    assert get_num_hosts( [255,255,255,255] ) == 1
 
 def test_get_num_subnets():
     """Tests for get_num_subnets"""
+    # Test invalid input types
+    with pytest.raises( TypeError ) as e_info:
+        get_num_subnets( '255.255.255.0' )
     ### Class (none) ###
+    assert get_num_subnets( [0,0,0,0] ) == 1
+    assert get_num_subnets( [128,0,0,0] ) == 2
     ### Class A ###
+    assert get_num_subnets( [255,0,0,0] ) == 1
+    assert get_num_subnets( [255,192,0,0] ) == 4
     ### Class B ###
+    assert get_num_subnets( [255,255,0,0] ) == 1
+    assert get_num_subnets( [255,255,240,0] ) == 16
     ### Class C ###
-    assert True
+    assert get_num_subnets( [255,255,255,0] ) == 1
+    assert get_num_subnets( [255,255,255,252] ) == 64
+    assert get_num_subnets( [255,255,255,254] ) == 128
+    assert get_num_subnets( [255,255,255,255] ) == 256
 
 def test_get_subnet_class():
     """Tests for get_subnet_class"""
@@ -112,11 +166,20 @@ def test_get_subnet_class():
 
 def test_get_first_host():
     """Tests for get_first_host"""
-    assert True
+    assert get_first_host( [192,168,10,0] ) == [192,168,10,1]
+    assert get_first_host( [10,0,0,8], 30 ) == [10,0,0,9]
+    # Test /31 and /32 subnets -> the network ID is a usable host
+    assert get_first_host( [1,0,0,4], 31 ) == [1,0,0,4]
+    assert get_first_host( [1,1,1,1], 32 ) == [1,1,1,1]
 
 def test_get_last_host():
     """Tests for get_last_host"""
-    assert True
+    assert get_last_host( [192,168,10,255] ) == [192,168,10,254]
+    # Test that decrementing borrows across octets
+    assert get_last_host( [10,1,0,0] ) == [10,0,255,255]
+    # Test /31 and /32 subnets -> the broadcast address is a usable host
+    assert get_last_host( [1,0,0,5], 31 ) == [1,0,0,5]
+    assert get_last_host( [1,1,1,1], 32 ) == [1,1,1,1]
 
 def test_netmask_to_cidr():
     """Tests for netmask_to_cidr"""
@@ -200,10 +263,6 @@ def test_cidr_to_str():
 
 
 def test_get_subnet_info_given_mask():
-
-    # Currently failing: wildcard mask, broadcast (due to wildcard), last host (due to wildcard), number of hosts (due to wildcard), and number of subnets (separate issue possibly).
-    # Wildcard issue seems to be due to unexpected behavior from bitwise_not from numpy. e.g. 255.255.255.0 should be 0.0.0.255, not -256.-256.-256.-1
-
     """Tests for get_subnet_info_given_mask"""
     ##### Test valid input #####
     ### Class (none) ###
@@ -216,9 +275,210 @@ def test_get_subnet_info_given_mask():
     ### Class C ###
     expected = {'ipv4':'192.168.10.4','network_id':'192.168.10.0','subnet_mask':'255.255.255.0','wildcard_mask':'0.0.0.255','cidr_int':24,'cidr_str':'/24','subnet_class':'C','first_host':'192.168.10.1','last_host':'192.168.10.254','broadcast':'192.168.10.255','num_hosts':254,'num_subnets':1}
     assert get_subnet_info_given_mask( '192.168.10.4', '255.255.255.0' ) == expected
-    assert True
+    expected = {'ipv4':'10.0.0.5','network_id':'10.0.0.4','subnet_mask':'255.255.255.254','wildcard_mask':'0.0.0.1','cidr_int':31,'cidr_str':'/31','subnet_class':'C','first_host':'10.0.0.4','last_host':'10.0.0.5','broadcast':'10.0.0.5','num_hosts':2,'num_subnets':128}
+    assert get_subnet_info_given_mask( '10.0.0.5', '255.255.255.254' ) == expected
+    expected = {'ipv4':'255.255.255.255','network_id':'255.255.255.255','subnet_mask':'255.255.255.255','wildcard_mask':'0.0.0.0','cidr_int':32,'cidr_str':'/32','subnet_class':'C','first_host':'255.255.255.255','last_host':'255.255.255.255','broadcast':'255.255.255.255','num_hosts':1,'num_subnets':256}
+    assert get_subnet_info_given_mask( '255.255.255.255', '255.255.255.255' ) == expected
 
 
 def test_get_subnet_info_given_cidr():
     """Tests for get_subnet_info_given_cidr"""
-    assert True
\ No newline at end of file
+    ##### Test invalid input #####
+    with pytest.raises( TypeError ) as e_info:
+        get_subnet_info_given_cidr( '10.0.0.1', '24' )
+    with pytest.raises( TypeError ) as e_info:
+        get_subnet_info_given_cidr( 167772161, 24 )
+    for cidr in ( -1, 33 ):
+        with pytest.raises( ValueError ) as e_info:
+            get_subnet_info_given_cidr( '10.0.0.1', cidr )
+    ##### Test valid input #####
+    expected = {'ipv4':'10.1.2.3','network_id':'0.0.0.0','subnet_mask':'0.0.0.0','wildcard_mask':'255.255.255.255','cidr_int':0,'cidr_str':'/0','subnet_class':'none','first_host':'0.0.0.1','last_host':'255.255.255.254','broadcast':'255.255.255.255','num_hosts':4294967294,'num_subnets':1}
+    assert get_subnet_info_given_cidr( '10.1.2.3', 0 ) == expected
+    expected = {'ipv4':'172.16.5.4','network_id':'172.16.0.0','subnet_mask':'255.255.240.0','wildcard_mask':'0.0.15.255','cidr_int':20,'cidr_str':'/20','subnet_class':'B','first_host':'172.16.0.1','last_host':'172.16.15.254','broadcast':'172.16.15.255','num_hosts':4094,'num_subnets':16}
+    assert get_subnet_info_given_cidr( '172.16.5.4', 20 ) == expected
+    expected = {'ipv4':'192.168.10.4','network_id':'192.168.10.0','subnet_mask':'255.255.255.0','wildcard_mask':'0.0.0.255','cidr_int':24,'cidr_str':'/24','subnet_class':'C','first_host':'192.168.10.1','last_host':'192.168.10.254','broadcast':'192.168.10.255','num_hosts':254,'num_subnets':1}
+    assert get_subnet_info_given_cidr( '192.168.10.4', 24 ) == expected
+    ### /31 -> point-to-point link, both addresses are hosts (RFC 3021) ###
+    expected = {'ipv4':'10.0.0.5','network_id':'10.0.0.4','subnet_mask':'255.255.255.254','wildcard_mask':'0.0.0.1','cidr_int':31,'cidr_str':'/31','subnet_class':'C','first_host':'10.0.0.4','last_host':'10.0.0.5','broadcast':'10.0.0.5','num_hosts':2,'num_subnets':128}
+    assert get_subnet_info_given_cidr( '10.0.0.5', 31 ) == expected
+    ### /32 -> a single host ###
+    expected = {'ipv4':'10.0.0.5','network_id':'10.0.0.5','subnet_mask':'255.255.255.255','wildcard_mask':'0.0.0.0','cidr_int':32,'cidr_str':'/32','subnet_class':'C','first_host':'10.0.0.5','last_host':'10.0.0.5','broadcast':'10.0.0.5','num_hosts':1,'num_subnets':256}
+    assert get_subnet_info_given_cidr( '10.0.0.5', 32 ) == expected
+    # Test that every CIDR value matches the equivalent subnet mask
+    for cidr in range(33):
+        assert get_subnet_info_given_cidr( '254.172.75.42', cidr ) == get_subnet_info_given_mask( '254.172.75.42', cidr_to_netmask( cidr ) )
+
+def test_get_subnet_info_batch():
+    """Tests for get_subnet_info_batch"""
+    # Test invalid address and CIDR values
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_batch( [ -1 ], 24 )
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_batch( [ 2**32 ], 24 )
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_batch( [ 0 ], [ 33 ] )
+    # Test that every column matches the scalar calculator for every prefix length
+    ipv4 = [ 254, 172, 75, 42 ]
+    ipv4_int = ( ipv4[0] << 24 ) | ( ipv4[1] << 16 ) | ( ipv4[2] << 8 ) | ipv4[3]
+    batch = get_subnet_info_batch( [ ipv4_int ] * 33, list( range(33) ) )
+    for i in range(33):
+        expected = get_subnet_info_given_cidr( '254.172.75.42', i )
+        for key in ( 'network_id', 'subnet_mask', 'wildcard_mask', 'first_host', 'last_host', 'broadcast' ):
+            octets = [ int( batch[ key ][ i ] ) >> shift & 255 for shift in ( 24, 16, 8, 0 ) ]
+            assert addr_to_str( octets ) == expected[ key ]
+        assert batch[ 'cidr_int' ][ i ] == expected[ 'cidr_int' ]
+        assert batch[ 'subnet_class' ][ i ] == expected[ 'subnet_class' ]
+        assert batch[ 'num_hosts' ][ i ] == expected[ 'num_hosts' ]
+        assert batch[ 'num_subnets' ][ i ] == expected[ 'num_subnets' ]
+    # Test that a scalar CIDR is broadcast across all addresses
+    batch = get_subnet_info_batch( [ 3232238081, 167772161 ], 24 )
+    assert list( batch[ 'network_id' ] ) == [ 3232238080, 167772160 ]
+    assert list( batch[ 'broadcast' ] ) == [ 3232238335, 167772415 ]
+
+def test_subnet_info_cache():
+    """Tests for enable_subnet_info_cache/disable_subnet_info_cache/get_subnet_info_cache_stats"""
+    assert get_subnet_info_cache_stats() is None
+    enable_subnet_info_cache( 2 )
+    try:
+        first = get_subnet_info_given_mask( '192.168.10.4', '255.255.255.0' )
+        # Another host in the same subnet is a hit, only the echoed address differs
+        second = get_subnet_info_given_mask( '192.168.10.77', '255.255.255.0' )
+        assert second == dict( first, ipv4='192.168.10.77' )
+        assert get_subnet_info_given_cidr( '192.168.10.200', 24 )[ 'ipv4' ] == '192.168.10.200'
+        # Mutating a returned result must not affect the cache
+        second[ 'network_id' ] = 'mutated'
+        assert get_subnet_info_given_mask( '192.168.10.5', '255.255.255.0' ) == dict( first, ipv4='192.168.10.5' )
+        # Fill the cache past its size to force an eviction
+        get_subnet_info_given_cidr( '10.0.0.1', 8 )
+        get_subnet_info_given_cidr( '172.16.0.1', 12 )
+        assert get_subnet_info_cache_stats() == { 'hits' : 3, 'misses' : 3, 'evictions' : 1, 'size' : 2, 'maxsize' : 2 }
+    finally:
+        disable_subnet_info_cache()
+    assert get_subnet_info_cache_stats() is None
+
+def test_strict_validation():
+    """Tests that strict validation mode returns the same results and raises the same errors as the default mode"""
+    calls = (
+        lambda: get_subnet_info_given_mask( '192.168.10.2', '255.255.255.0' ),
+        lambda: get_subnet_info_given_cidr( '192.168.10.2', 31 ),
+        lambda: get_subnet_info_given_cidr( '192.168.10.2', 33 ),
+        lambda: get_subnet_info_given_cidr( '192.168.10.2', '24' ),
+        lambda: get_subnet_info_given_mask( '192.168.10.2', '255.0.255.0' ),
+        lambda: get_subnet_info_given_mask( 3232238082, '255.255.255.0' ),
+        lambda: get_network_id( [192,168,10,2], [255,255,255,0] ),
+        lambda: get_network_id( [192,168,10,2], [255,255,255,0.0] ),
+        lambda: get_num_hosts( [255,255,255,0] ),
+        lambda: get_num_hosts( (255,255,255,0) ),
+        lambda: addr_to_str( [192,168,10,'2'] ),
+        lambda: ipv4_to_int( '192.168.10.2' ),
+        lambda: parse_subnet_str( '192.168.10.2/24' )
+    )
+    def outcome( call ):
+        try:
+            return call()
+        except ( TypeError, ValueError ) as e:
+            return ( type( e ), str( e ) )
+    default = [ outcome( call ) for call in calls ]
+    enable_strict_validation()
+    try:
+        assert [ outcome( call ) for call in calls ] == default
+    finally:
+        disable_strict_validation()
+
+def test_parse_cidr_str():
+    """Tests for parse_cidr_str"""
+    # Test invalid input type
+    with pytest.raises( TypeError ) as e_info:
+        parse_cidr_str( 24 )
+    # Test invalid prefix strings
+    for bad in ( '192.168.10.1', '192.168.10.1/', '192.168.10.1/33', '192.168.10/24', '192.168.10.1/-1', '/24', '192.168.10.1/\u00b2', '192.168.10.1/\uff12\uff14' ):
+        with pytest.raises( ValueError ) as e_info:
+            parse_cidr_str( bad )
+    # Test valid prefix strings
+    assert parse_cidr_str( '192.168.10.1/24' ) == ( '192.168.10.1', 24 )
+    assert parse_cidr_str( '0.0.0.0/0' ) == ( '0.0.0.0', 0 )
+
+def test_parse_subnet_str():
+    """Tests for parse_subnet_str"""
+    with pytest.raises( ValueError ) as e_info:
+        parse_subnet_str( '192.168.10.1 255.255.255.0 extra' )
+    with pytest.raises( ValueError ) as e_info:
+        parse_subnet_str( '192.168.10.1/33' )
+    with pytest.raises( ValueError ) as e_info:
+        parse_subnet_str( '192.168.10.1 255.0.255.0' )
+    with pytest.raises( ValueError ) as e_info:
+        parse_subnet_str( '192.168.10.256' )
+    with pytest.raises( ValueError ) as e_info:
+        parse_subnet_str( '192.168.10.1/\u00b2' )
+    with pytest.raises( TypeError ) as e_info:
+        parse_subnet_str( 3232238081 )
+    assert parse_subnet_str( '192.168.10.1' ) == ( '192.168.10.1', 3232238081, 32 )
+    assert parse_subnet_str( '192.168.10.1', 24 ) == ( '192.168.10.1', 3232238081, 24 )
+    assert parse_subnet_str( '192.168.10.1\t255.255.255.0' ) == ( '192.168.10.1', 3232238081, 24 )
+    assert parse_subnet_str( '192.168.10.1/24' ) == ( '192.168.10.1', 3232238081, 24 )
+
+def test_get_subnet_info_rows():
+    """Tests that get_subnet_info_rows matches the scalar calculator"""
+    assert get_subnet_info_rows( [], [], [] ) == []
+    rows = get_subnet_info_rows( [ '192.168.10.2', '10.1.2.3', '0.0.0.0' ], [ 3232238082, 167838211, 0 ], [ 24, 31, 0 ] )
+    assert rows == [ get_subnet_info_given_cidr( '192.168.10.2', 24 ), get_subnet_info_given_cidr( '10.1.2.3', 31 ), get_subnet_info_given_cidr( '0.0.0.0', 0 ) ]
+    # Small inputs are computed with plain integers, larger ones in a vectorized pass -> both match the scalar calculator
+    for n in ( SCALAR_ROWS_LIMIT, SCALAR_ROWS_LIMIT + 1 ):
+        ipv4s = [ ( i * 2654435761 ) & 0xFFFFFFFF for i in range( n ) ]
+        cidrs = [ i % 33 for i in range( n ) ]
+        ipv4_strs = [ int_to_addr_str( ipv4 ) for ipv4 in ipv4s ]
+        assert get_subnet_info_rows( ipv4_strs, ipv4s, cidrs ) == [ get_subnet_info_given_cidr( a, c ) for a, c in zip( ipv4_strs, cidrs ) ]
+        with pytest.raises( ValueError ) as e_info:
+            get_subnet_info_rows( ipv4_strs, ipv4s[ :-1 ] + [ 1 << 32 ], cidrs )
+        with pytest.raises( ValueError ) as e_info:
+            get_subnet_info_rows( ipv4_strs, ipv4s, cidrs[ :-1 ] + [ 33 ] )
+
+def test_numpy_free_import():
+    """Tests that the scalar functions work without importing NumPy"""
+    code = """if True:
+        import sys
+        from v4._ipv4_calculator import get_subnet_info_given_cidr, get_subnet_info_given_mask, get_subnet_info_rows, get_num_subnets
+        get_subnet_info_given_cidr( '192.168.10.2', 24 )
+        get_subnet_info_given_mask( '192.168.10.2', '255.255.255.0' )
+        get_subnet_info_rows( [ '10.0.0.1' ], [ 167772161 ], [ 8 ] )
+        assert get_num_subnets( [ 255, 255, 255, 224 ] ) == 8
+        # One-shot callers may compute larger inputs one row at a time too
+        get_subnet_info_rows( [ '10.0.0.1' ] * 1000, [ 167772161 ] * 1000, [ 8 ] * 1000, cold=True )
+        assert 'numpy' not in sys.modules
+        # Otherwise inputs over SCALAR_ROWS_LIMIT take the vectorized pass, which imports NumPy when first used, like
+        # the other batch functions
+        get_subnet_info_rows( [ '10.0.0.1' ] * 1000, [ 167772161 ] * 1000, [ 8 ] * 1000 )
+        assert 'numpy' in sys.modules
+    """
+    run( [ sys.executable, '-c', code ], cwd=dirname( dirname( abspath( __file__ ) ) ), check=True )
+
+def test_ipv4_to_int():
+    """Tests for ipv4_to_int"""
+    with pytest.raises( TypeError ) as e_info:
+        ipv4_to_int( 1.0 )
+    with pytest.raises( ValueError ) as e_info:
+        ipv4_to_int( '256.1.1.1' )
+    with pytest.raises( ValueError ) as e_info:
+        ipv4_to_int( 2**32 )
+    assert ipv4_to_int( '192.168.10.1' ) == 3232238081
+    assert ipv4_to_int( 3232238081 ) == 3232238081
+
+def test_parse_prefix():
+    """Tests for parse_prefix"""
+    with pytest.raises( ValueError ) as e_info:
+        parse_prefix( ( '10.0.0.0', 33 ) )
+    with pytest.raises( TypeError ) as e_info:
+        parse_prefix( ( '10.0.0.0', '8' ) )
+    # Test that host bits are cleared
+    assert parse_prefix( '192.168.10.1/24' ) == ( 3232238080, 24 )
+    assert parse_prefix( ( '10.9.9.9', 8 ) ) == ( 167772160, 8 )
+    assert parse_prefix( ( 3232238081, 32 ) ) == ( 3232238081, 32 )
+
+def test_range_to_prefixes():
+    """Tests for range_to_prefixes"""
+    assert range_to_prefixes( 0, 2**32 - 1 ) == [ ( 0, 0 ) ]
+    assert range_to_prefixes( 5, 5 ) == [ ( 5, 32 ) ]
+    assert range_to_prefixes( 6, 5 ) == []
+    # 10.0.0.1 - 10.0.0.6 -> .1/32, .2/31, .4/31, .6/32
+    assert range_to_prefixes( 167772161, 167772166 ) == [ ( 167772161, 32 ), ( 167772162, 31 ), ( 167772164, 31 ), ( 167772166, 32 ) ]
+    assert range_to_prefixes( 2**31, 2**32 - 1 ) == [ ( 2**31, 1 ) ]
@@ -0,0 +1,95 @@
+"""Tests for _ipv4_frame.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_frame import SubnetFrame
+from v4._ipv4_calculator import get_subnet_info_batch
+from v4._ipv4_calculator import get_subnet_info_given_cidr
+from numpy import uint32
+from numpy.random import default_rng
+from io import BytesIO
+from io import StringIO
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_subnet_frame():
+    """Tests that SubnetFrame columns and rows match the subnet information batch and dicts"""
+    with pytest.raises( ValueError ) as e_info:
+        SubnetFrame( [ 1 ], [ 33 ] )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetFrame( [ -1 ], 24 )
+    rng = default_rng( 19 )
+    ipv4s = rng.integers( 0, 1 << 32, size=5000, dtype=uint32 )
+    cidrs = rng.integers( 0, 33, size=5000 )
+    frame = SubnetFrame( ipv4s, cidrs )
+    assert len( frame ) == 5000
+    info = get_subnet_info_batch( ipv4s, cidrs )
+    for key in info:
+        assert ( frame[ key ] == info[ key ] ).all()
+    assert frame[ 'cidr_str' ][ 0 ] == '/{}'.format( cidrs[ 0 ] )
+    with pytest.raises( KeyError ) as e_info:
+        frame[ 'network_int' ]
+    # Rows
+    assert frame[ 7 ].to_dicts() == [ get_subnet_info_given_cidr( frame[ 7:8 ].to_dicts()[0][ 'ipv4' ], int( cidrs[ 7 ] ) ) ]
+    assert frame[ -1 ] == frame[ 4999: ]
+    assert frame[ 10:20 ] == SubnetFrame( ipv4s[ 10:20 ], cidrs[ 10:20 ] )
+    assert len( SubnetFrame() ) == 0
+    assert SubnetFrame.concat( [ frame[ :100 ], frame[ 100: ] ] ) == frame
+
+def test_subnet_frame_queries():
+    """Tests filtering, sorting and grouping"""
+    frame = SubnetFrame( [ 3232238082, 167772161, 3232238090, 167772161, 3232238338 ], [ 24, 8, 24, 32, 24 ] )
+    small = frame.filter( frame[ 'num_hosts' ] < 256 )
+    assert small[ 'cidr_int' ].tolist() == [ 24, 24, 32, 24 ]
+    assert frame.sort( 'ipv4' )[ 'ipv4' ].tolist() == [ 167772161, 167772161, 3232238082, 3232238090, 3232238338 ]
+    assert frame.sort( ( 'ipv4', 'cidr_int' ), descending=True )[ 'cidr_int' ].tolist() == [ 24, 24, 24, 32, 8 ]
+    # Descending sorts are stable too
+    assert SubnetFrame( [ 1, 2, 3, 4 ], [ 24 ] * 4 ).sort( 'cidr_int', descending=True )[ 'ipv4' ].tolist() == [ 1, 2, 3, 4 ]
+    assert frame.sort( 'subnet_class', descending=True )[ 'ipv4' ].tolist() == [ 3232238082, 3232238090, 167772161, 3232238338, 167772161 ]
+    assert [ ( cidr, len( group ) ) for cidr, group in frame.group_by() ] == [ ( 8, 1 ), ( 24, 3 ), ( 32, 1 ) ]
+    subnets = [ ( key, group[ 'ipv4' ].tolist() ) for key, group in frame.group_by( ( 'network_id', 'cidr_int' ) ) ]
+    assert subnets == [ ( ( 167772160, 8 ), [ 167772161 ] ), ( ( 167772161, 32 ), [ 167772161 ] ),
+                        ( ( 3232238080, 24 ), [ 3232238082, 3232238090 ] ), ( ( 3232238336, 24 ), [ 3232238338 ] ) ]
+    assert frame.prefix_counts() == { 8 : 1, 24 : 3, 32 : 1 }
+    assert list( SubnetFrame().group_by() ) == []
+
+def test_subnet_frame_files( tmp_path ):
+    """Tests saving and loading frames in the binary format and as CSV"""
+    rng = default_rng( 190 )
+    frame = SubnetFrame( rng.integers( 0, 1 << 32, size=1000, dtype=uint32 ), rng.integers( 0, 33, size=1000 ) )
+    frame.save( tmp_path / 'frame.bin', chunk_size=300 )
+    assert SubnetFrame.load( tmp_path / 'frame.bin' ) == frame
+    assert [ len( chunk ) for chunk in SubnetFrame.iter_binary_chunks( tmp_path / 'frame.bin' ) ] == [ 300, 300, 300, 100 ]
+    data = ( tmp_path / 'frame.bin' ).read_bytes()
+    with pytest.raises( ValueError ) as e_info:
+        SubnetFrame.load( BytesIO( data[ :-1 ] ) )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetFrame.load( BytesIO( b'not a frame' ) )
+    buffer = BytesIO()
+    SubnetFrame().save( buffer )
+    buffer.seek( 0 )
+    assert len( SubnetFrame.load( buffer ) ) == 0
+    # CSV
+    frame.to_csv( tmp_path / 'frame.csv' )
+    assert SubnetFrame.read_csv( tmp_path / 'frame.csv', chunk_size=77 ) == frame
+    text = StringIO()
+    frame[ :1 ].to_csv( text, fields=( 'ipv4', 'cidr_int', 'network_id' ) )
+    row = frame[ :1 ].to_dicts()[0]
+    assert text.getvalue() == 'ipv4,cidr_int,network_id\n{},{},{}\n'.format( row[ 'ipv4' ], row[ 'cidr_int' ], row[ 'network_id' ] )
+    with pytest.raises( KeyError ) as e_info:
+        frame.to_csv( StringIO(), fields=( 'ipv4', 'network_int' ) )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetFrame.read_csv( StringIO( 'ipv4,cidr_str\n10.0.0.1,/8\n' ) )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetFrame.read_csv( StringIO( 'ipv4,cidr_int\n10.0.0.256,8\n' ) )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetFrame.read_csv( StringIO( 'ipv4,cidr_int\n10.0.0.1,x\n' ) )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetFrame.read_csv( StringIO( 'ipv4,cidr_int\n10.0.0.1,\u00b2\n' ) )
+    assert '\u00b2' in str( e_info.value )
+    # Empty and missing cells are errors, even in the last row
+    for bad in ( 'ipv4,cidr_int\n10.0.0.1,24\n,16\n', 'ipv4,cidr_int\n10.0.0.1,24\n10.0.0.2\n', 'ipv4,cidr_int\n"10.0.0.1\n10.0.0.2",8\n' ):
+        with pytest.raises( ValueError ) as e_info:
+            SubnetFrame.read_csv( StringIO( bad ) )
+    assert len( SubnetFrame.read_csv( StringIO( '' ) ) ) == 0
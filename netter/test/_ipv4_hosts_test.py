@@ -0,0 +1,56 @@
+"""Tests for _ipv4_hosts.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_hosts import subnet_hosts
+from v4._ipv4_hosts import enumerate_hosts
+from v4._ipv4_hosts import write_hosts
+from v4._ipv4_address_set import AddressSet
+from v4._ipv4_calculator import ipv4_to_int
+from io import BytesIO
+from numpy import concatenate
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def hosts_of( *args, **kwargs ) -> list:
+    """Helper function that collects every chunk of enumerate_hosts into one list"""
+    return concatenate( [ [] ] + list( enumerate_hosts( *args, **kwargs ) ) ).astype( int ).tolist()
+
+def test_subnet_hosts():
+    """Tests for subnet_hosts"""
+    # Network ID and broadcast are left out except for /31 and /32
+    assert subnet_hosts( [ ipv4_to_int( '192.168.10.7' ), ipv4_to_int( '10.0.0.1' ), ipv4_to_int( '10.0.0.9' ) ], [ 29, 31, 32 ] ) == AddressSet(
+        ranges=[ ( '192.168.10.1', '192.168.10.6' ), ( '10.0.0.0', '10.0.0.1' ), ( '10.0.0.9', '10.0.0.9' ) ] )
+
+def test_enumerate_hosts():
+    """Tests for enumerate_hosts"""
+    with pytest.raises( ValueError ) as e_info:
+        hosts_of( [ '10.0.0.0/24' ], chunk_size=0 )
+    with pytest.raises( ValueError ) as e_info:
+        hosts_of( [ '10.0.0.0/33' ] )
+    assert hosts_of( [] ) == []
+    # Overlapping subnets give each host once, in address order, in chunks of at most chunk_size
+    expected = list( range( ipv4_to_int( '10.0.0.1' ), ipv4_to_int( '10.0.0.255' ) ) )
+    chunks = list( enumerate_hosts( [ '10.0.0.0/24', '10.0.0.16/28' ], chunk_size=100 ) )
+    assert [ len( chunk ) for chunk in chunks ] == [ 100, 100, 54 ]
+    assert concatenate( chunks ).tolist() == expected
+    # Exclusions as prefixes or an AddressSet
+    excluded = [ '10.0.0.0/25', ( '10.0.0.200', 32 ) ]
+    remaining = [ host for host in expected if host >= ipv4_to_int( '10.0.0.128' ) and host != ipv4_to_int( '10.0.0.200' ) ]
+    assert hosts_of( [ '10.0.0.0/24' ], exclude=excluded ) == remaining
+    assert hosts_of( [ '10.0.0.0/24' ], exclude=AddressSet( prefixes=excluded ) ) == remaining
+    # Shuffled -> a permutation that only depends on the seed, not on the chunking
+    for size in ( 1, 2, 3, 100, 1000 ):
+        hosts = AddressSet( ranges=[ ( 7, 6 + size ) ] )
+        shuffled = hosts_of( hosts, shuffle=True, seed=size, chunk_size=9 )
+        assert sorted( shuffled ) == list( range( 7, 7 + size ) )
+        assert hosts_of( hosts, shuffle=True, seed=size, chunk_size=1000 ) == shuffled
+    shuffled = hosts_of( [ '10.0.0.0/16' ], shuffle=True, seed=1 )
+    assert shuffled != sorted( shuffled ) and shuffled != hosts_of( [ '10.0.0.0/16' ], shuffle=True, seed=2 )
+
+def test_write_hosts():
+    """Tests for write_hosts"""
+    f = BytesIO()
+    assert write_hosts( [ '192.168.10.0/30', '10.0.0.0/31' ], f, chunk_size=1 ) == 4
+    assert f.getvalue() == b'10.0.0.0\n10.0.0.1\n192.168.10.1\n192.168.10.2\n'
@@ -0,0 +1,111 @@
+"""Tests for _ipv4_instrumentation.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+import v4._ipv4_calculator as calculator
+from v4._ipv4_instrumentation import enable_instrumentation
+from v4._ipv4_instrumentation import disable_instrumentation
+from v4._ipv4_instrumentation import is_instrumentation_enabled
+from v4._ipv4_instrumentation import reset_instrumentation
+from v4._ipv4_instrumentation import get_instrumentation_snapshot
+from v4._ipv4_instrumentation import dump_instrumentation
+from v4._ipv4_instrumentation import start_instrumentation_dump
+from v4._ipv4_instrumentation import stop_instrumentation_dump
+from v4._ipv4_calculator import get_subnet_info_given_cidr
+from v4._ipv4_calculator import get_subnet_info_batch
+from v4._ipv4_validator import is_valid_ipv4
+from json import load
+from os.path import dirname
+from os.path import abspath
+from subprocess import run
+from threading import Thread
+import sys
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_instrumentation():
+    """Tests that calls are recorded while enabled, and that disabling restores the original functions"""
+    original = get_subnet_info_given_cidr
+    reset_instrumentation()
+    enable_instrumentation()
+    try:
+        assert is_instrumentation_enabled()
+        # Names imported before enabling are swapped too
+        assert calculator.get_subnet_info_given_cidr is not original
+        assert get_subnet_info_given_cidr.__wrapped__ is original
+        for cidr in ( 24, 24, 31 ): get_subnet_info_given_cidr( '192.168.10.2', cidr )
+        with pytest.raises( ValueError ) as e_info:
+            get_subnet_info_given_cidr( '192.168.10.2', 33 )
+        with pytest.raises( TypeError ) as e_info:
+            get_subnet_info_given_cidr( '192.168.10.2', '24' )
+        get_subnet_info_batch( [ 1, 2, 3 ], [ 8, 8, 32 ] )
+        is_valid_ipv4( '10.0.0.1' )
+        is_valid_ipv4( '10.0.0.256' )
+        functions = get_instrumentation_snapshot()[ 'functions' ]
+    finally:
+        disable_instrumentation()
+    assert not is_instrumentation_enabled()
+    assert get_subnet_info_given_cidr is original and calculator.get_subnet_info_given_cidr is original
+    stats = functions[ 'get_subnet_info_given_cidr' ]
+    assert ( stats[ 'calls' ], stats[ 'failures' ], stats[ 'prefixes' ] ) == ( 5, 2, { 24 : 2, 31 : 1 } )
+    assert 0 < stats[ 'min_us' ] <= stats[ 'p50_us' ] <= stats[ 'p90_us' ] <= stats[ 'p99_us' ] <= stats[ 'max_us' ]
+    assert ( functions[ 'get_subnet_info_batch' ][ 'items' ], functions[ 'get_subnet_info_batch' ][ 'prefixes' ] ) == ( 3, { 8 : 2, 32 : 1 } )
+    assert ( functions[ 'is_valid_ipv4' ][ 'calls' ], functions[ 'is_valid_ipv4' ][ 'failures' ] ) == ( 2, 1 )
+    # Counters survive disabling until reset
+    get_subnet_info_given_cidr( '192.168.10.2', 24 )
+    assert get_instrumentation_snapshot()[ 'functions' ][ 'get_subnet_info_given_cidr' ][ 'calls' ] == 5
+    reset_instrumentation()
+    assert get_instrumentation_snapshot()[ 'functions' ] == {}
+
+def test_instrumentation_threads():
+    """Tests that enabling and disabling from several threads at once always leaves the functions consistent"""
+    original = get_subnet_info_given_cidr
+    def toggle():
+        for _ in range( 20 ):
+            enable_instrumentation()
+            disable_instrumentation()
+    threads = [ Thread( target=toggle ) for _ in range( 4 ) ]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert calculator.get_subnet_info_given_cidr is original
+    enable_instrumentation()
+    assert calculator.get_subnet_info_given_cidr is not original
+    disable_instrumentation()
+    reset_instrumentation()
+    assert calculator.get_subnet_info_given_cidr is original
+
+def test_instrumentation_dump( tmp_path ):
+    """Tests the JSON dumps, periodic and configured through the environment"""
+    reset_instrumentation()
+    enable_instrumentation()
+    try:
+        get_subnet_info_given_cidr( '10.0.0.1', 8 )
+        dump_instrumentation( tmp_path / 'snapshot.json' )
+        with pytest.raises( ValueError ) as e_info:
+            start_instrumentation_dump( tmp_path / 'periodic.json', 0 )
+        start_instrumentation_dump( tmp_path / 'periodic.json', 3600 )
+        get_subnet_info_given_cidr( '10.0.0.1', 8 )
+        # Stopping writes a final snapshot
+        stop_instrumentation_dump()
+    finally:
+        disable_instrumentation()
+        reset_instrumentation()
+    with open( tmp_path / 'snapshot.json' ) as f:
+        assert load( f )[ 'functions' ][ 'get_subnet_info_given_cidr' ][ 'prefixes' ] == { '8' : 1 }
+    with open( tmp_path / 'periodic.json' ) as f:
+        assert load( f )[ 'functions' ][ 'get_subnet_info_given_cidr' ][ 'calls' ] == 2
+    # NETTER_INSTRUMENT enables instrumentation on import, NETTER_INSTRUMENT_DUMP writes the snapshot at exit
+    env = { 'NETTER_INSTRUMENT' : '1', 'NETTER_INSTRUMENT_DUMP' : str( tmp_path / 'env.json' ), 'PYTHONPATH' : dirname( dirname( abspath( __file__ ) ) ) }
+    code = 'from v4._ipv4_calculator import netmask_to_cidr; netmask_to_cidr( "255.255.255.0" )'
+    run( [ sys.executable, '-c', code ], env=env, check=True )
+    with open( tmp_path / 'env.json' ) as f:
+        assert load( f )[ 'functions' ][ 'netmask_to_cidr' ][ 'prefixes' ] == { '24' : 1 }
+    # An invalid interval only warns, the import still succeeds and the snapshot is still written at exit
+    env[ 'NETTER_INSTRUMENT_INTERVAL' ] = 'often'
+    env[ 'NETTER_INSTRUMENT_DUMP' ] = str( tmp_path / 'fallback.json' )
+    result = run( [ sys.executable, '-c', code ], env=env, capture_output=True, text=True )
+    assert result.returncode == 0
+    assert 'RuntimeWarning' in result.stderr and 'often' in result.stderr
+    with open( tmp_path / 'fallback.json' ) as f:
+        assert load( f )[ 'functions' ][ 'netmask_to_cidr' ][ 'calls' ] == 1
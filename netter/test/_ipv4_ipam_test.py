@@ -0,0 +1,133 @@
+"""Tests for _ipv4_ipam.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_ipam import AddressPool
+from v4._ipv4_calculator import parse_prefix
+from v4._ipv4_address_set import AddressSet
+from threading import Thread
+from random import Random
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _check_pool( pool: AddressPool, parents: list ) -> None:
+    """Helper function that checks that free, allocated and reserved blocks tile the parents and no free buddies are left"""
+    blocks = pool.free_blocks() + pool.allocations() + pool.reservations()
+    assert AddressSet( prefixes=blocks ) == AddressSet( prefixes=parents )
+    assert sum( 1 << ( 32 - parse_prefix( block )[1] ) for block in blocks ) == pool.stats()[ 'parent_addresses' ]
+    free = { parse_prefix( block ) for block in pool.free_blocks() }
+    for network, cidr in free:
+        if cidr > max( parent_cidr for parent, parent_cidr in map( parse_prefix, parents ) if parent <= network ):
+            assert ( network ^ ( 1 << ( 32 - cidr ) ), cidr ) not in free
+
+def test_address_pool():
+    """Tests allocating, reserving and releasing blocks and hosts"""
+    pool = AddressPool( [ '10.0.0.0/24' ] )
+    assert [ pool.allocate( 30 ), pool.allocate( 30 ), pool.allocate( 28 ) ] == [ '10.0.0.0/30', '10.0.0.4/30', '10.0.0.16/28' ]
+    pool.release( '10.0.0.0/30' )
+    assert pool.allocate( 30 ) == '10.0.0.0/30'
+    assert pool.allocate_host() == '10.0.0.8'
+    assert '10.0.0.8/32' in pool and '10.0.0.9/32' not in pool
+    # Reserved blocks are skipped, and can be released like allocations
+    pool.reserve( '10.0.0.128/25' )
+    with pytest.raises( ValueError ) as e_info:
+        pool.allocate( 25 )
+    with pytest.raises( ValueError ) as e_info:
+        pool.reserve( '10.0.0.0/29' )
+    with pytest.raises( ValueError ) as e_info:
+        pool.reserve( '10.0.1.0/30' )
+    pool.release( '10.0.0.128/25' )
+    with pytest.raises( KeyError ) as e_info:
+        pool.release( '10.0.0.128/25' )
+    assert pool.stats() == { 'parent_addresses' : 256, 'allocated_addresses' : 25, 'reserved_addresses' : 0, 'free_addresses' : 231,
+                             'free_blocks' : { 25 : 1, 26 : 1, 27 : 1, 30 : 1, 31 : 1, 32 : 1 } }
+    # Releasing everything merges the free space back into the parent
+    for prefix in pool.allocations(): pool.release( prefix )
+    assert pool.free_blocks() == [ '10.0.0.0/24' ]
+    # Hosts skip the network IDs and broadcast addresses of their parents, /31 parents have neither
+    pool = AddressPool( [ '10.0.0.0/30', '10.0.0.4/31' ] )
+    assert [ pool.allocate_host() for _ in range( 4 ) ] == [ '10.0.0.4', '10.0.0.5', '10.0.0.1', '10.0.0.2' ]
+    with pytest.raises( ValueError ) as e_info:
+        pool.allocate_host()
+    assert pool.reservations() == [ '10.0.0.0/32', '10.0.0.3/32' ]
+    # Invalid input
+    with pytest.raises( ValueError ) as e_info:
+        AddressPool( [ '10.0.0.0/8', '10.1.0.0/16' ] )
+    with pytest.raises( TypeError ) as e_info:
+        pool.allocate( '30' )
+    with pytest.raises( ValueError ) as e_info:
+        pool.allocate( 33 )
+
+def test_address_pool_random():
+    """Tests that random allocations, reservations and releases keep the free lists consistent"""
+    parents = [ '10.0.0.0/20', '192.168.0.0/23' ]
+    pool = AddressPool( parents )
+    rng = Random( 25 )
+    used = []
+    for step in range( 3000 ):
+        r = rng.random()
+        try:
+            if r < 0.45:
+                used.append( pool.allocate( rng.randint( 22, 32 ) ) )
+            elif r < 0.5:
+                used.append( pool.allocate_host() + '/32' )
+            elif r < 0.55:
+                prefix = ( 0x0A000000 + rng.randrange( 1 << 12 ), rng.randint( 24, 32 ) )
+                pool.reserve( prefix )
+                used.append( prefix )
+            elif used:
+                pool.release( used.pop( rng.randrange( len( used ) ) ) )
+        except ValueError:
+            pass
+        if step % 500 == 0: _check_pool( pool, parents )
+    _check_pool( pool, parents )
+
+def test_address_pool_threads():
+    """Tests that concurrent allocations never hand out the same block twice"""
+    pool = AddressPool( [ '10.0.0.0/16' ] )
+    results = [ [] for _ in range( 8 ) ]
+    def worker( out: list ):
+        for i in range( 500 ):
+            out.append( pool.allocate( 30 ) )
+            if i % 5 == 0: pool.release( out.pop() )
+    threads = [ Thread( target=worker, args=( out, ) ) for out in results ]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    allocated = [ prefix for out in results for prefix in out ]
+    assert len( set( allocated ) ) == len( allocated ) == len( pool.allocations() )
+    _check_pool( pool, [ '10.0.0.0/16' ] )
+
+def test_address_pool_save_threads( tmp_path ):
+    """Tests that concurrent saves leave a complete, up to date snapshot and no temp files behind"""
+    pool = AddressPool( [ '10.0.0.0/16' ] )
+    path = tmp_path / 'pool.json'
+    errors = []
+    def worker():
+        try:
+            for _ in range( 50 ):
+                pool.allocate( 30 )
+                pool.save( path )
+        except Exception as e:
+            errors.append( e )
+    threads = [ Thread( target=worker ) for _ in range( 4 ) ]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert errors == []
+    assert AddressPool.load( path ).allocations() == pool.allocations()
+    assert [ child.name for child in tmp_path.iterdir() ] == [ 'pool.json' ]
+
+def test_address_pool_snapshot( tmp_path ):
+    """Tests saving a pool to disk and loading it back"""
+    pool = AddressPool( [ '10.0.0.0/16', '172.16.0.0/24' ] )
+    # The smallest parent that fits is split first
+    assert [ pool.allocate( cidr ) for cidr in ( 30, 29, 28, 30 ) ] == [ '172.16.0.0/30', '172.16.0.8/29', '172.16.0.16/28', '172.16.0.4/30' ]
+    pool.reserve( '172.16.0.200/32' )
+    pool.release( '172.16.0.8/29' )
+    pool.save( tmp_path / 'pool.json' )
+    loaded = AddressPool.load( tmp_path / 'pool.json' )
+    assert ( loaded.allocations(), loaded.reservations(), loaded.free_blocks() ) == ( pool.allocations(), pool.reservations(), pool.free_blocks() )
+    assert loaded.allocate( 30 ) == pool.allocate( 30 )
+    ( tmp_path / 'bad.json' ).write_text( '{}' )
+    with pytest.raises( ValueError ) as e_info:
+        AddressPool.load( tmp_path / 'bad.json' )
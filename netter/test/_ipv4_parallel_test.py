@@ -0,0 +1,62 @@
+"""Tests for _ipv4_parallel.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_parallel import get_subnet_info_parallel
+from v4._ipv4_parallel import imap_ordered
+from v4._ipv4_calculator import get_subnet_info_batch
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from numpy.random import default_rng
+from numpy import array_equal
+from operator import truediv
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_get_subnet_info_parallel():
+    """Tests that get_subnet_info_parallel matches get_subnet_info_batch"""
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_parallel( [ 0, 2**32 ], 24, workers=2, shard_size=1 )
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_parallel( [ 0 ], 33 )
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_parallel( [ 0 ], 24, workers=0 )
+    with pytest.raises( TypeError ) as e_info:
+        get_subnet_info_parallel( [ 0 ], 24, shard_size=1.5 )
+    rng = default_rng( 11 )
+    ipv4s = rng.integers( 0, 2**32, 10007 )
+    cidrs = rng.integers( 0, 33, 10007 )
+    expected = get_subnet_info_batch( ipv4s, cidrs )
+    # Uneven shards on a new pool, on a reused pool and in process
+    with ProcessPoolExecutor( 2 ) as executor:
+        results = [
+            get_subnet_info_parallel( ipv4s, cidrs, workers=2, shard_size=1000 ),
+            get_subnet_info_parallel( ipv4s, cidrs, shard_size=3333, executor=executor ),
+            get_subnet_info_parallel( ipv4s, cidrs, workers=1 )
+        ]
+    for info in results:
+        assert info.keys() == expected.keys()
+        for key in expected:
+            assert info[ key ].dtype == expected[ key ].dtype
+            assert array_equal( info[ key ], expected[ key ] )
+    # A single CIDR value is broadcast over every address
+    info = get_subnet_info_parallel( ipv4s, 24, workers=2, shard_size=4096 )
+    assert array_equal( info[ 'network_id' ], get_subnet_info_batch( ipv4s, 24 )[ 'network_id' ] )
+
+def test_imap_ordered():
+    """Tests for imap_ordered"""
+    with ThreadPoolExecutor( 4 ) as executor:
+        assert list( imap_ordered( executor, truediv, ( ( i, 2 ) for i in range( 100 ) ), window=3 ) ) == [ i / 2 for i in range( 100 ) ]
+        # Only window tasks are consumed ahead of the results
+        consumed = []
+        def args():
+            for i in range( 100 ):
+                consumed.append( i )
+                yield ( i, 1 )
+        results = imap_ordered( executor, truediv, args(), window=3 )
+        next( results )
+        assert len( consumed ) == 4
+        results.close()
+        with pytest.raises( ZeroDivisionError ) as e_info:
+            list( imap_ordered( executor, truediv, [ ( 1, 1 ), ( 1, 0 ) ], window=2 ) )
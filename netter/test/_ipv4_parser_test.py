@@ -0,0 +1,80 @@
+"""Tests for _ipv4_parser.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_parser import parse_ipv4_lines
+from v4._ipv4_parser import parse_ipv4_file
+from v4._ipv4_parser import format_ipv4_lines
+from v4._ipv4_parser import format_ipv4_into
+from v4._ipv4_parser import format_ipv4_batch
+from v4._ipv4_parser import write_ipv4_lines
+from v4._ipv4_validator import is_valid_ipv4
+from v4._ipv4_calculator import parse_addr_str
+from v4._ipv4_calculator import addr_to_int
+from v4._ipv4_calculator import int_to_addr_str
+from io import BytesIO
+from numpy.random import default_rng
+from numpy import array_equal
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_parse_ipv4_lines():
+    """Tests that the bulk parser agrees with is_valid_ipv4/parse_addr_str on every line"""
+    with pytest.raises( TypeError ) as e_info:
+        parse_ipv4_lines( b'', block_size=1.5 )
+    with pytest.raises( ValueError ) as e_info:
+        parse_ipv4_lines( b'', block_size=0 )
+    rng = default_rng( 15 )
+    octets = [ '0', '1', '9', '10', '99', '100', '199', '200', '249', '250', '255', '256', '999', '1000', '01', '00', '' ]
+    lines = [ '.'.join( rng.choice( octets, size=rng.choice( [ 3, 4, 4, 4, 5 ] ) ) ) for _ in range( 2000 ) ]
+    lines += [ '', '1.2.3.4 ', ' 1.2.3.4', '1.2.3.4.', '.1.2.3.4', '1..2.3', '1.2.3.4/24', '123.123.123.1234', '1.2.3.a', '000000000001.2.3.4' ]
+    data = '\r\n'.join( lines ).encode()
+    expected = [ addr_to_int( parse_addr_str( line ) ) if is_valid_ipv4( line ) else 0 for line in lines ]
+    # Tiny blocks exercise lines that span block boundaries
+    for block_size in ( 1, 13, 1 << 18 ):
+        ipv4s, valid = parse_ipv4_lines( memoryview( data ), block_size )
+        assert ipv4s.tolist() == expected
+        assert valid.tolist() == [ bool( is_valid_ipv4( line ) ) for line in lines ]
+    # Trailing newline, str input, empty input
+    ipv4s, valid = parse_ipv4_lines( '0.0.0.0\n255.255.255.255\n' )
+    assert ipv4s.tolist() == [ 0, 2**32 - 1 ] and valid.all()
+    assert parse_ipv4_lines( b'\n' )[1].tolist() == [ False ]
+    assert len( parse_ipv4_lines( b'' )[0] ) == 0
+
+def test_parse_ipv4_file( tmp_path ):
+    """Tests for parse_ipv4_file"""
+    source = tmp_path / 'addresses.txt'
+    source.write_bytes( b'' )
+    assert len( parse_ipv4_file( source )[0] ) == 0
+    source.write_bytes( b'192.168.10.1\nbad\n10.0.0.1' )
+    ipv4s, valid = parse_ipv4_file( source, block_size=8 )
+    assert ipv4s.tolist() == [ 3232238081, 0, 167772161 ]
+    assert valid.tolist() == [ True, False, True ]
+
+def test_format_ipv4_lines():
+    """Tests that the bulk formatters agree with int_to_addr_str"""
+    rng = default_rng( 16 )
+    ipv4s = rng.integers( 0, 2**32, size=1000, dtype='uint64' ).astype( 'uint32' )
+    ipv4s[ :4 ] = [ 0, 2**32 - 1, 10, 3232238081 ]
+    expected = [ int_to_addr_str( ipv4 ) for ipv4 in ipv4s.tolist() ]
+    assert format_ipv4_batch( ipv4s ) == expected
+    text = ''.join( addr + '\n' for addr in expected ).encode()
+    assert format_ipv4_lines( ipv4s ) == text
+    assert format_ipv4_lines( ipv4s[ :2 ], ',' ) == b'0.0.0.0,255.255.255.255,'
+    assert format_ipv4_lines( [] ) == b''
+    with pytest.raises( ValueError ) as e_info:
+        format_ipv4_lines( ipv4s, '\r\n' )
+    # Round trip through the parser
+    assert array_equal( parse_ipv4_lines( text )[0], ipv4s )
+    # Into a preallocated buffer, only the formatted bytes are touched
+    buffer = bytearray( b'#' * 32 )
+    assert format_ipv4_into( [ 3232238081 ], buffer, 2 ) == 13
+    assert buffer == b'##192.168.10.1\n' + b'#' * 17
+    with pytest.raises( ValueError ) as e_info:
+        format_ipv4_into( ipv4s, buffer )
+    # To a file, in chunks
+    f = BytesIO()
+    assert write_ipv4_lines( ipv4s, f, chunk_size=7 ) == len( text )
+    assert f.getvalue() == text
+    assert write_ipv4_lines( [], f ) == 0
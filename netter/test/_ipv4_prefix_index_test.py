@@ -0,0 +1,132 @@
+"""Tests for _ipv4_prefix_index.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_prefix_index import PrefixIndex
+from v4._ipv4_calculator import parse_prefix
+from v4._ipv4_calculator import cidr_to_mask_int
+from numpy.random import default_rng
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _brute_force_lookup( table: dict, ipv4: int ):
+    """Helper function that finds the longest matching prefix by trying every CIDR value from /32 down to /0"""
+    for cidr in range( 32, -1, -1 ):
+        key = ( ipv4 & cidr_to_mask_int( cidr ), cidr )
+        if key in table: return table[ key ]
+    return None
+
+def test_prefix_index_lookup():
+    """Tests for PrefixIndex.lookup/lookup_prefix"""
+    index = PrefixIndex( [ ( '10.0.0.0/8', 'corp' ), ( '10.20.0.0/16', 'lab' ), ( ( '10.20.30.0', 24 ), 'rack' ), ( '10.20.0.0/16', 'lab2' ) ] )
+    # Test that duplicate prefixes keep the last payload
+    assert len( index ) == 3
+    assert index.lookup( '10.20.30.40' ) == 'rack'
+    assert index.lookup( '10.20.31.40' ) == 'lab2'
+    assert index.lookup( '10.21.0.0' ) == 'corp'
+    assert index.lookup( '11.0.0.0' ) is None
+    assert index.lookup_prefix( '10.20.31.40' ) == parse_prefix( '10.20.0.0/16' )
+    assert index.lookup_prefix( '9.255.255.255' ) is None
+    assert list( index ) == [ ( '10.0.0.0/8', 'corp' ), ( '10.20.0.0/16', 'lab2' ), ( '10.20.30.0/24', 'rack' ) ]
+    # Test the default route and host routes at both ends of the address space
+    index = PrefixIndex( [ ( '0.0.0.0/0', 'default' ), ( '0.0.0.0/32', 'first' ), ( '255.255.255.255/32', 'last' ) ] )
+    assert index.lookup( 0 ) == 'first'
+    assert index.lookup( 1 ) == 'default'
+    assert index.lookup( 2**32 - 2 ) == 'default'
+    assert index.lookup( 2**32 - 1 ) == 'last'
+    # Test invalid input
+    with pytest.raises( ValueError ) as e_info:
+        index.lookup( '256.0.0.0' )
+    with pytest.raises( ValueError ) as e_info:
+        PrefixIndex( [ ( '10.0.0.0/33', 'bad' ) ] )
+    assert PrefixIndex().lookup( '10.0.0.1' ) is None
+
+def test_prefix_index_batch():
+    """Tests for PrefixIndex.from_arrays/lookup_batch against a brute force search"""
+    rng = default_rng( 5 )
+    # Cluster the prefixes into a few /8s so that they nest
+    networks = ( rng.integers( 0, 4, 2000 ) << 24 ) | rng.integers( 0, 2**24, 2000 )
+    cidrs = rng.integers( 0, 33, 2000 )
+    index = PrefixIndex.from_arrays( networks, cidrs )
+    table = {}
+    for row, ( network, cidr ) in enumerate( zip( networks.tolist(), cidrs.tolist() ) ):
+        table[ parse_prefix( ( network, cidr ) ) ] = row
+    ipv4s = ( rng.integers( 0, 5, 5000 ) << 24 ) | rng.integers( 0, 2**24, 5000 )
+    assert list( index.lookup_batch( ipv4s ) ) == [ _brute_force_lookup( table, ipv4 ) for ipv4 in ipv4s.tolist() ]
+    # Test that the matched prefixes contain the addresses
+    networks, cidrs = index.lookup_prefixes( ipv4s )
+    for ipv4, network, cidr in zip( ipv4s.tolist(), networks.tolist(), cidrs.tolist() ):
+        assert ( cidr == -1 and network == 0 ) or parse_prefix( ( ipv4, cidr ) ) == ( network, cidr )
+    # Test mismatched columns and out of range values
+    with pytest.raises( ValueError ) as e_info:
+        PrefixIndex.from_arrays( [ 0, 1 ], [ 8 ] )
+    with pytest.raises( ValueError ) as e_info:
+        PrefixIndex.from_arrays( [ 2**32 ], [ 8 ] )
+    with pytest.raises( ValueError ) as e_info:
+        index.lookup_batch( [ -1 ] )
+
+def test_prefix_index_updates():
+    """Tests for PrefixIndex.add/remove/replace/batch/snapshot"""
+    index = PrefixIndex( [ ( '10.0.0.0/8', 'corp' ), ( '10.20.0.0/16', 'lab' ), ( '10.20.30.0/24', 'rack' ) ] )
+    frozen = index.snapshot()
+    # Test withdrawing a base prefix -> falls back to the closest remaining parent
+    index.remove( '10.20.0.0/16' )
+    assert index.lookup( '10.20.31.1' ) == 'corp'
+    assert index.lookup( '10.20.30.1' ) == 'rack'
+    index.remove( '10.0.0.0/8' )
+    assert index.lookup( '10.20.31.1' ) is None
+    assert index.lookup( '10.20.30.1' ) == 'rack'
+    # Test announcing new and previously withdrawn prefixes
+    index.add( '10.20.0.0/16', 'lab-again' )
+    index.add( '10.20.30.128/25', 'half-rack' )
+    assert index.lookup( '10.20.31.1' ) == 'lab-again'
+    assert index.lookup( '10.20.30.200' ) == 'half-rack'
+    assert index.lookup_prefix( '10.20.30.1' ) == parse_prefix( '10.20.30.0/24' )
+    # Test replacing payloads of base and added prefixes
+    index.replace( '10.20.30.0/24', 'rack-2' )
+    index.replace( '10.20.30.128/25', 'half-rack-2' )
+    assert list( index ) == [ ( '10.20.0.0/16', 'lab-again' ), ( '10.20.30.0/24', 'rack-2' ), ( '10.20.30.128/25', 'half-rack-2' ) ]
+    assert '10.20.30.128/25' in index
+    assert '10.0.0.0/8' not in index
+    # Test missing prefixes
+    with pytest.raises( KeyError ) as e_info:
+        index.remove( '10.0.0.0/8' )
+    with pytest.raises( KeyError ) as e_info:
+        index.replace( '192.168.0.0/16', 'missing' )
+    # Test that a failed batch applies none of its changes
+    with pytest.raises( KeyError ) as e_info:
+        with index.batch() as changes:
+            changes.add( '192.168.0.0/16', 'home' )
+            changes.remove( '172.16.0.0/12' )
+    assert index.lookup( '192.168.1.1' ) is None
+    # Test that the snapshot taken before any updates is unaffected
+    assert frozen.lookup( '10.20.31.1' ) == 'lab'
+    assert len( frozen ) == 3
+    # Test that compaction doesn't change the contents
+    before = list( index )
+    index.compact()
+    assert list( index ) == before
+    assert len( index ) == 3
+
+@pytest.mark.parametrize( 'max_delta', [ 16, 10**6 ] )
+def test_prefix_index_churn( max_delta ):
+    """Tests random updates with frequent or no compaction against a brute force search"""
+    rng = default_rng( 7 )
+    # Draw from a small pool of prefixes so that the same prefixes are withdrawn and re-added, in the base table too
+    random_key = lambda: parse_prefix( ( int( rng.integers( 0, 2**4 ) ) << 28, int( rng.integers( 0, 33 ) ) ) )
+    table = { random_key() : -i for i in range( 50 ) }
+    index = PrefixIndex( table.items(), max_delta=max_delta )
+    for step in range(600):
+        key = random_key()
+        if table and step % 3 == 0:
+            key = list( table )[ int( rng.integers( 0, len( table ) ) ) ]
+            index.remove( key )
+            del table[ key ]
+        else:
+            index.add( key, step )
+            table[ key ] = step
+    assert len( index ) == len( table )
+    ipv4s = rng.integers( 0, 2**32, 3000 )
+    ipv4s[ :len( table ) ] = [ key[0] for key in table ][ :3000 ]
+    assert list( index.lookup_batch( ipv4s ) ) == [ _brute_force_lookup( table, ipv4 ) for ipv4 in ipv4s.tolist() ]
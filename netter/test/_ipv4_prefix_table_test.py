@@ -0,0 +1,51 @@
+"""Tests for _ipv4_prefix_table.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_prefix_table import PREFIX_MASK_INT
+from v4._ipv4_prefix_table import PREFIX_MASK_STR
+from v4._ipv4_prefix_table import PREFIX_WILDCARD_STR
+from v4._ipv4_prefix_table import PREFIX_USABLE_HOSTS
+from v4._ipv4_prefix_table import PREFIX_CLASS
+from v4._ipv4_prefix_table import PREFIX_NUM_SUBNETS
+from v4._ipv4_prefix_table import MASK_STR_TO_PREFIX
+from v4._ipv4_prefix_table import MASK_INT_TO_PREFIX
+from v4._ipv4_prefix_table import MASK_INT_ARRAY
+from v4._ipv4_prefix_table import USABLE_HOSTS_ARRAY
+from v4._ipv4_prefix_table import CLASS_ARRAY
+from v4._ipv4_validator import CIDR_DICT
+from v4._ipv4_calculator import get_num_subnets
+from v4._ipv4_calculator import get_subnet_class
+from v4._ipv4_calculator import parse_addr_str
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_prefix_dicts():
+    """Tests for the per-prefix dicts"""
+    # Test that the generated masks match the hand-written CIDR dictionary
+    assert PREFIX_MASK_STR == CIDR_DICT
+    # Test that the dicts agree with the octet-based calculator functions
+    for cidr, mask_str in CIDR_DICT.items():
+        assert PREFIX_CLASS[ cidr ] == get_subnet_class( parse_addr_str( mask_str ) )
+        assert PREFIX_NUM_SUBNETS[ cidr ] == get_num_subnets( parse_addr_str( mask_str ) )
+    # Spot check wildcards and host counts
+    assert PREFIX_WILDCARD_STR[ 0 ] == '255.255.255.255'
+    assert PREFIX_WILDCARD_STR[ 20 ] == '0.0.15.255'
+    assert PREFIX_USABLE_HOSTS[ 0 ] == 4294967294
+    assert PREFIX_USABLE_HOSTS[ 24 ] == 254
+    assert PREFIX_USABLE_HOSTS[ 31 ] == 2
+    assert PREFIX_USABLE_HOSTS[ 32 ] == 1
+
+def test_reverse_lookups():
+    """Tests for the mask -> prefix dicts"""
+    for cidr in range(33):
+        assert MASK_STR_TO_PREFIX[ PREFIX_MASK_STR[ cidr ] ] == cidr
+        assert MASK_INT_TO_PREFIX[ PREFIX_MASK_INT[ cidr ] ] == cidr
+    assert '254.255.255.0' not in MASK_STR_TO_PREFIX
+
+def test_prefix_arrays():
+    """Tests for the NumPy prefix arrays"""
+    assert len( MASK_INT_ARRAY ) == 33
+    assert list( MASK_INT_ARRAY ) == [ PREFIX_MASK_INT[ cidr ] for cidr in range(33) ]
+    assert list( USABLE_HOSTS_ARRAY ) == [ PREFIX_USABLE_HOSTS[ cidr ] for cidr in range(33) ]
+    assert list( CLASS_ARRAY[ [ 0, 8, 16, 24, 32 ] ] ) == [ 'none', 'A', 'B', 'C', 'C' ]
@@ -0,0 +1,142 @@
+"""Tests for _ipv4_service.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_service import MicroBatcher
+from v4._ipv4_service import start_server
+from v4._ipv4_service import load_test
+from v4._ipv4_service import BAD_LINE_LENGTH_ERROR
+from v4._ipv4_calculator import get_subnet_info_given_cidr
+from v4._ipv4_calculator import SCALAR_ROWS_LIMIT
+from json import loads
+import v4._ipv4_calculator
+import v4._ipv4_service
+import asyncio
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_micro_batcher():
+    """Tests that concurrent requests are coalesced and each caller gets its own answer"""
+    with pytest.raises( ValueError ) as e_info:
+        MicroBatcher( max_batch_size=0 )
+    async def run():
+        batcher = MicroBatcher( max_batch_size=8, max_delay=0.05, max_pending=4 )
+        await batcher.start()
+        requests = [ '10.{}.0.1/{}'.format( i, 8 + i % 25 ) for i in range( 50 ) ] + [ 'bad' ]
+        futures = [ await batcher.submit( request ) for request in requests ]
+        results = await asyncio.gather( *futures )
+        stats = batcher.stats()
+        await batcher.stop()
+        return results, stats
+    results, stats = asyncio.run( run() )
+    assert results[ :-1 ] == [ get_subnet_info_given_cidr( '10.{}.0.1'.format( i ), 8 + i % 25 ) for i in range( 50 ) ]
+    assert 'error' in results[ -1 ]
+    # The invalid request is never queued, and no batch exceeds max_batch_size
+    assert stats[ 'requests' ] == 50
+    assert 50 / 8 <= stats[ 'batches' ] < 50
+
+def test_micro_batcher_vectorized( monkeypatch ):
+    """Tests that batches over SCALAR_ROWS_LIMIT are computed by the vectorized pass"""
+    sizes = []
+    def get_subnet_info_batch( ipv4s, cidrs ):
+        sizes.append( len( cidrs ) )
+        return get_subnet_info_batch_original( ipv4s, cidrs )
+    get_subnet_info_batch_original = v4._ipv4_calculator.get_subnet_info_batch
+    monkeypatch.setattr( v4._ipv4_calculator, 'get_subnet_info_batch', get_subnet_info_batch )
+    count = SCALAR_ROWS_LIMIT * 4
+    async def run():
+        batcher = MicroBatcher( max_batch_size=count, max_delay=1 )
+        await batcher.start()
+        results = await asyncio.gather( *[ await batcher.submit( '10.0.{}.1/{}'.format( i, 8 + i % 25 ) ) for i in range( count ) ] )
+        await batcher.stop()
+        return results
+    results = asyncio.run( run() )
+    assert results == [ get_subnet_info_given_cidr( '10.0.{}.1'.format( i ), 8 + i % 25 ) for i in range( count ) ]
+    assert sizes == [ count ]
+
+def test_server():
+    """Tests the TCP service end to end with pipelined requests from concurrent connections"""
+    async def run():
+        server, batcher = await start_server( port=0, max_in_flight=4, max_batch_size=64, max_delay=0.001 )
+        port = server.sockets[0].getsockname()[1]
+        async def client( lines ):
+            reader, writer = await asyncio.open_connection( '127.0.0.1', port )
+            writer.write( ''.join( line + '\n' for line in lines ).encode() )
+            writer.write_eof()
+            responses = [ loads( line ) for line in ( await reader.read() ).decode().splitlines() ]
+            writer.close()
+            return responses
+        clients = [ [ '172.16.{}.{} 255.255.0.0'.format( c, i ) for i in range( 100 ) ] + [ '', '1.2.3.4/33', 'x' * 300 ] for c in range( 5 ) ]
+        results = await asyncio.gather( *( client( lines ) for lines in clients ) )
+        report = await load_test( port=port, requests=500, connections=3, pipeline=8 )
+        server.close()
+        await server.wait_closed()
+        await batcher.stop()
+        return results, report
+    results, report = asyncio.run( run() )
+    for c, responses in enumerate( results ):
+        assert len( responses ) == 102
+        assert responses[ :100 ] == [ get_subnet_info_given_cidr( '172.16.{}.{}'.format( c, i ), 16 ) for i in range( 100 ) ]
+        assert [ list( response ) for response in responses[ 100: ] ] == [ [ 'error' ], [ 'error' ] ]
+    assert report[ 'requests' ] == 500
+    assert report[ 'errors' ] == 0
+    assert 0 < report[ 'p50_ms' ] <= report[ 'p99_ms' ] <= report[ 'max_ms' ]
+
+def test_server_overlong_lines():
+    """Tests that requests too long to buffer are answered with errors and the connection keeps going"""
+    async def run():
+        server, batcher = await start_server( port=0, max_delay=0.001 )
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection( '127.0.0.1', port )
+        writer.write( ( 'x' * 5000 + '\n10.0.0.1/24\n' + '1' * 300 + '\n10.0.0.2/24\n' + 'y' * 5000 ).encode() )
+        writer.write_eof()
+        responses = [ loads( line ) for line in ( await asyncio.wait_for( reader.read(), 5 ) ).decode().splitlines() ]
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        await batcher.stop()
+        return responses
+    error = { 'error' : BAD_LINE_LENGTH_ERROR }
+    assert asyncio.run( run() ) == [ error, get_subnet_info_given_cidr( '10.0.0.1', 24 ), error, get_subnet_info_given_cidr( '10.0.0.2', 24 ), error ]
+
+def test_micro_batcher_errors( monkeypatch ):
+    """Tests that a failed batch answers its callers with errors and the batcher keeps running"""
+    calls = []
+    def get_subnet_info_rows( *columns ):
+        calls.append( columns )
+        if len( calls ) == 1: raise MemoryError( 'out of memory' )
+        return get_subnet_info_rows_original( *columns )
+    get_subnet_info_rows_original = v4._ipv4_service.get_subnet_info_rows
+    monkeypatch.setattr( v4._ipv4_service, 'get_subnet_info_rows', get_subnet_info_rows )
+    async def run():
+        batcher = MicroBatcher( max_delay=0.01 )
+        await batcher.start()
+        failed = await asyncio.gather( *[ await batcher.submit( '10.0.0.{}/24'.format( i ) ) for i in range( 3 ) ] )
+        answered = await ( await batcher.submit( '10.0.0.1/24' ) )
+        await batcher.stop()
+        return failed, answered
+    failed, answered = asyncio.run( run() )
+    assert failed == [ { 'error' : 'out of memory' } ] * 3
+    assert answered == get_subnet_info_given_cidr( '10.0.0.1', 24 )
+
+def test_server_stop():
+    """Tests that requests cancelled by stopping the batcher are answered with errors and the connection is closed"""
+    async def run():
+        # The batch never fills and its delay never runs out, so nothing is answered before stop() and later requests are refused
+        server, batcher = await start_server( port=0, max_in_flight=2, max_batch_size=64, max_delay=60 )
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection( '127.0.0.1', port )
+        writer.write( ''.join( '10.0.0.{}/24\n'.format( i ) for i in range( 8 ) ).encode() )
+        await asyncio.sleep( 0.1 )
+        await batcher.stop()
+        responses = [ loads( await asyncio.wait_for( reader.readline(), 5 ) ) for _ in range( 8 ) ]
+        writer.write_eof()
+        closed = await asyncio.wait_for( reader.read(), 5 )
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses, closed
+    responses, closed = asyncio.run( run() )
+    assert closed == b''
+    assert all( list( response ) == [ 'error' ] for response in responses )
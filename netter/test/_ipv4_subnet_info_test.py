@@ -0,0 +1,59 @@
+"""Tests for _ipv4_subnet_info.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_subnet_info import SubnetInfo
+from v4._ipv4_calculator import get_subnet_info_given_mask
+from v4._ipv4_calculator import get_subnet_info_given_cidr
+from v4._ipv4_calculator import get_subnet_info_rows
+from numpy.random import default_rng
+from pickle import dumps
+from pickle import loads
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_subnet_info():
+    """Tests that SubnetInfo has the same fields as the subnet information dicts"""
+    with pytest.raises( TypeError ) as e_info:
+        SubnetInfo.from_cidr( '10.0.0.1', '24' )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetInfo.from_cidr( '10.0.0.1', 33 )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetInfo.from_cidr( '10.0.0.256', 24 )
+    with pytest.raises( ValueError ) as e_info:
+        SubnetInfo.from_mask( '10.0.0.1', '255.0.255.0' )
+    info = SubnetInfo.from_mask( '192.168.10.2', '255.255.255.0' )
+    assert info.to_dict() == get_subnet_info_given_mask( '192.168.10.2', '255.255.255.0' )
+    assert ( info.network_int, info.broadcast_int ) == ( 3232238080, 3232238335 )
+    assert info[ 'first_host' ] == '192.168.10.1'
+    with pytest.raises( KeyError ) as e_info:
+        info[ 'network_int' ]
+    # Address fields are cached once formatted
+    assert info.network_id is info.network_id
+    for cidr in range( 33 ):
+        for ipv4_str in ( '0.0.0.0', '10.1.2.3', '255.255.255.255' ):
+            assert SubnetInfo.from_cidr( ipv4_str, cidr ).to_dict() == get_subnet_info_given_cidr( ipv4_str, cidr )
+    assert repr( info ) == 'SubnetInfo(\'192.168.10.2/24\')'
+    assert loads( dumps( info ) ).to_dict() == info.to_dict()
+
+def test_subnet_info_equality():
+    """Tests that results compare and hash by (network ID, CIDR)"""
+    same = [ SubnetInfo.from_cidr( '10.0.0.{}'.format( i ), 24 ) for i in range( 0, 256, 17 ) ]
+    assert len( set( same ) ) == 1 and same[0] == same[-1] and hash( same[0] ) == hash( same[-1] )
+    assert SubnetInfo.from_cidr( '10.0.0.1', 24 ) != SubnetInfo.from_cidr( '10.0.0.1', 25 )
+    assert SubnetInfo.from_cidr( '10.0.0.1', 24 ) != SubnetInfo.from_cidr( '10.0.1.1', 24 )
+    assert SubnetInfo.from_cidr( '10.0.0.1', 24 ) != get_subnet_info_given_cidr( '10.0.0.1', 24 )
+
+def test_subnet_info_from_batch():
+    """Tests that batch construction matches get_subnet_info_rows"""
+    rng = default_rng( 18 )
+    ipv4s = rng.integers( 0, 2**32, size=500 ).tolist()
+    cidrs = rng.integers( 0, 33, size=500 ).tolist()
+    strs = [ 'addr{}'.format( i ) for i in range( 500 ) ]
+    rows = get_subnet_info_rows( strs, ipv4s, cidrs )
+    assert [ info.to_dict() for info in SubnetInfo.from_batch( ipv4s, cidrs, strs ) ] == rows
+    infos = SubnetInfo.from_batch( ipv4s, cidrs )
+    assert [ info.ipv4_int for info in infos ] == ipv4s
+    with pytest.raises( ValueError ) as e_info:
+        SubnetInfo.from_batch( [ 1 ], [ 33 ] )
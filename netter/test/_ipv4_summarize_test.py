@@ -0,0 +1,101 @@
+"""Tests for _ipv4_summarize.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_summarize import collapse_prefixes
+from v4._ipv4_summarize import collapse_prefix_arrays
+from v4._ipv4_summarize import collapse_sorted_stream
+from v4._ipv4_summarize import collapse_sorted_chunks
+from v4._ipv4_summarize import prefixes_to_ranges
+from v4._ipv4_summarize import merge_ranges
+from v4._ipv4_summarize import ranges_to_prefix_arrays
+from v4._ipv4_calculator import range_to_prefixes
+from v4._ipv4_calculator import int_to_addr_str
+from ipaddress import collapse_addresses
+from ipaddress import ip_network
+from numpy.random import default_rng
+from numpy import lexsort
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _random_prefixes( rng, n: int ) -> list:
+    """Helper function that generates n random prefixes clustered into two /8s so that they overlap"""
+    networks = ( ( rng.integers( 10, 12, n ) << 24 ) | rng.integers( 0, 2**24, n ) ).tolist()
+    cidrs = rng.integers( 12, 33, n ).tolist()
+    return [ '{}/{}'.format( int_to_addr_str( network & ( ( 0xFFFFFFFF << ( 32 - cidr ) ) & 0xFFFFFFFF ) ), cidr ) for network, cidr in zip( networks, cidrs ) ]
+
+def test_collapse_prefixes():
+    """Tests for collapse_prefixes"""
+    with pytest.raises( ValueError ) as e_info:
+        collapse_prefixes( [ '10.0.0.0/33' ] )
+    assert collapse_prefixes( [] ) == []
+    assert collapse_prefixes( [ '10.0.1.0/24', '10.0.0.0/24', '10.0.0.64/26' ] ) == [ '10.0.0.0/23' ]
+    assert collapse_prefixes( [ '0.0.0.0/1', '128.0.0.0/1' ] ) == [ '0.0.0.0/0' ]
+    assert collapse_prefixes( [ '255.255.255.255/32', ( '255.255.255.254', 32 ) ] ) == [ '255.255.255.254/31' ]
+    # Adjacent but unaligned blocks can't merge into a single prefix
+    assert collapse_prefixes( [ '10.0.1.0/24', '10.0.2.0/24' ] ) == [ '10.0.1.0/24', '10.0.2.0/24' ]
+    # Compare against the standard library on random input
+    rng = default_rng( 3 )
+    for _ in range(10):
+        prefixes = _random_prefixes( rng, 2000 )
+        assert collapse_prefixes( prefixes ) == [ str( n ) for n in collapse_addresses( ip_network( p ) for p in prefixes ) ]
+
+def test_collapse_prefix_arrays():
+    """Tests for collapse_prefix_arrays"""
+    with pytest.raises( ValueError ) as e_info:
+        collapse_prefix_arrays( [ 0, 1 ], [ 8 ] )
+    # Host bits are ignored -> 10.0.0.0/25 and 10.0.0.128/25
+    networks, cidrs = collapse_prefix_arrays( [ 167772161, 167772289 ], [ 25, 25 ] )
+    assert list( networks ) == [ 167772160 ]
+    assert list( cidrs ) == [ 24 ]
+
+def test_collapse_sorted_stream():
+    """Tests for collapse_sorted_stream/collapse_sorted_chunks"""
+    with pytest.raises( ValueError ) as e_info:
+        list( collapse_sorted_stream( [ '10.0.0.0/8', '9.0.0.0/8' ] ) )
+    # Test unsorted input across a chunk boundary
+    with pytest.raises( ValueError ) as e_info:
+        list( collapse_sorted_stream( [ '10.0.0.0/8', '11.0.0.0/8', '9.0.0.0/8' ], chunk_size=2 ) )
+    assert list( collapse_sorted_stream( [] ) ) == []
+    rng = default_rng( 4 )
+    prefixes = _random_prefixes( rng, 5000 )
+    networks = [ ip_network( p ) for p in prefixes ]
+    expected = [ str( n ) for n in collapse_addresses( networks ) ]
+    ordered = [ prefixes[ i ] for i in sorted( range( len( prefixes ) ), key=lambda i: int( networks[ i ].network_address ) ) ]
+    # Small chunks so that merged ranges span chunk boundaries
+    assert list( collapse_sorted_stream( ordered, chunk_size=7 ) ) == expected
+    assert list( collapse_sorted_stream( ordered ) ) == expected
+    chunks = [ ( [ 167772160 ], [ 25 ] ), ( [], [] ), ( [ 167772288 ], [ 25 ] ) ]
+    assert [ ( list( n ), list( c ) ) for n, c in collapse_sorted_chunks( chunks ) ] == [ ( [ 167772160 ], [ 24 ] ) ]
+
+def test_prefixes_to_ranges():
+    """Tests for prefixes_to_ranges"""
+    firsts, lasts = prefixes_to_ranges( [ 3232238081, 167772161, 4294967295, 5 ], [ 24, 8, 0, 32 ] )
+    assert firsts.tolist() == [ 3232238080, 167772160, 0, 5 ]
+    assert lasts.tolist() == [ 3232238335, 184549375, 4294967295, 5 ]
+    for networks, cidrs in ( ( [ 0, 1 ], [ 8 ] ), ( [ 2**32 ], [ 8 ] ), ( [ 0 ], [ 33 ] ) ):
+        with pytest.raises( ValueError ) as e_info:
+            prefixes_to_ranges( networks, cidrs )
+
+def test_merge_ranges():
+    """Tests for merge_ranges"""
+    firsts, lasts = merge_ranges( [ 0, 5, 8 ], [ 4, 6, 9 ] )
+    assert list( firsts ) == [ 0, 8 ]
+    assert list( lasts ) == [ 6, 9 ]
+    firsts, lasts = merge_ranges( [ 0, 1, 20 ], [ 100, 2, 30 ] )
+    assert list( firsts ) == [ 0 ]
+    assert list( lasts ) == [ 100 ]
+
+def test_ranges_to_prefix_arrays():
+    """Tests that ranges_to_prefix_arrays matches range_to_prefixes"""
+    rng = default_rng( 6 )
+    firsts = rng.integers( 0, 2**32, 500 )
+    lasts = firsts + rng.integers( 0, 2**20, 500 )
+    lasts[ lasts > 2**32 - 1 ] = 2**32 - 1
+    order = lexsort( ( lasts, firsts ) )
+    networks, cidrs = ranges_to_prefix_arrays( firsts[ order ], lasts[ order ] )
+    expected = [ block for i in order.tolist() for block in range_to_prefixes( int( firsts[ i ] ), int( lasts[ i ] ) ) ]
+    assert list( zip( networks.tolist(), cidrs.tolist() ) ) == expected
+    networks, cidrs = ranges_to_prefix_arrays( [ 0 ], [ 2**32 - 1 ] )
+    assert ( list( networks ), list( cidrs ) ) == ( [ 0 ], [ 0 ] )
@@ -12,9 +12,16 @@ import pytest
 def test_is_valid_subnet_mask():
     """Tests for is_valid_subnet_mask"""
     # Test invalid input type
+    with pytest.raises( TypeError ) as e_info:
+        is_valid_subnet_mask( 24 )
     # Test invalid subnet mask
+    assert not is_valid_subnet_mask( '255.255.255.1' )
+    assert not is_valid_subnet_mask( '254.255.255.0' )
+    assert not is_valid_subnet_mask( 'invalid' )
     # Test valid subnet mask
-    assert True
+    assert is_valid_subnet_mask( '0.0.0.0' )
+    assert is_valid_subnet_mask( '255.255.255.0' )
+    assert is_valid_subnet_mask( '255.255.255.255' )
 
 def test_is_valid_ipv4():
     """Tests for is_valid_ipv4"""
@@ -0,0 +1,63 @@
+"""Tests for _ipv4_vlsm.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_vlsm import plan_vlsm
+from v4._ipv4_calculator import parse_prefix
+from numpy.random import default_rng
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_plan_vlsm():
+    """Tests for plan_vlsm"""
+    # Test invalid input
+    with pytest.raises( TypeError ) as e_info:
+        plan_vlsm( 3232238080, 24, [ 10 ] )
+    with pytest.raises( ValueError ) as e_info:
+        plan_vlsm( '192.168.10.256', 24, [ 10 ] )
+    with pytest.raises( ValueError ) as e_info:
+        plan_vlsm( '192.168.10.0', '255.0.255.0', [ 10 ] )
+    with pytest.raises( ValueError ) as e_info:
+        plan_vlsm( '192.168.10.0', 33, [ 10 ] )
+    with pytest.raises( ValueError ) as e_info:
+        plan_vlsm( '192.168.10.0', 24, [ 10, -1 ] )
+    with pytest.raises( ValueError ) as e_info:
+        plan_vlsm( '192.168.10.0', 24, [ 1.5 ] )
+    # Test requirements that don't fit
+    with pytest.raises( ValueError ) as e_info:
+        plan_vlsm( '192.168.10.0', 24, [ 126, 126, 1 ] )
+    # Test a small plan, results are in requirement order
+    plan = plan_vlsm( '192.168.10.7', '255.255.255.0', [ 50, 2, 20 ] )
+    assert plan[ 'parent' ] == '192.168.10.0/24'
+    assert [ ( s[ 'network_id' ], s[ 'cidr_int' ], s[ 'num_hosts' ] ) for s in plan[ 'subnets' ] ] == [ ( '192.168.10.0', 26, 62 ), ( '192.168.10.96', 31, 2 ), ( '192.168.10.64', 27, 30 ) ]
+    assert plan[ 'subnets' ][1][ 'first_host' ] == '192.168.10.96'
+    assert plan[ 'subnets' ][1][ 'last_host' ] == '192.168.10.97'
+    assert plan[ 'free' ] == [ '192.168.10.98/31', '192.168.10.100/30', '192.168.10.104/29', '192.168.10.112/28', '192.168.10.128/25' ]
+    assert plan[ 'used_addresses' ] == 98
+    assert plan[ 'utilization' ] == 100 * 98 / 256
+    # Test an exact fit and an empty plan
+    plan = plan_vlsm( '10.0.0.0', 24, [ 126, 62, 30, 14, 6, 2, 2, 2, 1, 1 ] )
+    assert plan[ 'free' ] == []
+    assert plan[ 'utilization' ] == 100
+    assert plan_vlsm( '10.0.0.0', 30, [] )[ 'free' ] == [ '10.0.0.0/30' ]
+
+def test_plan_vlsm_large():
+    """Tests that a large plan is aligned, non-overlapping and big enough for every requirement"""
+    hosts = default_rng( 11 ).integers( 0, 300, 20000 )
+    plan = plan_vlsm( '10.0.0.0', 8, hosts )
+    spans = []
+    for required, subnet in zip( hosts.tolist(), plan[ 'subnets' ] ):
+        assert subnet[ 'num_hosts' ] >= required
+        network, cidr = parse_prefix( ( subnet[ 'network_id' ], subnet[ 'cidr_int' ] ) )
+        # parse_prefix clears host bits, so an aligned subnet is unchanged
+        assert network == parse_prefix( subnet[ 'network_id' ] + '/32' )[0]
+        spans.append( ( network, network + ( 1 << ( 32 - cidr ) ) ) )
+    for prefix in plan[ 'free' ]:
+        network, cidr = parse_prefix( prefix )
+        spans.append( ( network, network + ( 1 << ( 32 - cidr ) ) ) )
+    # Allocated and free blocks tile the parent block exactly
+    spans.sort()
+    assert spans[0][0] == parse_prefix( '10.0.0.0/8' )[0]
+    assert all( spans[i][1] == spans[i + 1][0] for i in range( len( spans ) - 1 ) )
+    assert spans[-1][1] == parse_prefix( '11.0.0.0/8' )[0]
@@ -0,0 +1,96 @@
+"""Tests for _ipv6_calculator.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v6._ipv6_calculator import get_subnet_info_given_cidr
+from v6._ipv6_calculator import get_subnet_info_batch
+from v6._ipv6_calculator import split_addr_ints
+from v6._ipv6_calculator import join_addr_ints
+from v6._ipv6_calculator import addr_to_int
+from v6._ipv6_calculator import int_to_addr_str
+from ipaddress import IPv6Address
+from ipaddress import IPv6Network
+from numpy.random import default_rng
+from numpy import array_equal
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_addr_to_int():
+    """Tests for addr_to_int/int_to_addr_str"""
+    for bad in [ '1::2::3', '1:2:3:4:5:6:7:8:9', '1:2:3:4:5:6:7', '12345::', 'g::', '', ':1::', '1:2:3:4:5:6:7:8::' ]:
+        with pytest.raises( ValueError ) as e_info:
+            addr_to_int( bad )
+    with pytest.raises( TypeError ) as e_info:
+        addr_to_int( 1 )
+    assert addr_to_int( '::' ) == 0
+    assert addr_to_int( '2001:DB8::1' ) == 0x20010DB8000000000000000000000001
+    assert addr_to_int( 'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff' ) == 2**128 - 1
+    assert int_to_addr_str( 0 ) == '::'
+    assert int_to_addr_str( 1 ) == '::1'
+    assert int_to_addr_str( 0x20010db8000000010000000000000001 ) == '2001:db8:0:1::1'
+    # Single zero groups aren't compressed, the first of two equally long runs is
+    assert int_to_addr_str( 0x20010db8000000010001000100010001 ) == '2001:db8:0:1:1:1:1:1'
+    assert int_to_addr_str( 0x20010000000000010000000000010001 ) == '2001::1:0:0:1:1'
+    assert int_to_addr_str( 0x20010000000000010000000000000001 ) == '2001:0:0:1::1'
+    rng = default_rng( 13 )
+    for _ in range( 500 ):
+        ipv6 = int( rng.integers( 0, 2**63 ) ) << int( rng.integers( 0, 66 ) )
+        assert int_to_addr_str( ipv6 ) == str( IPv6Address( ipv6 ) )
+        assert addr_to_int( str( IPv6Address( ipv6 ) ) ) == ipv6
+        assert addr_to_int( IPv6Address( ipv6 ).exploded ) == ipv6
+
+def test_get_subnet_info_given_cidr():
+    """Tests for get_subnet_info_given_cidr"""
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_given_cidr( '2001:db8::1', 129 )
+    with pytest.raises( TypeError ) as e_info:
+        get_subnet_info_given_cidr( '2001:db8::1', '64' )
+    assert get_subnet_info_given_cidr( '2001:db8::1', 64 ) == {
+        'ipv6' : '2001:db8::1',
+        'network_id' : '2001:db8::',
+        'subnet_mask' : 'ffff:ffff:ffff:ffff::',
+        'cidr_int' : 64,
+        'cidr_str' : '/64',
+        'first_host' : '2001:db8::1',
+        'last_host' : '2001:db8::ffff:ffff:ffff:ffff',
+        'last_addr' : '2001:db8::ffff:ffff:ffff:ffff',
+        'num_addresses' : 2**64,
+        'num_hosts' : 2**64 - 1
+    }
+    # /127 and /128 use every address as a host
+    info = get_subnet_info_given_cidr( '2001:db8::3', 127 )
+    assert ( info[ 'first_host' ], info[ 'last_host' ], info[ 'num_hosts' ] ) == ( '2001:db8::2', '2001:db8::3', 2 )
+    info = get_subnet_info_given_cidr( '2001:db8::3', 128 )
+    assert ( info[ 'first_host' ], info[ 'last_host' ], info[ 'num_hosts' ] ) == ( '2001:db8::3', '2001:db8::3', 1 )
+    info = get_subnet_info_given_cidr( '2001:db8::3', 0 )
+    assert ( info[ 'network_id' ], info[ 'last_addr' ], info[ 'num_addresses' ] ) == ( '::', 'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff', 2**128 )
+
+def test_get_subnet_info_batch():
+    """Tests that get_subnet_info_batch matches the standard library"""
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_batch( [ -1 ], [ 0 ], 64 )
+    with pytest.raises( ValueError ) as e_info:
+        get_subnet_info_batch( [ 0 ], [ 0 ], 129 )
+    with pytest.raises( ValueError ) as e_info:
+        split_addr_ints( [ 2**128 ] )
+    rng = default_rng( 14 )
+    ipv6s = [ int( hi ) << 64 | int( lo ) for hi, lo in zip( rng.integers( 0, 2**64, 2000, dtype='uint64' ), rng.integers( 0, 2**64, 2000, dtype='uint64' ) ) ]
+    cidrs = rng.integers( 0, 129, 2000 )
+    his, los = split_addr_ints( ipv6s )
+    assert join_addr_ints( his, los ) == ipv6s
+    info = get_subnet_info_batch( his, los, cidrs )
+    networks = [ IPv6Network( ( ipv6, cidr ), strict=False ) for ipv6, cidr in zip( ipv6s, cidrs.tolist() ) ]
+    assert join_addr_ints( info[ 'network_id_hi' ], info[ 'network_id_lo' ] ) == [ int( n.network_address ) for n in networks ]
+    assert join_addr_ints( info[ 'subnet_mask_hi' ], info[ 'subnet_mask_lo' ] ) == [ int( n.netmask ) for n in networks ]
+    assert join_addr_ints( info[ 'last_addr_hi' ], info[ 'last_addr_lo' ] ) == [ int( n.broadcast_address ) for n in networks ]
+    assert [ 2 ** int( b ) for b in info[ 'host_bits' ] ] == [ n.num_addresses for n in networks ]
+    # Scalar and batch agree on the host range
+    for i in range( 0, 2000, 50 ):
+        scalar = get_subnet_info_given_cidr( int_to_addr_str( ipv6s[ i ] ), int( cidrs[ i ] ) )
+        first = join_addr_ints( info[ 'first_host_hi' ][ i:i + 1 ], info[ 'first_host_lo' ][ i:i + 1 ] )[0]
+        last = join_addr_ints( info[ 'last_host_hi' ][ i:i + 1 ], info[ 'last_host_lo' ][ i:i + 1 ] )[0]
+        assert ( scalar[ 'first_host' ], scalar[ 'last_host' ] ) == ( int_to_addr_str( first ), int_to_addr_str( last ) )
+        assert scalar[ 'num_hosts' ] == 2 ** int( info[ 'host_bits' ][ i ] ) - int( info[ 'reserved' ][ i ] )
+    # A single CIDR value is broadcast over every address
+    assert array_equal( get_subnet_info_batch( his, los, 48 )[ 'network_id_lo' ], [ 0 ] * 2000 )
@@ -0,0 +1,96 @@
+"""Tests for _ipv6_parser.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v6._ipv6_parser import parse_ipv6
+from v6._ipv6_parser import format_ipv6
+from v6._ipv6_parser import parse_ipv6_lines
+from v6._ipv6_parser import format_ipv6_lines
+from v6._ipv6_parser import format_ipv6_batch
+from ipaddress import IPv6Address
+from numpy.random import default_rng
+from numpy import array_equal
+import pytest
+
+#|###################################################################| Global constants |###################################################################|#
+
+BAD_ADDRS = [ '', ':', '1:', ':1', ':::', '1:::2', '1::2::3', ':1::', '12345::', 'g::', '1:2:3:4:5:6:7', '1:2:3:4:5:6:7:8:9',
+              '1:2:3:4:5:6:7:8::', '::1:', '::1.2.3', '::1.2.3.04', '::1.2.3.256', '::ffff:1.2.3.4:5', '1:2:3:4:5:6:7:1.2.3.4',
+              '1.2.3.4', 'fe80::1%', ' ::1', '::0x1' ]
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_parse_ipv6():
+    """Tests for parse_ipv6"""
+    for bad in BAD_ADDRS:
+        with pytest.raises( ValueError ) as e_info:
+            parse_ipv6( bad )
+    with pytest.raises( TypeError ) as e_info:
+        parse_ipv6( 1 )
+    assert parse_ipv6( '::' ) == ( 0, None )
+    assert parse_ipv6( '::1' ) == ( 1, None )
+    assert parse_ipv6( '1::' ) == ( 1 << 112, None )
+    assert parse_ipv6( 'fe80::1%eth0' ) == ( 0xfe800000000000000000000000000001, 'eth0' )
+    # IPv4 tails stand for the last two groups
+    assert parse_ipv6( '::ffff:192.0.2.1' ) == ( 0xffffc0000201, None )
+    assert parse_ipv6( '1:2:3:4:5:6:1.2.3.4' ) == ( 0x00010002000300040005000601020304, None )
+    assert parse_ipv6( '::1.2.3.4%1' ) == ( 0x01020304, '1' )
+    rng = default_rng( 14 )
+    for _ in range( 500 ):
+        ipv6 = int( rng.integers( 0, 2**63 ) ) << int( rng.integers( 0, 66 ) )
+        address = IPv6Address( ipv6 )
+        for text in ( str( address ), address.exploded, address.exploded.upper() ):
+            assert parse_ipv6( text ) == ( ipv6, None )
+        assert parse_ipv6( ':'.join( address.exploded.split( ':' )[ :6 ] ) + ':{}.{}.{}.{}'.format( *( ipv6 & 0xFFFFFFFF ).to_bytes( 4, 'big' ) ) ) == ( ipv6, None )
+
+def test_format_ipv6():
+    """Tests for format_ipv6"""
+    with pytest.raises( ValueError ) as e_info:
+        format_ipv6( 1 << 128 )
+    assert format_ipv6( 0 ) == '::'
+    assert format_ipv6( 1, 'eth0' ) == '::1%eth0'
+    assert format_ipv6( 0x20010db8000000000000000000000001 ) == '2001:db8::1'
+    # Single zero groups aren't compressed, the first of two equally long runs is
+    assert format_ipv6( 0x20010db8000000010001000100010001 ) == '2001:db8:0:1:1:1:1:1'
+    assert format_ipv6( 0x20010000000000010000000000010001 ) == '2001::1:0:0:1:1'
+    # IPv4-mapped addresses end in a dotted quad
+    assert format_ipv6( 0xffffc0000201 ) == '::ffff:192.0.2.1'
+    rng = default_rng( 15 )
+    for _ in range( 500 ):
+        ipv6 = int( rng.integers( 0, 2**63 ) ) << int( rng.integers( 0, 66 ) )
+        assert format_ipv6( ipv6 ) == str( IPv6Address( ipv6 ) )
+
+def test_parse_ipv6_lines():
+    """Tests that the bulk parser agrees with parse_ipv6 on every line"""
+    rng = default_rng( 16 )
+    lines = [ format_ipv6( int( rng.integers( 0, 2**63 ) ) << int( rng.integers( 0, 66 ) ) ) for _ in range( 300 ) ]
+    lines += BAD_ADDRS + [ 'FFFF::', '::ffff:192.0.2.1', 'fe80::1%eth0', '  ::1  ', '0:0:0:0:0:0:0:0', 'é::' ]
+    data = ( '\r\n'.join( lines ) + '\n' ).encode()
+    his, los, valid = parse_ipv6_lines( data, chunk_size=64 )
+    assert len( his ) == len( lines )
+    for i, line in enumerate( lines ):
+        try:
+            expected = parse_ipv6( line.strip() )[0]
+        except ValueError:
+            assert not valid[ i ] and his[ i ] == los[ i ] == 0
+            continue
+        assert valid[ i ] and ( int( his[ i ] ) << 64 ) | int( los[ i ] ) == expected
+    # No trailing newline, str input, empty input
+    his, los, valid = parse_ipv6_lines( '::1\n2001:db8::' )
+    assert his.tolist() == [ 0, 0x20010db800000000 ] and los.tolist() == [ 1, 0 ] and valid.all()
+    assert len( parse_ipv6_lines( b'' )[0] ) == 0
+
+def test_format_ipv6_lines():
+    """Tests that the bulk formatter agrees with format_ipv6"""
+    rng = default_rng( 17 )
+    ipv6s = [ int( rng.integers( 0, 2**63 ) ) << int( rng.integers( 0, 66 ) ) for _ in range( 300 ) ]
+    ipv6s += [ 0, 1, 1 << 112, ( 1 << 128 ) - 1, 0xffffc0000201, 0x20010000000000010000000000010001 ]
+    his = [ ipv6 >> 64 for ipv6 in ipv6s ]
+    los = [ ipv6 & ( ( 1 << 64 ) - 1 ) for ipv6 in ipv6s ]
+    expected = [ format_ipv6( ipv6 ) for ipv6 in ipv6s ]
+    assert format_ipv6_batch( his, los ) == expected
+    assert format_ipv6_lines( his, los ) == ''.join( text + '\n' for text in expected )
+    assert format_ipv6_lines( [], [] ) == ''
+    # Round trip
+    parsed = parse_ipv6_lines( format_ipv6_lines( his, los ) )
+    assert parsed[2].all() and array_equal( parsed[0], his ) and array_equal( parsed[1], los )
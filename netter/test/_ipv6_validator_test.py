@@ -0,0 +1,29 @@
+"""Tests for _ipv6_validator.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from v6._ipv6_validator import is_valid_ipv6
+from v6._ipv6_validator import is_valid_ipv6_cidr
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_is_valid_ipv6():
+    """Tests for is_valid_ipv6"""
+    # Test invalid input type
+    with pytest.raises( TypeError ) as e_info:
+        is_valid_ipv6( 1 )
+    # Test invalid IPv6 addresses
+    for bad in [ '', ':::', '1::2::3', '12345::', '1:2:3:4:5:6:7', '1:2:3:4:5:6:7:8:9', '::1.2.3.04', '1:2:3:4:5:6:7:1.2.3.4', '::1%', '::1\n' ]:
+        assert not is_valid_ipv6( bad )
+    # Test valid IPv6 addresses, including the forms the original pattern rejected
+    for good in [ '::', '::1', '1::', '2001:db8::1', '1:2:3:4:5:6:7::', '::2:3:4:5:6:7:8', '::ffff:192.0.2.1', '1:2:3:4:5:6:1.2.3.4', 'fe80::1%eth0' ]:
+        assert is_valid_ipv6( good )
+
+def test_is_valid_ipv6_cidr():
+    """Tests for is_valid_ipv6_cidr"""
+    with pytest.raises( TypeError ) as e_info:
+        is_valid_ipv6_cidr( '64' )
+    assert not is_valid_ipv6_cidr( -1 )
+    assert not is_valid_ipv6_cidr( 129 )
+    assert is_valid_ipv6_cidr( 0 ) and is_valid_ipv6_cidr( 128 )
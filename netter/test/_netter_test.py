@@ -0,0 +1,101 @@
+"""Tests for netter.py"""
+
+#|#######################################################################| Imports |########################################################################|#
+
+from netter import main
+from netter import read_chunks
+from v4._ipv4_calculator import get_subnet_info_given_mask
+from v4._ipv4_calculator import get_subnet_info_given_cidr
+from v4._ipv4_validator import BAD_IPV4_ERROR
+from io import StringIO
+from json import loads
+from csv import DictReader
+from os.path import dirname
+from os.path import abspath
+from subprocess import run
+import sys
+import pytest
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def test_read_chunks():
+    """Tests that read_chunks skips and reports invalid lines across chunk boundaries"""
+    errors = []
+    stream = StringIO( '10.0.0.1\n\n# comment\nbad\n10.0.0.2/8\n10.0.0.3 255.0.0.0\nalso bad\n' )
+    chunks = list( read_chunks( [ ( 'in', stream ) ], chunk_size=2, on_error=lambda *e: errors.append( e[ :2 ] ) ) )
+    assert chunks == [ ( [ '10.0.0.1' ], [ 167772161 ], [ 32 ] ), ( [ '10.0.0.2', '10.0.0.3' ], [ 167772162, 167772163 ], [ 8, 8 ] ) ]
+    assert errors == [ ( 'in', 4 ), ( 'in', 7 ) ]
+
+def test_main( tmp_path, capsys ):
+    """Tests the command line interface end to end against the scalar calculator"""
+    source = tmp_path / 'addresses.txt'
+    source.write_text( '192.168.10.2 255.255.255.0\n10.1.2.3/31\nnot an address\n172.16.0.1\n' )
+    expected = [
+        get_subnet_info_given_mask( '192.168.10.2', '255.255.255.0' ),
+        get_subnet_info_given_cidr( '10.1.2.3', 31 ),
+        get_subnet_info_given_cidr( '172.16.0.1', 16 )
+    ]
+    # JSON Lines to stdout, the invalid line is reported and skipped
+    assert main( [ str( source ), '--cidr', '16', '--chunk-size', '2' ] ) == 1
+    out, err = capsys.readouterr()
+    assert [ loads( line ) for line in out.splitlines() ] == expected
+    assert '{}:3:'.format( source ) in err
+    # CSV to a file
+    target = tmp_path / 'subnets.csv'
+    assert main( [ str( source ), '-c', '16', '-f', 'csv', '-o', str( target ) ] ) == 1
+    with open( target, newline='' ) as f:
+        rows = list( DictReader( f ) )
+    assert rows == [ { key : str( value ) for key, value in info.items() } for info in expected ]
+    capsys.readouterr()
+    # Worker processes keep the output in input order
+    assert main( [ str( source ), '-c', '16', '--chunk-size', '1', '--workers', '2' ] ) == 1
+    out, err = capsys.readouterr()
+    assert [ loads( line ) for line in out.splitlines() ] == expected
+    assert err.count( 'netter:' ) == 1
+    # Clean input exits with 0
+    source.write_text( '10.0.0.1\n' )
+    assert main( [ str( source ) ] ) == 0
+    capsys.readouterr()
+    # Files that can't be opened are reported and skipped
+    missing = tmp_path / 'missing.txt'
+    assert main( [ str( missing ), str( source ) ] ) == 1
+    out, err = capsys.readouterr()
+    assert [ loads( line ) for line in out.splitlines() ] == [ get_subnet_info_given_cidr( '10.0.0.1', 32 ) ]
+    assert err == 'netter: {}: No such file or directory\n'.format( missing )
+    for bad in ( [ '--cidr', '33' ], [ '--cidr', '\u00b2' ], [ '--workers', '\uff12' ], [ '--serve', 'localhost:\u00b9' ],
+                 [ '--max-delay-ms', '-5' ], [ '--max-delay-ms', 'nan' ], [ '--max-delay-ms', 'inf' ], [ '--max-delay-ms', 'x' ] ):
+        with pytest.raises( SystemExit ) as e_info:
+            main( bad )
+
+def test_main_cold_start():
+    """Tests that a run over a handful of addresses doesn't import NumPy or asyncio"""
+    netter_dir = dirname( dirname( abspath( __file__ ) ) )
+    # netter.py ends with sys.exit, so an exit handler reports whether NumPy or asyncio was imported
+    code = 'import atexit, runpy, sys; atexit.register( lambda: sys.stderr.write( str( "numpy" in sys.modules or "asyncio" in sys.modules ) ) ); runpy.run_path( "netter.py", run_name="__main__" )'
+    result = run( [ sys.executable, '-c', code ], cwd=netter_dir, input='192.168.10.2/24\n10.0.0.1\n', capture_output=True, text=True )
+    assert result.returncode == 0
+    assert loads( result.stdout.splitlines()[0] ) == get_subnet_info_given_cidr( '192.168.10.2', 24 )
+    assert result.stderr == 'False'
+
+def test_main_hosts( tmp_path, capsys ):
+    """Tests the host list mode of the command line interface"""
+    source = tmp_path / 'subnets.txt'
+    source.write_text( '192.168.10.0/29\n10.0.0.1 255.255.255.254\nnot an address\n' )
+    excluded = tmp_path / 'excluded.txt'
+    excluded.write_text( '192.168.10.4/30\n' )
+    target = tmp_path / 'targets.txt'
+    assert main( [ str( source ), '--hosts', '--exclude', '10.0.0.0', '--exclude-file', str( excluded ), '-o', str( target ) ] ) == 1
+    assert target.read_text().splitlines() == [ '10.0.0.1', '192.168.10.1', '192.168.10.2', '192.168.10.3' ]
+    assert '{}:3:'.format( source ) in capsys.readouterr()[1]
+    # Shuffled output depends only on the seed
+    assert main( [ str( source ), '--hosts', '--shuffle', '--seed', '3', '-o', str( target ) ] ) == 1
+    shuffled = target.read_text().splitlines()
+    assert sorted( shuffled ) == [ '10.0.0.0', '10.0.0.1' ] + [ '192.168.10.{}'.format( i ) for i in range( 1, 7 ) ]
+    assert main( [ str( source ), '--hosts', '--shuffle', '--seed', '3', '-o', str( target ) ] ) == 1
+    assert target.read_text().splitlines() == shuffled
+    # Bad exclusions and exclusion files that can't be opened are reported, the rest still apply
+    missing = tmp_path / 'missing.txt'
+    capsys.readouterr()
+    assert main( [ str( excluded ), '--hosts', '--exclude', '192.168.10.5,bad', '--exclude-file', str( missing ), '-o', str( target ) ] ) == 1
+    assert target.read_text().splitlines() == [ '192.168.10.6' ]
+    assert capsys.readouterr()[1] == 'netter: --exclude:2: {}\nnetter: {}: No such file or directory\n'.format( BAD_IPV4_ERROR.format( 'bad' ), missing )
@@ -0,0 +1,6 @@
+from os import environ
+
+# Opt-in instrumentation of the calculator and validator functions (see v4/_ipv4_instrumentation.py)
+if environ.get( 'NETTER_INSTRUMENT' ):
+    from v4._ipv4_instrumentation import enable_from_environment
+    enable_from_environment()
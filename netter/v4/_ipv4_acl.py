@@ -0,0 +1,269 @@
+"""
+Access control lists of (address, wildcard mask, action) entries, evaluated first match wins.
+
+A wildcard mask marks the address bits that are ignored, so an address matches an entry if it equals the entry's
+address in every bit where the wildcard is 0. Wildcards don't have to be contiguous: 10.0.0.1 0.255.255.0 matches
+the .1 host in every 10.x.y.0/24 subnet.
+
+Compiling an ACL splits its entries in two. Contiguous wildcards (0.0.0.255 etc.) are prefixes, and are flattened
+into sorted, non-overlapping address intervals each owned by the first entry covering it, so a whole address column
+is matched against all of them with one binary search. Non-contiguous wildcards can't be flattened. Each of them is
+only checked against the addresses inside its covering prefix (its fixed leading bits), found by binary search in
+the sorted column, and only where no earlier entry has already matched.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator   import ipv4_to_int
+from v4._ipv4_calculator   import int_to_addr_str
+from v4._ipv4_validator    import BAD_IPV4_ERROR
+from v4._ipv4_prefix_table import PREFIX_MASK_INT
+from v4._ipv4_prefix_table import PREFIX_WILDCARD_INT
+from heapq                 import heappush
+from heapq                 import heappop
+from numpy                 import asarray
+from numpy                 import argsort
+from numpy                 import bincount
+from numpy                 import empty
+from numpy                 import flatnonzero
+from numpy                 import int64
+from numpy                 import searchsorted
+from numpy                 import where
+
+#|###################################################################| Global constants |###################################################################|#
+
+BAD_ACL_ENTRY_ERROR = 'ACL entry must be an (address, wildcard mask, action) triple - Value: {}'
+
+# shadowed_entries gives up on an entry (and reports it as reachable) once the part of it not covered by earlier
+# entries splits into more than this many pieces
+MAX_SHADOW_PIECES = 4096
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class AccessList:
+    """Immutable, compiled access control list
+
+    example:
+    acl = AccessList( [ ( '10.0.0.1', '0.255.255.0', 'deny' ), ( '10.0.0.0', '0.255.255.255', 'permit' ) ] )
+    acl.action( '10.20.30.1' ) -> 'deny'
+    acl.action( '10.20.30.2' ) -> 'permit'
+    acl.action( '192.168.1.1' ) -> 'deny' (no entry matches -> default_action)
+    acl.match_batch( [ 169090561, 169090562, 3232235777 ] ) -> array([ 0,  1, -1])
+    """
+
+    def __init__( self, entries=(), default_action='deny' ):
+        """Compiles an ACL from (address, wildcard mask, action) entries
+
+        Args:
+            entries:
+                An iterable of (address, wildcard mask, action) triples, in order. The address and wildcard mask are
+                x.x.x.x strings or packed 32-bit integers, address bits under the wildcard are ignored. The action can
+                be any object, e.g. 'permit'/'deny'.
+            default_action:
+                The action of addresses that no entry matches (an implicit deny by default).
+
+        Raises:
+            TypeError: An address or wildcard mask is of the wrong type.
+            ValueError: An entry is not a triple, or contains an invalid address or wildcard mask.
+        """
+        values, cares, actions = [], [], []
+        for entry in entries:
+            if not isinstance( entry, ( tuple, list ) ) or len( entry ) != 3: raise ValueError( BAD_ACL_ENTRY_ERROR.format(entry) )
+            address, wildcard, action = entry
+            # Fixed bits of the entry -> the bits where the wildcard is 0
+            care = ipv4_to_int( wildcard ) ^ 0xFFFFFFFF
+            values.append( ipv4_to_int( address ) & care )
+            cares.append( care )
+            actions.append( action )
+        self.default_action = default_action
+        self._values = asarray( values, dtype=int64 )
+        self._cares = asarray( cares, dtype=int64 )
+        # Object array with a trailing default action, so that 'no match' (-1) maps to it
+        self._actions = empty( len( actions ) + 1, dtype=object )
+        self._actions[ :-1 ] = actions
+        self._actions[ -1 ] = default_action
+        self._compile( values, cares )
+
+    def _compile( self, values: list, cares: list ) -> None:
+        """Helper function that flattens the contiguous entries and collects the non-contiguous ones"""
+        none = len( values )
+        intervals, sparse = [], []
+        for i, ( value, care ) in enumerate( zip( values, cares ) ):
+            wildcard = care ^ 0xFFFFFFFF
+            # Contiguous wildcard -> the entry is the prefix [value, value | wildcard]
+            if wildcard & ( wildcard + 1 ) == 0:
+                intervals.append( ( value, value | wildcard, i ) )
+                continue
+            # Otherwise only the leading fixed bits form a prefix, the covering prefix of every address it can match
+            cidr = 32 - wildcard.bit_length()
+            first = value & PREFIX_MASK_INT[ cidr ]
+            sparse.append( ( i, value, care, first, first | PREFIX_WILDCARD_INT[ cidr ] ) )
+        # Sweep the intervals in address order with a heap of the open ones, keyed by entry number so that the top is
+        # always the first entry covering the current address. Every start and end is a new interval boundary.
+        intervals.sort()
+        bounds = sorted( { 0 } | { first for first, last, i in intervals } | { last + 1 for first, last, i in intervals if last < 0xFFFFFFFF } )
+        seg_starts, seg_owners = [], []
+        heap, pos = [], 0
+        for start in bounds:
+            while pos < len( intervals ) and intervals[ pos ][0] <= start:
+                heappush( heap, ( intervals[ pos ][2], intervals[ pos ][1] ) )
+                pos += 1
+            # Drop entries that ended before this boundary, deeper expired entries are dropped once they reach the top
+            while heap and heap[0][1] < start: heappop( heap )
+            owner = heap[0][0] if heap else none
+            # Merge neighbouring intervals with the same owner
+            if not seg_owners or seg_owners[-1] != owner:
+                seg_starts.append( start )
+                seg_owners.append( owner )
+        self._seg_starts = asarray( seg_starts, dtype=int64 )
+        self._seg_owners = asarray( seg_owners, dtype=int64 )
+        self._sparse = sparse
+
+    def __len__( self ) -> int:
+        """Returns the number of entries"""
+        return len( self._values )
+
+    def __iter__( self ):
+        """Yields the ( 'x.x.x.x' address, 'x.x.x.x' wildcard mask, action ) entries in order"""
+        for value, care, action in zip( self._values.tolist(), self._cares.tolist(), self._actions[ :-1 ] ):
+            yield ( int_to_addr_str( value ), int_to_addr_str( care ^ 0xFFFFFFFF ), action )
+
+    def match_batch( self, ipv4s ):
+        """Finds the first entry matching each address in a column
+
+        Args:
+            ipv4s:
+                An array-like of addresses as packed 32-bit integers.
+
+        Returns:
+            An int64 array with the index of the first matching entry for every address, -1 where none matches.
+
+        Raises:
+            ValueError: ipv4s contains values outside of the 32-bit address space.
+        """
+        ipv4s = asarray( ipv4s, dtype=int64 ).ravel()
+        if ipv4s.size and ( ipv4s.min() < 0 or ipv4s.max() > 0xFFFFFFFF ):
+            raise ValueError( BAD_IPV4_ERROR.format( ipv4s[ (ipv4s < 0) | (ipv4s > 0xFFFFFFFF) ][0] ) )
+        none = len( self )
+        firsts = self._seg_owners[ searchsorted( self._seg_starts, ipv4s, side='right' ) - 1 ]
+        if self._sparse and ipv4s.size:
+            # Sort the addresses once, so the addresses within each covering prefix are a contiguous slice
+            order = argsort( ipv4s, kind='stable' )
+            sorted_ipv4s = ipv4s[ order ]
+            sorted_firsts = firsts[ order ]
+            los = searchsorted( sorted_ipv4s, [ entry[3] for entry in self._sparse ], side='left' ).tolist()
+            his = searchsorted( sorted_ipv4s, [ entry[4] for entry in self._sparse ], side='right' ).tolist()
+            for ( i, value, care, first, last ), lo, hi in zip( self._sparse, los, his ):
+                if lo == hi: continue
+                # Views -> assigning through the mask updates sorted_firsts in place
+                window = sorted_firsts[ lo:hi ]
+                window[ ( ( sorted_ipv4s[ lo:hi ] & care ) == value ) & ( window > i ) ] = i
+            firsts[ order ] = sorted_firsts
+        return where( firsts == none, -1, firsts )
+
+    def actions_batch( self, ipv4s ):
+        """Returns the action of the first entry matching each address in a column, default_action where none matches
+
+        Raises:
+            ValueError: ipv4s contains values outside of the 32-bit address space.
+        """
+        return self._actions[ self.match_batch( ipv4s ) ]
+
+    def match( self, ipv4 ) -> int:
+        """Returns the index of the first entry matching an address, or -1 if none matches
+
+        Args:
+            ipv4:
+                An IPv4 address as a string or a packed 32-bit integer.
+
+        Raises:
+            TypeError: ipv4 is neither a string nor an integer.
+            ValueError: ipv4 is not a valid IPv4 address.
+        """
+        return int( self.match_batch( [ ipv4_to_int( ipv4 ) ] )[0] )
+
+    def action( self, ipv4 ):
+        """Returns the action of the first entry matching an address, or default_action if none matches
+
+        Raises:
+            TypeError: ipv4 is neither a string nor an integer.
+            ValueError: ipv4 is not a valid IPv4 address.
+        """
+        return self._actions[ self.match( ipv4 ) ]
+
+    def hit_counts( self, ipv4s ):
+        """Counts how many addresses of a column each entry is the first match for
+
+        Returns:
+            An int64 array with one count per entry. Addresses that no entry matches aren't counted.
+
+        Raises:
+            ValueError: ipv4s contains values outside of the 32-bit address space.
+        """
+        matches = self.match_batch( ipv4s )
+        return bincount( matches[ matches >= 0 ], minlength=len( self ) )
+
+    def shadowed_entries( self ) -> dict:
+        """Finds the entries that can never match because earlier entries cover every address they match
+
+        Each entry is a ternary pattern (fixed bits and wildcard bits). The parts of it covered by each overlapping
+        earlier entry are subtracted in turn, splitting what's left on the bits that entry fixes, until nothing is
+        left (the entry is shadowed) or the earlier entries run out (it is reachable). An entry whose remainder splits
+        into more than MAX_SHADOW_PIECES pieces is reported as reachable.
+
+        Returns:
+            A dict mapping the index of every shadowed entry to a tuple of the earlier entries that cover it. That's a
+            single entry wherever one earlier entry covers it on its own.
+            example:
+            AccessList( [ ( '10.0.0.0', '0.0.255.255', 'permit' ), ( '10.0.1.0', '0.0.0.255', 'deny' ) ] ).shadowed_entries() -> { 1 : (0,) }
+        """
+        values, cares = self._values, self._cares
+        shadowed = {}
+        for j, ( value, care ) in enumerate( zip( values.tolist(), cares.tolist() ) ):
+            # Earlier entries that overlap this one -> they agree on every bit both of them fix
+            overlapping = flatnonzero( ( ( values[ :j ] ^ value ) & cares[ :j ] & care ) == 0 )
+            # An overlapping entry that fixes no bits this one doesn't covers it on its own
+            covering = overlapping[ ( cares[ overlapping ] & ~care ) == 0 ]
+            if covering.size:
+                shadowed[ j ] = ( int( covering[0] ), )
+                continue
+            by = _cover( value, care, values[ overlapping ].tolist(), cares[ overlapping ].tolist() )
+            if by is not None: shadowed[ j ] = tuple( overlapping[ by ].tolist() )
+        return shadowed
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _cover( value: int, care: int, values: list, cares: list ):
+    """Helper function that checks whether a pattern is covered by the union of other patterns
+
+    Returns:
+        The positions of the patterns that were needed to cover it, or None if it isn't covered (or gets too
+        fragmented to tell, see MAX_SHADOW_PIECES).
+    """
+    pieces = [ ( value, care ) ]
+    used = []
+    for k, ( other_value, other_care ) in enumerate( zip( values, cares ) ):
+        remaining, overlaps = [], False
+        for piece_value, piece_care in pieces:
+            # Disjoint -> the piece differs from the other pattern in a bit both of them fix
+            if ( piece_value ^ other_value ) & piece_care & other_care:
+                remaining.append( ( piece_value, piece_care ) )
+                continue
+            overlaps = True
+            # Split off the part of the piece outside the other pattern, one bit it fixes (and the piece doesn't) at
+            # a time -> each split off part has that bit set opposite to the other pattern
+            free = other_care & ~piece_care
+            while free:
+                bit = free & -free
+                free ^= bit
+                remaining.append( ( ( piece_value & ~bit ) | ( ~other_value & bit ), piece_care | bit ) )
+                piece_value = ( piece_value & ~bit ) | ( other_value & bit )
+                piece_care |= bit
+            # What's left of the piece lies inside the other pattern and is dropped
+        if overlaps: used.append( k )
+        pieces = remaining
+        if not pieces: return used
+        if len( pieces ) > MAX_SHADOW_PIECES: return None
+    return None
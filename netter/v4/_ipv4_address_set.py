@@ -0,0 +1,250 @@
+"""
+Set algebra over IPv4 address space, stored as sorted, non-overlapping [first, last] address intervals.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator import parse_prefix
+from v4._ipv4_calculator import ipv4_to_int
+from v4._ipv4_calculator import int_to_addr_str
+from v4._ipv4_summarize  import merge_ranges
+from v4._ipv4_summarize  import ranges_to_prefix_arrays
+from v4._ipv4_summarize  import prefixes_to_ranges
+from v4._ipv4_validator  import BAD_IPV4_ERROR
+from numpy               import asarray
+from numpy               import concatenate
+from numpy               import flatnonzero
+from numpy               import int64
+from numpy               import lexsort
+from numpy               import searchsorted
+from numpy               import unique
+from numpy               import array_equal
+
+#|###################################################################| Global constants |###################################################################|#
+
+BAD_RANGE_ERROR = 'Range must be a (first, last) pair of IPv4 addresses with first <= last - Value: {}'
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class AddressSet:
+    """Immutable set of IPv4 addresses stored as sorted, disjoint, non-adjacent inclusive intervals
+
+    Sets can hold anything from a single address up to the whole 2^32 address space in a few intervals, and support
+    the usual set operators: | (union), & (intersection), - (difference), ^ (symmetric difference), ~ (complement),
+    plus 'in' for single addresses, contains_batch for address columns and subset comparisons (<=, <, >=, >).
+
+    example:
+    allocated = AddressSet( prefixes=[ '10.0.0.0/8' ] )
+    reserved = AddressSet( prefixes=[ '10.0.0.0/16' ], ranges=[ ( '10.255.255.0', '10.255.255.255' ) ] )
+    ( allocated - reserved ).to_prefixes() -> [ '10.1.0.0/16', '10.2.0.0/15', ..., '10.255.254.0/24' ]
+    """
+
+    __slots__ = ( '_firsts', '_lasts' )
+
+    def __init__( self, prefixes=(), ranges=() ):
+        """Builds a set from any mix of prefixes and address ranges
+
+        Args:
+            prefixes:
+                An iterable of CIDR notation strings or (address, cidr) tuples as accepted by parse_prefix.
+            ranges:
+                An iterable of inclusive (first, last) address pairs, each address a string or packed 32-bit integer.
+
+        Raises:
+            TypeError: A prefix or address is of the wrong type.
+            ValueError: A prefix, address or range is invalid.
+        """
+        parsed = [ parse_prefix( prefix ) for prefix in prefixes ]
+        firsts, lasts = prefixes_to_ranges( [ p[0] for p in parsed ], [ p[1] for p in parsed ] )
+        bounds = []
+        for pair in ranges:
+            first, last = ( ipv4_to_int( addr ) for addr in pair )
+            if first > last: raise ValueError( BAD_RANGE_ERROR.format( pair ) )
+            bounds.append( ( first, last ) )
+        if bounds:
+            firsts = concatenate( ( firsts, asarray( [ b[0] for b in bounds ], dtype=int64 ) ) )
+            lasts = concatenate( ( lasts, asarray( [ b[1] for b in bounds ], dtype=int64 ) ) )
+        self._set_ranges( firsts, lasts )
+
+    @classmethod
+    def from_prefix_arrays( cls, networks, cidrs ):
+        """Builds a set from columns of packed addresses and CIDR values, host bits are ignored"""
+        return cls.from_range_arrays( *prefixes_to_ranges( networks, cidrs ) )
+
+    @classmethod
+    def from_range_arrays( cls, firsts, lasts ):
+        """Builds a set from columns of inclusive first/last packed addresses, in any order and possibly overlapping
+
+        Raises:
+            ValueError: The columns differ in length, contain values outside of the 32-bit address space, or a first
+                        address is greater than its last address.
+        """
+        firsts = asarray( firsts, dtype=int64 ).ravel()
+        lasts = asarray( lasts, dtype=int64 ).ravel()
+        if len( firsts ) != len( lasts ): raise ValueError( 'firsts and lasts must have the same length' )
+        if len( firsts ):
+            for column in ( firsts, lasts ):
+                if column.min() < 0 or column.max() > 0xFFFFFFFF:
+                    raise ValueError( BAD_IPV4_ERROR.format( column[ (column < 0) | (column > 0xFFFFFFFF) ][0] ) )
+            reversed_ranges = flatnonzero( firsts > lasts )
+            if len( reversed_ranges ):
+                i = reversed_ranges[0]
+                raise ValueError( BAD_RANGE_ERROR.format( ( int( firsts[ i ] ), int( lasts[ i ] ) ) ) )
+        result = cls.__new__( cls )
+        result._set_ranges( firsts, lasts )
+        return result
+
+    def _set_ranges( self, firsts, lasts ) -> None:
+        """Helper function that sorts and merges arbitrary ranges into the canonical interval representation"""
+        order = lexsort( ( -lasts, firsts ) )
+        self._firsts, self._lasts = merge_ranges( firsts[ order ], lasts[ order ] )
+
+    @classmethod
+    def _from_canonical( cls, firsts, lasts ):
+        """Helper function that wraps intervals that are already sorted, disjoint and non-adjacent"""
+        result = cls.__new__( cls )
+        result._firsts = firsts
+        result._lasts = lasts
+        return result
+
+    @property
+    def ranges( self ) -> tuple:
+        """The (firsts, lasts) int64 interval columns, sorted, disjoint and non-adjacent"""
+        return ( self._firsts, self._lasts )
+
+    def __len__( self ) -> int:
+        """Returns the number of addresses in the set"""
+        return int( ( self._lasts - self._firsts + 1 ).sum() )
+
+    def __bool__( self ) -> bool:
+        return len( self._firsts ) > 0
+
+    def __eq__( self, other ) -> bool:
+        if not isinstance( other, AddressSet ): return NotImplemented
+        return array_equal( self._firsts, other._firsts ) and array_equal( self._lasts, other._lasts )
+
+    def __hash__( self ) -> int:
+        return hash( ( self._firsts.tobytes(), self._lasts.tobytes() ) )
+
+    def __repr__( self ) -> str:
+        ranges = [ '{}-{}'.format( int_to_addr_str( first ), int_to_addr_str( last ) ) for first, last in zip( self._firsts.tolist()[ :4 ], self._lasts.tolist()[ :4 ] ) ]
+        if len( self._firsts ) > 4: ranges.append( '... {} ranges'.format( len( self._firsts ) ) )
+        return 'AddressSet({})'.format( ', '.join( ranges ) )
+
+    def __contains__( self, ipv4 ) -> bool:
+        """Returns True if a single address (string or packed 32-bit integer) is in the set"""
+        return bool( self.contains_batch( [ ipv4_to_int( ipv4 ) ] )[0] )
+
+    def contains_batch( self, ipv4s ):
+        """Vectorized membership test for a column of packed 32-bit addresses
+
+        Args:
+            ipv4s:
+                An array-like of addresses as packed 32-bit integers.
+
+        Returns:
+            A boolean array, True where the address is in the set.
+        """
+        ipv4s = asarray( ipv4s, dtype=int64 )
+        # Find the last interval starting at or before each address, then check that the address is inside it
+        pos = searchsorted( self._firsts, ipv4s, side='right' ) - 1
+        if not len( self._lasts ): return pos >= 0
+        return ( pos >= 0 ) & ( ipv4s <= self._lasts[ pos.clip( 0 ) ] )
+
+    def to_prefixes( self ) -> list:
+        """Returns the set as the fewest CIDR blocks, as CIDR notation strings in address order"""
+        networks, cidrs = self.to_prefix_arrays()
+        return [ '{}/{}'.format( int_to_addr_str( network ), cidr ) for network, cidr in zip( networks.tolist(), cidrs.tolist() ) ]
+
+    def to_prefix_arrays( self ) -> tuple:
+        """Returns the set as the fewest CIDR blocks, as (network ID uint32, cidr int64) columns in address order"""
+        return ranges_to_prefix_arrays( self._firsts, self._lasts )
+
+    def union( self, *others ):
+        """Returns the addresses in this set or any of the others"""
+        sets = ( self, ) + others
+        for other in others:
+            if not isinstance( other, AddressSet ): raise TypeError( '\'{}\' is not a valid {}'.format(other, repr(AddressSet)) )
+        return AddressSet.from_range_arrays( concatenate( [ s._firsts for s in sets ] ), concatenate( [ s._lasts for s in sets ] ) )
+
+    def intersection( self, other ):
+        """Returns the addresses in both this set and other"""
+        return self._combine( other, lambda a, b: a & b )
+
+    def difference( self, other ):
+        """Returns the addresses in this set but not in other"""
+        return self._combine( other, lambda a, b: a & ~b )
+
+    def symmetric_difference( self, other ):
+        """Returns the addresses in exactly one of this set and other"""
+        return self._combine( other, lambda a, b: a ^ b )
+
+    def complement( self ):
+        """Returns every IPv4 address not in this set"""
+        return AddressSet._from_canonical( *_invert( self._firsts, self._lasts ) )
+
+    exclude = difference
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetric_difference
+    __invert__ = complement
+
+    def issubset( self, other ) -> bool:
+        """Returns True if every address in this set is also in other"""
+        return not self.difference( other )
+
+    def issuperset( self, other ) -> bool:
+        """Returns True if every address in other is also in this set"""
+        if not isinstance( other, AddressSet ): raise TypeError( '\'{}\' is not a valid {}'.format(other, repr(AddressSet)) )
+        return other.issubset( self )
+
+    def isdisjoint( self, other ) -> bool:
+        """Returns True if this set and other have no addresses in common"""
+        return not self.intersection( other )
+
+    # Subset comparisons as for built-in sets -> a < b is a proper subset
+    def __le__( self, other ) -> bool:
+        if not isinstance( other, AddressSet ): return NotImplemented
+        return self.issubset( other )
+
+    def __lt__( self, other ) -> bool:
+        if not isinstance( other, AddressSet ): return NotImplemented
+        return self != other and self.issubset( other )
+
+    def __ge__( self, other ) -> bool:
+        if not isinstance( other, AddressSet ): return NotImplemented
+        return other.issubset( self )
+
+    def __gt__( self, other ) -> bool:
+        if not isinstance( other, AddressSet ): return NotImplemented
+        return self != other and other.issubset( self )
+
+    def _combine( self, other, op ):
+        """Helper function that applies a boolean membership operator to two sets
+
+        Every interval boundary of either set splits the address space into elementary segments that are either fully
+        inside or fully outside of each set. The operator is evaluated once per segment and consecutive selected
+        segments are merged back into intervals, so the cost is O((n + m) log(n + m)) regardless of set sizes.
+        """
+        if not isinstance( other, AddressSet ): raise TypeError( '\'{}\' is not a valid {}'.format(other, repr(AddressSet)) )
+        # Elementary segment starts -> every interval start and every address just past an interval end
+        starts = unique( concatenate( ( [ 0 ], self._firsts, self._lasts + 1, other._firsts, other._lasts + 1 ) ) )
+        starts = starts[ starts <= 0xFFFFFFFF ]
+        ends = concatenate( ( starts[ 1: ] - 1, [ 0xFFFFFFFF ] ) )
+        # No segment straddles a boundary, so each one is in a set exactly when its first address is
+        selected = op( self.contains_batch( starts ), other.contains_batch( starts ) )
+        # Selected segments are in order and touch whenever consecutive, so merging is linear
+        firsts, lasts = merge_ranges( starts[ selected ], ends[ selected ] )
+        return AddressSet._from_canonical( firsts, lasts )
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _invert( firsts, lasts ) -> tuple:
+    """Helper function that returns the gaps between (and around) canonical intervals"""
+    gap_firsts = concatenate( ( [ 0 ], lasts + 1 ) )
+    gap_lasts = concatenate( ( firsts - 1, [ 0xFFFFFFFF ] ) )
+    keep = gap_firsts <= gap_lasts
+    return ( gap_firsts[ keep ].astype( int64 ), gap_lasts[ keep ].astype( int64 ) )
@@ -0,0 +1,96 @@
+"""
+Bounded, thread-safe LRU cache for IPv4 subnet information results.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from collections import OrderedDict
+from threading   import Lock
+
+#|###################################################################| Global constants |###################################################################|#
+
+DEFAULT_CACHE_SIZE = 4096
+BAD_CACHE_SIZE_ERROR = 'Cache size must be a positive integer - Value: {}'
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class SubnetInfoCache:
+    """Least-recently-used cache mapping normalized (network ID, CIDR) keys to subnet information dicts
+
+    Every host in a subnet shares all of its subnet information except for the 'ipv4' echo field, so entries are
+    keyed on the packed network ID and CIDR value rather than on the raw input strings. Callers are expected to
+    copy the returned dict and fill in the 'ipv4' field themselves.
+
+    All operations hold a single lock, so one instance can be shared between threads.
+
+    Attributes:
+        maxsize:
+            The maximum number of entries held before the least recently used entry is evicted.
+    """
+
+    def __init__( self, maxsize: int = DEFAULT_CACHE_SIZE ):
+        """Creates an empty cache
+
+        Args:
+            maxsize:
+                The maximum number of entries, must be a positive integer.
+
+        Raises:
+            TypeError: Non-integer input provided for maxsize.
+            ValueError: maxsize is less than 1.
+        """
+        if not isinstance( maxsize, int ): raise TypeError( '\'{}\' is not a valid {}'.format(maxsize, repr(int)) )
+        if maxsize < 1: raise ValueError( BAD_CACHE_SIZE_ERROR.format(maxsize) )
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get( self, key: tuple ):
+        """Returns the cached value for key and marks it as most recently used, or None on a miss"""
+        with self._lock:
+            try:
+                value = self._entries[ key ]
+            except KeyError:
+                self._misses += 1
+                return None
+            self._entries.move_to_end( key )
+            self._hits += 1
+            return value
+
+    def put( self, key: tuple, value ) -> None:
+        """Stores value under key, evicting the least recently used entry if the cache is full"""
+        with self._lock:
+            self._entries[ key ] = value
+            self._entries.move_to_end( key )
+            if len( self._entries ) > self.maxsize:
+                self._entries.popitem( last=False )
+                self._evictions += 1
+
+    def clear( self ) -> None:
+        """Removes all entries and resets the hit/miss/eviction counters"""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def stats( self ) -> dict:
+        """Returns a snapshot of the cache counters
+
+        Returns:
+            A dict with the number of hits, misses and evictions since the last clear, the current number of entries
+            and the maximum number of entries.
+            example:
+            { 'hits' : 9000, 'misses' : 1000, 'evictions' : 0, 'size' : 1000, 'maxsize' : 4096 }
+        """
+        with self._lock:
+            return {
+                'hits' : self._hits,
+                'misses' : self._misses,
+                'evictions' : self._evictions,
+                'size' : len( self._entries ),
+                'maxsize' : self.maxsize
+            }
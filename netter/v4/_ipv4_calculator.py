@@ -5,35 +5,30 @@ Author: Noah Benveniste
 https://github.com/noahbenveniste/subnet-calculator
 """
 # TODO: 
-# - Finish implementing addr_to_str
-# - Handle edge cases for /0, /31, /32
-# - Finish implementing tests for ipv4 calculator and validator
+# - Finish implementing tests for ipv4 validator
 # - Look up how to generate documentation
 # - Set up a Jenkins server to automate unit testing
 # - Create a dev branch once all IPv4 functionality is tested and implemented, only merge to main when all tests pass
 
-# - get_subnet_info_given_mask  TODO: test
-# - get_subnet_info_given_cidr  TODO: test
-# - get_first_host              TODO: test, handle edge case for /0, /31 and /32 subnets
-# - get_last_host               TODO: test, handle edge case for /0, /31 and /32 subnets
-# - get_num_hosts               TODO: test, handle edge case for /0, /31 and /32 subnets
-# - get_num_subnets             TODO: test, handle edge case for /0, /31 and /32 subnets
-
 #|#######################################################################| Imports |########################################################################|#
 
 from v4._ipv4_validator import argument_type_validator
 from v4._ipv4_validator import BAD_SUBNET_MASK_ERROR
 from v4._ipv4_validator import BAD_CIDR_ERROR
-from v4._ipv4_validator import CIDR_DICT
-from numpy              import bitwise_and
-from numpy              import bitwise_or
-from numpy              import bitwise_not
-from numpy              import binary_repr
-from numpy              import prod
-from numpy              import array
-from numpy              import uint8
-from itertools          import chain
-from re                 import split
+from v4._ipv4_validator import BAD_IPV4_ERROR
+from v4._ipv4_validator import BAD_PREFIX_ERROR
+from v4._ipv4_validator import BAD_SUBNET_STR_ERROR
+from v4._ipv4_validator import is_valid_ipv4
+from v4._ipv4_prefix_table import PREFIX_MASK_INT
+from v4._ipv4_prefix_table import PREFIX_MASK_STR
+from v4._ipv4_prefix_table import PREFIX_WILDCARD_INT
+from v4._ipv4_prefix_table import PREFIX_USABLE_HOSTS
+from v4._ipv4_prefix_table import PREFIX_NUM_SUBNETS
+from v4._ipv4_prefix_table import PREFIX_CLASS
+from v4._ipv4_prefix_table import MASK_STR_TO_PREFIX
+from v4._ipv4_cache     import SubnetInfoCache
+from v4._ipv4_cache     import DEFAULT_CACHE_SIZE
+# NumPy is only imported by the batch functions, so scalar code (e.g. one-shot command line calls) starts up without it
 
 #|##########################################################| Argument type validator functions |###########################################################|#
 
@@ -42,6 +37,30 @@ ensure_dtype_str = argument_type_validator( str )
 ensure_dtype_int = argument_type_validator( int )
 ensure_dtype_list = argument_type_validator( list )
 
+#|###################################################################| Global constants |###################################################################|#
+
+# Keys of the subnet information dicts, in order
+SUBNET_INFO_FIELDS = ( 'ipv4', 'network_id', 'subnet_mask', 'wildcard_mask', 'cidr_int', 'cidr_str', 'subnet_class', 'first_host', 'last_host', 'broadcast', 'num_hosts', 'num_subnets' )
+# Fields that are packed addresses in get_subnet_info_batch's result and need formatting
+_ADDRESS_FIELDS = ( 'network_id', 'wildcard_mask', 'first_host', 'last_host', 'broadcast' )
+# get_subnet_info_rows computes up to this many rows one at a time with plain integers, which is faster than a
+# vectorized pass for small inputs
+SCALAR_ROWS_LIMIT = 24
+# ... and up to this many for cold=True callers, i.e. one-shot processes that would otherwise import NumPy just for
+# this call (the import alone takes longer than computing this many rows one at a time)
+COLD_SCALAR_ROWS_LIMIT = 16384
+
+#|##################################################################| Subnet info cache |###################################################################|#
+
+# Opt-in LRU cache used by get_subnet_info_given_mask, None while disabled (see enable_subnet_info_cache)
+_subnet_info_cache = None
+
+#|###################################################################| Validation mode |####################################################################|#
+
+# While False, arguments are type checked once at the public entry point and internal calls go to unchecked kernels.
+# While True, every helper re-validates its own arguments, even when called internally (see enable_strict_validation)
+_strict_validation = False
+
 #|#################################################################| Function definitions |#################################################################|#
 
 def get_subnet_info_given_mask( ipv4_str: str, subnet_mask_str: str ) -> dict:
@@ -78,50 +97,39 @@ def get_subnet_info_given_mask( ipv4_str: str, subnet_mask_str: str ) -> dict:
 
     Raises:
         TypeError: Non-string input provided for ipv4_str or subnet_mask_str.
+        ValueError: subnet_mask_str is not a valid subnet mask.
     """
     # Ensure IPv4 input is a string, throw a TypeError if it is not
     ensure_dtype_str( ipv4_str )
     # Ensure subnet mask input is a string, throw a TypeError if it is not
     ensure_dtype_str( subnet_mask_str )
-    # Get the IPv4 octet values as an array -> parse and tokenize the input string
-    ipv4 = parse_addr_str( ipv4_str )
-    # Get the subnet mask octet values as an array
-    subnet_mask = parse_addr_str( subnet_mask_str )
+    # Get the CIDR integer value from the subnet mask -> the mask is already known to be a string
+    cidr_int = ( netmask_to_cidr if _strict_validation else _netmask_to_cidr )( subnet_mask_str )
+    return _get_subnet_info( ipv4_str, subnet_mask_str, cidr_int )
+
+def _get_subnet_info( ipv4_str: str, subnet_mask_str: str, cidr_int: int ) -> dict:
+    """Helper function that computes the subnet information dict from arguments validated by the caller"""
+    strict = _strict_validation
+    # Get the IPv4 address as a packed 32-bit integer -> parse and tokenize the input string
+    ipv4 = addr_to_int( ( parse_addr_str if strict else _parse_addr_str )( ipv4_str ) )
+    # Get the subnet mask as a packed 32-bit integer -> shift the CIDR value
+    subnet_mask = cidr_to_mask_int( cidr_int )
     # Get the wildcard mask -> invert the subnet mask
-    wildcard_mask = get_wildcard_mask( subnet_mask )
+    wildcard_mask = get_wildcard_mask_int( subnet_mask )
     # Get the network ID -> bitwise AND the IPv4 address and subnet mask
-    network_id = get_network_id( ipv4, subnet_mask )
-    # Get the broadcast address -> bitwise OR the network ID and wildcard mask
-    broadcast = get_broadcast_addr( network_id, wildcard_mask )
-    # Get the first host address -> increment network ID by 1
-    first_host = get_first_host( network_id )
-    # Get the last host address -> decrement broadcast addr by 1
-    last_host = get_last_host( broadcast )
-    # Get the subnet class -> examine the subnet mask
-    subnet_class = get_subnet_class( subnet_mask )
-    # Get the number of usable host addresses -> multiply wildcard mask octets (+1 to each), subtract 2 from total
-    num_hosts = get_num_hosts( subnet_mask )
-    # Get the number of subnets per network of the given class -> 2^(subnet_bits)
-    num_subnets = get_num_subnets( subnet_mask )
-    # Get the CIDR integer value from the subnet mask
-    cidr_int = netmask_to_cidr( subnet_mask_str )
-    # Get the CIDR string representation
-    cidr_str = cidr_to_str( cidr_int )
-
-    return {
-        'ipv4' : ipv4_str,
-        'network_id' : addr_to_str( network_id ), 
-        'subnet_mask' : subnet_mask_str,
-        'wildcard_mask' : addr_to_str( wildcard_mask ), 
-        'cidr_int' : cidr_int,
-        'cidr_str' : cidr_str,
-        'subnet_class' : subnet_class, 
-        'first_host' : addr_to_str( first_host ), 
-        'last_host' : addr_to_str( last_host ), 
-        'broadcast' : addr_to_str( broadcast ), 
-        'num_hosts' : num_hosts, 
-        'num_subnets' : num_subnets 
-    }
+    network_id = get_network_id_int( ipv4, subnet_mask )
+    # If caching is enabled, every host in the subnet shares the same result except for the 'ipv4' field
+    cache = _subnet_info_cache
+    if cache is not None:
+        cached = cache.get( ( network_id, cidr_int ) )
+        if cached is not None:
+            info = dict( cached )
+            info[ 'ipv4' ] = ipv4_str
+            return info
+    info = _build_subnet_info( ipv4_str, subnet_mask_str, network_id, wildcard_mask, cidr_int, ( cidr_to_str if strict else _cidr_to_str )( cidr_int ) )
+    # Store a private copy so callers can't mutate the cached entry
+    if cache is not None: cache.put( ( network_id, cidr_int ), dict( info ) )
+    return info
 
 def get_subnet_info_given_cidr( ipv4_str: str, cidr: int ) -> dict:
     """Returns IPv4 subnet information given an IPv4 address and a CIDR value
@@ -142,13 +150,202 @@ def get_subnet_info_given_cidr( ipv4_str: str, cidr: int ) -> dict:
 
     Raises:
         TypeError: Non-string input provided for ipv4_str, non-integer input provided for cidr.
+        ValueError: cidr is not in the range [0,32].
     """
     # Ensure cidr is an integer, throw TypeError if it is not
     ensure_dtype_int( cidr )
     # Ensure IPv4 is a string, throw TypeError if it is not
-    ensure_dtype_str( ipv4_str )    
-    # Convert the CIDR value to a subnet mask and call get_subnet_info_given_mask
-    return get_subnet_info_given_mask( ipv4_str, cidr_to_netmask( cidr ) )
+    ensure_dtype_str( ipv4_str )
+    # Strict mode -> convert the CIDR value to a subnet mask and call get_subnet_info_given_mask, which checks both again
+    if _strict_validation: return get_subnet_info_given_mask( ipv4_str, cidr_to_netmask( cidr ) )
+    return _get_subnet_info( ipv4_str, _cidr_to_netmask( cidr ), cidr )
+
+def get_subnet_info_batch( ipv4s, cidrs ) -> dict:
+    """Returns IPv4 subnet information for whole columns of addresses and CIDR values in one vectorized pass
+
+    Batch counterpart of get_subnet_info_given_cidr. Rather than parsing and formatting one address at a time,
+    every field is computed for all addresses at once using 32-bit integer arithmetic on NumPy arrays.
+
+    Args:
+        ipv4s:
+            An array-like of IPv4 addresses as unsigned 32-bit integers (e.g. 192.168.10.1 -> 3232238081).
+        cidrs:
+            An array-like of CIDR prefix lengths in the range [0,32], or a single integer applied to every address.
+
+    Returns:
+        A dict mapping the same label keys as get_subnet_info_given_cidr (minus 'cidr_str') to NumPy arrays.
+        Addresses and masks are uint32 columns, 'cidr_int', 'num_hosts' and 'num_subnets' are int64 columns and
+        'subnet_class' is a column of strings.
+        example:
+        get_subnet_info_batch( [3232238081], 24 )['network_id'] -> array([3232238080], dtype=uint32)
+
+    Raises:
+        ValueError: ipv4s contains values outside of the 32-bit address space, cidrs contains values outside of [0,32].
+    """
+    from v4._ipv4_prefix_table import MASK_INT_ARRAY
+    from v4._ipv4_prefix_table import USABLE_HOSTS_ARRAY
+    from v4._ipv4_prefix_table import NUM_SUBNETS_ARRAY
+    from v4._ipv4_prefix_table import CLASS_ARRAY
+    from numpy                 import uint32
+    ipv4_col, cidr_col = validate_batch_columns( ipv4s, cidrs )
+    # Look up the subnet masks in the precomputed prefix table
+    subnet_mask = MASK_INT_ARRAY[ cidr_col ]
+    # Get the wildcard masks -> invert the subnet masks
+    wildcard_mask = ~subnet_mask
+    # Get the network IDs -> bitwise AND the addresses and subnet masks
+    network_id = ipv4_col & subnet_mask
+    # Get the broadcast addresses -> bitwise OR the network IDs and wildcard masks
+    broadcast = network_id | wildcard_mask
+    # /31 and /32 subnets have no separate network ID/broadcast address to exclude from the host range (see RFC 3021)
+    has_reserved = ( cidr_col < 31 )
+
+    return {
+        'ipv4' : ipv4_col,
+        'network_id' : network_id,
+        'subnet_mask' : subnet_mask,
+        'wildcard_mask' : wildcard_mask,
+        'cidr_int' : cidr_col,
+        'subnet_class' : CLASS_ARRAY[ cidr_col ],
+        'first_host' : network_id + has_reserved.astype( uint32 ),
+        'last_host' : broadcast - has_reserved.astype( uint32 ),
+        'broadcast' : broadcast,
+        'num_hosts' : USABLE_HOSTS_ARRAY[ cidr_col ],
+        'num_subnets' : NUM_SUBNETS_ARRAY[ cidr_col ]
+    }
+
+def get_subnet_info_rows( ipv4_strs: list, ipv4s: list, cidrs: list, cold: bool = False ) -> list:
+    """Returns the same dicts as get_subnet_info_given_cidr for many addresses, computed in one vectorized pass
+
+    Small inputs (see SCALAR_ROWS_LIMIT) are computed one row at a time with plain integers instead, which skips the
+    fixed cost of the vectorized pass and doesn't import NumPy.
+
+    Args:
+        ipv4_strs:
+            The address strings, echoed back in the 'ipv4' fields.
+        ipv4s:
+            The same addresses as packed 32-bit integers.
+        cidrs:
+            A list of CIDR values in the range [0,32], one per address.
+        cold:
+            Set by one-shot callers that only make this call, e.g. netter.py on its first chunk. Inputs up to
+            COLD_SCALAR_ROWS_LIMIT rows are then computed one row at a time too, rather than importing NumPy.
+            Long-lived processes must leave it unset, they would give up the vectorized pass for good.
+
+    Returns:
+        A list of subnet information dicts, in input order.
+
+    Raises:
+        ValueError: ipv4s contains values outside of the 32-bit address space, cidrs contains values outside of [0,32].
+    """
+    if len( cidrs ) <= ( COLD_SCALAR_ROWS_LIMIT if cold else SCALAR_ROWS_LIMIT ):
+        return _get_subnet_info_rows_scalar( ipv4_strs, ipv4s, cidrs )
+    from v4._ipv4_parser import format_ipv4_batch
+    info = get_subnet_info_batch( ipv4s, cidrs )
+    # Pull every column out of NumPy once, formatting the address columns as strings in bulk
+    columns = { key : format_ipv4_batch( info[ key ] ) for key in _ADDRESS_FIELDS }
+    for key in ( 'subnet_class', 'num_hosts', 'num_subnets' ): columns[ key ] = info[ key ].tolist()
+    return [ {
+        'ipv4' : ipv4_strs[ i ],
+        'network_id' : columns[ 'network_id' ][ i ],
+        'subnet_mask' : PREFIX_MASK_STR[ cidr ],
+        'wildcard_mask' : columns[ 'wildcard_mask' ][ i ],
+        'cidr_int' : cidr,
+        'cidr_str' : '/{}'.format( cidr ),
+        'subnet_class' : columns[ 'subnet_class' ][ i ],
+        'first_host' : columns[ 'first_host' ][ i ],
+        'last_host' : columns[ 'last_host' ][ i ],
+        'broadcast' : columns[ 'broadcast' ][ i ],
+        'num_hosts' : columns[ 'num_hosts' ][ i ],
+        'num_subnets' : columns[ 'num_subnets' ][ i ]
+    } for i, cidr in enumerate( cidrs ) ]
+
+def _get_subnet_info_rows_scalar( ipv4_strs: list, ipv4s: list, cidrs: list ) -> list:
+    """Helper function that computes get_subnet_info_rows' dicts one row at a time, without NumPy"""
+    # Ensure all addresses fit in 32 bits and all CIDR values are within [0,32], in the same order as the batch path
+    for ipv4 in ipv4s:
+        if not 0 <= ipv4 <= 0xFFFFFFFF: raise ValueError( BAD_IPV4_ERROR.format(ipv4) )
+    for cidr in cidrs:
+        if cidr not in PREFIX_MASK_INT: raise ValueError( BAD_CIDR_ERROR.format(cidr) )
+    return [ _build_subnet_info( ipv4_str, PREFIX_MASK_STR[ cidr ], ipv4 & PREFIX_MASK_INT[ cidr ], PREFIX_WILDCARD_INT[ cidr ], cidr, '/{}'.format( cidr ) )
+             for ipv4_str, ipv4, cidr in zip( ipv4_strs, ipv4s, cidrs ) ]
+
+def validate_batch_columns( ipv4s, cidrs ) -> tuple:
+    """Validates and broadcasts batch input columns as accepted by get_subnet_info_batch
+
+    Returns:
+        A tuple containing the addresses as a uint32 column and the CIDR values as an int64 column, broadcast
+        against each other.
+
+    Raises:
+        ValueError: ipv4s contains values outside of the 32-bit address space, cidrs contains values outside of [0,32].
+    """
+    from numpy import asarray
+    from numpy import broadcast_arrays
+    from numpy import int64
+    from numpy import uint32
+    # Cast the inputs to 64-bit integer columns so that range checks and shifts cannot overflow
+    ipv4_col, cidr_col = broadcast_arrays( asarray( ipv4s, dtype=int64 ), asarray( cidrs, dtype=int64 ) )
+    # Ensure all addresses fit in 32 bits
+    if ipv4_col.size and ( ipv4_col.min() < 0 or ipv4_col.max() > 0xFFFFFFFF ):
+        raise ValueError( BAD_IPV4_ERROR.format( ipv4_col[ (ipv4_col < 0) | (ipv4_col > 0xFFFFFFFF) ][0] ) )
+    # Ensure all CIDR values are within [0,32]
+    if cidr_col.size and ( cidr_col.min() < 0 or cidr_col.max() > 32 ):
+        raise ValueError( BAD_CIDR_ERROR.format( cidr_col[ (cidr_col < 0) | (cidr_col > 32) ][0] ) )
+    return ( ipv4_col.astype( uint32 ), cidr_col )
+
+def enable_subnet_info_cache( maxsize: int = DEFAULT_CACHE_SIZE ) -> None:
+    """Turns on LRU caching of get_subnet_info_given_mask/get_subnet_info_given_cidr results
+
+    Results are keyed on the normalized (network ID, CIDR) pair, so every address within a cached subnet is a hit.
+    Calling this again replaces the current cache (and its counters) with an empty one of the given size.
+
+    Args:
+        maxsize:
+            The maximum number of subnets to keep before evicting the least recently used one.
+
+    Raises:
+        TypeError: Non-integer input provided for maxsize.
+        ValueError: maxsize is less than 1.
+    """
+    global _subnet_info_cache
+    _subnet_info_cache = SubnetInfoCache( maxsize )
+
+def disable_subnet_info_cache() -> None:
+    """Turns off result caching and drops all cached entries"""
+    global _subnet_info_cache
+    _subnet_info_cache = None
+
+def clear_subnet_info_cache() -> None:
+    """Drops all cached entries and resets the cache counters, does nothing if caching is disabled"""
+    cache = _subnet_info_cache
+    if cache is not None: cache.clear()
+
+def get_subnet_info_cache_stats() -> dict:
+    """Returns the result cache counters
+
+    Returns:
+        A dict with the cache hits, misses, evictions, current size and maximum size, or None if caching is disabled.
+        example:
+        { 'hits' : 9000, 'misses' : 1000, 'evictions' : 0, 'size' : 1000, 'maxsize' : 4096 }
+    """
+    cache = _subnet_info_cache
+    return None if cache is None else cache.stats()
+
+def enable_strict_validation() -> None:
+    """Makes every helper re-validate its own arguments, even when called internally on already validated values
+
+    By default, arguments are type checked once where they enter a public function and internal calls go straight to
+    unchecked kernels. Both modes raise the same errors for the same input, strict mode only repeats the checks at
+    every layer (e.g. get_subnet_info_given_cidr re-checks through cidr_to_netmask, get_subnet_info_given_mask,
+    netmask_to_cidr, parse_addr_str and cidr_to_str), which is useful when debugging changes to this module.
+    """
+    global _strict_validation
+    _strict_validation = True
+
+def disable_strict_validation() -> None:
+    """Goes back to validating arguments once at the public entry point (the default)"""
+    global _strict_validation
+    _strict_validation = False
 
 def get_wildcard_mask( subnet_mask: list ) -> list:
     """Calculates the wildcard mask for a subnet given the subnet mask
@@ -163,19 +360,10 @@ def get_wildcard_mask( subnet_mask: list ) -> list:
     Raises:
         TypeError: Non-list input provided for subnet_mask, subnet_mask contains non-integer elements
     """
-    # Ensure input is a list
-    ensure_dtype_list( subnet_mask )
-    '''
-    Ensure all list elements are integers. The bool return from
-    all() is irrelevant, only using it b/c it is an easy one-liner
-    looping mechanism that allows us to call the int validator
-    function which will throw an error for any non-int elements.
-    '''
-    all( ensure_dtype_int(oct) for oct in subnet_mask )
-    # Cast to a numpy.array with datatype uint8 to prevent negative integer values being calculated
-    np_subnet_mask = array( subnet_mask, dtype=uint8 )
-    # Get the wildcard mask by inverting the subnet mask, cast back to integer list
-    return [ int(oct) for oct in list( bitwise_not( np_subnet_mask ) ) ] 
+    # Ensure input is a list of integers
+    ensure_octet_list( subnet_mask )
+    # Get the wildcard mask by inverting the packed subnet mask, unpack back to an integer list
+    return int_to_addr( get_wildcard_mask_int( addr_to_int( subnet_mask ) ) )
 
 def get_network_id( ipv4: list, subnet_mask: list ) -> list:
     """Calculates the network ID for a subnet given an arbitrary address within the subnet's address space and the subnet mask
@@ -192,16 +380,11 @@ def get_network_id( ipv4: list, subnet_mask: list ) -> list:
     Raises:
         TypeError: Non-list input provided for ipv4 or subnet_mask, ipv4 or subnet_mask contain non-integer elements
     """
-     # Ensure that both inputs are lists, and that both lists only contain integers
-    ensure_dtype_list( ipv4 )
-    all( ensure_dtype_int(oct) for oct in ipv4 )
-    ensure_dtype_list( subnet_mask )
-    all( ensure_dtype_int(oct) for oct in subnet_mask )
-    # Cast ipv4 and subnet_mask to numpy.array with data type uint8
-    np_ipv4 = array( ipv4, dtype=uint8 )
-    np_subnet_mask = array( subnet_mask, dtype=uint8 )
-    # Get the network ID by AND-ing the IPv4 address and subnet mask, cast back to integer list
-    return [ int(oct) for oct  in list ( bitwise_and( np_ipv4, np_subnet_mask ) ) ]
+    # Ensure that both inputs are lists, and that both lists only contain integers
+    ensure_octet_list( ipv4 )
+    ensure_octet_list( subnet_mask )
+    # Get the network ID by AND-ing the packed IPv4 address and subnet mask, unpack back to an integer list
+    return int_to_addr( get_network_id_int( addr_to_int( ipv4 ), addr_to_int( subnet_mask ) ) )
 
 def get_broadcast_addr( network_id: list, wildcard_mask: list ) -> list:
     """Calculates the broadcast address for a subnet given its network ID and wildcard mask
@@ -219,15 +402,10 @@ def get_broadcast_addr( network_id: list, wildcard_mask: list ) -> list:
         TypeError: Non-list input provided for network_id or wildcard_mask, network_id or wildcard_mask contain non-integer elements
     """
     # Ensure that both inputs are lists, and that both lists only contain integers
-    ensure_dtype_list( network_id )
-    all( ensure_dtype_int(oct) for oct in network_id )
-    ensure_dtype_list( wildcard_mask )
-    all( ensure_dtype_int(oct) for oct in wildcard_mask )
-    # Cast network_id and wildcard_mask to numpy.array with data type uint8
-    np_network_id = array( network_id, dtype=uint8 )
-    np_wildcard_mask = array( wildcard_mask, dtype=uint8 )
-    # Get the broadcast address by OR-ing the network ID and wildcard mask, cast back to integer list
-    return [ int(oct) for oct in list( bitwise_or( np_network_id, np_wildcard_mask ) ) ]
+    ensure_octet_list( network_id )
+    ensure_octet_list( wildcard_mask )
+    # Get the broadcast address by OR-ing the packed network ID and wildcard mask, unpack back to an integer list
+    return int_to_addr( get_broadcast_addr_int( addr_to_int( network_id ), addr_to_int( wildcard_mask ) ) )
 
 def cidr_to_netmask( cidr: int ) -> str:
     """Given a valid CIDR value, returns the corresponding subnet mask as a string
@@ -245,11 +423,7 @@ def cidr_to_netmask( cidr: int ) -> str:
     """
     # Ensure input is an integer
     ensure_dtype_int( cidr )
-    # Return the value corresponding to the key cidr
-    try:
-        return CIDR_DICT[ cidr ]
-    except KeyError:
-        raise ValueError( BAD_CIDR_ERROR.format(cidr) )
+    return _cidr_to_netmask( cidr )
 
 def netmask_to_cidr( subnet_mask_str: str ) -> int:
     """Given a valid subnet mask, returns the corresponding CIDR value as an integer
@@ -267,16 +441,7 @@ def netmask_to_cidr( subnet_mask_str: str ) -> int:
     """
     # Ensure input is a string
     ensure_dtype_str( subnet_mask_str )
-    # List comprehension that generates an array of integers [0, 32]
-    cidr_vals = [ c for c in range (33) ]
-    # Loop over range [0,32], filter out CIDR values where cidr_dict[value] == subnet_mask
-    cidr_iterator = filter( lambda cidr: CIDR_DICT[ cidr ] == subnet_mask_str, cidr_vals )
-    try:
-        # Only one CIDR should match subnet_mask, get it and return                                                                    
-        return next( cidr_iterator )
-    except StopIteration:
-        # If bad input was provided, need to catch error for empty iterator
-        raise ValueError( BAD_SUBNET_MASK_ERROR.format(subnet_mask_str) )
+    return _netmask_to_cidr( subnet_mask_str )
 
 def parse_addr_str( addr_str: str ) -> list:
     """Parses an IPv4 address/netmask for octet values, returns a list containing the integer values
@@ -295,17 +460,123 @@ def parse_addr_str( addr_str: str ) -> list:
     """
     # Ensure input is a string
     ensure_dtype_str( addr_str )
-    # Split the input string into four separate strings
-    oct_list_str = split( '[.]', addr_str )
-    # Convert the string tokens to integers - don't need try/except b/c the string is already validated
-    return [ int(oct) for oct in oct_list_str ]                                                               
+    return _parse_addr_str( addr_str )
+
+def parse_cidr_str( prefix_str: str ) -> tuple:
+    """Parses a CIDR notation string into its address string and CIDR integer value
+
+    Args:
+        prefix_str:
+            A string of the format x.x.x.x/y, where x is any integer in the range [0,255] and y is in the range [0,32]
+
+    Returns:
+        A tuple containing the address string and the CIDR value.
+        example:
+        parse_cidr_str( '192.168.10.1/24' ) -> ( '192.168.10.1', 24 )
+
+    Raises:
+        TypeError: Non-string input is provided for prefix_str
+        ValueError: prefix_str is not a valid address followed by a '/' and a CIDR value
+    """
+    # Ensure input is a string
+    ensure_dtype_str( prefix_str )
+    # Split on the first '/' -> the address string and the CIDR string
+    addr_str, sep, cidr_str = prefix_str.partition( '/' )
+    # Validate both halves before converting the CIDR string. isdigit() alone would let through characters such as
+    # superscripts that int() rejects, and isdecimal() alone other scripts' digits that int() accepts
+    if not sep or not is_valid_ipv4( addr_str ) or not ( cidr_str.isascii() and cidr_str.isdecimal() ) or not 0 <= int( cidr_str ) <= 32:
+        raise ValueError( BAD_PREFIX_ERROR.format(prefix_str) )
+    return ( addr_str, int( cidr_str ) )
+
+def parse_subnet_str( subnet_str: str, default_cidr: int = 32 ) -> tuple:
+    """Parses an address given as a bare address, an address and subnet mask, or in CIDR notation
+
+    Args:
+        subnet_str:
+            A string of the format x.x.x.x, x.x.x.x y.y.y.y (separated by any whitespace) or x.x.x.x/y.
+        default_cidr:
+            The CIDR value used for bare addresses.
+
+    Returns:
+        A tuple containing the address string, the packed address and the CIDR value.
+        example:
+        parse_subnet_str( '192.168.10.1 255.255.255.0' ) -> ( '192.168.10.1', 3232238081, 24 )
+
+    Raises:
+        TypeError: Non-string input is provided for subnet_str
+        ValueError: subnet_str is not in a supported form or contains an invalid address, subnet mask or CIDR value.
+    """
+    ensure_dtype_str( subnet_str )
+    tokens = subnet_str.split()
+    if len( tokens ) == 2:
+        # Address and subnet mask
+        return ( tokens[0], ipv4_to_int( tokens[0] ), netmask_to_cidr( tokens[1] ) )
+    if len( tokens ) != 1: raise ValueError( BAD_SUBNET_STR_ERROR.format(subnet_str.strip()) )
+    if '/' in tokens[0]:
+        # CIDR notation -> parse_cidr_str already validated the address
+        addr_str, cidr = parse_cidr_str( tokens[0] )
+        return ( addr_str, addr_to_int( _parse_addr_str( addr_str ) ), cidr )
+    # Bare address
+    return ( tokens[0], ipv4_to_int( tokens[0] ), default_cidr )
+
+def ipv4_to_int( ipv4 ) -> int:
+    """Validates an IPv4 address given as a string or an integer and returns it as a packed 32-bit integer
+
+    Args:
+        ipv4:
+            A string of the format x.x.x.x, or an integer in the range [0, 2^32 - 1].
+
+    Returns:
+        The packed 32-bit integer value.
+        example:
+        ipv4_to_int( '192.168.10.1' ) -> 3232238081
 
-def get_first_host( net_id: list ) -> list:
+    Raises:
+        TypeError: ipv4 is neither a string nor an integer.
+        ValueError: ipv4 is not a valid IPv4 address.
+    """
+    if isinstance( ipv4, str ):
+        if not is_valid_ipv4( ipv4 ): raise ValueError( BAD_IPV4_ERROR.format(ipv4) )
+        return addr_to_int( ( parse_addr_str if _strict_validation else _parse_addr_str )( ipv4 ) )
+    # Ensure non-string input is an integer within the 32-bit address space
+    ensure_dtype_int( ipv4 )
+    if not 0 <= ipv4 <= 0xFFFFFFFF: raise ValueError( BAD_IPV4_ERROR.format(ipv4) )
+    return ipv4
+
+def parse_prefix( prefix ) -> tuple:
+    """Parses a prefix into its packed network ID and CIDR value
+
+    Args:
+        prefix:
+            Either a CIDR notation string (e.g. '10.1.0.0/16') or an (address, cidr) tuple, where the address is a
+            string or a packed 32-bit integer. Host bits set in the address are cleared.
+
+    Returns:
+        A tuple containing the packed network ID and the CIDR value.
+        example:
+        parse_prefix( '192.168.10.1/24' ) -> ( 3232238080, 24 )
+
+    Raises:
+        TypeError: prefix is neither a string nor a tuple, or contains elements of the wrong type.
+        ValueError: prefix does not describe a valid IPv4 address and CIDR value.
+    """
+    if isinstance( prefix, str ):
+        addr, cidr = parse_cidr_str( prefix )
+    else:
+        addr, cidr = prefix
+        ensure_dtype_int( cidr )
+        if not 0 <= cidr <= 32: raise ValueError( BAD_CIDR_ERROR.format(cidr) )
+    return ( ipv4_to_int( addr ) & PREFIX_MASK_INT[ cidr ], cidr )
+
+def get_first_host( net_id: list, cidr: int = None ) -> list:
     """Finds the first host address for a subnet given a valid network ID
 
     Args:
         net_id:
             The network ID for the subnet as a list of four integers corresponding to the four 8-bit octet values.
+        cidr:
+            Optional CIDR value of the subnet. /31 and /32 subnets have no separate network ID, so their first host
+            is the network ID itself. If omitted, the first host is always the network ID plus one.
 
     Returns:
         The first host address for the subnet as a list of four integers corresponding to the four 8-bit octet values.
@@ -313,19 +584,20 @@ def get_first_host( net_id: list ) -> list:
     Raises:
         TypeError: Non-list input is provided for net_id, non-integer elements in net_id
     """
-    # Ensure input is a list
-    ensure_dtype_list( net_id )
-    # Ensure all list elements are integers
-    all( ensure_dtype_int(oct) for oct in net_id )
-    # Get the first host addr by incrementing the net ID by 1
-    return [ sum(x) for x in zip( net_id, [0, 0, 0, 1] ) ]
-
-def get_last_host( broadcast: list ) -> list:
+    # Ensure input is a list of integers
+    ensure_octet_list( net_id )
+    # Get the first host addr by incrementing the packed net ID, carrying across octets
+    return int_to_addr( get_first_host_int( addr_to_int( net_id ), 0 if cidr is None else cidr ) )
+
+def get_last_host( broadcast: list, cidr: int = None ) -> list:
     """Finds the last host address given the broadcast address
 
     Args:
         broadcast:
             The broadcast address for the given subnet as a list of four integers corresponding to the four 8-bit octet values.
+        cidr:
+            Optional CIDR value of the subnet. /31 and /32 subnets have no separate broadcast address, so their last
+            host is the broadcast address itself. If omitted, the last host is always the broadcast address minus one.
     
     Returns:
         The last host address for the subnet as a list of four integers corresponding to the four 8-bit octet values.
@@ -333,12 +605,10 @@ def get_last_host( broadcast: list ) -> list:
     Raises:
         TypeError: Non-list input is provided for broadcast, non-integer elements in broadcast.
     """
-    # Ensure input is a list
-    ensure_dtype_list( broadcast )
-    # Ensure all list elements are integers
-    all( ensure_dtype_int(oct) for oct in broadcast )
-    # Get the last host addr by decrementing the broadcast addr by 1
-    return [ sum(x) for x in zip( broadcast, [0, 0, 0, -1] ) ]
+    # Ensure input is a list of integers
+    ensure_octet_list( broadcast )
+    # Get the last host addr by decrementing the packed broadcast addr, borrowing across octets
+    return int_to_addr( get_last_host_int( addr_to_int( broadcast ), 0 if cidr is None else cidr ) )
 
 def get_subnet_class( subnet_mask: list ) -> str:
     """Given a valid subnet mask, returns the classful network type that the subnet would segment
@@ -355,10 +625,8 @@ def get_subnet_class( subnet_mask: list ) -> str:
     Raises:
         TypeError: Non-list input provided for subnet_mask, non-integer elements in subnet_mask.
     """ 
-    # Ensure input is a list
-    ensure_dtype_list( subnet_mask )
-    # Ensure all list elements are integers
-    all( ensure_dtype_int(oct) for oct in subnet_mask )
+    # Ensure input is a list of integers
+    ensure_octet_list( subnet_mask )
     # Determine the subnet class based on the interesting octet, i.e. the right-most non-255 octet
     if subnet_mask[0] != 255:
         return 'none'
@@ -378,18 +646,19 @@ def get_num_hosts( subnet_mask: list ) -> int:
     
     Returns:
         The number of host addresses for the subnet (i.e. the total number of addresses, minus two for the network ID and broadcast address).
+        /31 and /32 subnets have no network ID/broadcast address to exclude, so all of their addresses are counted (see RFC 3021).
 
     Throws:
         TypeError: Non-list input provided for subnet_mask, non-integer elements in subnet_mask.
     """
-    # Call get_wildcard_mask to convert the subnet mask to a wildcard
-    wildcard_mask = get_wildcard_mask( subnet_mask )
-    # Get each element from the wildcard_mask array and add one
-    wild_plus_1 = [ w + 1 for w in wildcard_mask ]
-    # Multiply the values together to get the total number of addresses
-    addr_total = prod( wild_plus_1 )
-    # Subtract 2 for the network ID and broadcast address to get the final number of valid hosts
-    return addr_total - 2
+    # Strict mode -> call get_wildcard_mask to convert the subnet mask to a wildcard, which checks the input again
+    if _strict_validation:
+        wildcard_mask = addr_to_int( get_wildcard_mask( subnet_mask ) )
+    else:
+        ensure_octet_list( subnet_mask )
+        wildcard_mask = get_wildcard_mask_int( addr_to_int( subnet_mask ) )
+    # The number of host bits is the bit length of the packed wildcard mask
+    return get_num_hosts_int( 32 - wildcard_mask.bit_length() )
 
 def get_num_subnets( subnet_mask: list ) -> int:
     """Gets the number of possible subnets for the given mask that could segment that class of network
@@ -404,25 +673,131 @@ def get_num_subnets( subnet_mask: list ) -> int:
     Throws:
         TypeError: Non-list input provided for subnet_mask, non-integer elements in subnet_mask.
     """
-    # Ensure input is a list
-    ensure_dtype_list( subnet_mask )
-    # Ensure all list elements are integers
-    all( ensure_dtype_int(oct) for oct in subnet_mask )
+    # Ensure input is a list of integers
+    ensure_octet_list( subnet_mask )
     # Loop over the octets in the subnet mask
     for oct in subnet_mask:
         # Find the "interesting octet", i.e. the first non-255 octet
         if oct != 255:
-            # Convert the interesting octet to binary representation
-            bit_str = binary_repr( oct )
-            # Count the number of 1-bits
-            subnet_bits = 0
-            for b in bit_str:
-                if b == '1': subnet_bits += 1
+            # Count the number of 1-bits in the interesting octet
+            subnet_bits = bin( oct ).count( '1' )
             # Return the number of subnets based on the number of subnet bits
             return 2**subnet_bits
     # Should only reach this point if 255.255.255.255 is passed -> network with only 1 host, 256 1-host subnets
     return 256
 
+def addr_to_int( addr: list ) -> int:
+    """Packs an IPv4 address or subnet mask given as a list of integer octets into a single 32-bit integer
+
+    Args:
+        addr:
+            A list containing four integers representing the four 8-bit integer octets.
+
+    Returns:
+        The packed 32-bit integer value.
+        example:
+        addr_to_int( [192, 168, 10, 1] ) -> 3232238081
+    """
+    return ( addr[0] << 24 ) | ( addr[1] << 16 ) | ( addr[2] << 8 ) | addr[3]
+
+def int_to_addr( addr_int: int ) -> list:
+    """Unpacks a 32-bit integer IPv4 address or subnet mask into a list of integer octets
+
+    Args:
+        addr_int:
+            An integer in the range [0, 2^32 - 1].
+
+    Returns:
+        The four 8-bit integer octets as a list.
+        example:
+        int_to_addr( 3232238081 ) -> [192, 168, 10, 1]
+    """
+    return [ ( addr_int >> 24 ) & 255, ( addr_int >> 16 ) & 255, ( addr_int >> 8 ) & 255, addr_int & 255 ]
+
+def int_to_addr_str( addr_int: int ) -> str:
+    """Formats a 32-bit integer IPv4 address or subnet mask as a dotted-quad string
+
+    Args:
+        addr_int:
+            An integer in the range [0, 2^32 - 1].
+
+    Returns:
+        The IPv4 address or subnet mask as a string
+        example:
+        int_to_addr_str( 3232238081 ) -> '192.168.10.1'
+    """
+    return '%d.%d.%d.%d' % ( ( addr_int >> 24 ) & 255, ( addr_int >> 16 ) & 255, ( addr_int >> 8 ) & 255, addr_int & 255 )
+
+def cidr_to_mask_int( cidr: int ) -> int:
+    """Given a valid CIDR value, returns the subnet mask as a packed 32-bit integer
+
+    Args:
+        cidr:
+            An integer value in the range [0,32] corresponding to a CIDR prefix length.
+
+    Returns:
+        The subnet mask as a 32-bit integer i.e. cidr 1-bits followed by (32 - cidr) 0-bits.
+        example:
+        cidr_to_mask_int( 24 ) -> 4294967040 (255.255.255.0)
+    """
+    return PREFIX_MASK_INT[ cidr ]
+
+def get_wildcard_mask_int( subnet_mask: int ) -> int:
+    """Returns the wildcard mask for a packed 32-bit subnet mask"""
+    return subnet_mask ^ 0xFFFFFFFF
+
+def get_network_id_int( ipv4: int, subnet_mask: int ) -> int:
+    """Returns the network ID for a packed 32-bit address and subnet mask"""
+    return ipv4 & subnet_mask
+
+def get_broadcast_addr_int( network_id: int, wildcard_mask: int ) -> int:
+    """Returns the broadcast address for a packed 32-bit network ID and wildcard mask"""
+    return network_id | wildcard_mask
+
+def get_first_host_int( network_id: int, cidr: int ) -> int:
+    """Returns the first host address for a packed 32-bit network ID, /31 and /32 subnets start at the network ID"""
+    return network_id + ( cidr < 31 )
+
+def get_last_host_int( broadcast: int, cidr: int ) -> int:
+    """Returns the last host address for a packed 32-bit broadcast address, /31 and /32 subnets end at the broadcast address"""
+    return broadcast - ( cidr < 31 )
+
+def get_num_hosts_int( cidr: int ) -> int:
+    """Returns the number of host addresses for a CIDR value, /31 and /32 subnets do not reserve a network ID/broadcast"""
+    return PREFIX_USABLE_HOSTS[ cidr ]
+
+def get_num_subnets_int( cidr: int ) -> int:
+    """Returns 2^(bits in the interesting octet) for a CIDR value, /32 is treated as 256 1-host subnets"""
+    return PREFIX_NUM_SUBNETS[ cidr ]
+
+def get_subnet_class_int( cidr: int ) -> str:
+    """Returns the classful network type that a subnet with the given CIDR value would segment"""
+    return PREFIX_CLASS[ cidr ]
+
+def range_to_prefixes( first: int, last: int ) -> list:
+    """Splits an inclusive range of packed 32-bit addresses into the fewest aligned CIDR blocks covering it exactly
+
+    Args:
+        first:
+            The first address in the range as a packed 32-bit integer.
+        last:
+            The last address in the range as a packed 32-bit integer, must not be less than first.
+
+    Returns:
+        A list of (network ID, cidr) tuples in address order.
+        example:
+        range_to_prefixes( 167772160, 167772162 ) -> [ (167772160, 31), (167772162, 32) ] (10.0.0.0 - 10.0.0.2)
+    """
+    prefixes = []
+    while first <= last:
+        # The largest block starting at first is limited by the alignment of first (its lowest set bit) ...
+        size = first & -first if first else 1 << 32
+        # ... and by the number of addresses left in the range
+        while size > last - first + 1: size >>= 1
+        prefixes.append( ( first, 33 - size.bit_length() ) )
+        first += size
+    return prefixes
+
 def cidr_to_str( cidr: int ) -> str:
     """Given a valid CIDR value, returns the string representation
 
@@ -440,8 +815,7 @@ def cidr_to_str( cidr: int ) -> str:
     """
     # Ensure input is an integer
     ensure_dtype_int( cidr )
-    # Build the output string
-    return ''.join( ['/', str(cidr) ] )
+    return _cidr_to_str( cidr )
 
 def addr_to_str( addr: list ) -> str:
     """Given a valid IPv4 address or subnet mask as a list of integer octets, returns a string representation
@@ -456,36 +830,67 @@ def addr_to_str( addr: list ) -> str:
     Raises:
         TypeError: Non-list input is provided for addr, addr contains non-integer elements
     """
-    # Ensure input is a list
-    ensure_dtype_list( addr )
-    # Ensure all list elements are integers
-    all( ensure_dtype_int(oct) for oct in addr )
-    # Convert the elements in addr to strings
-    oct_str_list = [ str(oct) for oct in addr ]
-    return ''.join(_delimit_list( oct_str_list, '.', 1 ))
-
-def _delimit_list( _list: list, _delim: str, _freq: int ) -> list:
-    """Helper function for inserting a delimiter character every f elements (specified by _freq) into an existing list
-    
-    Source: https://www.geeksforgeeks.org/python-insert-after-every-nth-element-in-a-list/
+    # Ensure input is a list of integers
+    ensure_octet_list( addr )
+    # Join the octets directly, one formatting operation for all four
+    return '%d.%d.%d.%d' % tuple( addr )
 
-    Args:
-        _list:
-            The list to insert a delimiter into
-        _delim:
-            The delimter character/string
-        _freq:
-            How often to insert the delimiter, indicated by the length of a substring within _list
-    
-    Returns:
-        A delimited list
-        example: 
-        _delimit_list( [ 'a', 'b', 'c', 'd' ], '.', 1 ) -> [ 'a', '.', 'b', '.', 'c', '.', 'd' ]
+def ensure_octet_list( addr: list ) -> None:
+    """Ensures that an address or mask is a list of integer octets, in one pass without per-octet validator calls
+
+    Raises:
+        TypeError: Non-list input provided for addr, addr contains non-integer elements.
     """
-    delimited = list( chain( *[ _list[i : i+_freq] + [_delim] 
-                               if len(_list[i : i+_freq]) == _freq
-                               else _list[i : i+_freq]
-                               for i in range(0, len(_list), _freq) ] ) )
-    # Remove extra delimiter character from end of list (can happen when _freq == 1)
-    if delimited[ len(delimited) - 1 ] == _delim: delimited.pop()
-    return delimited
\ No newline at end of file
+    # Strict mode -> the list and octet validators from before, one lambda call per octet
+    if _strict_validation or not isinstance( addr, list ):
+        ensure_dtype_list( addr )
+        all( ensure_dtype_int(oct) for oct in addr )
+        return
+    for oct in addr:
+        if not isinstance( oct, int ): ensure_dtype_int( oct )
+
+#|##################################################################| Unchecked kernels |###################################################################|#
+
+# The kernels below expect arguments of the right type, callers must validate them first
+
+def _parse_addr_str( addr_str: str ) -> list:
+    """Helper function that splits a validated dotted-quad string into its integer octets (see parse_addr_str)"""
+    return [ int(oct) for oct in addr_str.split( '.' ) ]
+
+def _netmask_to_cidr( subnet_mask_str: str ) -> int:
+    """Helper function that looks up the CIDR value of a subnet mask string (see netmask_to_cidr)"""
+    try:
+        # Constant time reverse lookup in the precomputed prefix table
+        return MASK_STR_TO_PREFIX[ subnet_mask_str ]
+    except KeyError:
+        raise ValueError( BAD_SUBNET_MASK_ERROR.format(subnet_mask_str) )
+
+def _cidr_to_netmask( cidr: int ) -> str:
+    """Helper function that looks up the subnet mask string of an integer CIDR value (see cidr_to_netmask)"""
+    try:
+        return PREFIX_MASK_STR[ cidr ]
+    except KeyError:
+        raise ValueError( BAD_CIDR_ERROR.format(cidr) )
+
+def _cidr_to_str( cidr: int ) -> str:
+    """Helper function that formats an integer CIDR value as '/y' (see cidr_to_str)"""
+    return '/{}'.format( cidr )
+
+def _build_subnet_info( ipv4_str: str, subnet_mask_str: str, network_id: int, wildcard_mask: int, cidr_int: int, cidr_str: str ) -> dict:
+    """Helper function that builds a subnet information dict from the packed network ID and wildcard mask"""
+    # Get the broadcast address -> bitwise OR the network ID and wildcard mask
+    broadcast = get_broadcast_addr_int( network_id, wildcard_mask )
+    return {
+        'ipv4' : ipv4_str,
+        'network_id' : int_to_addr_str( network_id ), 
+        'subnet_mask' : subnet_mask_str,
+        'wildcard_mask' : int_to_addr_str( wildcard_mask ), 
+        'cidr_int' : cidr_int,
+        'cidr_str' : cidr_str,
+        'subnet_class' : get_subnet_class_int( cidr_int ), 
+        'first_host' : int_to_addr_str( get_first_host_int( network_id, cidr_int ) ), 
+        'last_host' : int_to_addr_str( get_last_host_int( broadcast, cidr_int ) ), 
+        'broadcast' : int_to_addr_str( broadcast ), 
+        'num_hosts' : get_num_hosts_int( cidr_int ), 
+        'num_subnets' : get_num_subnets_int( cidr_int ) 
+    }
@@ -0,0 +1,350 @@
+"""
+Columnar container for large numbers of IPv4 subnet information results.
+
+A SubnetFrame stores only what every other field is derived from: the packed addresses as a uint32 column and the
+CIDR values as a uint8 column, 5 bytes per result. Each field of the subnet information dicts is available as a whole
+NumPy column, computed on access from the prefix tables in one vectorized step, so 50M results take 250 MB rather than
+the tens of GB of the equivalent dicts. Slicing, filtering, sorting and grouping all work on the two stored columns
+and return new frames, without ever creating per-row objects.
+
+Frames are saved to a compact binary format, a short header followed by chunks of the two stored columns, or to CSV
+with the same columns as the command line interface. Both are written and read in chunks, so files larger than memory
+can be streamed with iter_binary_chunks/iter_csv_chunks.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator     import validate_batch_columns
+from v4._ipv4_calculator     import get_subnet_info_rows
+from v4._ipv4_calculator     import SUBNET_INFO_FIELDS
+from v4._ipv4_parser         import format_ipv4_batch
+from v4._ipv4_parser         import parse_ipv4_lines
+from v4._ipv4_prefix_table   import MASK_INT_ARRAY
+from v4._ipv4_prefix_table   import CLASS_ARRAY
+from v4._ipv4_prefix_table   import USABLE_HOSTS_ARRAY
+from v4._ipv4_prefix_table   import NUM_SUBNETS_ARRAY
+from v4._ipv4_prefix_table   import WILDCARD_INT_ARRAY
+from v4._ipv4_validator      import BAD_IPV4_ERROR
+from v4._ipv4_validator      import BAD_CIDR_ERROR
+from numpy                   import array
+from numpy                   import asarray
+from numpy                   import bincount
+from numpy                   import concatenate
+from numpy                   import empty
+from numpy                   import flatnonzero
+from numpy                   import frombuffer
+from numpy                   import int64
+from numpy                   import lexsort
+from numpy                   import uint8
+from numpy                   import uint32
+from numpy                   import unique
+from numpy                   import zeros
+from contextlib              import contextmanager
+from csv                     import reader as csv_reader
+from csv                     import writer
+from itertools               import islice
+from struct                  import Struct
+
+#|###################################################################| Global constants |###################################################################|#
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+BAD_FRAME_FILE_ERROR = 'Not a SubnetFrame file, or a truncated one - {}'
+BAD_FIELD_ERROR = 'Unknown subnet information field - Value: {}'
+
+# Binary format -> magic and version, then per chunk the row count followed by the little endian uint32 addresses
+# and the uint8 CIDR values
+_MAGIC = b'NETTERSF\x01'
+_CHUNK_HEADER = Struct( '<Q' )
+
+# CIDR -> CIDR notation suffix, indexed like the prefix table arrays
+_CIDR_STR_ARRAY = array( [ '/{}'.format( cidr ) for cidr in range( 33 ) ] )
+
+# Field -> function computing its column from the stored ( ipv4s, cidrs ) columns
+_COLUMNS = {
+    'ipv4' : lambda ipv4s, cidrs: ipv4s,
+    'network_id' : lambda ipv4s, cidrs: ipv4s & MASK_INT_ARRAY[ cidrs ],
+    'subnet_mask' : lambda ipv4s, cidrs: MASK_INT_ARRAY[ cidrs ],
+    'wildcard_mask' : lambda ipv4s, cidrs: WILDCARD_INT_ARRAY[ cidrs ],
+    'cidr_int' : lambda ipv4s, cidrs: cidrs.astype( int64 ),
+    'cidr_str' : lambda ipv4s, cidrs: _CIDR_STR_ARRAY[ cidrs ],
+    'subnet_class' : lambda ipv4s, cidrs: CLASS_ARRAY[ cidrs ],
+    # /31 and /32 subnets have no separate network ID/broadcast address to exclude from the host range (see RFC 3021)
+    'first_host' : lambda ipv4s, cidrs: ( ipv4s & MASK_INT_ARRAY[ cidrs ] ) + ( cidrs < 31 ).astype( uint32 ),
+    'last_host' : lambda ipv4s, cidrs: ( ipv4s | WILDCARD_INT_ARRAY[ cidrs ] ) - ( cidrs < 31 ).astype( uint32 ),
+    'broadcast' : lambda ipv4s, cidrs: ipv4s | WILDCARD_INT_ARRAY[ cidrs ],
+    'num_hosts' : lambda ipv4s, cidrs: USABLE_HOSTS_ARRAY[ cidrs ],
+    'num_subnets' : lambda ipv4s, cidrs: NUM_SUBNETS_ARRAY[ cidrs ]
+}
+_ADDRESS_FIELDS = ( 'ipv4', 'network_id', 'subnet_mask', 'wildcard_mask', 'first_host', 'last_host', 'broadcast' )
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class SubnetFrame:
+    """Structure-of-arrays container of IPv4 subnet information, one row per address
+
+    Indexing a frame with a field name returns that field's column, any other index (an integer, slice, boolean mask
+    or integer array) returns a new frame with the selected rows. Slices share memory with the original frame.
+
+    example:
+    frame = SubnetFrame( addresses, cidrs )
+    frame[ 'network_id' ] -> array([...], dtype=uint32)
+    small = frame[ frame[ 'num_hosts' ] < 64 ].sort( 'network_id' )
+    for cidr, group in frame.group_by( 'cidr_int' ): ...
+    frame.save( 'subnets.bin' ); SubnetFrame.load( 'subnets.bin' )
+    """
+
+    __slots__ = ( 'ipv4s', 'cidrs' )
+
+    FIELDS = SUBNET_INFO_FIELDS
+
+    def __init__( self, ipv4s=(), cidrs=32 ):
+        """Creates a frame from columns of addresses and CIDR values
+
+        Args:
+            ipv4s:
+                An array-like of IPv4 addresses as unsigned 32-bit integers.
+            cidrs:
+                An array-like of CIDR values in the range [0,32], or a single integer applied to every address.
+
+        Raises:
+            ValueError: ipv4s contains values outside of the 32-bit address space, cidrs contains values outside of [0,32].
+        """
+        ipv4_col, cidr_col = validate_batch_columns( ipv4s, cidrs )
+        self.ipv4s = ipv4_col.ravel()
+        self.cidrs = cidr_col.ravel().astype( uint8 )
+
+    @classmethod
+    def _from_columns( cls, ipv4s, cidrs ):
+        """Helper function that wraps columns that are already validated uint32/uint8 arrays"""
+        frame = cls.__new__( cls )
+        frame.ipv4s = ipv4s
+        frame.cidrs = cidrs
+        return frame
+
+    @classmethod
+    def concat( cls, frames ):
+        """Returns one frame holding the rows of every frame in turn"""
+        frames = list( frames )
+        if not frames: return cls()
+        return cls._from_columns( concatenate( [ f.ipv4s for f in frames ] ), concatenate( [ f.cidrs for f in frames ] ) )
+
+    def __len__( self ) -> int:
+        return len( self.ipv4s )
+
+    def __repr__( self ) -> str:
+        return 'SubnetFrame({} rows)'.format( len( self ) )
+
+    def __eq__( self, other ) -> bool:
+        if not isinstance( other, SubnetFrame ): return NotImplemented
+        return len( self ) == len( other ) and bool( ( self.ipv4s == other.ipv4s ).all() and ( self.cidrs == other.cidrs ).all() )
+
+    __hash__ = None
+
+    def __getitem__( self, key ):
+        """Returns a field's column for a field name, or a frame of the selected rows for anything else
+
+        Raises:
+            KeyError: key is a string but not a field name.
+        """
+        if isinstance( key, str ): return self.column( key )
+        if isinstance( key, int ): key = slice( key, key + 1 or None )
+        return SubnetFrame._from_columns( self.ipv4s[ key ], self.cidrs[ key ] )
+
+    def column( self, field: str ):
+        """Returns the column of one field of the subnet information dicts (see get_subnet_info_batch for the dtypes)
+
+        Raises:
+            KeyError: field is not a field name.
+        """
+        try:
+            compute = _COLUMNS[ field ]
+        except KeyError:
+            raise KeyError( BAD_FIELD_ERROR.format(field) )
+        return compute( self.ipv4s, self.cidrs )
+
+    def filter( self, mask ):
+        """Returns a frame of the rows where mask is True, e.g. frame.filter( frame[ 'cidr_int' ] >= 24 )"""
+        return self[ asarray( mask, dtype=bool ) ]
+
+    def sort( self, by='network_id', descending: bool = False ):
+        """Returns a frame with the rows sorted by one or more fields
+
+        Args:
+            by:
+                A field name, or a sequence of field names where the first is the primary sort key.
+            descending:
+                Sort from largest to smallest.
+
+        Returns:
+            A new frame. The sort is stable, so equal rows keep their relative order.
+        """
+        keys = [ by ] if isinstance( by, str ) else list( by )
+        columns = [ self.column( key ) for key in reversed( keys ) ]
+        # Reversing an ascending order would also reverse equal rows, so sort on negated ranks instead (ranks rather
+        # than values, which covers the unsigned and string columns)
+        if descending: columns = [ -unique( column, return_inverse=True )[1] for column in columns ]
+        # lexsort sorts by its last key first
+        return self[ lexsort( columns ) ]
+
+    def group_by( self, by='cidr_int' ):
+        """Yields the rows grouped by the values of one or more fields, in ascending order of those values
+
+        Args:
+            by:
+                A field name, or a sequence of field names, e.g. ( 'network_id', 'cidr_int' ) to group hosts by the
+                subnet they belong to.
+
+        Yields:
+            Tuples of the group's value (a tuple of values when grouping by several fields) and a frame of its rows,
+            which keep their relative order.
+        """
+        keys = [ by ] if isinstance( by, str ) else list( by )
+        ordered = self.sort( keys )
+        columns = [ ordered.column( key ) for key in keys ]
+        if not len( ordered ): return
+        # A new group starts wherever any key column changes value
+        changed = zeros( len( ordered ) - 1, dtype=bool )
+        for col in columns: changed |= col[ 1: ] != col[ :-1 ]
+        bounds = concatenate( ( [ 0 ], flatnonzero( changed ) + 1, [ len( ordered ) ] ) ).tolist()
+        for start, stop in zip( bounds, bounds[ 1: ] ):
+            values = tuple( col[ start ].item() for col in columns )
+            yield ( values[0] if isinstance( by, str ) else values, ordered[ start:stop ] )
+
+    def prefix_counts( self ) -> dict:
+        """Returns the number of rows per CIDR value, e.g. { 24 : 1000, 32 : 5 }"""
+        counts = bincount( self.cidrs, minlength=33 )
+        return { cidr : int( counts[ cidr ] ) for cidr in flatnonzero( counts ).tolist() }
+
+    def to_dicts( self ) -> list:
+        """Returns the rows as the dicts of get_subnet_info_given_mask, only meant for small frames"""
+        return get_subnet_info_rows( format_ipv4_batch( self.ipv4s ), self.ipv4s.tolist(), self.cidrs.tolist() )
+
+    def save( self, file, chunk_size: int = DEFAULT_CHUNK_SIZE ) -> None:
+        """Saves the frame in the binary format, chunk by chunk
+
+        Args:
+            file:
+                A path or a binary file object opened for writing.
+            chunk_size:
+                The number of rows written per chunk.
+        """
+        with _open( file, 'wb' ) as f:
+            f.write( _MAGIC )
+            for start in range( 0, len( self ), chunk_size ):
+                ipv4s = self.ipv4s[ start:start + chunk_size ]
+                f.write( _CHUNK_HEADER.pack( len( ipv4s ) ) )
+                f.write( ipv4s.astype( '<u4' ).tobytes() )
+                f.write( self.cidrs[ start:start + chunk_size ].tobytes() )
+
+    @classmethod
+    def load( cls, file ):
+        """Loads a frame saved with save()
+
+        Raises:
+            ValueError: file is not in the binary format, is truncated, or holds invalid values.
+        """
+        return cls.concat( cls.iter_binary_chunks( file ) )
+
+    @classmethod
+    def iter_binary_chunks( cls, file ):
+        """Lazily reads a file saved with save(), yielding one frame per saved chunk
+
+        Raises:
+            ValueError: file is not in the binary format, is truncated, or holds invalid values.
+        """
+        with _open( file, 'rb' ) as f:
+            if f.read( len( _MAGIC ) ) != _MAGIC: raise ValueError( BAD_FRAME_FILE_ERROR.format('bad header') )
+            while True:
+                header = f.read( _CHUNK_HEADER.size )
+                if not header: return
+                if len( header ) != _CHUNK_HEADER.size: raise ValueError( BAD_FRAME_FILE_ERROR.format('truncated chunk header') )
+                size, = _CHUNK_HEADER.unpack( header )
+                data = f.read( 5 * size )
+                if len( data ) != 5 * size: raise ValueError( BAD_FRAME_FILE_ERROR.format('truncated chunk') )
+                ipv4s = frombuffer( data, dtype='<u4', count=size ).astype( uint32 )
+                cidrs = frombuffer( data, dtype=uint8, offset=4 * size ).copy()
+                if size and cidrs.max() > 32: raise ValueError( BAD_CIDR_ERROR.format( int( cidrs.max() ) ) )
+                yield cls._from_columns( ipv4s, cidrs )
+
+    def to_csv( self, file, fields=SUBNET_INFO_FIELDS, chunk_size: int = 65536 ) -> None:
+        """Writes the frame as CSV with a header row, chunk by chunk
+
+        Args:
+            file:
+                A path or a text file object opened for writing (with newline='').
+            fields:
+                The fields to write, defaults to every field in the order of the command line interface. Files that
+                are read back with read_csv must include 'ipv4' and 'cidr_int'.
+            chunk_size:
+                The number of rows formatted per chunk.
+
+        Raises:
+            KeyError: fields contains an unknown field name.
+        """
+        for field in fields:
+            if field not in _COLUMNS: raise KeyError( BAD_FIELD_ERROR.format(field) )
+        with _open( file, 'w', newline='' ) as f:
+            csv_writer = writer( f, lineterminator='\n' )
+            csv_writer.writerow( fields )
+            for start in range( 0, len( self ), chunk_size ):
+                chunk = self[ start:start + chunk_size ]
+                # Address columns are formatted in bulk, the rest go through tolist() once per column
+                columns = [ format_ipv4_batch( chunk.column( field ) ) if field in _ADDRESS_FIELDS else chunk.column( field ).tolist() for field in fields ]
+                csv_writer.writerows( zip( *columns ) )
+
+    @classmethod
+    def read_csv( cls, file, chunk_size: int = 65536 ):
+        """Loads a frame from CSV written by to_csv (or the command line interface), see iter_csv_chunks"""
+        return cls.concat( cls.iter_csv_chunks( file, chunk_size ) )
+
+    @classmethod
+    def iter_csv_chunks( cls, file, chunk_size: int = 65536 ):
+        """Lazily reads CSV with a header row and 'ipv4' and 'cidr_int' columns, yielding one frame per chunk of rows
+
+        Other columns are ignored, they are derived from the address and CIDR value.
+
+        Raises:
+            ValueError: The header lacks the 'ipv4' or 'cidr_int' column, or a row lacks either column or holds an invalid
+                value.
+        """
+        with _open( file, 'r', newline='' ) as f:
+            reader = csv_reader( f )
+            header = next( reader, None )
+            if header is None: return
+            if 'ipv4' not in header or 'cidr_int' not in header:
+                raise ValueError( 'CSV header must include \'ipv4\' and \'cidr_int\' - Value: {}'.format(header) )
+            # Plain rows with the two column indices, DictReader builds a dict per row
+            ipv4_index, cidr_index = header.index( 'ipv4' ), header.index( 'cidr_int' )
+            width = max( ipv4_index, cidr_index ) + 1
+            while True:
+                rows = list( islice( reader, chunk_size ) )
+                if not rows: return
+                for row in rows:
+                    if len( row ) < width: raise ValueError( 'CSV row lacks the \'ipv4\' or \'cidr_int\' column - Value: {}'.format(row) )
+                addr_strs = [ row[ ipv4_index ] for row in rows ]
+                cidr_strs = [ row[ cidr_index ] for row in rows ]
+                # Terminate every cell so an empty last one still gets its own line, a cell holding a newline would
+                # add lines and can't be a valid address anyway
+                ipv4s, valid = parse_ipv4_lines( '\n'.join( addr_strs ) + '\n' )
+                if len( ipv4s ) != len( rows ): raise ValueError( BAD_IPV4_ERROR.format( next( addr for addr in addr_strs if '\n' in addr ) ) )
+                if not valid.all(): raise ValueError( BAD_IPV4_ERROR.format( addr_strs[ int( flatnonzero( ~valid )[0] ) ] ) )
+                cidrs = empty( len( cidr_strs ), dtype=int64 )
+                for i, cidr in enumerate( cidr_strs ):
+                    try:
+                        cidrs[ i ] = int( cidr )
+                    except ( ValueError, OverflowError ):
+                        raise ValueError( BAD_CIDR_ERROR.format( cidr ) ) from None
+                yield cls( ipv4s, cidrs )
+
+#|#################################################################| Function definitions |#################################################################|#
+
+@contextmanager
+def _open( file, mode: str, **kwargs ):
+    """Helper function that opens a path, or yields an already open file object without closing it"""
+    if hasattr( file, 'write' if 'w' in mode else 'read' ):
+        yield file
+        return
+    with open( file, mode, **kwargs ) as f:
+        yield f
@@ -0,0 +1,147 @@
+"""
+Lazily enumerates the host addresses of subnets in NumPy chunks, in address order or in a random order, e.g. to build
+target lists for nmap -iL.
+
+The hosts to enumerate are held as an AddressSet, so any number of (possibly overlapping) subnets and exclusions take
+a few intervals no matter how many hosts they cover. The i-th host is found by a binary search over the cumulative
+interval sizes, which lets chunks of any index range be materialized on their own and keeps memory use constant.
+
+Random order never materializes the host list either: the host indices [0, n) are mapped through a keyed Feistel
+network over the smallest power-of-4 domain that holds them, which is a bijection, and indices that land outside
+[0, n) are walked through the network again until they land inside (cycle walking), which keeps it a bijection on
+[0, n). The same seed always gives the same order.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator      import get_subnet_info_batch
+from v4._ipv4_calculator      import parse_prefix
+from v4._ipv4_address_set     import AddressSet
+from v4._ipv4_parser          import write_ipv4_lines
+from v4._ipv4_parser          import DEFAULT_CHUNK_SIZE
+from numpy                    import arange
+from numpy                    import asarray
+from numpy                    import concatenate
+from numpy                    import cumsum
+from numpy                    import int64
+from numpy                    import searchsorted
+from numpy                    import uint32
+from numpy                    import uint64
+from numpy.random             import default_rng
+
+#|###################################################################| Global constants |###################################################################|#
+
+FEISTEL_ROUNDS = 4
+BAD_CHUNK_SIZE_ERROR = 'Chunk size must be a positive integer - Value: {}'
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def subnet_hosts( networks, cidrs ) -> AddressSet:
+    """Returns the set of host addresses of every subnet given as columns
+
+    Network IDs and broadcast addresses are left out, except for /31 and /32 subnets where every address is a host
+    (see get_first_host_int/get_last_host_int).
+
+    Args:
+        networks:
+            An array-like of addresses within each subnet as unsigned 32-bit integers, host bits are ignored.
+        cidrs:
+            An array-like of CIDR values in the range [0,32], or a single integer applied to every subnet.
+
+    Returns:
+        An AddressSet of the hosts.
+        example:
+        subnet_hosts( [ 3232238080 ], 30 ).to_prefixes() -> [ '192.168.10.1/32', '192.168.10.2/32' ]
+    """
+    info = get_subnet_info_batch( networks, cidrs )
+    return AddressSet.from_range_arrays( info[ 'first_host' ], info[ 'last_host' ] )
+
+def enumerate_hosts( subnets, exclude=(), shuffle: bool = False, seed: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE ):
+    """Lazily yields the host addresses of one or more subnets as uint32 chunks
+
+    Every host is yielded exactly once, even if subnets overlap.
+
+    Args:
+        subnets:
+            An iterable of CIDR notation strings or (address, cidr) tuples as accepted by parse_prefix, or an
+            AddressSet of the hosts themselves (see subnet_hosts).
+        exclude:
+            Addresses to leave out, as an AddressSet or an iterable of prefixes as accepted by parse_prefix.
+        shuffle:
+            False for ascending address order, True for a random order.
+        seed:
+            The seed of the random order, defaults to a fresh random seed.
+        chunk_size:
+            The number of addresses per chunk (the last chunk may be shorter).
+
+    Yields:
+        uint32 NumPy arrays of host addresses.
+        example:
+        list( enumerate_hosts( [ '192.168.10.0/30' ] ) ) -> [ array([3232238081, 3232238082], dtype=uint32) ]
+
+    Raises:
+        TypeError: A prefix is of the wrong type, non-integer input provided for chunk_size.
+        ValueError: A prefix is invalid, chunk_size is less than 1.
+    """
+    if not isinstance( chunk_size, int ): raise TypeError( '\'{}\' is not a valid {}'.format(chunk_size, repr(int)) )
+    if chunk_size < 1: raise ValueError( BAD_CHUNK_SIZE_ERROR.format(chunk_size) )
+    hosts = subnets if isinstance( subnets, AddressSet ) else _prefix_hosts( subnets )
+    if not isinstance( exclude, AddressSet ): exclude = AddressSet( prefixes=exclude )
+    if exclude: hosts = hosts - exclude
+    firsts, lasts = hosts.ranges
+    # Index of the first host of each interval, plus the total as a sentinel
+    offsets = concatenate( ( [ 0 ], cumsum( lasts - firsts + 1 ) ) )
+    total = int( offsets[ -1 ] )
+    keys = default_rng( seed ).integers( 0, 1 << 63, size=FEISTEL_ROUNDS, dtype=uint64 ) if shuffle else None
+    for start in range( 0, total, chunk_size ):
+        indices = arange( start, min( start + chunk_size, total ), dtype=int64 )
+        if shuffle: indices = _permute( indices, total, keys )
+        interval = searchsorted( offsets, indices, side='right' ) - 1
+        yield ( firsts[ interval ] + ( indices - offsets[ interval ] ) ).astype( uint32 )
+
+def write_hosts( subnets, file, exclude=(), shuffle: bool = False, seed: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE ) -> int:
+    """Writes the host addresses of one or more subnets to a binary file, one per line (see enumerate_hosts)
+
+    example:
+    with open( 'targets.txt', 'wb' ) as f: write_hosts( [ '10.0.0.0/8' ], f, shuffle=True )  -> then nmap -iL targets.txt
+
+    Returns:
+        The number of hosts written.
+    """
+    count = 0
+    for chunk in enumerate_hosts( subnets, exclude, shuffle, seed, chunk_size ):
+        write_ipv4_lines( chunk, file, chunk_size=chunk_size )
+        count += len( chunk )
+    return count
+
+def _prefix_hosts( prefixes ) -> AddressSet:
+    """Helper function that parses an iterable of prefixes into the set of their hosts"""
+    parsed = [ parse_prefix( prefix ) for prefix in prefixes ]
+    return subnet_hosts( asarray( [ p[0] for p in parsed ], dtype=uint32 ), asarray( [ p[1] for p in parsed ], dtype=int64 ) )
+
+def _permute( indices, size: int, keys ):
+    """Helper function that maps indices in [0, size) to their positions in the keyed random permutation of [0, size)"""
+    # Balanced Feistel network over 2 * half bits, the smallest power-of-4 domain holding every index (< 4 * size)
+    half = max( 1, ( ( size - 1 ).bit_length() + 1 ) // 2 )
+    values = _feistel( indices.astype( uint64 ), half, keys )
+    # Cycle walking -> values outside [0, size) go through the network again until they land inside
+    outside = values >= size
+    while outside.any():
+        values[ outside ] = _feistel( values[ outside ], half, keys )
+        outside = values >= size
+    return values.astype( int64 )
+
+def _feistel( values, half: int, keys ):
+    """Helper function that applies the keyed Feistel network to values of 2 * half bits"""
+    mask = uint64( ( 1 << half ) - 1 )
+    left, right = values >> uint64( half ), values & mask
+    for key in keys:
+        # Round function -> the murmur3 64-bit finalizer of the keyed right half
+        mixed = ( right + key ) * uint64( 0x9E3779B97F4A7C15 )
+        mixed ^= mixed >> uint64( 33 )
+        mixed *= uint64( 0xFF51AFD7ED558CCD )
+        mixed ^= mixed >> uint64( 33 )
+        left, right = right, left ^ ( mixed & mask )
+    return ( left << uint64( half ) ) | right
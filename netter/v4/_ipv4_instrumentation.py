@@ -0,0 +1,334 @@
+"""
+Opt-in instrumentation of the public IPv4 calculator and validator functions.
+
+While enabled, every call to an instrumented function records its latency in a log-scale histogram, its outcome
+(validation failures are calls that raise a TypeError/ValueError, or is_valid_* checks that return False) and, where
+the call involves a subnet, its prefix length. get_instrumentation_snapshot() reports per-function call counts,
+cumulative/mean/min/max and p50/p90/p99 latencies and the calls per prefix length, so it shows which entry points and
+which prefixes dominate a workload without attaching a profiler.
+
+Enabling swaps each function for a recording wrapper wherever a loaded module holds a reference to it, including
+names imported with 'from ... import'. Disabling swaps the originals back, so a disabled build runs exactly the same
+code as an uninstrumented one with no per-call check. Instrumented functions called by other instrumented functions
+are counted too, e.g. ipv4_to_int calls is_valid_ipv4, and their latency is included in the caller's.
+
+Set NETTER_INSTRUMENT=1 to enable instrumentation when the v4 package is imported. Also set NETTER_INSTRUMENT_DUMP to
+a file path to write a JSON snapshot to it every NETTER_INSTRUMENT_INTERVAL seconds (default 60) and at exit.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+import v4._ipv4_calculator as _calculator
+import v4._ipv4_validator  as _validator
+from v4._ipv4_prefix_table import MASK_STR_TO_PREFIX
+from bisect                import bisect_left
+from datetime              import datetime
+from datetime              import timezone
+from functools             import wraps
+from json                  import dump
+from os                    import environ
+from os                    import replace
+from threading             import Event
+from threading             import Lock
+from threading             import Thread
+from time                  import perf_counter_ns
+from warnings              import warn
+import atexit
+import sys
+
+#|###################################################################| Global constants |###################################################################|#
+
+# Public functions that are instrumented, per module -> the packed-integer kernels are left out, they are called
+# several times per entry point call and would only add overhead
+INSTRUMENTED_FUNCTIONS = {
+    _calculator : (
+        'get_subnet_info_given_mask', 'get_subnet_info_given_cidr', 'get_subnet_info_batch', 'get_subnet_info_rows',
+        'get_wildcard_mask', 'get_network_id', 'get_broadcast_addr', 'get_first_host', 'get_last_host',
+        'get_subnet_class', 'get_num_hosts', 'get_num_subnets', 'cidr_to_netmask', 'netmask_to_cidr', 'cidr_to_str',
+        'parse_addr_str', 'parse_cidr_str', 'parse_subnet_str', 'parse_prefix', 'ipv4_to_int', 'addr_to_str'
+    ),
+    _validator : ( 'is_valid_ipv4', 'is_valid_subnet_mask', 'is_valid_cidr' )
+}
+
+# Function -> prefix length(s) of a successful call, taken from its result (an int, or a column for batch calls)
+PREFIX_OF_RESULT = {
+    'get_subnet_info_given_mask' : lambda result: result[ 'cidr_int' ],
+    'get_subnet_info_given_cidr' : lambda result: result[ 'cidr_int' ],
+    'get_subnet_info_batch' : lambda result: result[ 'cidr_int' ],
+    'get_subnet_info_rows' : lambda result: [ row[ 'cidr_int' ] for row in result ],
+    'netmask_to_cidr' : lambda result: result,
+    'cidr_to_netmask' : lambda result: MASK_STR_TO_PREFIX[ result ],
+    'cidr_to_str' : lambda result: int( result[ 1: ] ),
+    'parse_cidr_str' : lambda result: result[1],
+    'parse_subnet_str' : lambda result: result[2],
+    'parse_prefix' : lambda result: result[1]
+}
+
+# Latency histogram bucket upper bounds in ns -> quarter powers of 2 from 32 ns to ~17 s, so percentiles are
+# accurate to within 19%
+BUCKET_BOUNDS = [ int( 2 ** ( exp / 4 ) ) for exp in range( 20, 137 ) ]
+
+ENV_ENABLE = 'NETTER_INSTRUMENT'
+ENV_DUMP = 'NETTER_INSTRUMENT_DUMP'
+ENV_INTERVAL = 'NETTER_INSTRUMENT_INTERVAL'
+DEFAULT_DUMP_INTERVAL = 60.0
+BAD_INTERVAL_ERROR = 'Dump interval must be a positive number of seconds - Value: {}'
+
+#|################################################################| Instrumentation state |#################################################################|#
+
+_lock = Lock()
+# Function name -> its _FunctionStats, and the time the counters were last reset
+_stats = {}
+_since = None
+# id of each original function -> ( original, wrapper ) while enabled, empty while disabled
+_wrappers = {}
+# Periodic dump thread and the event that stops it
+_dump_thread = None
+_dump_stop = None
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class _FunctionStats:
+    """Counters of one instrumented function"""
+
+    __slots__ = ( 'calls', 'items', 'failures', 'total_ns', 'min_ns', 'max_ns', 'buckets', 'prefixes' )
+
+    def __init__( self ):
+        self.calls = 0
+        # Addresses processed -> 1 per scalar call, the number of rows per batch call
+        self.items = 0
+        self.failures = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = [ 0 ] * ( len( BUCKET_BOUNDS ) + 1 )
+        self.prefixes = [ 0 ] * 33
+
+    def record( self, elapsed_ns: int, failed: bool, items: int, prefix, prefix_counts ) -> None:
+        """Records one call, the caller holds the lock
+
+        Args:
+            elapsed_ns:
+                The call's latency.
+            failed:
+                Whether the call was a validation failure.
+            items:
+                The number of addresses the call processed.
+            prefix:
+                The prefix length of a scalar call, or None.
+            prefix_counts:
+                The number of rows per prefix length of a batch call, or None.
+        """
+        self.calls += 1
+        self.items += items
+        self.total_ns += elapsed_ns
+        if self.min_ns is None or elapsed_ns < self.min_ns: self.min_ns = elapsed_ns
+        if elapsed_ns > self.max_ns: self.max_ns = elapsed_ns
+        self.buckets[ bisect_left( BUCKET_BOUNDS, elapsed_ns ) ] += 1
+        if failed: self.failures += 1
+        if prefix is not None: self.prefixes[ prefix ] += 1
+        if prefix_counts is not None: self.prefixes = [ a + b for a, b in zip( self.prefixes, prefix_counts ) ]
+
+    def percentile( self, fraction: float ) -> int:
+        """Returns the upper bound of the histogram bucket holding the given fraction of calls, capped at the maximum"""
+        rank = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate( self.buckets ):
+            seen += count
+            if seen >= rank and count: return min( BUCKET_BOUNDS[ bucket ] if bucket < len( BUCKET_BOUNDS ) else self.max_ns, self.max_ns )
+        return self.max_ns
+
+    def to_dict( self ) -> dict:
+        """Returns the counters with latencies in microseconds"""
+        return {
+            'calls' : self.calls,
+            'items' : self.items,
+            'failures' : self.failures,
+            'total_ms' : round( self.total_ns / 1e6, 3 ),
+            'mean_us' : round( self.total_ns / self.calls / 1e3, 3 ),
+            'min_us' : round( self.min_ns / 1e3, 3 ),
+            'p50_us' : round( self.percentile( 0.50 ) / 1e3, 3 ),
+            'p90_us' : round( self.percentile( 0.90 ) / 1e3, 3 ),
+            'p99_us' : round( self.percentile( 0.99 ) / 1e3, 3 ),
+            'max_us' : round( self.max_ns / 1e3, 3 ),
+            'prefixes' : { cidr : count for cidr, count in enumerate( self.prefixes ) if count }
+        }
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def enable_instrumentation() -> None:
+    """Starts recording calls to the instrumented functions, does nothing if already enabled
+
+    Counters recorded before a previous disable_instrumentation() are kept, see reset_instrumentation.
+    """
+    global _since
+    with _lock:
+        if _wrappers: return
+        if _since is None: _since = _now()
+        for module, names in INSTRUMENTED_FUNCTIONS.items():
+            for name in names:
+                original = getattr( module, name )
+                _wrappers[ id( original ) ] = ( original, _wrap( name, original ) )
+        # Rebinding under the lock, so a concurrent disable can't restore the originals halfway through
+        _rebind( lambda value: _wrappers[ id( value ) ][1] if id( value ) in _wrappers and _wrappers[ id( value ) ][0] is value else None )
+
+def disable_instrumentation() -> None:
+    """Stops recording calls and restores the original functions, the counters are kept"""
+    with _lock:
+        wrappers = { id( wrapper ) : ( wrapper, original ) for original, wrapper in _wrappers.values() }
+        _wrappers.clear()
+        _rebind( lambda value: wrappers[ id( value ) ][1] if id( value ) in wrappers and wrappers[ id( value ) ][0] is value else None )
+
+def is_instrumentation_enabled() -> bool:
+    """Returns True while calls are being recorded"""
+    return bool( _wrappers )
+
+def reset_instrumentation() -> None:
+    """Drops all recorded counters"""
+    global _since
+    with _lock:
+        _stats.clear()
+        _since = _now() if _wrappers else None
+
+def get_instrumentation_snapshot() -> dict:
+    """Returns the recorded counters of every instrumented function called since the last reset
+
+    Returns:
+        A dict with the state, the time of the last reset and per-function counters, sorted by cumulative time.
+        example:
+        {
+            'enabled' : True,
+            'since' : '2024-05-01T12:00:00+00:00',
+            'taken' : '2024-05-01T12:05:00+00:00',
+            'functions' : {
+                'get_subnet_info_given_cidr' : {
+                    'calls' : 1000, 'items' : 1000, 'failures' : 2, 'total_ms' : 5.1, 'mean_us' : 5.1, 'min_us' : 4.2,
+                    'p50_us' : 4.8, 'p90_us' : 5.7, 'p99_us' : 9.5, 'max_us' : 31.0, 'prefixes' : { 24 : 990, 32 : 8 }
+                }
+            }
+        }
+    """
+    with _lock:
+        functions = { name : stats.to_dict() for name, stats in _stats.items() if stats.calls }
+        since = _since
+    return {
+        'enabled' : is_instrumentation_enabled(),
+        'since' : since,
+        'taken' : _now(),
+        'functions' : dict( sorted( functions.items(), key=lambda item: -item[1][ 'total_ms' ] ) )
+    }
+
+def dump_instrumentation( path: str ) -> None:
+    """Writes a snapshot to a file as JSON, replacing the file atomically so readers never see a partial snapshot"""
+    temp = '{}.tmp'.format( path )
+    with open( temp, 'w' ) as f: dump( get_instrumentation_snapshot(), f, indent=2 )
+    replace( temp, path )
+
+def start_instrumentation_dump( path: str, interval: float = DEFAULT_DUMP_INTERVAL ) -> None:
+    """Writes a snapshot to a file every interval seconds from a background thread, and once more at exit
+
+    Calling this again replaces the running dump.
+
+    Raises:
+        ValueError: interval is not a positive number.
+    """
+    global _dump_thread, _dump_stop
+    if not isinstance( interval, ( int, float ) ) or not interval > 0: raise ValueError( BAD_INTERVAL_ERROR.format(interval) )
+    stop_instrumentation_dump()
+    stop = Event()
+    def run():
+        while not stop.wait( interval ): dump_instrumentation( path )
+        dump_instrumentation( path )
+    _dump_stop = stop
+    _dump_thread = Thread( target=run, name='netter-instrumentation-dump', daemon=True )
+    _dump_thread.start()
+
+def stop_instrumentation_dump() -> None:
+    """Stops the periodic dump after writing a final snapshot, does nothing if no dump is running"""
+    global _dump_thread, _dump_stop
+    if _dump_thread is None: return
+    _dump_stop.set()
+    _dump_thread.join()
+    _dump_thread = _dump_stop = None
+
+def enable_from_environment() -> None:
+    """Enables instrumentation and the periodic dump as configured by the NETTER_INSTRUMENT* environment variables
+
+    This runs while the v4 package is imported, so an invalid NETTER_INSTRUMENT_INTERVAL only warns and falls back to
+    DEFAULT_DUMP_INTERVAL rather than making the import fail.
+    """
+    if environ.get( ENV_ENABLE, '' ).lower() in ( '', '0', 'false', 'no', 'off' ): return
+    enable_instrumentation()
+    if environ.get( ENV_DUMP ): start_instrumentation_dump( environ[ ENV_DUMP ], _interval_from_environment() )
+
+def _interval_from_environment() -> float:
+    """Helper function that reads the dump interval from the environment, warning about and replacing invalid values"""
+    value = environ.get( ENV_INTERVAL )
+    if value is None: return DEFAULT_DUMP_INTERVAL
+    try:
+        interval = float( value )
+    except ValueError:
+        interval = None
+    # Also rejects nan and inf, which the dump thread can't wait for
+    if interval is None or not 0 < interval < float( 'inf' ):
+        warn( '{}: {}, using the default of {} seconds'.format( ENV_INTERVAL, BAD_INTERVAL_ERROR.format(value), DEFAULT_DUMP_INTERVAL ), RuntimeWarning )
+        return DEFAULT_DUMP_INTERVAL
+    return interval
+
+def _wrap( name: str, func ):
+    """Helper function that returns the recording wrapper of an instrumented function"""
+    prefix_of = PREFIX_OF_RESULT.get( name )
+    is_check = name.startswith( 'is_valid' )
+    @wraps( func )
+    def wrapper( *args, **kwargs ):
+        start = perf_counter_ns()
+        try:
+            result = func( *args, **kwargs )
+        except ( TypeError, ValueError ):
+            _record( name, perf_counter_ns() - start, True, 1, None, None )
+            raise
+        elapsed = perf_counter_ns() - start
+        prefix = prefix_of( result ) if prefix_of is not None else None
+        if prefix is None or isinstance( prefix, int ):
+            _record( name, elapsed, is_check and result is False, 1, prefix, None )
+        else:
+            # A batch -> count the rows per prefix length in one pass
+            prefix_counts = _count_prefixes( prefix )
+            _record( name, elapsed, False, sum( prefix_counts ), None, prefix_counts )
+        return result
+    return wrapper
+
+def _record( name: str, elapsed_ns: int, failed: bool, items: int, prefix, prefix_counts ) -> None:
+    """Helper function that records one call of a function, see _FunctionStats.record"""
+    with _lock:
+        stats = _stats.get( name )
+        # Counters dropped by reset_instrumentation are recreated on the next call
+        if stats is None: stats = _stats[ name ] = _FunctionStats()
+        stats.record( elapsed_ns, failed, items, prefix, prefix_counts )
+
+def _count_prefixes( cidrs ) -> list:
+    """Helper function that counts the rows per prefix length of a batch, given as a NumPy column or a list"""
+    if isinstance( cidrs, list ):
+        counts = [ 0 ] * 33
+        for cidr in cidrs: counts[ cidr ] += 1
+        return counts
+    from numpy import bincount
+    return bincount( cidrs.ravel(), minlength=33 ).tolist()
+
+def _rebind( replacement ) -> None:
+    """Helper function that replaces every module-level reference to a function with replacement( function )"""
+    for module in list( sys.modules.values() ):
+        namespace = getattr( module, '__dict__', None )
+        if not isinstance( namespace, dict ): continue
+        for name, value in list( namespace.items() ):
+            if not callable( value ): continue
+            new = replacement( value )
+            if new is not None: namespace[ name ] = new
+
+def _now() -> str:
+    """Helper function that returns the current UTC time as an ISO 8601 string"""
+    return datetime.now( timezone.utc ).isoformat( timespec='seconds' )
+
+atexit.register( stop_instrumentation_dump )
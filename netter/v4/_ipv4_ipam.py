@@ -0,0 +1,323 @@
+"""
+IP address management pool that hands out subnets and host addresses from a set of parent blocks.
+
+Free space is kept as buddy-system free lists, one per prefix length: every free block is an aligned prefix, and a
+block is only ever split into its two halves (buddies). Allocating a /y takes the lowest free /y, or splits the
+smallest free block that is larger, pushing the unused halves onto the longer prefix lengths' lists. Releasing a block
+merges it with its buddy for as long as the buddy is free too, so free space never stays fragmented. Each free list is
+a set (membership, removal) plus a heap (lowest address), so allocation, reservation and release are O(log n).
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator   import parse_prefix
+from v4._ipv4_calculator   import int_to_addr_str
+from v4._ipv4_validator    import BAD_CIDR_ERROR
+from v4._ipv4_prefix_table import PREFIX_MASK_INT
+from v4._ipv4_prefix_table import PREFIX_WILDCARD_INT
+from v4._ipv4_prefix_table import PREFIX_TOTAL_HOSTS
+from bisect                import bisect_right
+from heapq                 import heapify
+from heapq                 import heappop
+from heapq                 import heappush
+from json                  import dump
+from json                  import load
+from os                    import fdopen
+from os                    import remove
+from os                    import replace
+from os.path               import abspath
+from os.path               import basename
+from os.path               import dirname
+from tempfile              import mkstemp
+from threading             import Lock
+
+#|###################################################################| Global constants |###################################################################|#
+
+POOL_EXHAUSTED_ERROR = 'No free /{} block left in the pool'
+PREFIX_NOT_FREE_ERROR = 'Prefix is not free in the pool - Value: {}'
+OVERLAPPING_PARENT_ERROR = 'Parent block overlaps another parent block - Value: {}'
+BAD_SNAPSHOT_ERROR = 'Not an address pool snapshot - Value: {}'
+
+SNAPSHOT_FORMAT = 1
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class AddressPool:
+    """Thread-safe pool of IPv4 subnets and host addresses carved out of parent blocks
+
+    Prefixes are returned as 'x.x.x.x/y' strings and accepted in any form parse_prefix accepts.
+
+    example:
+    pool = AddressPool( [ '10.0.0.0/24' ] )
+    pool.allocate( 30 ) -> '10.0.0.0/30'
+    pool.allocate( 30 ) -> '10.0.0.4/30'
+    pool.allocate( 28 ) -> '10.0.0.16/28'
+    pool.release( '10.0.0.0/30' )
+    pool.allocate( 30 ) -> '10.0.0.0/30'
+    pool.allocate_host() -> '10.0.0.8'
+    """
+
+    def __init__( self, parents=() ):
+        """Builds a pool whose free space is the given parent blocks
+
+        Args:
+            parents:
+                An iterable of prefixes. Host bits set in a prefix are ignored.
+
+        Raises:
+            TypeError: A prefix is of the wrong type.
+            ValueError: A prefix is not a valid IPv4 prefix, or parent blocks overlap.
+        """
+        self._lock = Lock()
+        # Serializes save, which writes the file outside _lock so allocations don't wait on the disk
+        self._save_lock = Lock()
+        # Parent blocks sorted by network ID, with their network IDs alone for bisecting
+        self._parents = []
+        self._parent_starts = []
+        # One free list per prefix length -> a set of free network IDs and a heap of them that may hold stale entries
+        self._free = [ set() for _ in range( 33 ) ]
+        self._heaps = [ [] for _ in range( 33 ) ]
+        self._allocated = set()
+        self._reserved = set()
+        for prefix in parents: self.add_parent( prefix )
+
+    def add_parent( self, prefix ) -> None:
+        """Adds a parent block to the pool, all of it free
+
+        Raises:
+            TypeError: prefix is of the wrong type.
+            ValueError: prefix is not a valid IPv4 prefix, or overlaps a parent block already in the pool.
+        """
+        network, cidr = parse_prefix( prefix )
+        with self._lock:
+            pos = bisect_right( self._parent_starts, network )
+            # Parents are disjoint, so only the neighbours on either side can overlap
+            if ( pos > 0 and _last( *self._parents[ pos - 1 ] ) >= network ) or ( pos < len( self._parents ) and self._parent_starts[ pos ] <= _last( network, cidr ) ):
+                raise ValueError( OVERLAPPING_PARENT_ERROR.format(_prefix_str( network, cidr )) )
+            self._parents.insert( pos, ( network, cidr ) )
+            self._parent_starts.insert( pos, network )
+            self._push( network, cidr )
+
+    def allocate( self, cidr: int ) -> str:
+        """Allocates the lowest free block of a prefix length, splitting the smallest larger free block if needed
+
+        Args:
+            cidr:
+                The prefix length of the block to allocate, in the range [0,32].
+
+        Returns:
+            The allocated block in CIDR notation.
+
+        Raises:
+            TypeError: cidr is not an integer.
+            ValueError: cidr is not in the range [0,32], or no free block is large enough.
+        """
+        if not isinstance( cidr, int ): raise TypeError( '\'{}\' is not a valid {}'.format(cidr, repr(int)) )
+        if not 0 <= cidr <= 32: raise ValueError( BAD_CIDR_ERROR.format(cidr) )
+        with self._lock:
+            network = self._take( cidr )
+            self._allocated.add( ( network, cidr ) )
+        return _prefix_str( network, cidr )
+
+    def allocate_host( self ) -> str:
+        """Allocates a free host address as a /32, picked the same way as allocate( 32 ) picks one
+
+        Network IDs and broadcast addresses of parent blocks (other than /31 and /32 parents) aren't host addresses.
+        They are reserved instead when they come up, so neither they nor any block containing them can be allocated
+        afterwards.
+
+        Returns:
+            The allocated address as an x.x.x.x string.
+
+        Raises:
+            ValueError: The pool has no free host address left.
+        """
+        with self._lock:
+            while True:
+                network = self._take( 32 )
+                parent, parent_cidr = self._parent_of( network )
+                if parent_cidr < 31 and network in ( parent, _last( parent, parent_cidr ) ):
+                    self._reserved.add( ( network, 32 ) )
+                    continue
+                self._allocated.add( ( network, 32 ) )
+                return int_to_addr_str( network )
+
+    def reserve( self, prefix ) -> None:
+        """Takes a specific block out of the free space, e.g. to keep a gateway address or an existing subnet
+
+        Raises:
+            TypeError: prefix is of the wrong type.
+            ValueError: prefix is not a valid IPv4 prefix, or not entirely free.
+        """
+        network, cidr = parse_prefix( prefix )
+        with self._lock:
+            self._carve( network, cidr )
+            self._reserved.add( ( network, cidr ) )
+
+    def release( self, prefix ) -> None:
+        """Returns an allocated or reserved block to the free space, merging it with its free buddies
+
+        Raises:
+            TypeError: prefix is of the wrong type.
+            ValueError: prefix is not a valid IPv4 prefix.
+            KeyError: prefix is not allocated or reserved.
+        """
+        key = parse_prefix( prefix )
+        with self._lock:
+            if key in self._allocated:
+                self._allocated.remove( key )
+            elif key in self._reserved:
+                self._reserved.remove( key )
+            else:
+                raise KeyError( prefix )
+            network, cidr = key
+            parent_cidr = self._parent_of( network )[1]
+            # Merge with the buddy while it is free, but never past the parent block
+            while cidr > parent_cidr:
+                buddy = network ^ PREFIX_TOTAL_HOSTS[ cidr ]
+                if buddy not in self._free[ cidr ]: break
+                self._discard( buddy, cidr )
+                network &= buddy
+                cidr -= 1
+            self._push( network, cidr )
+
+    def __contains__( self, prefix ) -> bool:
+        """Returns True if exactly this block (not just a containing one) is allocated or reserved"""
+        key = parse_prefix( prefix )
+        with self._lock:
+            return key in self._allocated or key in self._reserved
+
+    def allocations( self ) -> list:
+        """Returns the allocated blocks in CIDR notation, in address order"""
+        with self._lock:
+            return [ _prefix_str( *key ) for key in sorted( self._allocated ) ]
+
+    def reservations( self ) -> list:
+        """Returns the reserved blocks in CIDR notation, in address order"""
+        with self._lock:
+            return [ _prefix_str( *key ) for key in sorted( self._reserved ) ]
+
+    def free_blocks( self ) -> list:
+        """Returns the free blocks in CIDR notation, in address order"""
+        with self._lock:
+            return [ _prefix_str( *key ) for key in sorted( ( network, cidr ) for cidr, free in enumerate( self._free ) for network in free ) ]
+
+    def stats( self ) -> dict:
+        """Returns the number of parent, allocated, reserved and free addresses, and the free blocks per prefix length
+
+        example:
+        AddressPool( [ '10.0.0.0/24' ] ).stats() -> { 'parent_addresses' : 256, 'allocated_addresses' : 0, 'reserved_addresses' : 0, 'free_addresses' : 256, 'free_blocks' : { 24 : 1 } }
+        """
+        with self._lock:
+            return {
+                'parent_addresses' : sum( PREFIX_TOTAL_HOSTS[ cidr ] for network, cidr in self._parents ),
+                'allocated_addresses' : sum( PREFIX_TOTAL_HOSTS[ cidr ] for network, cidr in self._allocated ),
+                'reserved_addresses' : sum( PREFIX_TOTAL_HOSTS[ cidr ] for network, cidr in self._reserved ),
+                'free_addresses' : sum( PREFIX_TOTAL_HOSTS[ cidr ] * len( free ) for cidr, free in enumerate( self._free ) ),
+                'free_blocks' : { cidr : len( free ) for cidr, free in enumerate( self._free ) if free }
+            }
+
+    def save( self, path: str ) -> None:
+        """Writes the parent blocks, allocations and reservations to a JSON file
+
+        The file is replaced atomically, so a crash mid-write leaves the previous snapshot intact. Concurrent saves
+        happen one at a time, so the file always ends up holding the latest snapshot. Free space isn't stored, load
+        rebuilds it.
+        """
+        with self._save_lock:
+            with self._lock:
+                snapshot = {
+                    'format' : SNAPSHOT_FORMAT,
+                    'parents' : [ _prefix_str( *key ) for key in self._parents ],
+                    'allocated' : [ _prefix_str( *key ) for key in sorted( self._allocated ) ],
+                    'reserved' : [ _prefix_str( *key ) for key in sorted( self._reserved ) ]
+                }
+            # A unique temp file next to the target, so other pools or processes saving to the same path can't write
+            # into it
+            path = abspath( path )
+            fd, temp = mkstemp( prefix=basename( path ) + '.', suffix='.tmp', dir=dirname( path ) )
+            try:
+                with fdopen( fd, 'w' ) as f: dump( snapshot, f, indent=2 )
+                replace( temp, path )
+            except BaseException:
+                remove( temp )
+                raise
+
+    @classmethod
+    def load( cls, path: str ):
+        """Rebuilds a pool from a file written by save
+
+        Raises:
+            ValueError: The file is not a snapshot, or its blocks overlap.
+        """
+        with open( path ) as f: snapshot = load( f )
+        if not isinstance( snapshot, dict ) or snapshot.get( 'format' ) != SNAPSHOT_FORMAT: raise ValueError( BAD_SNAPSHOT_ERROR.format(path) )
+        pool = cls( snapshot[ 'parents' ] )
+        for name, used in ( ( 'allocated', pool._allocated ), ( 'reserved', pool._reserved ) ):
+            for prefix in snapshot[ name ]:
+                key = parse_prefix( prefix )
+                pool._carve( *key )
+                used.add( key )
+        return pool
+
+    def _push( self, network: int, cidr: int ) -> None:
+        """Helper function that adds a block to its free list"""
+        self._free[ cidr ].add( network )
+        heappush( self._heaps[ cidr ], network )
+
+    def _discard( self, network: int, cidr: int ) -> None:
+        """Helper function that removes a block from its free list, its heap entry goes stale"""
+        free, heap = self._free[ cidr ], self._heaps[ cidr ]
+        free.remove( network )
+        # Rebuild a heap that is mostly stale entries, which keeps the heaps O(free blocks) under churn
+        if len( heap ) > 2 * len( free ) + 64:
+            heap[:] = free
+            heapify( heap )
+
+    def _take( self, cidr: int ) -> int:
+        """Helper function that removes the lowest free block of a prefix length from the free space, splitting the
+        smallest larger free block if there is none -> returns its network ID"""
+        for size in range( cidr, -1, -1 ):
+            free, heap = self._free[ size ], self._heaps[ size ]
+            while heap:
+                network = heappop( heap )
+                # Skip stale entries of blocks that were merged or carved up since they were pushed
+                if network not in free: continue
+                free.remove( network )
+                # Split down to the requested length, the upper halves stay free
+                while size < cidr:
+                    size += 1
+                    self._push( network | PREFIX_TOTAL_HOSTS[ size ], size )
+                return network
+        raise ValueError( POOL_EXHAUSTED_ERROR.format(cidr) )
+
+    def _carve( self, network: int, cidr: int ) -> None:
+        """Helper function that removes a specific block from the free space, splitting the free block containing it"""
+        for size in range( cidr, -1, -1 ):
+            block = network & PREFIX_MASK_INT[ size ]
+            if block in self._free[ size ]: break
+        else:
+            raise ValueError( PREFIX_NOT_FREE_ERROR.format(_prefix_str( network, cidr )) )
+        self._discard( block, size )
+        # Split down to the block, the halves not containing it stay free
+        while size < cidr:
+            size += 1
+            half = PREFIX_TOTAL_HOSTS[ size ]
+            self._push( block if network & half else block | half, size )
+            block |= network & half
+
+    def _parent_of( self, network: int ) -> tuple:
+        """Helper function that returns the parent block containing an address"""
+        return self._parents[ bisect_right( self._parent_starts, network ) - 1 ]
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _last( network: int, cidr: int ) -> int:
+    """Helper function that returns the last address of a block"""
+    return network | PREFIX_WILDCARD_INT[ cidr ]
+
+def _prefix_str( network: int, cidr: int ) -> str:
+    """Helper function that formats a block in CIDR notation"""
+    return '{}/{}'.format( int_to_addr_str( network ), cidr )
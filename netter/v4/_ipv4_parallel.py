@@ -0,0 +1,163 @@
+"""
+Multi-process execution of the batch IPv4 calculator for inputs too large for a single core.
+
+Input columns are split into contiguous shards that are processed by a pool of worker processes. The input and
+output columns live in shared memory blocks, so workers read and write them in place and only shard boundaries are
+pickled. Every worker writes its own slice of the outputs, so results are always in input order.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator         import get_subnet_info_batch
+from v4._ipv4_calculator         import validate_batch_columns
+from numpy                       import dtype
+from numpy                       import ndarray
+from numpy                       import uint8
+from numpy                       import uint32
+from concurrent.futures          import ProcessPoolExecutor
+from collections                 import deque
+from contextlib                  import contextmanager
+from multiprocessing             import shared_memory
+from os                          import cpu_count
+
+#|###################################################################| Global constants |###################################################################|#
+
+DEFAULT_SHARD_SIZE = 1 << 20
+BAD_WORKERS_ERROR = 'Number of workers must be a positive integer - Value: {}'
+BAD_SHARD_SIZE_ERROR = 'Shard size must be a positive integer - Value: {}'
+
+# Output column dtypes, taken from the batch calculator itself so the two can never disagree
+_OUTPUT_DTYPES = { key : column.dtype.str for key, column in get_subnet_info_batch( [], [] ).items() }
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def get_subnet_info_parallel( ipv4s, cidrs, workers: int = None, shard_size: int = DEFAULT_SHARD_SIZE, executor=None ) -> dict:
+    """Parallel counterpart of get_subnet_info_batch that spreads the work across a process pool
+
+    Args:
+        ipv4s:
+            An array-like of IPv4 addresses as unsigned 32-bit integers.
+        cidrs:
+            An array-like of CIDR prefix lengths in the range [0,32], or a single integer applied to every address.
+        workers:
+            The number of worker processes, defaults to the number of CPUs. If executor is given, this only sets how
+            many shards are queued on it at once (twice the number of workers).
+        shard_size:
+            The number of addresses per task. Inputs no larger than one shard are processed in the calling process.
+        executor:
+            An existing ProcessPoolExecutor to reuse across calls instead of starting a new pool for every call.
+
+    Returns:
+        The same dict of columns as get_subnet_info_batch, in input order.
+        example:
+        get_subnet_info_parallel( addresses, 24, workers=8 )['network_id'] -> array([...], dtype=uint32)
+
+    Raises:
+        TypeError: Non-integer input provided for workers or shard_size.
+        ValueError: workers or shard_size is less than 1, ipv4s contains values outside of the 32-bit address space,
+                    cidrs contains values outside of [0,32].
+    """
+    workers = ( cpu_count() or 1 ) if workers is None else workers
+    for value, error in ( ( workers, BAD_WORKERS_ERROR ), ( shard_size, BAD_SHARD_SIZE_ERROR ) ):
+        if not isinstance( value, int ): raise TypeError( '\'{}\' is not a valid {}'.format(value, repr(int)) )
+        if value < 1: raise ValueError( error.format(value) )
+    # Validate everything up front so that workers can't fail halfway through
+    ipv4_col, cidr_col = validate_batch_columns( ipv4s, cidrs )
+    shape = ipv4_col.shape
+    size = ipv4_col.size
+    # Not worth starting processes for -> run in place
+    if size <= shard_size or ( executor is None and workers == 1 ):
+        return get_subnet_info_batch( ipv4_col, cidr_col )
+    # CIDR values fit in a byte, which cuts the shared input to 5 bytes per address
+    layout = dict( _OUTPUT_DTYPES, _ipv4s=uint32, _cidrs=uint8 )
+    with _shared_columns( layout, size ) as ( spec, columns ):
+        columns[ '_ipv4s' ][ : ] = ipv4_col.ravel()
+        columns[ '_cidrs' ][ : ] = cidr_col.ravel()
+        shards = ( ( spec, start, min( start + shard_size, size ) ) for start in range( 0, size, shard_size ) )
+        with _executor( executor, workers ) as pool:
+            # Shards write their own slices, the results themselves are empty -> just wait for (and re-raise from) each
+            for _ in imap_ordered( pool, _compute_shard, shards, window=2 * workers ): pass
+        # Copy the results out and drop the views so that the shared blocks can be released
+        info = { key : columns[ key ].reshape( shape ).copy() for key in _OUTPUT_DTYPES }
+        del columns
+    return info
+
+def imap_ordered( executor, fn, arg_tuples, window: int ):
+    """Lazily maps fn over argument tuples on an executor, yielding results in input order
+
+    Unlike Executor.map, at most window tasks are in flight at once, so arg_tuples is consumed only as fast as
+    results are used and memory use stays bounded for arbitrarily long (or infinite) inputs.
+
+    Args:
+        executor:
+            A concurrent.futures executor.
+        fn:
+            The function to call, must be picklable for process pools.
+        arg_tuples:
+            An iterable of argument tuples, fn is called as fn( *args ).
+        window:
+            The maximum number of submitted but not yet yielded tasks.
+
+    Yields:
+        fn's results, in the same order as arg_tuples. Exceptions raised by fn are re-raised here.
+    """
+    pending = deque()
+    try:
+        for args in arg_tuples:
+            if len( pending ) >= window: yield pending.popleft().result()
+            pending.append( executor.submit( fn, *args ) )
+        while pending: yield pending.popleft().result()
+    finally:
+        # Don't leave queued work behind if the consumer stops early or a task failed
+        for future in pending: future.cancel()
+
+@contextmanager
+def _executor( executor, workers: int ):
+    """Helper function that yields the given executor, or a new process pool that is shut down afterwards"""
+    if executor is not None:
+        yield executor
+        return
+    with ProcessPoolExecutor( workers ) as pool:
+        yield pool
+
+@contextmanager
+def _shared_columns( layout: dict, size: int ):
+    """Helper function that allocates one shared memory block per column and releases them all afterwards
+
+    Yields:
+        A tuple of a picklable spec ({ key : ( block name, dtype ) }, size) that workers attach with, and a dict of
+        NumPy arrays backed by the blocks.
+    """
+    blocks = {}
+    try:
+        for key, column_dtype in layout.items():
+            # Zero-sized blocks aren't allowed
+            blocks[ key ] = shared_memory.SharedMemory( create=True, size=max( 1, size * dtype( column_dtype ).itemsize ) )
+        columns = { key : ndarray( size, dtype=layout[ key ], buffer=block.buf ) for key, block in blocks.items() }
+        yield ( ( { key : ( block.name, dtype( layout[ key ] ).str ) for key, block in blocks.items() }, size ), columns )
+    finally:
+        columns = None
+        for block in blocks.values():
+            # Unlinking frees the block once every process has unmapped it. Closing fails while views are still alive
+            # (e.g. held by an exception traceback), in which case the mapping is released when they are collected
+            block.unlink()
+            try:
+                block.close()
+            except BufferError:
+                pass
+
+def _compute_shard( spec: tuple, start: int, stop: int ) -> None:
+    """Helper function run by workers -> computes one shard of the batch calculation in place in shared memory"""
+    names, size = spec
+    blocks = { key : shared_memory.SharedMemory( name=name ) for key, ( name, _ ) in names.items() }
+    columns = None
+    try:
+        columns = { key : ndarray( size, dtype=names[ key ][1], buffer=block.buf ) for key, block in blocks.items() }
+        info = get_subnet_info_batch( columns[ '_ipv4s' ][ start:stop ], columns[ '_cidrs' ][ start:stop ] )
+        for key, column in info.items(): columns[ key ][ start:stop ] = column
+    finally:
+        # Views must be dropped before their blocks can be closed
+        columns = None
+        for block in blocks.values(): block.close()
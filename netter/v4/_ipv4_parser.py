@@ -0,0 +1,256 @@
+"""
+Parses and formats newline-delimited dotted-quad IPv4 address text in bulk, straight between raw bytes and NumPy columns.
+
+Input may be any buffer (bytes, bytearray, memoryview, mmap), and parse_ipv4_file memory-maps a file, so no Python
+string is ever created per line. The buffer is processed in blocks of whole lines to bound the working memory: each
+block's lines are laid out as the columns of a fixed-width character matrix, characters are classified through a
+lookup table, and every check and the octet-by-octet conversion is done for all lines of the block at once.
+
+Only the exact dotted-quad form accepted by is_valid_ipv4 is valid: four octets of 1-3 decimal digits without leading
+zeros, each within [0, 255], separated by '.'. Lines may end in '\\r\\n'. Anything else on a line, including
+surrounding whitespace, makes it invalid.
+
+The formatter works the other way around with precomputed octet tables: every octet value maps to a fixed 4-byte slot
+(its digits and a separator) plus a mask of the bytes actually used, so the text of every address is gathered from the
+tables and compacted straight into the output buffer at once.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from numpy                import arange
+from numpy                import asarray
+from numpy                import compress
+from numpy                import concatenate
+from numpy                import flatnonzero
+from numpy                import frombuffer
+from numpy                import full
+from numpy                import int8
+from numpy                import int32
+from numpy                import uint8
+from numpy                import uint32
+from numpy                import where
+from numpy                import zeros
+from mmap                 import mmap
+from mmap                 import ACCESS_READ
+
+#|###################################################################| Global constants |###################################################################|#
+
+DEFAULT_BLOCK_SIZE = 1 << 18
+DEFAULT_CHUNK_SIZE = 65536
+BAD_BLOCK_SIZE_ERROR = 'Block size must be a positive integer - Value: {}'
+BAD_TERMINATOR_ERROR = 'Line terminator must be a single ASCII character - Value: {}'
+BAD_BUFFER_SIZE_ERROR = 'Output buffer is too small - {} bytes needed, {} available'
+# Longest dotted quad, 4 octets of 3 digits and 3 dots
+_MAX_IPV4_LENGTH = 15
+
+# Byte -> decimal digit value, -1 for '.' and -2 for anything else
+_DEC_TABLE = full( 256, -2, dtype=int8 )
+_DEC_TABLE[ ord( '0' ):ord( '9' ) + 1 ] = arange( 10 )
+_DEC_TABLE[ ord( '.' ) ] = -1
+# Octet value -> its decimal digits followed by a '.', left aligned in 4 bytes, and which of the 4 bytes are used
+_OCTET_CHARS = frombuffer( b''.join( '{:<3}.'.format( octet ).encode() for octet in range( 256 ) ), dtype=uint8 ).reshape( 256, 4 )
+_OCTET_USED = _OCTET_CHARS != ord( ' ' )
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def parse_ipv4_lines( data, block_size: int = DEFAULT_BLOCK_SIZE ) -> tuple:
+    """Parses newline-delimited dotted-quad text into a uint32 address column
+
+    Every line produces exactly one entry, a trailing newline at the end of data doesn't start another line.
+
+    Args:
+        data:
+            The text as bytes, bytearray, memoryview, mmap or str.
+        block_size:
+            The number of bytes parsed per vectorized step, bounds the working memory. Blocks are extended to the end
+            of their last line.
+
+    Returns:
+        A tuple of the addresses as a uint32 column and a boolean column that is False for lines that aren't valid
+        dotted quads (their addresses are 0).
+        example:
+        parse_ipv4_lines( b'192.168.10.1\\nbad\\n' ) -> ( array([3232238081, 0], dtype=uint32), array([ True, False]) )
+
+    Raises:
+        TypeError: Non-integer input provided for block_size.
+        ValueError: block_size is less than 1.
+    """
+    if not isinstance( block_size, int ): raise TypeError( '\'{}\' is not a valid {}'.format(block_size, repr(int)) )
+    if block_size < 1: raise ValueError( BAD_BLOCK_SIZE_ERROR.format(block_size) )
+    buffer = frombuffer( data.encode() if isinstance( data, str ) else data, dtype=uint8 )
+    ipv4_blocks, valid_blocks = [], []
+    begin = 0
+    while begin < len( buffer ):
+        # Extend the block to the end of its last line, growing it if a single line doesn't fit
+        end = min( begin + block_size, len( buffer ) )
+        newlines = flatnonzero( buffer[ begin:end ] == 10 )
+        while not len( newlines ) and end < len( buffer ):
+            end = min( begin + 2 * ( end - begin ), len( buffer ) )
+            newlines = flatnonzero( buffer[ begin:end ] == 10 )
+        if end < len( buffer ): end = begin + int( newlines[ -1 ] ) + 1
+        ipv4s, valid = _parse_block( buffer[ begin:end ], newlines[ newlines < end - begin ] )
+        ipv4_blocks.append( ipv4s )
+        valid_blocks.append( valid )
+        begin = end
+    if not ipv4_blocks: return ( zeros( 0, dtype=uint32 ), zeros( 0, dtype=bool ) )
+    return ( concatenate( ipv4_blocks ), concatenate( valid_blocks ) )
+
+def parse_ipv4_file( path, block_size: int = DEFAULT_BLOCK_SIZE ) -> tuple:
+    """Parses a file of newline-delimited dotted quads by memory-mapping it (see parse_ipv4_lines)
+
+    Args:
+        path:
+            The path of the file to read.
+        block_size:
+            The number of bytes parsed per vectorized step.
+
+    Returns:
+        The same tuple of address and validity columns as parse_ipv4_lines.
+    """
+    with open( path, 'rb' ) as f:
+        # Empty files can't be mapped
+        if not f.seek( 0, 2 ): return parse_ipv4_lines( b'', block_size )
+        with mmap( f.fileno(), 0, access=ACCESS_READ ) as mapped:
+            return parse_ipv4_lines( mapped, block_size )
+
+def format_ipv4_lines( ipv4s, terminator: str = '\n' ) -> bytes:
+    """Formats a column of 32-bit addresses as dotted-quad text, each address followed by terminator
+
+    Args:
+        ipv4s:
+            An array-like of IPv4 addresses as unsigned 32-bit integers.
+        terminator:
+            The single ASCII character written after every address, e.g. ',' for one line of values.
+
+    Returns:
+        The text as bytes.
+        example:
+        format_ipv4_lines( [ 3232238081, 167772161 ] ) -> b'192.168.10.1\\n10.0.0.1\\n'
+
+    Raises:
+        ValueError: terminator isn't a single ASCII character.
+    """
+    chars, used = _octet_slots( ipv4s, terminator )
+    return chars[ used ].tobytes()
+
+def format_ipv4_into( ipv4s, buffer, offset: int = 0, terminator: str = '\n' ) -> int:
+    """Formats a column of 32-bit addresses as dotted-quad text (see format_ipv4_lines) directly into a writable buffer
+
+    Args:
+        ipv4s:
+            An array-like of IPv4 addresses as unsigned 32-bit integers.
+        buffer:
+            A preallocated writable buffer (bytearray, memoryview, writable mmap). At most 16 bytes per address are
+            needed.
+        offset:
+            The position in buffer at which the text starts.
+        terminator:
+            The single ASCII character written after every address.
+
+    Returns:
+        The number of bytes written.
+        example:
+        format_ipv4_into( [ 3232238081 ], out, 10 ) -> 13 (out[ 10:23 ] == b'192.168.10.1\\n')
+
+    Raises:
+        ValueError: terminator isn't a single ASCII character, buffer doesn't have room for the text.
+    """
+    chars, used = _octet_slots( ipv4s, terminator )
+    size = int( used.sum() )
+    out = frombuffer( buffer, dtype=uint8 )
+    if offset + size > len( out ): raise ValueError( BAD_BUFFER_SIZE_ERROR.format(offset + size, len( out )) )
+    # Compact the used bytes of every slot straight into place
+    compress( used.ravel(), chars.ravel(), out=out[ offset:offset + size ] )
+    return size
+
+def write_ipv4_lines( ipv4s, file, terminator: str = '\n', chunk_size: int = DEFAULT_CHUNK_SIZE ) -> int:
+    """Writes a column of 32-bit addresses to a binary file as dotted-quad text (see format_ipv4_lines)
+
+    The text is formatted chunk by chunk into a single reused buffer, so memory use is bounded for any number of
+    addresses. One address per line is the host list format of e.g. nmap -iL.
+
+    Args:
+        ipv4s:
+            An array-like of IPv4 addresses as unsigned 32-bit integers.
+        file:
+            A file object opened for writing in binary mode.
+        terminator:
+            The single ASCII character written after every address.
+        chunk_size:
+            The number of addresses formatted per step.
+
+    Returns:
+        The number of bytes written.
+    """
+    ipv4s = asarray( ipv4s, dtype=uint32 ).ravel()
+    buffer = bytearray( 16 * min( chunk_size, len( ipv4s ) ) )
+    view = memoryview( buffer )
+    written = 0
+    for start in range( 0, len( ipv4s ), chunk_size ):
+        size = format_ipv4_into( ipv4s[ start:start + chunk_size ], buffer, 0, terminator )
+        file.write( view[ :size ] )
+        written += size
+    return written
+
+def format_ipv4_batch( ipv4s ) -> list:
+    """Formats a column of 32-bit addresses as a list of dotted-quad strings
+
+    example:
+    format_ipv4_batch( [ 3232238081, 167772161 ] ) -> [ '192.168.10.1', '10.0.0.1' ]
+    """
+    return format_ipv4_lines( ipv4s ).decode( 'ascii' ).split( '\n' )[ :-1 ]
+
+def _octet_slots( ipv4s, terminator: str ) -> tuple:
+    """Helper function that gathers the 4 octet slots of every address from the tables -> (chars, used) n x 16 arrays"""
+    if not isinstance( terminator, str ) or len( terminator ) != 1 or not terminator.isascii():
+        raise ValueError( BAD_TERMINATOR_ERROR.format(repr( terminator )) )
+    ipv4s = asarray( ipv4s, dtype=uint32 ).ravel()
+    # Big endian bytes are the octets in order
+    octets = ipv4s.astype( '>u4' ).view( uint8 ).reshape( -1, 4 )
+    chars = _OCTET_CHARS[ octets ].reshape( -1, 16 )
+    used = _OCTET_USED[ octets ].reshape( -1, 16 )
+    # The last octet's '.' becomes the terminator
+    chars[ :, 15 ] = ord( terminator )
+    return ( chars, used )
+
+def _parse_block( buffer, newlines ) -> tuple:
+    """Helper function that parses every line of a block of whole lines at once"""
+    # Line boundaries -> every newline ends a line, and so does the end of the block unless it follows a newline
+    starts = concatenate( ( [ 0 ], newlines + 1 ) )
+    ends = concatenate( ( newlines, [ len( buffer ) ] ) )
+    if starts[ -1 ] == len( buffer ): starts, ends = starts[ :-1 ], ends[ :-1 ]
+    # Drop the '\r' of '\r\n' line endings
+    ends = ends - ( ( ends > starts ) & ( buffer[ ( ends - 1 ).clip( 0 ) ] == 13 ) )
+    lengths = ends - starts
+    # Lay the lines out as columns of a fixed-width character matrix (one row per character position, so that each step
+    # below handles that position of every line at once), padding with -3 past the end of each line
+    width = _MAX_IPV4_LENGTH
+    positions = arange( width )[ :, None ]
+    chars = where( positions < lengths, _DEC_TABLE[ buffer ][ ( positions + starts ).clip( 0, len( buffer ) - 1 ) ], -3 )
+    # Only digits and exactly three dots
+    valid = ( lengths >= 7 ) & ( lengths <= width ) & ~( chars == -2 ).any( axis=0 )
+    dot = chars == -1
+    digit = chars >= 0
+    valid &= dot.sum( axis=0 ) == 3
+    # Every octet is non-empty -> four digits that don't follow another digit
+    lead = digit.copy()
+    lead[ 1: ] &= ~digit[ :-1 ]
+    valid &= lead.sum( axis=0 ) == 4
+    # At most 3 digits per octet, and no leading zeros
+    valid &= ~( digit[ :-3 ] & digit[ 1:-2 ] & digit[ 2:-1 ] & digit[ 3: ] ).any( axis=0 )
+    valid &= ~( lead[ :-1 ] & ( chars[ :-1 ] == 0 ) & digit[ 1: ] ).any( axis=0 )
+    # Accumulate each octet's digits left to right, shifting it into the address at the dot that ends it
+    octets = zeros( len( starts ), dtype=int32 )
+    ipv4s = zeros( len( starts ), dtype=uint32 )
+    too_big = zeros( len( starts ), dtype=bool )
+    for i in range( width ):
+        octets = where( digit[ i ], octets * 10 + chars[ i ], octets )
+        too_big |= dot[ i ] & ( octets > 255 )
+        ipv4s = where( dot[ i ], ( ipv4s << uint32( 8 ) ) | octets.astype( uint32 ), ipv4s )
+        octets[ dot[ i ] ] = 0
+    valid &= ~too_big & ( octets <= 255 )
+    ipv4s = ( ipv4s << uint32( 8 ) ) | octets.astype( uint32 )
+    ipv4s[ ~valid ] = 0
+    return ( ipv4s, valid )
@@ -0,0 +1,512 @@
+"""
+Longest-prefix-match index for mapping IPv4 addresses to the most specific prefix in a large prefix table.
+
+The prefixes are flattened into sorted, non-overlapping address intervals, each owned by the most specific prefix
+covering it. A lookup is then a single binary search (numpy.searchsorted for whole address columns) regardless of
+how many prefix lengths are in the table.
+
+Updates (add/remove/replace) don't touch the flattened table. They are recorded in a small delta that lookups
+consult after the base table: added prefixes are kept in one sorted column per CIDR value, and removed base
+prefixes fall back to their containing (parent) prefix. Once the delta grows past max_delta it is folded into a
+freshly flattened table, which is rebuilt without holding up other updates. Every update publishes a new immutable
+snapshot that shares the columns it didn't change, so concurrent readers always see either all or none of a batch of
+changes.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator   import parse_prefix
+from v4._ipv4_calculator   import ipv4_to_int
+from v4._ipv4_calculator   import int_to_addr_str
+from v4._ipv4_validator    import BAD_CIDR_ERROR
+from v4._ipv4_validator    import BAD_IPV4_ERROR
+from v4._ipv4_prefix_table import MASK_INT_ARRAY
+from contextlib            import contextmanager
+from threading             import Lock
+from numpy                 import asarray
+from numpy                 import empty
+from numpy                 import append
+from numpy                 import insert
+from numpy                 import int64
+from numpy                 import uint32
+from numpy                 import lexsort
+from numpy                 import unique
+from numpy                 import isin
+from numpy                 import minimum
+from numpy                 import where
+from numpy                 import searchsorted
+
+#|###################################################################| Global constants |###################################################################|#
+
+# Number of pending added/removed prefixes after which the delta is folded into a rebuilt table
+DEFAULT_MAX_DELTA = 16384
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class PrefixIndex:
+    """Longest-prefix-match index over a table of IPv4 prefixes with attached payloads
+
+    Adding the same prefix more than once keeps the last payload. Host bits set in a prefix are ignored.
+
+    example:
+    index = PrefixIndex( [ ( '10.0.0.0/8', 'corp' ), ( '10.20.0.0/16', 'lab' ) ] )
+    index.lookup( '10.20.1.1' ) -> 'lab'
+    index.lookup( '10.30.1.1' ) -> 'corp'
+    index.lookup( '192.168.1.1' ) -> None
+    index.remove( '10.20.0.0/16' )
+    index.lookup( '10.20.1.1' ) -> 'corp'
+    """
+
+    def __init__( self, entries=(), max_delta: int = DEFAULT_MAX_DELTA ):
+        """Builds an index from (prefix, payload) pairs
+
+        Args:
+            entries:
+                An iterable of (prefix, payload) pairs. Each prefix is a CIDR notation string or an (address, cidr)
+                tuple as accepted by parse_prefix, the payload can be any object.
+            max_delta:
+                The number of pending added/removed prefixes after which updates trigger a full rebuild.
+
+        Raises:
+            TypeError: A prefix is of the wrong type.
+            ValueError: A prefix is not a valid IPv4 prefix.
+        """
+        networks, cidrs, payloads = [], [], []
+        for prefix, payload in entries:
+            network, cidr = parse_prefix( prefix )
+            networks.append( network )
+            cidrs.append( cidr )
+            payloads.append( payload )
+        self._init( _PrefixTable( asarray( networks, dtype=int64 ), asarray( cidrs, dtype=int64 ), payloads ), max_delta )
+
+    @classmethod
+    def from_arrays( cls, networks, cidrs, payloads=None, max_delta: int = DEFAULT_MAX_DELTA ):
+        """Builds an index directly from columns of packed addresses and CIDR values
+
+        This is the fast path for loading very large tables, e.g. a full routing table export.
+
+        Args:
+            networks:
+                An array-like of addresses as packed 32-bit integers, host bits are ignored.
+            cidrs:
+                An array-like of CIDR values in the range [0,32], the same length as networks.
+            payloads:
+                An optional sequence of payloads, the same length as networks. Defaults to the row number of each
+                prefix so that lookups can be mapped back to the caller's own table.
+            max_delta:
+                The number of pending added/removed prefixes after which updates trigger a full rebuild.
+
+        Returns:
+            A new PrefixIndex.
+
+        Raises:
+            ValueError: The columns differ in length, or contain invalid addresses or CIDR values.
+        """
+        networks = asarray( networks, dtype=int64 ).ravel()
+        cidrs = asarray( cidrs, dtype=int64 ).ravel()
+        if len( networks ) != len( cidrs ) or ( payloads is not None and len( payloads ) != len( networks ) ):
+            raise ValueError( 'networks, cidrs and payloads must have the same length' )
+        if len( networks ) and ( networks.min() < 0 or networks.max() > 0xFFFFFFFF ):
+            raise ValueError( BAD_IPV4_ERROR.format( networks[ (networks < 0) | (networks > 0xFFFFFFFF) ][0] ) )
+        if len( cidrs ) and ( cidrs.min() < 0 or cidrs.max() > 32 ):
+            raise ValueError( BAD_CIDR_ERROR.format( cidrs[ (cidrs < 0) | (cidrs > 32) ][0] ) )
+        index = cls.__new__( cls )
+        payloads = list( range( len( networks ) ) ) if payloads is None else list( payloads )
+        index._init( _PrefixTable( networks, cidrs, payloads ), max_delta )
+        return index
+
+    def _init( self, table, max_delta: int ) -> None:
+        """Helper function that publishes the first snapshot"""
+        if not isinstance( max_delta, int ): raise TypeError( '\'{}\' is not a valid {}'.format(max_delta, repr(int)) )
+        self.max_delta = max_delta
+        self._write_lock = Lock()
+        self._snapshot = _Snapshot( table, empty( 0, dtype=int64 ), {}, len( table ) )
+
+    def __len__( self ) -> int:
+        """Returns the number of distinct prefixes in the index"""
+        return self._snapshot.size
+
+    def __contains__( self, prefix ) -> bool:
+        """Returns True if exactly this prefix (not just a containing one) is in the index"""
+        return self._snapshot.find( parse_prefix( prefix ) )[0]
+
+    def __iter__( self ):
+        """Yields ('x.x.x.x/y', payload) pairs in address order"""
+        snapshot = self._snapshot
+        for network, cidr, payload in snapshot.entries():
+            yield ( '{}/{}'.format( int_to_addr_str( network ), cidr ), payload )
+
+    def lookup_prefixes( self, ipv4s ) -> tuple:
+        """Finds the most specific prefix containing each address in a column
+
+        Args:
+            ipv4s:
+                An array-like of addresses as packed 32-bit integers.
+
+        Returns:
+            A tuple of two arrays with one element per address: the packed network IDs (uint32) and the CIDR values
+            (int64) of the longest matching prefixes. The CIDR value is -1 where no prefix contains the address.
+
+        Raises:
+            ValueError: ipv4s contains values outside of the 32-bit address space.
+        """
+        payloads, cidrs = self._snapshot.lookup( _check_ipv4s( ipv4s ) )
+        networks = asarray( ipv4s, dtype=int64 ) & MASK_INT_ARRAY[ minimum( cidrs, 32 ) ]
+        return ( where( cidrs < 0, 0, networks ).astype( uint32 ), cidrs )
+
+    def lookup_batch( self, ipv4s ):
+        """Returns the payload of the most specific prefix containing each address in a column
+
+        Args:
+            ipv4s:
+                An array-like of addresses as packed 32-bit integers.
+
+        Returns:
+            An object array of payloads, None where no prefix contains the address.
+
+        Raises:
+            ValueError: ipv4s contains values outside of the 32-bit address space.
+        """
+        return self._snapshot.lookup( _check_ipv4s( ipv4s ) )[0]
+
+    def lookup_prefix( self, ipv4 ):
+        """Returns the most specific prefix containing an address as a (network ID, cidr) tuple, or None
+
+        Args:
+            ipv4:
+                An IPv4 address as a string or a packed 32-bit integer.
+
+        Raises:
+            TypeError: ipv4 is neither a string nor an integer.
+            ValueError: ipv4 is not a valid IPv4 address.
+        """
+        networks, cidrs = self.lookup_prefixes( [ ipv4_to_int( ipv4 ) ] )
+        return None if cidrs[0] < 0 else ( int( networks[0] ), int( cidrs[0] ) )
+
+    def lookup( self, ipv4 ):
+        """Returns the payload of the most specific prefix containing an address, or None
+
+        Args:
+            ipv4:
+                An IPv4 address as a string or a packed 32-bit integer.
+
+        Raises:
+            TypeError: ipv4 is neither a string nor an integer.
+            ValueError: ipv4 is not a valid IPv4 address.
+        """
+        return self._snapshot.lookup( asarray( [ ipv4_to_int( ipv4 ) ], dtype=int64 ) )[0][0]
+
+    @contextmanager
+    def batch( self ):
+        """Context manager that applies a group of updates as a single atomic change
+
+        Readers keep seeing the previous snapshot until the with block exits. If the block raises, none of its
+        changes are applied.
+
+        example:
+        with index.batch() as changes:
+            changes.add( '10.30.0.0/16', 'new' )
+            changes.remove( '10.20.0.0/16' )
+
+        Yields:
+            A PrefixIndexBatch with add/remove/replace methods.
+        """
+        with self._write_lock:
+            changes = PrefixIndexBatch( self._snapshot )
+            yield changes
+            self._snapshot = snapshot = changes._publish()
+        # Fold an oversized delta back into the flattened table
+        if snapshot.delta > self.max_delta: self._install_compacted( snapshot )
+
+    def add( self, prefix, payload ) -> None:
+        """Inserts a prefix, or overwrites its payload if it is already in the index"""
+        with self.batch() as changes: changes.add( prefix, payload )
+
+    def remove( self, prefix ) -> None:
+        """Withdraws a prefix, raises a KeyError if it is not in the index"""
+        with self.batch() as changes: changes.remove( prefix )
+
+    def replace( self, prefix, payload ) -> None:
+        """Overwrites the payload of a prefix, raises a KeyError if it is not in the index"""
+        with self.batch() as changes: changes.replace( prefix, payload )
+
+    def compact( self ) -> None:
+        """Folds all pending updates into a freshly flattened table"""
+        while not self._install_compacted( self._snapshot ): pass
+
+    def _install_compacted( self, snapshot ) -> bool:
+        """Helper function that rebuilds a snapshot's table and publishes it, returns False if an update got there first
+
+        The rebuild is the slow part and runs without the write lock, so updates aren't held up by it. If another
+        batch was published in the meantime the rebuilt table is missing its changes and is dropped.
+        """
+        compacted = snapshot.compacted()
+        with self._write_lock:
+            if self._snapshot is not snapshot: return False
+            self._snapshot = compacted
+            return True
+
+    def snapshot( self ):
+        """Returns an independent copy of the index as it is right now
+
+        The copy shares all of its data with this index, so this is constant time. Later updates to either index
+        are not visible to the other one.
+        """
+        copy = self.__class__.__new__( self.__class__ )
+        copy.max_delta = self.max_delta
+        copy._write_lock = Lock()
+        copy._snapshot = self._snapshot
+        return copy
+
+class PrefixIndexBatch:
+    """A group of pending updates to a PrefixIndex, created by PrefixIndex.batch
+
+    Changes are recorded on top of the snapshot's delta without copying it, so a batch costs time in proportion to
+    its own changes rather than to everything pending since the last compaction.
+    """
+
+    def __init__( self, snapshot ):
+        self._snapshot = snapshot
+        # Prefixes added or replaced in this batch, and prefixes of the snapshot's added columns withdrawn in it
+        self._adds = {}
+        self._dropped = set()
+        # Base table positions withdrawn in this batch
+        self._removed = set()
+        self._size = snapshot.size
+
+    def _added( self, key: tuple ) -> bool:
+        """Helper function that checks whether a prefix is currently in the added columns"""
+        return key in self._adds or ( key not in self._dropped and self._snapshot.find_added( key )[0] )
+
+    def _is_live( self, key: tuple, pos: int ) -> bool:
+        """Helper function that checks whether a prefix is currently in the index"""
+        return self._added( key ) or ( pos >= 0 and pos not in self._removed and not self._snapshot.is_removed( pos ) )
+
+    def __contains__( self, prefix ) -> bool:
+        """Returns True if exactly this prefix is in the index, including the changes made so far in this batch"""
+        key = parse_prefix( prefix )
+        return self._is_live( key, self._snapshot.table.find( key ) )
+
+    def add( self, prefix, payload ) -> None:
+        """Inserts a prefix, or overwrites its payload if it is already in the index"""
+        key = parse_prefix( prefix )
+        pos = self._snapshot.table.find( key )
+        if not self._is_live( key, pos ): self._size += 1
+        # Added prefixes always win over a base table entry for the same prefix
+        self._adds[ key ] = payload
+
+    def remove( self, prefix ) -> None:
+        """Withdraws a prefix, raises a KeyError if it is not in the index"""
+        key = parse_prefix( prefix )
+        pos = self._snapshot.table.find( key )
+        if not self._is_live( key, pos ): raise KeyError( prefix )
+        self._adds.pop( key, None )
+        if self._snapshot.find_added( key )[0]: self._dropped.add( key )
+        # Tombstone the base table entry so lookups fall back to its parent prefix
+        if pos >= 0 and not self._snapshot.is_removed( pos ): self._removed.add( pos )
+        self._size -= 1
+
+    def replace( self, prefix, payload ) -> None:
+        """Overwrites the payload of a prefix, raises a KeyError if it is not in the index"""
+        key = parse_prefix( prefix )
+        if not self._is_live( key, self._snapshot.table.find( key ) ): raise KeyError( prefix )
+        self._adds[ key ] = payload
+
+    def _publish( self ):
+        """Builds the new snapshot, merging this batch's changes into copies of only the columns they touch"""
+        snapshot = self._snapshot
+        removed_column = snapshot.removed_column
+        if self._removed:
+            new = asarray( sorted( self._removed ), dtype=int64 )
+            removed_column = insert( removed_column, searchsorted( removed_column, new ), new )
+        add_columns = dict( snapshot.add_columns )
+        for cidr in { key[1] for key in self._adds } | { key[1] for key in self._dropped }:
+            networks, payloads = add_columns.pop( cidr, ( empty( 0, dtype=int64 ), empty( 0, dtype=object ) ) )
+            # Drop withdrawn and overwritten prefixes, then insert this batch's prefixes at their sorted positions
+            keys = sorted( key for key in self._adds if key[1] == cidr )
+            new_networks = asarray( [ key[0] for key in keys ], dtype=int64 )
+            new_payloads = empty( len( keys ), dtype=object )
+            new_payloads[:] = [ self._adds[ key ] for key in keys ]
+            stale = asarray( [ key[0] for key in self._dropped if key[1] == cidr ] + [ key[0] for key in keys ], dtype=int64 )
+            keep = ~isin( networks, stale )
+            networks, payloads = networks[ keep ], payloads[ keep ]
+            at = searchsorted( networks, new_networks )
+            networks, payloads = insert( networks, at, new_networks ), insert( payloads, at, new_payloads )
+            if len( networks ): add_columns[ cidr ] = ( networks, payloads )
+        return _Snapshot( snapshot.table, removed_column, add_columns, self._size )
+
+class _Snapshot:
+    """Immutable state of a PrefixIndex: the flattened base table plus the pending delta
+
+    Attributes:
+        removed_column:
+            The sorted positions of withdrawn base table prefixes.
+        add_columns:
+            CIDR value -> ( sorted network IDs, payloads ) of the added prefixes, longest CIDR first.
+        delta:
+            The number of pending added and withdrawn prefixes.
+
+    Batches share the arrays of every column they don't change, so none of them may be modified in place.
+    """
+
+    __slots__ = ( 'table', 'removed_column', 'add_columns', 'size', 'delta' )
+
+    def __init__( self, table, removed_column, add_columns: dict, size: int ):
+        self.table = table
+        self.removed_column = removed_column
+        # Longest CIDR first, so that lookups can skip columns that can't beat the current match
+        self.add_columns = dict( sorted( add_columns.items(), reverse=True ) )
+        self.size = size
+        self.delta = len( removed_column ) + sum( len( networks ) for networks, _ in add_columns.values() )
+
+    def find_added( self, key: tuple ) -> tuple:
+        """Returns ( is the prefix in the added columns, its payload ) for an exact (network ID, cidr) key"""
+        column = self.add_columns.get( key[1] )
+        if column is None: return ( False, None )
+        networks, payloads = column
+        pos = int( searchsorted( networks, key[0] ) )
+        if pos < len( networks ) and networks[ pos ] == key[0]: return ( True, payloads[ pos ] )
+        return ( False, None )
+
+    def is_removed( self, pos: int ) -> bool:
+        """Returns True if the base table prefix at a position has been withdrawn"""
+        i = int( searchsorted( self.removed_column, pos ) )
+        return i < len( self.removed_column ) and self.removed_column[ i ] == pos
+
+    def find( self, key: tuple ) -> tuple:
+        """Returns ( is the prefix live, its payload ) for an exact (network ID, cidr) key"""
+        found = self.find_added( key )
+        if found[0]: return found
+        pos = self.table.find( key )
+        if pos >= 0 and not self.is_removed( pos ): return ( True, self.table.payloads[ pos ] )
+        return ( False, None )
+
+    def entries( self ) -> list:
+        """Returns the live (network ID, cidr, payload) triples in address order"""
+        table = self.table
+        adds = { ( network, cidr ) : payload for cidr, ( networks, payloads ) in self.add_columns.items()
+                 for network, payload in zip( networks.tolist(), payloads ) }
+        removed = set( self.removed_column.tolist() )
+        live = [ ( network, cidr, table.payloads[ pos ] )
+                 for pos, ( network, cidr ) in enumerate( zip( table.networks.tolist(), table.cidrs.tolist() ) )
+                 if pos not in removed and ( network, cidr ) not in adds ]
+        live.extend( ( network, cidr, payload ) for ( network, cidr ), payload in adds.items() )
+        return sorted( live, key=lambda entry: entry[:2] )
+
+    def lookup( self, ipv4s ) -> tuple:
+        """Returns ( payloads, cidrs ) of the longest matching prefixes for an int64 address column"""
+        table = self.table
+        owners = table.lookup_owners( ipv4s )
+        # Walk withdrawn base prefixes up to their closest live parent
+        if len( self.removed_column ):
+            dead = isin( owners, self.removed_column )
+            while dead.any():
+                owners[ dead ] = table.parents[ owners[ dead ] ]
+                dead = isin( owners, self.removed_column )
+        payloads = table.payloads[ owners ]
+        cidrs = table.owner_cidrs[ owners ]
+        # Added prefixes win over any base match that is no more specific
+        for cidr, ( networks, added_payloads ) in self.add_columns.items():
+            candidates = ipv4s & int( MASK_INT_ARRAY[ cidr ] )
+            pos = minimum( searchsorted( networks, candidates ), len( networks ) - 1 )
+            hit = ( networks[ pos ] == candidates ) & ( cidrs <= cidr )
+            payloads[ hit ] = added_payloads[ pos[ hit ] ]
+            cidrs[ hit ] = cidr
+        return ( payloads, cidrs )
+
+    def compacted( self ):
+        """Returns an equivalent snapshot with an empty delta"""
+        entries = self.entries()
+        table = _PrefixTable( asarray( [ entry[0] for entry in entries ], dtype=int64 ),
+                              asarray( [ entry[1] for entry in entries ], dtype=int64 ),
+                              [ entry[2] for entry in entries ] )
+        return _Snapshot( table, empty( 0, dtype=int64 ), {}, len( table ) )
+
+class _PrefixTable:
+    """Immutable flattened prefix table
+
+    Attributes:
+        networks, cidrs:
+            The de-duplicated prefixes sorted by network ID, then CIDR value (i.e. containing prefixes first).
+        keys:
+            ( network << 6 ) | cidr for every prefix, sorted, used to find a prefix's position.
+        payloads, owner_cidrs:
+            Object array of payloads and array of CIDR values, with a trailing None/-1 so that position -1 (no
+            matching prefix) maps to None/-1.
+        parents:
+            The position of the closest prefix containing each prefix, -1 for top level prefixes.
+        seg_starts, seg_owners:
+            The start address of every flattened interval and the position of the prefix that owns it.
+    """
+
+    def __init__( self, networks, cidrs, payloads: list ):
+        # Clear host bits -> network ID of every prefix
+        networks = networks & MASK_INT_ARRAY[ cidrs ].astype( int64 )
+        # Keep only the last occurrence of each (network, cidr) pair by de-duplicating the reversed keys
+        keys = ( networks << 6 ) | cidrs
+        _, last = unique( keys[ ::-1 ], return_index=True )
+        keep = len( keys ) - 1 - last
+        # Sort by network ID, then by CIDR so that a prefix always comes after the prefixes containing it
+        order = keep[ lexsort( ( cidrs[ keep ], networks[ keep ] ) ) ]
+        self.networks = networks[ order ].astype( uint32 )
+        self.cidrs = cidrs[ order ].astype( int64 )
+        self.owner_cidrs = append( self.cidrs, -1 )
+        self.keys = keys[ order ]
+        self.payloads = empty( len( order ) + 1, dtype=object )
+        self.payloads[ :-1 ] = [ payloads[ i ] for i in order.tolist() ]
+        self.payloads[ -1 ] = None
+        starts = self.networks.tolist()
+        ends = ( self.networks | ~MASK_INT_ARRAY[ self.cidrs ] ).tolist()
+        # Sweep the sorted prefixes with a stack of the currently open (containing) prefixes. Every time a prefix
+        # opens or closes, a new interval starts that is owned by the innermost open prefix (-1 for none).
+        seg_starts, seg_owners = [ 0 ], [ -1 ]
+        parents = [ -1 ] * len( starts )
+        stack = []
+        for i, start in enumerate( starts ):
+            # Close every open prefix that ends before this one starts
+            while stack and ends[ stack[-1] ] < start:
+                closed = stack.pop()
+                _emit( seg_starts, seg_owners, ends[ closed ] + 1, stack[-1] if stack else -1 )
+            parents[ i ] = stack[-1] if stack else -1
+            _emit( seg_starts, seg_owners, start, i )
+            stack.append( i )
+        # Close the remaining prefixes, nothing can start past the end of the address space
+        while stack:
+            closed = stack.pop()
+            if ends[ closed ] < 0xFFFFFFFF: _emit( seg_starts, seg_owners, ends[ closed ] + 1, stack[-1] if stack else -1 )
+        self.parents = asarray( parents, dtype=int64 )
+        self.seg_starts = asarray( seg_starts, dtype=int64 )
+        self.seg_owners = asarray( seg_owners, dtype=int64 )
+
+    def __len__( self ) -> int:
+        return len( self.networks )
+
+    def find( self, key: tuple ) -> int:
+        """Returns the position of an exact (network ID, cidr) key, or -1 if it is not in the table"""
+        packed = ( key[0] << 6 ) | key[1]
+        pos = int( searchsorted( self.keys, packed ) )
+        return pos if pos < len( self.keys ) and self.keys[ pos ] == packed else -1
+
+    def lookup_owners( self, ipv4s ):
+        """Returns the position of the longest matching prefix for each address in an int64 column, -1 for none"""
+        # The owning interval is the last one starting at or before each address, the first interval starts at 0
+        return self.seg_owners[ searchsorted( self.seg_starts, ipv4s, side='right' ) - 1 ]
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def _check_ipv4s( ipv4s ):
+    """Helper function that casts an address column to int64 and ensures it fits in the 32-bit address space"""
+    ipv4s = asarray( ipv4s, dtype=int64 )
+    if ipv4s.size and ( ipv4s.min() < 0 or ipv4s.max() > 0xFFFFFFFF ):
+        raise ValueError( BAD_IPV4_ERROR.format( ipv4s[ (ipv4s < 0) | (ipv4s > 0xFFFFFFFF) ][0] ) )
+    return ipv4s
+
+def _emit( seg_starts: list, seg_owners: list, start: int, owner: int ) -> None:
+    """Helper function that starts a new owned interval, replacing the previous one if it starts at the same address"""
+    if seg_starts[-1] == start:
+        seg_owners[-1] = owner
+    else:
+        seg_starts.append( start )
+        seg_owners.append( owner )
@@ -0,0 +1,74 @@
+"""
+Precomputed per-prefix lookup tables for every IPv4 CIDR value in the range [0, 32].
+
+Everything that only depends on the prefix length (masks, host counts, class, ...) is calculated once at import
+and exposed both as dicts keyed by CIDR value (for scalar code) and as NumPy arrays indexed by CIDR value (for
+vectorized code). Mask to prefix lookups in both directions are constant time dict lookups.
+
+The NumPy arrays are only built, and NumPy only imported, the first time one of them is accessed, so scalar code
+that only uses the dicts never pays for importing NumPy.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|###################################################################| Global constants |###################################################################|#
+
+# All valid CIDR values
+PREFIXES = range( 33 )
+
+#|####################################################################| Prefix tables |#####################################################################|#
+
+# CIDR -> subnet mask as a packed 32-bit integer, e.g. 24 -> 4294967040
+PREFIX_MASK_INT = { cidr : ( 0xFFFFFFFF << ( 32 - cidr ) ) & 0xFFFFFFFF for cidr in PREFIXES }
+
+# CIDR -> subnet mask as a dotted-quad string, e.g. 24 -> '255.255.255.0'
+PREFIX_MASK_STR = { cidr : '.'.join( str( ( mask >> shift ) & 255 ) for shift in ( 24, 16, 8, 0 ) ) for cidr, mask in PREFIX_MASK_INT.items() }
+
+# CIDR -> wildcard mask as a packed 32-bit integer, e.g. 24 -> 255
+PREFIX_WILDCARD_INT = { cidr : mask ^ 0xFFFFFFFF for cidr, mask in PREFIX_MASK_INT.items() }
+
+# CIDR -> wildcard mask as a dotted-quad string, e.g. 24 -> '0.0.0.255'
+PREFIX_WILDCARD_STR = { cidr : '.'.join( str( ( wild >> shift ) & 255 ) for shift in ( 24, 16, 8, 0 ) ) for cidr, wild in PREFIX_WILDCARD_INT.items() }
+
+# CIDR -> total number of addresses in the subnet, e.g. 24 -> 256
+PREFIX_TOTAL_HOSTS = { cidr : 1 << ( 32 - cidr ) for cidr in PREFIXES }
+
+# CIDR -> number of usable host addresses, /31 and /32 subnets don't reserve a network ID/broadcast (see RFC 3021)
+PREFIX_USABLE_HOSTS = { cidr : total - 2 if cidr < 31 else total for cidr, total in PREFIX_TOTAL_HOSTS.items() }
+
+# CIDR -> classful network type that the subnet would segment
+PREFIX_CLASS = { cidr : 'none' if cidr < 8 else 'A' if cidr < 16 else 'B' if cidr < 24 else 'C' for cidr in PREFIXES }
+
+# CIDR -> 2^(bits in the interesting octet), 255.255.255.255 is treated as 256 1-host subnets
+PREFIX_NUM_SUBNETS = { cidr : 256 if cidr == 32 else 1 << ( cidr % 8 ) for cidr in PREFIXES }
+
+# Subnet mask string -> CIDR, e.g. '255.255.255.0' -> 24
+MASK_STR_TO_PREFIX = { mask : cidr for cidr, mask in PREFIX_MASK_STR.items() }
+
+# Subnet mask packed 32-bit integer -> CIDR, e.g. 4294967040 -> 24
+MASK_INT_TO_PREFIX = { mask : cidr for cidr, mask in PREFIX_MASK_INT.items() }
+
+#|#################################################################| NumPy prefix arrays |##################################################################|#
+
+# Array name -> ( the dict it is built from, its dtype ). Each array has 33 elements and is indexed by CIDR value,
+# e.g. MASK_INT_ARRAY[ cidr_column ]. String arrays get NumPy's default unicode dtype
+_PREFIX_ARRAYS = {
+    'MASK_INT_ARRAY' : ( PREFIX_MASK_INT, 'uint32' ),
+    'MASK_STR_ARRAY' : ( PREFIX_MASK_STR, None ),
+    'WILDCARD_INT_ARRAY' : ( PREFIX_WILDCARD_INT, 'uint32' ),
+    'WILDCARD_STR_ARRAY' : ( PREFIX_WILDCARD_STR, None ),
+    'TOTAL_HOSTS_ARRAY' : ( PREFIX_TOTAL_HOSTS, 'int64' ),
+    'USABLE_HOSTS_ARRAY' : ( PREFIX_USABLE_HOSTS, 'int64' ),
+    'CLASS_ARRAY' : ( PREFIX_CLASS, None ),
+    'NUM_SUBNETS_ARRAY' : ( PREFIX_NUM_SUBNETS, 'int64' )
+}
+
+def __getattr__( name: str ):
+    """Builds a NumPy prefix array the first time it is accessed and caches it as a module attribute (see PEP 562)"""
+    try:
+        table, dtype = _PREFIX_ARRAYS[ name ]
+    except KeyError:
+        raise AttributeError( 'module \'{}\' has no attribute \'{}\''.format(__name__, name) )
+    from numpy import array
+    value = globals()[ name ] = array( [ table[ cidr ] for cidr in PREFIXES ], dtype=dtype )
+    return value
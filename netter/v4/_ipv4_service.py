@@ -0,0 +1,355 @@
+"""
+Asyncio TCP service that answers IPv4 subnet calculations from a single warm process, with request micro-batching.
+
+The protocol is line based: clients send one request per line in any form accepted by parse_subnet_str (e.g.
+'192.168.10.1/24') and receive one JSON object per line, in the same order, holding the same fields as
+get_subnet_info_given_mask or a single 'error' field. Clients may pipeline any number of requests on a connection.
+
+Requests from every connection are queued for a single batching task, which waits at most max_delay seconds after
+the first queued request for more to arrive (or until max_batch_size are queued), then answers all of them with one
+vectorized calculation. Backpressure is applied at two levels: the shared queue holds at most max_pending requests,
+and each connection holds at most max_in_flight unanswered requests. When either is full, the service stops reading
+from the connection, so TCP flow control pushes back on the client.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator       import parse_subnet_str
+from v4._ipv4_calculator       import get_subnet_info_rows
+from v4._ipv4_calculator       import SCALAR_ROWS_LIMIT
+from v4._ipv4_service_defaults import DEFAULT_HOST
+from v4._ipv4_service_defaults import DEFAULT_PORT
+from v4._ipv4_service_defaults import DEFAULT_MAX_BATCH_SIZE
+from v4._ipv4_service_defaults import DEFAULT_MAX_DELAY
+from v4._ipv4_service_defaults import DEFAULT_MAX_PENDING
+from v4._ipv4_service_defaults import DEFAULT_MAX_IN_FLIGHT
+from json                      import JSONEncoder
+from json                      import loads
+from time                      import perf_counter
+from itertools                 import cycle
+from itertools                 import islice
+import asyncio
+
+#|###################################################################| Global constants |###################################################################|#
+
+# Requests are limited to one line, anything longer than this is certainly not an address
+MAX_LINE_LENGTH = 256
+BAD_LINE_LENGTH_ERROR = 'Request exceeds {} bytes'.format( MAX_LINE_LENGTH )
+STOPPED_ERROR = 'Service stopped before answering the request'
+
+# Responses only hold strings and integers, so skip the encoder's circular reference checks
+_encode = JSONEncoder( check_circular=False ).encode
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class MicroBatcher:
+    """Coalesces concurrent subnet calculations into batches for get_subnet_info_rows
+
+    Must be used from within a running event loop, between start() and stop().
+
+    example:
+    batcher = MicroBatcher( max_batch_size=256, max_delay=0.001 )
+    await batcher.start()
+    info = await ( await batcher.submit( '192.168.10.1/24' ) )
+    await batcher.stop()
+    """
+
+    def __init__( self, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_delay: float = DEFAULT_MAX_DELAY, max_pending: int = DEFAULT_MAX_PENDING, default_cidr: int = 32 ):
+        """Creates a stopped batcher
+
+        Args:
+            max_batch_size:
+                The maximum number of requests answered per batch.
+            max_delay:
+                The maximum number of seconds the first request of a batch waits for more requests to arrive.
+            max_pending:
+                The maximum number of queued requests, submit() waits while the queue is full.
+            default_cidr:
+                The CIDR value used for bare addresses.
+
+        Raises:
+            ValueError: max_batch_size or max_pending is less than 1, or max_delay is negative.
+        """
+        if max_batch_size < 1: raise ValueError( 'max_batch_size must be at least 1 - Value: {}'.format(max_batch_size) )
+        if max_pending < 1: raise ValueError( 'max_pending must be at least 1 - Value: {}'.format(max_pending) )
+        if max_delay < 0: raise ValueError( 'max_delay must not be negative - Value: {}'.format(max_delay) )
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.default_cidr = default_cidr
+        self._queue = None
+        self._task = None
+        self._requests = 0
+        self._batches = 0
+
+    async def start( self ) -> None:
+        """Starts the batching task on the running event loop"""
+        self._queue = asyncio.Queue( self.max_pending )
+        self._task = asyncio.get_running_loop().create_task( self._run() )
+
+    async def stop( self ) -> None:
+        """Stops the batching task, requests not yet answered are cancelled"""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty(): self._queue.get_nowait()[ -1 ].cancel()
+
+    async def submit( self, subnet_str: str ):
+        """Queues one request, waiting for room in the queue if it is full
+
+        Invalid requests, and requests made after stop(), are answered immediately rather than queued.
+
+        Args:
+            subnet_str:
+                An address in any form accepted by parse_subnet_str.
+
+        Returns:
+            A future that resolves to the subnet information dict, or to { 'error' : message } for invalid requests.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._task is None or self._task.done():
+            future.set_result( { 'error' : STOPPED_ERROR } )
+            return future
+        try:
+            parsed = parse_subnet_str( subnet_str, self.default_cidr )
+        except ValueError as e:
+            future.set_result( { 'error' : str( e ) } )
+            return future
+        await self._queue.put( parsed + ( future, ) )
+        return future
+
+    def stats( self ) -> dict:
+        """Returns the number of requests and batches answered so far, and the number of queued requests"""
+        return {
+            'requests' : self._requests,
+            'batches' : self._batches,
+            'mean_batch_size' : self._requests / self._batches if self._batches else 0.0,
+            'pending' : self._queue.qsize() if self._queue is not None else 0
+        }
+
+    async def _run( self ) -> None:
+        """Helper function that collects and answers batches until cancelled"""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [ await queue.get() ]
+            deadline = loop.time() + self.max_delay
+            try:
+                while len( batch ) < self.max_batch_size:
+                    # Take everything already queued, then wait out the rest of the delay for stragglers
+                    while len( batch ) < self.max_batch_size and not queue.empty(): batch.append( queue.get_nowait() )
+                    remaining = deadline - loop.time()
+                    if len( batch ) >= self.max_batch_size or remaining <= 0: break
+                    try:
+                        batch.append( await asyncio.wait_for( queue.get(), remaining ) )
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Stopped while collecting -> the batch's requests are cancelled like the ones still queued
+                for request in batch: request[ -1 ].cancel()
+                raise
+            self._answer( batch )
+
+    def _answer( self, batch: list ) -> None:
+        """Helper function that computes one batch and resolves each caller's future with its own row"""
+        # Callers that gave up (e.g. disconnected) don't need an answer but don't hurt the batch either
+        addr_strs, ipv4s, cidrs, futures = zip( *batch )
+        try:
+            rows = get_subnet_info_rows( addr_strs, ipv4s, cidrs )
+        except Exception as e:
+            # A failed batch answers every caller with the error rather than ending the batching task
+            rows = [ { 'error' : str( e ) or type( e ).__name__ } ] * len( futures )
+        for future, row in zip( futures, rows ):
+            if not future.done(): future.set_result( row )
+        self._requests += len( batch )
+        self._batches += 1
+
+#|#################################################################| Function definitions |#################################################################|#
+
+async def start_server( host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, **batcher_options ) -> tuple:
+    """Starts the service on the running event loop
+
+    Args:
+        host:
+            The interface to listen on.
+        port:
+            The TCP port to listen on, 0 picks a free port.
+        max_in_flight:
+            The maximum number of unanswered requests per connection.
+        batcher_options:
+            Keyword arguments for MicroBatcher.
+
+    Returns:
+        A tuple of the asyncio Server and the MicroBatcher. Close the server and stop the batcher to shut down.
+    """
+    # Batches over SCALAR_ROWS_LIMIT take the vectorized pass, run it once up front so the first busy batch doesn't
+    # stall the event loop importing NumPy
+    warm_up = SCALAR_ROWS_LIMIT + 1
+    get_subnet_info_rows( [ '0.0.0.0' ] * warm_up, [ 0 ] * warm_up, [ 32 ] * warm_up )
+    batcher = MicroBatcher( **batcher_options )
+    await batcher.start()
+
+    async def handle( reader, writer ):
+        # Futures are answered in any order but written back in request order
+        responses = asyncio.Queue( max_in_flight )
+        respond = asyncio.get_running_loop().create_task( _write_responses( responses, writer ) )
+        try:
+            while True:
+                overlong = False
+                try:
+                    line = await reader.readuntil( b'\n' )
+                except asyncio.IncompleteReadError as e:
+                    # Connection closed, possibly after a final unterminated request
+                    line = e.partial
+                    if not line.strip(): break
+                except asyncio.LimitOverrunError:
+                    # Too long to even buffer, so it is dropped and answered like any other overlong request
+                    line = await _drop_line( reader )
+                    overlong = True
+                if overlong or len( line ) > MAX_LINE_LENGTH:
+                    future = asyncio.get_running_loop().create_future()
+                    future.set_result( { 'error' : BAD_LINE_LENGTH_ERROR } )
+                elif line.strip():
+                    future = await batcher.submit( line.decode( errors='replace' ) )
+                else:
+                    continue
+                await responses.put( future )
+                if not line.endswith( b'\n' ): break
+        except ConnectionError:
+            pass
+        finally:
+            # Let the writer flush every answered request, then close. The end marker waits for room in the queue
+            # only while the writer is still running to make some
+            end = asyncio.ensure_future( responses.put( None ) )
+            try:
+                await asyncio.wait( ( end, respond ), return_when=asyncio.FIRST_COMPLETED )
+                await respond
+            finally:
+                end.cancel()
+                respond.cancel()
+
+    server = await asyncio.start_server( handle, host, port, limit=MAX_LINE_LENGTH * 2 )
+    return ( server, batcher )
+
+def run_server( host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, **batcher_options ) -> None:
+    """Runs the service until interrupted
+
+    Args:
+        host, port, max_in_flight, batcher_options:
+            See start_server.
+    """
+    async def serve():
+        server, batcher = await start_server( host, port, max_in_flight, **batcher_options )
+        try:
+            async with server: await server.serve_forever()
+        finally:
+            await batcher.stop()
+    try:
+        asyncio.run( serve() )
+    except KeyboardInterrupt:
+        pass
+
+async def load_test( host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, requests: int = 100000, connections: int = 16, pipeline: int = 64, lines=None ) -> dict:
+    """Measures the service's latency and throughput under concurrent pipelined load
+
+    Args:
+        host:
+            The service's host.
+        port:
+            The service's port.
+        requests:
+            The total number of requests sent, split evenly across connections.
+        connections:
+            The number of concurrent client connections.
+        pipeline:
+            The maximum number of unanswered requests per connection.
+        lines:
+            The request lines to send, repeated as needed. Defaults to a fixed set of CIDR notation addresses.
+
+    Returns:
+        A dict with the number of requests and errors, the elapsed seconds, the throughput in requests per second
+        and the p50/p99/max request latencies in milliseconds.
+        example:
+        { 'requests' : 100000, 'errors' : 0, 'seconds' : 2.1, 'throughput' : 47619.0, 'p50_ms' : 19.8, 'p99_ms' : 31.2, 'max_ms' : 40.5 }
+    """
+    if lines is None: lines = [ '10.{}.{}.{}/{}'.format( i % 256, ( i * 7 ) % 256, ( i * 13 ) % 256, 8 + i % 25 ) for i in range( 1024 ) ]
+    encoded = [ ( line.strip() + '\n' ).encode() for line in lines ]
+    latencies = []
+    errors = [ 0 ]
+
+    async def client( count, offset ):
+        reader, writer = await asyncio.open_connection( host, port )
+        sent_at = asyncio.Queue( pipeline )
+
+        async def send():
+            for line in islice( cycle( encoded ), offset, offset + count ):
+                await sent_at.put( perf_counter() )
+                writer.write( line )
+                await writer.drain()
+
+        sender = asyncio.get_running_loop().create_task( send() )
+        for _ in range( count ):
+            response = await reader.readline()
+            latencies.append( perf_counter() - await sent_at.get() )
+            if not response or 'error' in loads( response ): errors[0] += 1
+        await sender
+        writer.close()
+        await writer.wait_closed()
+
+    # Spread the requests over the connections as evenly as possible
+    counts = [ requests // connections + ( i < requests % connections ) for i in range( connections ) ]
+    start = perf_counter()
+    await asyncio.gather( *( client( count, i * 97 ) for i, count in enumerate( counts ) if count ) )
+    seconds = perf_counter() - start
+    latencies.sort()
+    percentile = lambda p: 1000 * latencies[ min( len( latencies ) - 1, int( p * len( latencies ) ) ) ] if latencies else 0.0
+    return {
+        'requests' : len( latencies ),
+        'errors' : errors[0],
+        'seconds' : seconds,
+        'throughput' : len( latencies ) / seconds if seconds else 0.0,
+        'p50_ms' : percentile( 0.50 ),
+        'p99_ms' : percentile( 0.99 ),
+        'max_ms' : percentile( 1.0 )
+    }
+
+async def _drop_line( reader ) -> bytes:
+    """Helper function that discards the rest of an overlong line, returns its newline or b'' if the stream ended first"""
+    while True:
+        try:
+            return ( await reader.readuntil( b'\n' ) )[ -1: ]
+        except asyncio.IncompleteReadError:
+            return b''
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly( e.consumed )
+
+async def _write_responses( responses, writer ) -> None:
+    """Helper function that writes each connection's answers back in request order, None marks the end"""
+    connected = True
+    try:
+        while True:
+            future = await responses.get()
+            if future is None: break
+            # Wait without awaiting the future itself, so a request cancelled by MicroBatcher.stop() gets an error
+            # answer while cancelling this task still ends it
+            if not future.done(): await asyncio.wait( ( future, ) )
+            if future.cancelled():
+                row = { 'error' : STOPPED_ERROR }
+            elif future.exception() is not None:
+                row = { 'error' : str( future.exception() ) }
+            else:
+                row = future.result()
+            # Keep consuming after the client goes away so the reading side never blocks on a full queue
+            if not connected: continue
+            try:
+                writer.write( ( _encode( row ) + '\n' ).encode() )
+                # Only wait on the socket once nothing else is ready, so pipelined answers go out together
+                if responses.empty(): await writer.drain()
+            except ConnectionError:
+                connected = False
+    finally:
+        writer.close()
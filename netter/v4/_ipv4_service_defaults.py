@@ -0,0 +1,17 @@
+"""
+Default settings of the subnet calculation service (see v4/_ipv4_service.py).
+
+They live apart from the service itself so that the command line interface can show them in its help without
+importing asyncio, which would add to the start-up time of every run rather than just the --serve/--load-test ones.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|###################################################################| Global constants |###################################################################|#
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 4994
+DEFAULT_MAX_BATCH_SIZE = 1024
+DEFAULT_MAX_DELAY = 0.002
+DEFAULT_MAX_PENDING = 65536
+DEFAULT_MAX_IN_FLIGHT = 1024
@@ -0,0 +1,195 @@
+"""
+Compact IPv4 subnet information result objects.
+
+A SubnetInfo holds only the packed address and CIDR value in __slots__ and derives every other field on access. The
+address fields are formatted as strings the first time they are read and cached in their own slots, so callers that
+only need one or two fields never pay for formatting the rest, and holding millions of results costs a fraction of
+the memory of the equivalent dicts.
+
+Results compare and hash by the subnet they describe, i.e. by (network ID, CIDR), so they can be used to deduplicate
+subnets directly. to_dict() returns the same dict as get_subnet_info_given_mask.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator     import ipv4_to_int
+from v4._ipv4_calculator     import netmask_to_cidr
+from v4._ipv4_calculator     import int_to_addr_str
+from v4._ipv4_calculator     import get_first_host_int
+from v4._ipv4_calculator     import get_last_host_int
+from v4._ipv4_calculator     import validate_batch_columns
+from v4._ipv4_calculator     import ensure_dtype_int
+from v4._ipv4_calculator     import ensure_dtype_str
+from v4._ipv4_calculator     import SUBNET_INFO_FIELDS
+from v4._ipv4_prefix_table   import PREFIX_MASK_INT
+from v4._ipv4_prefix_table   import PREFIX_MASK_STR
+from v4._ipv4_prefix_table   import PREFIX_USABLE_HOSTS
+from v4._ipv4_prefix_table   import PREFIX_NUM_SUBNETS
+from v4._ipv4_prefix_table   import PREFIX_CLASS
+from v4._ipv4_validator      import BAD_CIDR_ERROR
+
+#|##################################################################| Class definitions |###################################################################|#
+
+class _CachedAddressStr:
+    """Descriptor for an address field that is formatted on first access and cached in a slot of the instance"""
+
+    __slots__ = ( '_slot', '_address' )
+
+    def __init__( self, slot, address ):
+        """
+        Args:
+            slot:
+                The slot's member descriptor, e.g. SubnetInfo._network_id.
+            address:
+                A function returning the field's packed address for an instance.
+        """
+        self._slot = slot
+        self._address = address
+
+    def __get__( self, instance, owner=None ) -> str:
+        if instance is None: return self
+        try:
+            return self._slot.__get__( instance, owner )
+        except AttributeError:
+            text = int_to_addr_str( self._address( instance ) )
+            self._slot.__set__( instance, text )
+            return text
+
+class SubnetInfo:
+    """IPv4 subnet information for one address, with the same fields as the get_subnet_info_given_mask dicts
+
+    Attributes:
+        ipv4_int:
+            The address as a packed 32-bit integer.
+        cidr_int:
+            The CIDR value.
+        ipv4, network_id, subnet_mask, wildcard_mask, cidr_str, subnet_class, first_host, last_host, broadcast,
+        num_hosts, num_subnets:
+            The fields of get_subnet_info_given_mask, computed on access. Instances can also be indexed by field name,
+            e.g. info[ 'network_id' ].
+
+    example:
+    info = SubnetInfo.from_mask( '192.168.10.2', '255.255.255.0' )
+    info.network_id -> '192.168.10.0'
+    info == SubnetInfo.from_cidr( '192.168.10.77', 24 ) -> True (same subnet)
+    """
+
+    __slots__ = ( 'ipv4_int', 'cidr_int', '_ipv4', '_network_id', '_wildcard_mask', '_first_host', '_last_host', '_broadcast' )
+
+    def __init__( self, ipv4_int: int, cidr_int: int, ipv4: str = None ):
+        """Creates a result without validating its input (see from_mask/from_cidr for validated construction)
+
+        Args:
+            ipv4_int:
+                The address as a packed 32-bit integer.
+            cidr_int:
+                The CIDR value in the range [0,32].
+            ipv4:
+                The address string echoed in the 'ipv4' field, defaults to the formatted address.
+        """
+        self.ipv4_int = ipv4_int
+        self.cidr_int = cidr_int
+        if ipv4 is not None: self._ipv4 = ipv4
+
+    @classmethod
+    def from_mask( cls, ipv4_str: str, subnet_mask_str: str ):
+        """Returns the subnet information for an IPv4 address and subnet mask
+
+        Raises:
+            TypeError: Non-string input provided for ipv4_str or subnet_mask_str.
+            ValueError: ipv4_str is not a valid IPv4 address, subnet_mask_str is not a valid subnet mask.
+        """
+        ensure_dtype_str( ipv4_str )
+        return cls( ipv4_to_int( ipv4_str ), netmask_to_cidr( subnet_mask_str ), ipv4_str )
+
+    @classmethod
+    def from_cidr( cls, ipv4_str: str, cidr: int ):
+        """Returns the subnet information for an IPv4 address and CIDR value
+
+        Raises:
+            TypeError: Non-string input provided for ipv4_str, non-integer input provided for cidr.
+            ValueError: ipv4_str is not a valid IPv4 address, cidr is not in the range [0,32].
+        """
+        ensure_dtype_int( cidr )
+        ensure_dtype_str( ipv4_str )
+        if not 0 <= cidr <= 32: raise ValueError( BAD_CIDR_ERROR.format(cidr) )
+        return cls( ipv4_to_int( ipv4_str ), cidr, ipv4_str )
+
+    @classmethod
+    def from_batch( cls, ipv4s, cidrs, ipv4_strs=None ) -> list:
+        """Returns one result per address of a batch, see get_subnet_info_batch for the input columns
+
+        Raises:
+            ValueError: ipv4s contains values outside of the 32-bit address space, cidrs contains values outside of [0,32].
+        """
+        ipv4_col, cidr_col = validate_batch_columns( ipv4s, cidrs )
+        if ipv4_strs is None: return [ cls( ipv4, cidr ) for ipv4, cidr in zip( ipv4_col.ravel().tolist(), cidr_col.ravel().tolist() ) ]
+        return [ cls( ipv4, cidr, text ) for ipv4, cidr, text in zip( ipv4_col.ravel().tolist(), cidr_col.ravel().tolist(), ipv4_strs ) ]
+
+    # Packed fields, derived from the address and CIDR value on every access
+
+    @property
+    def network_int( self ) -> int:
+        return self.ipv4_int & PREFIX_MASK_INT[ self.cidr_int ]
+
+    @property
+    def broadcast_int( self ) -> int:
+        return self.ipv4_int | ( PREFIX_MASK_INT[ self.cidr_int ] ^ 0xFFFFFFFF )
+
+    # Fields of get_subnet_info_given_mask
+
+    @property
+    def ipv4( self ) -> str:
+        try:
+            return self._ipv4
+        except AttributeError:
+            self._ipv4 = text = int_to_addr_str( self.ipv4_int )
+            return text
+
+    @property
+    def subnet_mask( self ) -> str:
+        return PREFIX_MASK_STR[ self.cidr_int ]
+
+    @property
+    def cidr_str( self ) -> str:
+        return '/{}'.format( self.cidr_int )
+
+    @property
+    def subnet_class( self ) -> str:
+        return PREFIX_CLASS[ self.cidr_int ]
+
+    @property
+    def num_hosts( self ) -> int:
+        return PREFIX_USABLE_HOSTS[ self.cidr_int ]
+
+    @property
+    def num_subnets( self ) -> int:
+        return PREFIX_NUM_SUBNETS[ self.cidr_int ]
+
+    def to_dict( self ) -> dict:
+        """Returns the same dict as get_subnet_info_given_mask"""
+        return { key : getattr( self, key ) for key in SUBNET_INFO_FIELDS }
+
+    def __getitem__( self, key: str ):
+        """Returns a field by name, as with the dicts returned by get_subnet_info_given_mask"""
+        if key not in SUBNET_INFO_FIELDS: raise KeyError( key )
+        return getattr( self, key )
+
+    def __eq__( self, other ) -> bool:
+        if not isinstance( other, SubnetInfo ): return NotImplemented
+        return self.cidr_int == other.cidr_int and self.network_int == other.network_int
+
+    def __hash__( self ) -> int:
+        return hash( ( self.network_int, self.cidr_int ) )
+
+    def __repr__( self ) -> str:
+        return 'SubnetInfo(\'{}/{}\')'.format( self.ipv4, self.cidr_int )
+
+# Address fields, formatted on first access and cached in their slots
+SubnetInfo.network_id = _CachedAddressStr( SubnetInfo._network_id, lambda info: info.network_int )
+SubnetInfo.wildcard_mask = _CachedAddressStr( SubnetInfo._wildcard_mask, lambda info: PREFIX_MASK_INT[ info.cidr_int ] ^ 0xFFFFFFFF )
+SubnetInfo.first_host = _CachedAddressStr( SubnetInfo._first_host, lambda info: get_first_host_int( info.network_int, info.cidr_int ) )
+SubnetInfo.last_host = _CachedAddressStr( SubnetInfo._last_host, lambda info: get_last_host_int( info.broadcast_int, info.cidr_int ) )
+SubnetInfo.broadcast = _CachedAddressStr( SubnetInfo._broadcast, lambda info: info.broadcast_int )
@@ -0,0 +1,242 @@
+"""
+Collapses (summarizes) lists of IPv4 prefixes into the minimal equivalent set of CIDR blocks.
+
+Prefixes are converted to [network ID, broadcast] address intervals using the prefix table's subnet/wildcard
+masks, overlapping and adjacent intervals are merged, and each merged interval is split back into the fewest aligned
+CIDR blocks. Everything is vectorized over NumPy columns. Unsorted input costs one sort (O(n log n)), already sorted
+input can be streamed in chunks in O(n) with constant memory.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator   import parse_prefix
+from v4._ipv4_calculator   import int_to_addr_str
+from v4._ipv4_calculator   import validate_batch_columns
+from v4._ipv4_prefix_table import MASK_INT_ARRAY
+from v4._ipv4_prefix_table import WILDCARD_INT_ARRAY
+from numpy                 import asarray
+from numpy                 import concatenate
+from numpy                 import empty
+from numpy                 import flatnonzero
+from numpy                 import frexp
+from numpy                 import int64
+from numpy                 import lexsort
+from numpy                 import maximum
+from numpy                 import minimum
+from numpy                 import ones
+from numpy                 import uint32
+from numpy                 import where
+from itertools             import islice
+
+#|###################################################################| Global constants |###################################################################|#
+
+UNSORTED_STREAM_ERROR = 'Prefix stream must be sorted by network ID - {} follows {}'
+DEFAULT_CHUNK_SIZE = 65536
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def collapse_prefixes( prefixes ) -> list:
+    """Collapses a list of prefixes into the minimal equivalent list of CIDR blocks
+
+    Contained prefixes are dropped and adjacent/overlapping prefixes are merged, e.g. 10.0.0.0/25 + 10.0.0.128/25
+    -> 10.0.0.0/24.
+
+    Args:
+        prefixes:
+            An iterable of CIDR notation strings or (address, cidr) tuples as accepted by parse_prefix.
+
+    Returns:
+        The collapsed prefixes as CIDR notation strings in address order.
+        example:
+        collapse_prefixes( [ '10.0.1.0/24', '10.0.0.0/24', '10.0.0.64/26' ] ) -> [ '10.0.0.0/23' ]
+
+    Raises:
+        TypeError: A prefix is of the wrong type.
+        ValueError: A prefix is not a valid IPv4 prefix.
+    """
+    parsed = [ parse_prefix( prefix ) for prefix in prefixes ]
+    networks, cidrs = collapse_prefix_arrays( [ p[0] for p in parsed ], [ p[1] for p in parsed ] )
+    return _format_prefixes( networks, cidrs )
+
+def collapse_prefix_arrays( networks, cidrs ) -> tuple:
+    """Vectorized collapse of prefixes given as columns of packed addresses and CIDR values
+
+    Args:
+        networks:
+            An array-like of addresses as packed 32-bit integers, host bits are ignored.
+        cidrs:
+            An array-like of CIDR values in the range [0,32], the same length as networks.
+
+    Returns:
+        A tuple of the collapsed network IDs (uint32) and CIDR values (int64), in address order.
+
+    Raises:
+        ValueError: The columns differ in length, or contain invalid addresses or CIDR values.
+    """
+    firsts, lasts = prefixes_to_ranges( networks, cidrs )
+    # Sort by first address -> one O(n log n) pass, everything else is linear
+    order = lexsort( ( -lasts, firsts ) )
+    firsts, lasts = merge_ranges( firsts[ order ], lasts[ order ] )
+    return ranges_to_prefix_arrays( firsts, lasts )
+
+def collapse_sorted_stream( prefixes, chunk_size: int = DEFAULT_CHUNK_SIZE ):
+    """Lazily collapses a stream of prefixes that is already sorted by network ID
+
+    The stream is consumed chunk_size prefixes at a time and collapsed blocks are yielded as soon as no later prefix
+    can extend them, so inputs far larger than memory can be summarized.
+
+    Args:
+        prefixes:
+            An iterable of CIDR notation strings or (address, cidr) tuples, sorted by network ID. Prefixes sharing a
+            network ID may appear in any order.
+        chunk_size:
+            The number of prefixes parsed and merged per vectorized step.
+
+    Yields:
+        The collapsed prefixes as CIDR notation strings in address order.
+
+    Raises:
+        TypeError: A prefix is of the wrong type.
+        ValueError: A prefix is not a valid IPv4 prefix, or the stream is not sorted.
+    """
+    iterator = iter( prefixes )
+    def chunks():
+        while True:
+            parsed = [ parse_prefix( prefix ) for prefix in islice( iterator, chunk_size ) ]
+            if not parsed: return
+            yield ( [ p[0] for p in parsed ], [ p[1] for p in parsed ] )
+    for networks, cidrs in collapse_sorted_chunks( chunks() ):
+        yield from _format_prefixes( networks, cidrs )
+
+def collapse_sorted_chunks( chunks ):
+    """Lazily collapses a stream of (networks, cidrs) column chunks that is already sorted by network ID
+
+    This is the O(n), constant memory path: no sorting is done, and only the merged range still open at the end of
+    a chunk is carried over to the next one.
+
+    Args:
+        chunks:
+            An iterable of (networks, cidrs) array-like pairs, as accepted by collapse_prefix_arrays. Network IDs must
+            be non-decreasing within and across chunks.
+
+    Yields:
+        (networks, cidrs) tuples of collapsed uint32/int64 columns, in address order.
+
+    Raises:
+        ValueError: A chunk contains invalid addresses or CIDR values, or the stream is not sorted.
+    """
+    carry = None
+    previous = 0
+    for networks, cidrs in chunks:
+        firsts, lasts = prefixes_to_ranges( networks, cidrs )
+        if not len( firsts ): continue
+        # Ensure the stream is sorted, both within the chunk and against the end of the previous chunk
+        previous = concatenate( ( [ previous ], firsts[ :-1 ] ) )
+        unsorted = flatnonzero( firsts < previous )
+        if len( unsorted ):
+            i = unsorted[0]
+            raise ValueError( UNSORTED_STREAM_ERROR.format( int_to_addr_str( int( firsts[ i ] ) ), int_to_addr_str( int( previous[ i ] ) ) ) )
+        previous = firsts[ -1 ]
+        # Prepend the range left open by the previous chunk
+        if carry is not None:
+            firsts = concatenate( ( carry[0], firsts ) )
+            lasts = concatenate( ( carry[1], lasts ) )
+        firsts, lasts = merge_ranges( firsts, lasts )
+        # The last merged range may still grow in the next chunk
+        carry = ( firsts[ -1: ], lasts[ -1: ] )
+        if len( firsts ) > 1: yield ranges_to_prefix_arrays( firsts[ :-1 ], lasts[ :-1 ] )
+    if carry is not None: yield ranges_to_prefix_arrays( *carry )
+
+def prefixes_to_ranges( networks, cidrs ) -> tuple:
+    """Converts prefix columns to inclusive [network ID, broadcast] address ranges
+
+    Args:
+        networks:
+            An array-like of addresses as packed 32-bit integers, host bits are ignored.
+        cidrs:
+            An array-like of CIDR values in the range [0,32], the same length as networks.
+
+    Returns:
+        A tuple of int64 arrays (firsts, lasts) with one range per prefix, in input order.
+        example:
+        prefixes_to_ranges( [ 3232238081 ], [ 24 ] ) -> ( [3232238080], [3232238335] )
+
+    Raises:
+        ValueError: The columns differ in length, or contain invalid addresses or CIDR values.
+    """
+    networks = asarray( networks, dtype=int64 ).ravel()
+    cidrs = asarray( cidrs, dtype=int64 ).ravel()
+    if len( networks ) != len( cidrs ): raise ValueError( 'networks and cidrs must have the same length' )
+    networks, cidrs = validate_batch_columns( networks, cidrs )
+    # Only the two masks are needed, the rest of get_subnet_info_batch's columns would be computed and thrown away
+    firsts = ( networks & MASK_INT_ARRAY[ cidrs ] ).astype( int64 )
+    return ( firsts, firsts | WILDCARD_INT_ARRAY[ cidrs ] )
+
+def merge_ranges( firsts, lasts ) -> tuple:
+    """Merges overlapping and adjacent inclusive address ranges that are sorted by their first address
+
+    Args:
+        firsts:
+            An int64 array of first addresses, non-decreasing.
+        lasts:
+            An int64 array of last addresses, the same length as firsts.
+
+    Returns:
+        A tuple of int64 arrays (firsts, lasts) holding the disjoint, non-adjacent merged ranges in address order.
+        example:
+        merge_ranges( [0, 5, 8], [4, 6, 9] ) -> ( [0, 8], [6, 9] )
+    """
+    firsts = asarray( firsts, dtype=int64 )
+    lasts = asarray( lasts, dtype=int64 )
+    if not len( firsts ): return ( firsts, lasts )
+    # Furthest address reached by any range so far
+    reach = maximum.accumulate( lasts )
+    # A new merged range starts wherever a range begins more than one address past everything before it
+    starts = ones( len( firsts ), dtype=bool )
+    starts[ 1: ] = firsts[ 1: ] > reach[ :-1 ] + 1
+    begin = flatnonzero( starts )
+    end = concatenate( ( begin[ 1: ] - 1, [ len( firsts ) - 1 ] ) )
+    return ( firsts[ begin ], reach[ end ] )
+
+def ranges_to_prefix_arrays( firsts, lasts ) -> tuple:
+    """Vectorized range_to_prefixes: splits inclusive address ranges into the fewest aligned CIDR blocks
+
+    Args:
+        firsts:
+            An array-like of first addresses as packed 32-bit integers.
+        lasts:
+            An array-like of last addresses, the same length as firsts, with lasts >= firsts.
+
+    Returns:
+        A tuple of the network IDs (uint32) and CIDR values (int64) of the blocks, in address order if the ranges are.
+    """
+    firsts = asarray( firsts, dtype=int64 ).copy()
+    lasts = asarray( lasts, dtype=int64 )
+    # Each step carves the largest aligned block off the front of every unfinished range, at most 32 steps per range
+    block_ranges, block_networks, block_cidrs = [], [], []
+    active = flatnonzero( firsts <= lasts )
+    while len( active ):
+        first = firsts[ active ]
+        # Largest block allowed by the alignment of the first address (its lowest set bit, 2^32 for 0.0.0.0) ...
+        aligned = where( first == 0, int64(1) << 32, first & -first )
+        # ... and by the number of addresses left in the range (largest power of two not above it)
+        _, exponent = frexp( ( lasts[ active ] - first + 1 ).astype( float ) )
+        size = minimum( aligned, int64(1) << ( exponent.astype( int64 ) - 1 ) )
+        block_ranges.append( active )
+        block_networks.append( first )
+        # size is a power of two -> frexp gives log2(size) + 1
+        block_cidrs.append( 33 - frexp( size.astype( float ) )[1].astype( int64 ) )
+        firsts[ active ] = first + size
+        active = active[ firsts[ active ] <= lasts[ active ] ]
+    if not block_ranges: return ( empty( 0, dtype=uint32 ), empty( 0, dtype=int64 ) )
+    # Blocks from each step are in range order, sort by (range, network ID) to put them back in address order
+    ranges = concatenate( block_ranges )
+    networks = concatenate( block_networks )
+    order = lexsort( ( networks, ranges ) )
+    return ( networks[ order ].astype( uint32 ), concatenate( block_cidrs )[ order ] )
+
+def _format_prefixes( networks, cidrs ) -> list:
+    """Helper function that formats network ID/CIDR columns as CIDR notation strings"""
+    return [ '{}/{}'.format( int_to_addr_str( network ), cidr ) for network, cidr in zip( networks.tolist(), cidrs.tolist() ) ]
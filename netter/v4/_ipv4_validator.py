@@ -6,13 +6,26 @@ https://github.com/noahbenveniste/subnet-calculator
 """
 #|#######################################################################| Imports |########################################################################|#
 
-from re import search
+from re import compile
+from v4._ipv4_prefix_table import MASK_STR_TO_PREFIX
 
 #|###################################################################| Global constants |###################################################################|#
 
 BAD_CIDR_ERROR = 'CIDR must be within the range [0, 32] - Value: {}'
 BAD_SUBNET_MASK_ERROR = 'Invalid subnet mask - may only consist of integers within range [0, 255] (see help for a list of valid subnet masks) - Value: {}'
 BAD_IPV4_ERROR = 'IPv4 address must consist of four integers within range [0, 255] separated by \'.\' - Value: {}'
+BAD_PREFIX_ERROR = 'Prefix must be an IPv4 address followed by \'/\' and a CIDR value within the range [0, 32] - Value: {}'
+BAD_SUBNET_STR_ERROR = 'Expected an IPv4 address, an address and subnet mask, or CIDR notation - Value: {}'
+
+'''
+This regex matches a string that begins with 3 instances of a series of digits followed by a '.'
+The digits can either be 250-255, 200-249, 100-199, or 0-99.
+The final block also matches these digits, but does not look for a '.' at the end
+Source: https://www.geeksforgeeks.org/python-program-to-validate-an-ip-address/#
+Compiled once here rather than on every call to is_valid_ipv4
+'''
+ipv4_regex = "^((25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])[.]){3}(25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])$"
+_IPV4_PATTERN = compile( ipv4_regex )
 
 #|############################################################| CIDR to subnet mask dictionary |############################################################|#
 
@@ -76,15 +89,8 @@ def is_valid_ipv4( ipv4_str: str ) -> bool:
     """
     # Ensure string input
     if not isinstance( ipv4_str, str ): raise TypeError( '\'{}\' is not a valid {}'.format(ipv4_str, repr(str)) )
-    '''
-    This regex matches a string that begins with 3 instances of a series of digits followed by a '.'
-    The digits can either be 250-255, 200-249, 100-199, or 0-99.
-    The final block also matches these digits, but does not look for a '.' at the end
-    Source: https://www.geeksforgeeks.org/python-program-to-validate-an-ip-address/#
-    '''
-    ipv4_regex = "^((25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])[.]){3}(25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])$"
-    # Check if the input string matches the regex pattern, return the result
-    return search( ipv4_regex, ipv4_str )
+    # Check if the input string matches the precompiled pattern
+    return _IPV4_PATTERN.search( ipv4_str ) is not None
 
 def is_valid_subnet_mask( subnet_mask_str: str ) -> bool:
     """Function that validates the structure of an IPv4 subnet mask
@@ -101,12 +107,8 @@ def is_valid_subnet_mask( subnet_mask_str: str ) -> bool:
     """
     # Ensure string input
     if not isinstance( subnet_mask_str, str ): raise TypeError( '\'{}\' is not a valid {}'.format(subnet_mask_str, repr(str)) )
-    # Loop over all values in the CIDR dictionary
-    for cidr in CIDR_DICT:
-        # Compare each value to the input; if there's a match, return True
-        if CIDR_DICT[ cidr ] == subnet_mask_str: return True
-    # If no match is found, return False
-    return False
+    # Constant time membership check against the precomputed mask -> CIDR table
+    return subnet_mask_str in MASK_STR_TO_PREFIX
 
 def is_valid_cidr( cidr: int ) -> bool:
     """Function that validates CIDR values i.e. checks that the input is in the range [0, 32]
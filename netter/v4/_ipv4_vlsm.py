@@ -0,0 +1,138 @@
+"""
+Plans variable length subnet masking (VLSM) allocations within an IPv4 parent block.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v4._ipv4_calculator   import parse_addr_str
+from v4._ipv4_calculator   import cidr_to_netmask
+from v4._ipv4_calculator   import netmask_to_cidr
+from v4._ipv4_calculator   import addr_to_int
+from v4._ipv4_calculator   import int_to_addr_str
+from v4._ipv4_calculator   import range_to_prefixes
+from v4._ipv4_validator    import argument_type_validator
+from v4._ipv4_validator    import is_valid_ipv4
+from v4._ipv4_validator    import BAD_IPV4_ERROR
+from v4._ipv4_prefix_table import PREFIX_MASK_INT
+from v4._ipv4_prefix_table import PREFIX_MASK_STR
+from v4._ipv4_prefix_table import USABLE_HOSTS_ARRAY
+from numpy                 import asarray
+from numpy                 import int64
+from numpy                 import argsort
+from numpy                 import cumsum
+from numpy                 import searchsorted
+
+#|###################################################################| Global constants |###################################################################|#
+
+BAD_HOST_COUNT_ERROR = 'Host counts must be non-negative integers - Value: {}'
+VLSM_OVERFLOW_ERROR = 'Requirements need {} addresses but {} only has {}'
+
+# Usable host counts from /32 down to /0, non-decreasing so that they can be binary searched
+_USABLE_HOSTS_ASCENDING = USABLE_HOSTS_ARRAY[ ::-1 ]
+
+ensure_dtype_str = argument_type_validator( str )
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def plan_vlsm( ipv4_str: str, subnet_mask, host_counts ) -> dict:
+    """Allocates one aligned, non-overlapping subnet per host count requirement within a parent block
+
+    Each requirement gets the smallest subnet with at least that many usable hosts. Requirements are sorted from
+    the largest subnet to the smallest and allocated back to back from the start of the parent block. Because every
+    block size is a power of two and no block is bigger than the one before it, every subnet lands on its natural
+    boundary without leaving gaps, so the allocated space is packed as tightly as possible and everything after it is
+    free. This is O(n log n) in the number of requirements.
+
+    Args:
+        ipv4_str:
+            A string representation of an IPv4 address within the parent block, host bits are ignored.
+        subnet_mask:
+            The parent block's subnet mask as a string (e.g. '255.255.0.0') or its CIDR value as an integer.
+        host_counts:
+            An iterable (or NumPy array) of the number of usable hosts needed by each segment.
+
+    Returns:
+        A dict describing the plan. 'subnets' lists one dict per requirement, in the same order as host_counts.
+        'free' lists the leftover space as the fewest aligned CIDR blocks, in address order.
+        example:
+        plan_vlsm( '192.168.10.0', 24, [ 50, 2, 20 ] ) ->
+        {
+            'parent' : '192.168.10.0/24',
+            'subnets' : [
+                { 'hosts_required' : 50, 'network_id' : '192.168.10.0', 'subnet_mask' : '255.255.255.192', 'cidr_int' : 26, 'cidr_str' : '/26',
+                  'first_host' : '192.168.10.1', 'last_host' : '192.168.10.62', 'broadcast' : '192.168.10.63', 'num_hosts' : 62 },
+                { 'hosts_required' : 2, 'network_id' : '192.168.10.96', ..., 'cidr_int' : 31, ... },
+                { 'hosts_required' : 20, 'network_id' : '192.168.10.64', ..., 'cidr_int' : 27, ... }
+            ],
+            'free' : [ '192.168.10.98/31', '192.168.10.100/30', '192.168.10.104/29', '192.168.10.112/28', '192.168.10.128/25' ],
+            'num_addresses' : 256,
+            'used_addresses' : 98,
+            'utilization' : 38.28125
+        }
+
+    Raises:
+        TypeError: Non-string input provided for ipv4_str, subnet_mask is neither a string nor an integer.
+        ValueError: Invalid address, subnet mask, CIDR or host count, or the requirements don't fit in the parent block.
+    """
+    # Parse the parent block -> network ID and CIDR value
+    ensure_dtype_str( ipv4_str )
+    if not is_valid_ipv4( ipv4_str ): raise ValueError( BAD_IPV4_ERROR.format(ipv4_str) )
+    if isinstance( subnet_mask, str ):
+        parent_cidr = netmask_to_cidr( subnet_mask )
+    else:
+        # cidr_to_netmask validates the CIDR's type and range
+        cidr_to_netmask( subnet_mask )
+        parent_cidr = subnet_mask
+    parent_id = addr_to_int( parse_addr_str( ipv4_str ) ) & PREFIX_MASK_INT[ parent_cidr ]
+    parent_size = 1 << ( 32 - parent_cidr )
+    parent_str = '{}/{}'.format( int_to_addr_str( parent_id ), parent_cidr )
+    # Validate the host counts as a whole column
+    hosts = asarray( list( host_counts ) if not hasattr( host_counts, 'dtype' ) else host_counts )
+    if hosts.size and ( hosts.dtype.kind not in 'iu' or hosts.min() < 0 ):
+        bad = hosts[0] if hosts.dtype.kind not in 'iu' else hosts[ hosts < 0 ][0]
+        raise ValueError( BAD_HOST_COUNT_ERROR.format(bad) )
+    hosts = hosts.astype( int64 ).ravel()
+    # Smallest subnet per requirement -> first /32../0 entry with enough usable hosts (searchsorted past the end -> too big)
+    smallest = searchsorted( _USABLE_HOSTS_ASCENDING, hosts )
+    if hosts.size and smallest.max() > 32:
+        raise ValueError( VLSM_OVERFLOW_ERROR.format( 'more than 2^32', parent_str, parent_size ) )
+    cidrs = 32 - smallest
+    sizes = int64(1) << smallest
+    # Largest subnets first (stable, so equal requirements keep their input order), then allocate back to back
+    order = argsort( cidrs, kind='stable' )
+    offsets = cumsum( sizes[ order ] ) - sizes[ order ]
+    used = int( sizes.sum() )
+    if used > parent_size:
+        raise ValueError( VLSM_OVERFLOW_ERROR.format( used, parent_str, parent_size ) )
+    networks = offsets.copy()
+    networks[ order ] = parent_id + offsets
+
+    subnets = []
+    for required, network, cidr in zip( hosts.tolist(), networks.tolist(), cidrs.tolist() ):
+        broadcast = network + ( 1 << ( 32 - cidr ) ) - 1
+        # /31 and /32 subnets use every address as a host (see RFC 3021)
+        reserved = cidr < 31
+        subnets.append( {
+            'hosts_required' : required,
+            'network_id' : int_to_addr_str( network ),
+            'subnet_mask' : PREFIX_MASK_STR[ cidr ],
+            'cidr_int' : cidr,
+            'cidr_str' : '/{}'.format( cidr ),
+            'first_host' : int_to_addr_str( network + reserved ),
+            'last_host' : int_to_addr_str( broadcast - reserved ),
+            'broadcast' : int_to_addr_str( broadcast ),
+            'num_hosts' : int( USABLE_HOSTS_ARRAY[ cidr ] )
+        } )
+    # Everything after the packed allocations is free
+    free = [ '{}/{}'.format( int_to_addr_str( network ), cidr ) for network, cidr in range_to_prefixes( parent_id + used, parent_id + parent_size - 1 ) ]
+
+    return {
+        'parent' : parent_str,
+        'subnets' : subnets,
+        'free' : free,
+        'num_addresses' : parent_size,
+        'used_addresses' : used,
+        'utilization' : 100 * used / parent_size
+    }
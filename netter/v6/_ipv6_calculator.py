@@ -1 +1,230 @@
-# TODO: Implement
\ No newline at end of file
+"""
+Calculates detailed IPv6 subnet information given an arbitrary IPv6 address and CIDR value.
+
+Single addresses are handled as Python integers. The batch path never touches per-address Python integers: every
+128-bit address is held as two uint64 lanes (the high and low 64 bits) in paired NumPy columns, and all masking is
+done lane by lane with per-CIDR mask tables.
+
+There is no broadcast address in IPv6. For prefixes up to /126, the first address of a subnet is the Subnet-Router
+anycast address (see RFC 4291 section 2.6.1), so the first host is the address after it. /127 point-to-point links
+(see RFC 6164) and /128 subnets use every address as a host.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v6._ipv6_validator   import BAD_IPV6_ERROR
+from v6._ipv6_validator   import BAD_IPV6_CIDR_ERROR
+from v6._ipv6_validator   import is_valid_ipv6_cidr
+from v6._ipv6_parser      import parse_ipv6
+from v6._ipv6_parser      import format_ipv6
+from v4._ipv4_validator   import argument_type_validator
+from numpy                import asarray
+from numpy                import broadcast_arrays
+from numpy                import int64
+from numpy                import uint64
+
+#|###################################################################| Global constants |###################################################################|#
+
+ALL_ONES = ( 1 << 128 ) - 1
+_LANE_ONES = ( 1 << 64 ) - 1
+
+# Subnet masks for /0../128, split into high and low uint64 lanes
+MASK_HI_ARRAY = asarray( [ ( ( ALL_ONES << ( 128 - cidr ) ) & ALL_ONES ) >> 64 for cidr in range( 129 ) ], dtype=uint64 )
+MASK_LO_ARRAY = asarray( [ ( ALL_ONES << ( 128 - cidr ) ) & _LANE_ONES for cidr in range( 129 ) ], dtype=uint64 )
+
+#|##########################################################| Argument type validator functions |###########################################################|#
+
+ensure_dtype_str = argument_type_validator( str )
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def get_subnet_info_given_cidr( ipv6_str: str, cidr: int ) -> dict:
+    """Returns IPv6 subnet information given an IPv6 address and a CIDR value
+
+    Args:
+        ipv6_str:
+            A string representation of a valid IPv6 address.
+        cidr:
+            An integer value in the range [0,128] corresponding to a CIDR prefix length.
+
+    Returns:
+        A dict mapping label keys to corresponding subnet information.
+        example:
+        {
+            'ipv6' : '2001:db8::1',
+            'network_id' : '2001:db8::',
+            'subnet_mask' : 'ffff:ffff:ffff:ffff::',
+            'cidr_int' : 64,
+            'cidr_str' : '/64',
+            'first_host' : '2001:db8::1',
+            'last_host' : '2001:db8::ffff:ffff:ffff:ffff',
+            'last_addr' : '2001:db8::ffff:ffff:ffff:ffff',
+            'num_addresses' : 18446744073709551616,
+            'num_hosts' : 18446744073709551615
+        }
+
+    Raises:
+        TypeError: Non-string input provided for ipv6_str, non-integer input provided for cidr.
+        ValueError: ipv6_str is not a valid IPv6 address, cidr is not in the range [0,128].
+    """
+    ensure_dtype_str( ipv6_str )
+    if not is_valid_ipv6_cidr( cidr ): raise ValueError( BAD_IPV6_CIDR_ERROR.format(cidr) )
+    # Get the IPv6 address as a 128-bit integer
+    ipv6 = addr_to_int( ipv6_str )
+    # Get the subnet mask -> shift the CIDR value
+    subnet_mask = cidr_to_mask_int( cidr )
+    # Get the network ID -> bitwise AND the address and subnet mask
+    network_id = ipv6 & subnet_mask
+    # Get the last address -> set every host bit
+    last_addr = network_id | ( ~subnet_mask & ALL_ONES )
+
+    return {
+        'ipv6' : ipv6_str,
+        'network_id' : int_to_addr_str( network_id ),
+        'subnet_mask' : int_to_addr_str( subnet_mask ),
+        'cidr_int' : cidr,
+        'cidr_str' : '/{}'.format( cidr ),
+        'first_host' : int_to_addr_str( get_first_host_int( network_id, cidr ) ),
+        'last_host' : int_to_addr_str( last_addr ),
+        'last_addr' : int_to_addr_str( last_addr ),
+        'num_addresses' : 1 << ( 128 - cidr ),
+        'num_hosts' : get_num_hosts_int( cidr )
+    }
+
+def get_subnet_info_batch( ipv6_his, ipv6_los, cidrs ) -> dict:
+    """Returns IPv6 subnet information for whole columns of addresses and CIDR values in one vectorized pass
+
+    Batch counterpart of get_subnet_info_given_cidr. Each address is given as two uint64 lanes, and every address
+    result comes back as a pair of '<field>_hi'/'<field>_lo' uint64 columns. See split_addr_ints/join_addr_ints.
+
+    Args:
+        ipv6_his:
+            An array-like of the high 64 bits of each address.
+        ipv6_los:
+            An array-like of the low 64 bits of each address.
+        cidrs:
+            An array-like of CIDR prefix lengths in the range [0,128], or a single integer applied to every address.
+
+    Returns:
+        A dict of NumPy columns: 'network_id', 'subnet_mask', 'first_host', 'last_host' and 'last_addr' as _hi/_lo
+        uint64 lane pairs, and 'cidr_int', 'host_bits' and 'reserved' as int64 columns. Address counts can reach
+        2^128, which doesn't fit in any NumPy integer type, so they are given as host_bits instead
+        (num_addresses == 2 ** host_bits, num_hosts == num_addresses - reserved).
+        example:
+        get_subnet_info_batch( [0x20010db800000000], [1], 64 )['network_id_lo'] -> array([0], dtype=uint64)
+
+    Raises:
+        ValueError: An address lane contains values outside of [0, 2^64 - 1], cidrs contains values outside of [0,128].
+    """
+    his, los, cidr_col = _validate_batch_columns( ipv6_his, ipv6_los, cidrs )
+    # Look up both lanes of the subnet masks in the precomputed tables
+    mask_hi = MASK_HI_ARRAY[ cidr_col ]
+    mask_lo = MASK_LO_ARRAY[ cidr_col ]
+    # Get the network IDs -> bitwise AND each lane with its mask lane
+    network_hi = his & mask_hi
+    network_lo = los & mask_lo
+    # Get the last addresses -> bitwise OR each lane with its inverted mask lane
+    last_hi = network_hi | ~mask_hi
+    last_lo = network_lo | ~mask_lo
+    # Up to /126 the network ID is reserved, the low lane's host bits are all zero there, so adding 1 never carries
+    reserved = ( cidr_col < 127 )
+
+    return {
+        'network_id_hi' : network_hi,
+        'network_id_lo' : network_lo,
+        'subnet_mask_hi' : mask_hi,
+        'subnet_mask_lo' : mask_lo,
+        'cidr_int' : cidr_col,
+        'first_host_hi' : network_hi,
+        'first_host_lo' : network_lo + reserved.astype( uint64 ),
+        'last_host_hi' : last_hi,
+        'last_host_lo' : last_lo,
+        'last_addr_hi' : last_hi,
+        'last_addr_lo' : last_lo,
+        'host_bits' : 128 - cidr_col,
+        'reserved' : reserved.astype( int64 )
+    }
+
+def split_addr_ints( ipv6_ints ) -> tuple:
+    """Splits 128-bit integer addresses into high and low uint64 lane columns
+
+    Args:
+        ipv6_ints:
+            An iterable of addresses as integers in the range [0, 2^128 - 1].
+
+    Returns:
+        A tuple of the high and low lanes as uint64 columns.
+
+    Raises:
+        ValueError: An address is outside of the 128-bit address space.
+    """
+    ipv6_ints = list( ipv6_ints )
+    for ipv6 in ipv6_ints:
+        if not 0 <= ipv6 <= ALL_ONES: raise ValueError( BAD_IPV6_ERROR.format(ipv6) )
+    return ( asarray( [ ipv6 >> 64 for ipv6 in ipv6_ints ], dtype=uint64 ), asarray( [ ipv6 & _LANE_ONES for ipv6 in ipv6_ints ], dtype=uint64 ) )
+
+def join_addr_ints( his, los ) -> list:
+    """Joins high and low uint64 lane columns back into a list of 128-bit integer addresses"""
+    return [ ( hi << 64 ) | lo for hi, lo in zip( asarray( his ).tolist(), asarray( los ).tolist() ) ]
+
+def addr_to_int( ipv6_str: str ) -> int:
+    """Parses an IPv6 address string into a 128-bit integer (see parse_ipv6)
+
+    Accepts full, '::' compressed and mixed IPv4 notation, with hex digits in either case. A zone ID is ignored.
+
+    Args:
+        ipv6_str:
+            A string representation of an IPv6 address.
+
+    Returns:
+        The address as an integer.
+        example:
+        addr_to_int( '2001:db8::1' ) -> 42540766411282592856903984951653826561
+
+    Raises:
+        TypeError: Non-string input provided for ipv6_str.
+        ValueError: ipv6_str is not a valid IPv6 address.
+    """
+    return parse_ipv6( ipv6_str )[0]
+
+def int_to_addr_str( ipv6: int ) -> str:
+    """Formats a 128-bit integer as a canonical IPv6 address string (see format_ipv6)
+
+    Args:
+        ipv6:
+            An address as an integer in the range [0, 2^128 - 1].
+
+    Returns:
+        The address string.
+        example:
+        int_to_addr_str( 42540766411282592856903984951653826561 ) -> '2001:db8::1'
+    """
+    return format_ipv6( ipv6 )
+
+def cidr_to_mask_int( cidr: int ) -> int:
+    """Returns the 128-bit subnet mask for a CIDR value in the range [0,128]"""
+    return ( ALL_ONES << ( 128 - cidr ) ) & ALL_ONES
+
+def get_first_host_int( network_id: int, cidr: int ) -> int:
+    """Returns the first host of a subnet, the network ID itself for /127 and /128 subnets"""
+    return network_id + ( cidr < 127 )
+
+def get_num_hosts_int( cidr: int ) -> int:
+    """Returns the number of hosts in a subnet, every address for /127 and /128 subnets"""
+    return ( 1 << ( 128 - cidr ) ) - ( cidr < 127 )
+
+def _validate_batch_columns( ipv6_his, ipv6_los, cidrs ) -> tuple:
+    """Helper function that validates and broadcasts the batch input columns -> (uint64, uint64, int64) columns"""
+    lanes = []
+    for lane in ( ipv6_his, ipv6_los ):
+        lane = asarray( lane )
+        # Signed integer lanes can't be cast to uint64 without checking for negative values first
+        if lane.size and ( lane.dtype.kind not in 'iu' or ( lane.dtype.kind == 'i' and lane.min() < 0 ) ):
+            raise ValueError( BAD_IPV6_ERROR.format( lane[ lane < 0 ][0] if lane.dtype.kind == 'i' else lane.ravel()[0] ) )
+        lanes.append( lane.astype( uint64 ) )
+    cidr_col = asarray( cidrs, dtype=int64 )
+    if cidr_col.size and ( cidr_col.min() < 0 or cidr_col.max() > 128 ):
+        raise ValueError( BAD_IPV6_CIDR_ERROR.format( cidr_col[ (cidr_col < 0) | (cidr_col > 128) ][0] ) )
+    return broadcast_arrays( lanes[0], lanes[1], cidr_col )
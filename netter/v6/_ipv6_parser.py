@@ -0,0 +1,302 @@
+"""
+Parses and formats IPv6 address text, one address at a time or in bulk from newline-delimited input.
+
+The scalar parser is hand-written: it checks the character set once, splits the text into groups around the '::'
+(if any) and builds the 128-bit value directly in one conversion. It handles '::' compression, zone IDs
+(e.g. 'fe80::1%eth0') and embedded IPv4 tails (e.g. '::ffff:192.0.2.1'). The
+formatter produces the canonical text representation of RFC 5952.
+
+The bulk parser works on raw bytes (bytes, bytearray, memoryview, mmap) and handles the common pure-hex form of every
+line at once with NumPy: characters are classified through lookup tables, groups are delimited with running sums over
+the colon positions, and group values are accumulated into each address's two uint64 lanes. Lines in any other form
+(IPv4 tails, zone IDs, surrounding whitespace, invalid text) fall back to the scalar parser. The bulk formatter
+assembles the output bytes for every address at once in the same way.
+
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from v6._ipv6_validator   import BAD_IPV6_ERROR
+from v4._ipv4_validator   import argument_type_validator
+from numpy                import arange
+from numpy                import asarray
+from numpy                import concatenate
+from numpy                import empty
+from numpy                import flatnonzero
+from numpy                import frombuffer
+from numpy                import full
+from numpy                import int8
+from numpy                import int64
+from numpy                import minimum
+from numpy                import uint8
+from numpy                import uint64
+from numpy                import where
+from numpy                import zeros
+
+#|###################################################################| Global constants |###################################################################|#
+
+ALL_ONES = ( 1 << 128 ) - 1
+DEFAULT_CHUNK_SIZE = 8192
+# Longest pure-hex address, 8 groups of 4 digits and 7 colons
+_MAX_HEX_FORM_LENGTH = 39
+_HEX_VALUES = { c : int( c, 16 ) for c in '0123456789abcdefABCDEF' }
+_DECIMAL_DIGITS = frozenset( '0123456789' )
+_HEX_COLON_CHARS = frozenset( '0123456789abcdefABCDEF:' )
+
+# Byte -> hex digit value, -1 for ':' and -2 for anything else
+_HEX_TABLE = full( 256, -2, dtype=int8 )
+for c, value in _HEX_VALUES.items(): _HEX_TABLE[ ord( c ) ] = value
+_HEX_TABLE[ ord( ':' ) ] = -1
+# Nibble -> lowercase hex digit byte
+_NIBBLE_CHARS = frombuffer( b'0123456789abcdef', dtype=uint8 )
+
+#|##########################################################| Argument type validator functions |###########################################################|#
+
+ensure_dtype_str = argument_type_validator( str )
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def parse_ipv6( ipv6_str: str ) -> tuple:
+    """Parses IPv6 address text into its 128-bit value and zone ID
+
+    Args:
+        ipv6_str:
+            An IPv6 address in full, '::' compressed or mixed IPv4 notation, optionally followed by '%' and a zone ID.
+
+    Returns:
+        A tuple containing the address as an integer and the zone ID string (None if there isn't one).
+        example:
+        parse_ipv6( 'fe80::1%eth0' ) -> ( 338288524927261089654018896841347694593, 'eth0' )
+
+    Raises:
+        TypeError: Non-string input provided for ipv6_str.
+        ValueError: ipv6_str is not a valid IPv6 address.
+    """
+    ensure_dtype_str( ipv6_str )
+    # Zone ID -> anything non-empty after the first '%'
+    addr_str, sep, zone = ipv6_str.partition( '%' )
+    ipv6 = _parse_addr( addr_str )
+    if ipv6 is None or ( sep and not zone ): raise ValueError( BAD_IPV6_ERROR.format(ipv6_str) )
+    return ( ipv6, zone if sep else None )
+
+def format_ipv6( ipv6: int, zone: str = None ) -> str:
+    """Formats a 128-bit integer as canonical IPv6 address text (see RFC 5952)
+
+    Groups are lowercase hex without leading zeros, the longest run of two or more zero groups (the first one if
+    there's a tie) is replaced by '::', and IPv4-mapped addresses end in a dotted quad.
+
+    Args:
+        ipv6:
+            An address as an integer in the range [0, 2^128 - 1].
+        zone:
+            An optional zone ID, appended after a '%'.
+
+    Returns:
+        The address text.
+        example:
+        format_ipv6( 0x20010db8000000000000000000000001 ) -> '2001:db8::1'
+    """
+    if not 0 <= ipv6 <= ALL_ONES: raise ValueError( BAD_IPV6_ERROR.format(ipv6) )
+    suffix = '' if zone is None else '%' + zone
+    if ipv6 >> 32 == 0xFFFF:
+        return '::ffff:{}.{}.{}.{}{}'.format( ( ipv6 >> 24 ) & 0xFF, ( ipv6 >> 16 ) & 0xFF, ( ipv6 >> 8 ) & 0xFF, ipv6 & 0xFF, suffix )
+    groups = [ ( ipv6 >> shift ) & 0xFFFF for shift in range( 112, -1, -16 ) ]
+    # Find the longest run of zero groups
+    best_start, best_len, start = -1, 0, None
+    for i, group in enumerate( groups + [ 1 ] ):
+        if group == 0 and start is None: start = i
+        elif group != 0 and start is not None:
+            if i - start > best_len: best_start, best_len = start, i - start
+            start = None
+    hex_groups = [ '%x' % group for group in groups ]
+    if best_len < 2: return ':'.join( hex_groups ) + suffix
+    return ':'.join( hex_groups[ :best_start ] ) + '::' + ':'.join( hex_groups[ best_start + best_len: ] ) + suffix
+
+def parse_ipv6_lines( data, chunk_size: int = DEFAULT_CHUNK_SIZE ) -> tuple:
+    """Parses newline-delimited IPv6 address text into uint64 lane columns
+
+    Every line produces exactly one entry, a trailing newline at the end of data doesn't start another line. Lines may
+    end in '\\r\\n'. Zone IDs are accepted but not returned.
+
+    Args:
+        data:
+            The text as bytes, bytearray, memoryview, mmap or str.
+        chunk_size:
+            The number of lines parsed per vectorized step, bounds the working memory.
+
+    Returns:
+        A tuple of the high and low 64 bits of each address as uint64 columns, and a boolean column that is False for
+        lines that aren't valid addresses (their lanes are 0).
+        example:
+        parse_ipv6_lines( b'2001:db8::1\\nbad\\n' ) -> ( array([2306139568115548160, 0], dtype=uint64), array([1, 0], dtype=uint64), array([ True, False]) )
+    """
+    buffer = frombuffer( data.encode() if isinstance( data, str ) else data, dtype=uint8 )
+    # Line boundaries -> every newline ends a line, and so does the end of the data unless it follows a newline
+    newlines = flatnonzero( buffer == 10 )
+    starts = concatenate( ( [ 0 ], newlines + 1 ) )
+    ends = concatenate( ( newlines, [ len( buffer ) ] ) )
+    if starts[ -1 ] == len( buffer ): starts, ends = starts[ :-1 ], ends[ :-1 ]
+    # Drop the '\r' of '\r\n' line endings
+    if len( ends ): ends = ends - ( ( ends > starts ) & ( buffer[ ( ends - 1 ).clip( 0 ) ] == 13 ) )
+    his = zeros( len( starts ), dtype=uint64 )
+    los = zeros( len( starts ), dtype=uint64 )
+    valid = zeros( len( starts ), dtype=bool )
+    for begin in range( 0, len( starts ), chunk_size ):
+        chunk = slice( begin, begin + chunk_size )
+        his[ chunk ], los[ chunk ], valid[ chunk ] = _parse_chunk( buffer, starts[ chunk ], ends[ chunk ] )
+    return ( his, los, valid )
+
+def format_ipv6_lines( his, los ) -> str:
+    """Formats uint64 lane columns as newline-delimited canonical IPv6 address text (see format_ipv6)
+
+    Args:
+        his:
+            An array-like of the high 64 bits of each address.
+        los:
+            An array-like of the low 64 bits of each address.
+
+    Returns:
+        The address text, one address per line, each followed by a newline.
+    """
+    his = asarray( his, dtype=uint64 ).ravel()
+    los = asarray( los, dtype=uint64 ).ravel()
+    if not len( his ): return ''
+    text = _format_lanes( his, los ).tobytes().decode( 'ascii' )
+    # IPv4-mapped addresses are rare, patch them in with the scalar formatter
+    mapped = flatnonzero( ( his == 0 ) & ( los >> uint64( 32 ) == 0xFFFF ) )
+    if not len( mapped ): return text
+    lines = text.split( '\n' )
+    for i in mapped.tolist(): lines[ i ] = format_ipv6( int( los[ i ] ) )
+    return '\n'.join( lines )
+
+def format_ipv6_batch( his, los ) -> list:
+    """Formats uint64 lane columns as a list of canonical IPv6 address strings (see format_ipv6)"""
+    return format_ipv6_lines( his, los ).split( '\n' )[ :-1 ]
+
+def _parse_addr( addr_str: str ):
+    """Helper function that parses address text without a zone ID into a 128-bit integer, None if it isn't valid"""
+    if '.' in addr_str:
+        # IPv4 tail -> parse the rest with two zero groups in its place, then fill them in
+        split = addr_str.rfind( ':' ) + 1
+        if not split: return None
+        ipv4 = _parse_dotted_quad( addr_str[ split: ] )
+        high = _parse_addr( addr_str[ :split ] + '0:0' ) if ipv4 is not None else None
+        return None if high is None else high | ipv4
+    # One check over the whole text leaves only group lengths and the '::' to validate
+    if not _HEX_COLON_CHARS.issuperset( addr_str ): return None
+    head, sep, tail = addr_str.partition( '::' )
+    if sep:
+        # '::' stands for at least one zero group, a second '::' (or ':::') leaves an empty group below
+        head = head.split( ':' ) if head else []
+        tail = tail.split( ':' ) if tail else []
+        if len( head ) + len( tail ) > 7: return None
+        groups = head + [ '0' ] * ( 8 - len( head ) - len( tail ) ) + tail
+    else:
+        groups = addr_str.split( ':' )
+        if len( groups ) != 8: return None
+    for group in groups:
+        if not 0 < len( group ) <= 4: return None
+    # 32 hex digits -> the packed value in one conversion
+    return int( ''.join( [ group.rjust( 4, '0' ) for group in groups ] ), 16 )
+
+def _parse_dotted_quad( text: str ):
+    """Helper function that parses an IPv4 tail into a 32-bit integer, None if it isn't a valid dotted quad"""
+    octets = text.split( '.' )
+    if len( octets ) != 4: return None
+    ipv4 = 0
+    for octet in octets:
+        # 1-3 decimal digits, no leading zeros
+        if not 1 <= len( octet ) <= 3 or not _DECIMAL_DIGITS.issuperset( octet ) or ( octet[0] == '0' and len( octet ) > 1 ): return None
+        value = int( octet )
+        if value > 255: return None
+        ipv4 = ( ipv4 << 8 ) | value
+    return ipv4
+
+def _parse_chunk( buffer, starts, ends ) -> tuple:
+    """Helper function that parses one chunk of lines -> vectorized for the pure-hex form, scalar for the rest"""
+    n = len( starts )
+    lengths = ends - starts
+    # Lay the lines out as columns of a fixed-width character matrix (one row per character position, so that running
+    # operations over each line are vectorized across lines), padding with -3 past the end of each line
+    width = _MAX_HEX_FORM_LENGTH
+    positions = arange( width, dtype=int8 )[ :, None ]
+    in_line = positions < lengths
+    raw = buffer[ ( arange( width )[ :, None ] + starts ).clip( 0, len( buffer ) - 1 ) ] if len( buffer ) else zeros( ( width, n ), dtype=uint8 )
+    chars = where( in_line, _HEX_TABLE[ raw ], -3 )
+    # Anything other than hex digits and colons (or a line that is too long or empty) goes to the scalar parser
+    fast = ( lengths <= width ) & ( lengths > 0 ) & ~( chars == -2 ).any( axis=0 )
+    colon = chars == -1
+    digit = chars >= 0
+    # Group index of each character -> number of colons before it
+    group = colon.cumsum( axis=0, dtype=int8 ) - colon
+    num_groups = colon.sum( axis=0, dtype=int8 ) + 1
+    # Non-empty groups start with a digit that doesn't follow another digit
+    lead = digit.copy()
+    lead[ 1: ] &= ~digit[ :-1 ]
+    nonempty = lead.sum( axis=0, dtype=int8 )
+    # '::' -> at most one. It is an empty group, plus one more at either end of the line ('::1', '1::', '::')
+    double = colon[ :-1 ] & colon[ 1: ]
+    num_double = double.sum( axis=0 )
+    has_double = num_double == 1
+    double_at = double.argmax( axis=0 )
+    double_group = where( has_double, group[ double_at, arange( n ) ] + 1, 9 ).astype( int8 )
+    allowed_empty = where( has_double, 1 + ( double_at == 0 ) + ( double_at == lengths - 2 ), 0 )
+    fast &= ( num_double <= 1 ) & ( num_groups - nonempty == allowed_empty )
+    fast &= where( has_double, nonempty <= 7, num_groups == 8 )
+    # Digits left in the group after each character -> next colon (or end of line) below
+    group_end = minimum.accumulate( where( colon | ~in_line, positions, width ).astype( int8 )[ ::-1 ], axis=0 )[ ::-1 ]
+    exponent = group_end - positions - 1
+    fast &= ~( digit & ( exponent > 3 ) ).any( axis=0 )
+    # Groups after the '::' move to the end of the address, every digit then lands at a fixed bit offset in its lane
+    slot = where( group > double_group, group + 8 - num_groups, group )
+    shift = where( digit, 4 * exponent + 16 * ( 3 - ( slot & 3 ) ), 0 ).clip( 0, 60 ).astype( uint64 )
+    contribution = where( digit, chars.clip( 0 ).astype( uint64 ) << shift, uint64( 0 ) )
+    # Digits occupy disjoint bits, so summing them assembles each lane
+    his = where( slot < 4, contribution, uint64( 0 ) ).sum( axis=0, dtype=uint64 )
+    los = where( slot >= 4, contribution, uint64( 0 ) ).sum( axis=0, dtype=uint64 )
+    his[ ~fast ] = 0
+    los[ ~fast ] = 0
+    valid = fast.copy()
+    # Scalar fallback for everything else
+    for i in flatnonzero( ~fast ).tolist():
+        try:
+            ipv6, _ = parse_ipv6( bytes( buffer[ starts[ i ]:ends[ i ] ] ).decode( 'ascii' ).strip() )
+        except ( ValueError, UnicodeDecodeError ):
+            continue
+        his[ i ], los[ i ], valid[ i ] = ipv6 >> 64, ipv6 & 0xFFFFFFFFFFFFFFFF, True
+    return ( his, los, valid )
+
+def _format_lanes( his, los ):
+    """Helper function that assembles canonical text for every address at once -> one uint8 array of newline-terminated lines"""
+    n = len( his )
+    shifts = asarray( [ 48, 32, 16, 0 ], dtype=uint64 )
+    groups = concatenate( ( ( his[ :, None ] >> shifts ) & uint64( 0xFFFF ), ( los[ :, None ] >> shifts ) & uint64( 0xFFFF ) ), axis=1 ).astype( int64 )
+    zero = groups == 0
+    # Longest run of zero groups per address (first one on a tie) -> run length ending at each group, then its maximum
+    run = zeros( ( n, 8 ), dtype=int64 )
+    run[ :, 0 ] = zero[ :, 0 ]
+    for g in range( 1, 8 ): run[ :, g ] = where( zero[ :, g ], run[ :, g - 1 ] + 1, 0 )
+    best_len = run.max( axis=1 )
+    best_end = run.argmax( axis=1 )
+    compress = best_len >= 2
+    best_start = best_end - best_len + 1
+    g = arange( 8 )
+    in_run = compress[ :, None ] & ( g >= best_start[ :, None ] ) & ( g <= best_end[ :, None ] )
+    # Each group gets 6 output slots -> 4 hex digits, a ':' and (for the last group) a newline
+    nibbles = ( groups[ :, :, None ] >> asarray( [ 12, 8, 4, 0 ] ) ) & 0xF
+    num_digits = 1 + ( groups > 0xF ) + ( groups > 0xFF ) + ( groups > 0xFFF )
+    chars = empty( ( n, 8, 6 ), dtype=uint8 )
+    chars[ :, :, :4 ] = _NIBBLE_CHARS[ nibbles ]
+    chars[ :, :, 4 ] = ord( ':' )
+    chars[ :, :, 5 ] = ord( '\n' )
+    emit = zeros( ( n, 8, 6 ), dtype=bool )
+    # Digits, skipping leading zeros and groups inside the compressed run
+    emit[ :, :, :4 ] = ( arange( 4 ) >= 4 - num_digits[ :, :, None ] ) & ~in_run[ :, :, None ]
+    # Colons between groups, inside the run only the last group (and the first if the run starts the address) keep theirs
+    colon = ( g < 7 ) & ~in_run
+    colon |= in_run & ( g == best_end[ :, None ] )
+    colon |= in_run & ( g == 0 ) & ( best_start[ :, None ] == 0 )
+    emit[ :, :, 4 ] = colon
+    emit[ :, 7, 5 ] = True
+    return chars[ emit ]
@@ -1,4 +1,72 @@
-from re import search
+"""
+Helper functions and error messages for validating IPv6 addresses and prefix lengths.
 
-# Source: https://regex101.com/library/aL7tV3?orderBy=RELEVANCE&search=ip
-ipv6_regex = '^((([0-9A-Fa-f]{1,4}:){1,6}:)|(([0-9A-Fa-f]{1,4}:){7}))([0-9A-Fa-f]{1,4})$'
\ No newline at end of file
+Author: Noah Benveniste
+https://github.com/noahbenveniste/subnet-calculator
+"""
+#|#######################################################################| Imports |########################################################################|#
+
+from re import compile
+from re import DOTALL
+
+#|###################################################################| Global constants |###################################################################|#
+
+BAD_IPV6_ERROR = 'IPv6 address must consist of up to eight groups of 1-4 hex digits separated by \':\', with at most one \'::\' - Value: {}'
+BAD_IPV6_CIDR_ERROR = 'IPv6 CIDR must be within the range [0, 128] - Value: {}'
+
+'''
+The IPv6address rule of RFC 3986 (section 3.2.2), followed by an optional '%' and zone ID (RFC 6874). The rule has one
+alternative per number of groups after the '::', each group being 1-4 hex digits, and the last 32 bits may be written
+as a dotted quad instead of two groups, e.g. '::ffff:192.0.2.1'.
+'''
+_H16 = '[0-9A-Fa-f]{1,4}'
+_DEC_OCTET = '(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+_LS32 = '(?:{0}:{0}|{1}(?:[.]{1}){{3}})'.format( _H16, _DEC_OCTET )
+# Up to n groups before the '::'
+_HEAD = lambda n: '(?:(?:{0}:){{0,{1}}}{0})?'.format( _H16, n - 1 ) if n else ''
+ipv6_regex = '^(?:{})(?:%.+)?\\Z'.format( '|'.join(
+    [ '(?:{}:){{6}}{}'.format( _H16, _LS32 ) ] +
+    [ '{}::(?:{}:){{{}}}{}'.format( _HEAD( 5 - tail ), _H16, tail, _LS32 ) for tail in range( 5, -1, -1 ) ] +
+    [ '{}::{}'.format( _HEAD( 6 ), _H16 ), '{}::'.format( _HEAD( 7 ) ) ]
+) )
+_IPV6_PATTERN = compile( ipv6_regex, DOTALL )
+
+#|#################################################################| Function definitions |#################################################################|#
+
+def is_valid_ipv6( ipv6_str: str ) -> bool:
+    """Function that validates the structure of a given IPv6 address
+
+    Accepts full, '::' compressed and mixed IPv4 notation, with an optional zone ID e.g. 'fe80::1%eth0'.
+
+    Args:
+        ipv6_str:
+            An IPv6 address as a string.
+
+    Returns:
+        True if ipv6_str represents a valid IPv6 address, False otherwise.
+
+    Raises:
+        TypeError: Non-string input provided.
+    """
+    # Ensure string input
+    if not isinstance( ipv6_str, str ): raise TypeError( '\'{}\' is not a valid {}'.format(ipv6_str, repr(str)) )
+    # Check if the input string matches the pattern
+    return _IPV6_PATTERN.match( ipv6_str ) is not None
+
+def is_valid_ipv6_cidr( cidr: int ) -> bool:
+    """Function that validates IPv6 CIDR values i.e. checks that the input is in the range [0, 128]
+
+    Args:
+        cidr:
+            The input integer to check.
+
+    Returns:
+        True if cidr is in the range [0, 128], False otherwise.
+
+    Raises:
+        TypeError: Non-integer input provided.
+    """
+    # Ensure integer input
+    if not isinstance( cidr, int ): raise TypeError( '\'{}\' is not a valid {}'.format(cidr, repr(int)) )
+    # Check for valid range
+    return 0 <= cidr <= 128